@@ -0,0 +1,289 @@
+import math
+import time
+import threading
+from collections import deque
+from typing import Deque, Dict, List
+
+class AdmissionLimiter:
+    """
+    Adaptive in-flight limiter with bounded priority wait queues
+
+    Attributes:
+        __limit (float): Current in-flight limit, adapted with AIMD
+        __in_flight (int): Number of requests currently processed
+        __queues (Dict[int, Deque[object]]): Waiting tickets per priority
+        __queue_sizes (Dict[int, int]): Max waiting tickets per priority
+        __condition (threading.Condition): Guards limiter state
+    """
+
+    def acquire(self, write: bool) -> bool:
+        """
+        Admit request or wait shortly in queue for a free slot
+
+        Args:
+            write (bool): Request modifies data
+
+        Returns:
+            bool: Return true if request was admitted
+        """
+
+        priority: int = self.__write_priority if write else self.__read_priority
+
+        with self.__condition:
+            # Admit immediately when nobody waits before us
+            if self.__in_flight < int(self.__limit) and not self.__waiting_before(priority):
+                self.__in_flight += 1
+                self.__admitted += 1
+                return True
+
+            # Shed when queue is full
+            if len(self.__queues[priority]) >= self.__queue_sizes[priority]:
+                self.__rejected[priority] += 1
+                return False
+
+            ticket: object = object()
+            self.__queues[priority].append(ticket)
+            deadline: float = time.monotonic() + self.__queue_timeout
+
+            try:
+                while True:
+                    if self.__in_flight < int(self.__limit) and self.__queues[priority][0] is ticket and not self.__waiting_before(priority):
+                        self.__in_flight += 1
+                        self.__admitted += 1
+                        return True
+
+                    remaining: float = deadline - time.monotonic()
+
+                    if remaining <= 0:
+                        self.__rejected[priority] += 1
+                        return False
+
+                    self.__condition.wait(remaining)
+            finally:
+                self.__queues[priority].remove(ticket)
+                self.__condition.notify_all()
+
+    def release(self, latency: float) -> None:
+        """
+        Free slot and adapt limit to observed latency
+
+        Args:
+            latency (float): Request processing time in seconds
+        """
+
+        with self.__condition:
+            self.__in_flight = max(0, self.__in_flight - 1)
+            self.__latency = latency if self.__latency is None else self.__latency * 0.9 + latency * 0.1
+
+            now: float = time.monotonic()
+
+            if latency > self.__latency_target:
+                # Multiplicative decrease, at most once per latency target window
+                if now - self.__last_decrease >= self.__latency_target:
+                    self.__limit = max(float(self.__min_limit), self.__limit * self.__backoff_ratio)
+                    self.__last_decrease = now
+            else:
+                # Additive increase, roughly one slot per full window of requests
+                self.__limit = min(float(self.__max_limit), self.__limit + 1.0 / self.__limit)
+
+            self.__condition.notify_all()
+
+    def retry_after(self) -> int:
+        """
+        Estimate seconds after which client should retry
+
+        Returns:
+            int: Return number of seconds
+        """
+
+        with self.__condition:
+            latency: float = self.__latency or self.__latency_target
+            waiting: int = sum(len(queue) for queue in self.__queues.values())
+
+            return max(1, math.ceil(latency * (waiting + self.__in_flight) / max(1, int(self.__limit))))
+
+    def get_stats(self) -> Dict:
+        """
+        Get limiter statistics
+
+        Returns:
+            Dict: Return limit, in-flight, queue depth and rejection counts
+        """
+
+        with self.__condition:
+            return {
+                'limit': int(self.__limit),
+                'in_flight': self.__in_flight,
+                'admitted': self.__admitted,
+                'queue_depth': {self.__names[priority]: len(queue) for priority, queue in self.__queues.items()},
+                'rejected': {self.__names[priority]: count for priority, count in self.__rejected.items()},
+                'latency': self.__latency
+            }
+
+    def __waiting_before(self, priority: int) -> bool:
+        """
+        Check if requests with higher priority are waiting
+
+        Args:
+            priority (int): Priority of request (lower is served first)
+
+        Returns:
+            bool: Return true if someone should be admitted first
+        """
+
+        return any(len(queue) > 0 for other, queue in self.__queues.items() if other < priority)
+
+    def __init__(self, initial_limit: int, min_limit: int, max_limit: int, read_queue_size: int, write_queue_size: int, read_priority: int, write_priority: int, queue_timeout: float, latency_target: float, backoff_ratio: float):
+        """
+        Initialize limiter
+
+        Args:
+            initial_limit (int): Starting in-flight limit
+            min_limit (int): Lowest in-flight limit
+            max_limit (int): Highest in-flight limit
+            read_queue_size (int): Max waiting reads
+            write_queue_size (int): Max waiting writes
+            read_priority (int): Priority of reads (lower is served first)
+            write_priority (int): Priority of writes (lower is served first)
+            queue_timeout (float): Max time in seconds spent in queue
+            latency_target (float): Latency in seconds above which limit decreases
+            backoff_ratio (float): Multiplier applied to limit on decrease
+        """
+
+        if read_priority == write_priority:
+            raise ValueError("Read and write priorities must differ.")
+
+        self.__limit: float = float(initial_limit)
+        self.__min_limit: int = min_limit
+        self.__max_limit: int = max_limit
+        self.__read_priority: int = read_priority
+        self.__write_priority: int = write_priority
+        self.__queue_timeout: float = queue_timeout
+        self.__latency_target: float = latency_target
+        self.__backoff_ratio: float = backoff_ratio
+
+        self.__queues: Dict[int, Deque[object]] = {read_priority: deque(), write_priority: deque()}
+        self.__queue_sizes: Dict[int, int] = {read_priority: read_queue_size, write_priority: write_queue_size}
+        self.__names: Dict[int, str] = {read_priority: 'read', write_priority: 'write'}
+        self.__rejected: Dict[int, int] = {read_priority: 0, write_priority: 0}
+
+        self.__in_flight: int = 0
+        self.__admitted: int = 0
+        self.__latency: float = None
+        self.__last_decrease: float = 0.0
+        self.__condition: threading.Condition = threading.Condition()
+
+class AdmissionController:
+    """
+    Admission control and load shedding in front of endpoint method hooks
+
+    Attributes:
+        __limiters (Dict[str, AdmissionLimiter]): Limiters per endpoint class
+        __settings (Dict): Settings used for new limiters
+        __lock (threading.Lock): Guards limiter creation
+    """
+
+    def acquire(self, name: str, write: bool) -> bool:
+        """
+        Admit request to endpoint
+
+        Args:
+            name (str): Endpoint class name
+            write (bool): Request modifies data
+
+        Returns:
+            bool: Return true if request was admitted
+        """
+
+        return self.__limiter(name).acquire(write)
+
+    def release(self, name: str, latency: float) -> None:
+        """
+        Release admitted request
+
+        Args:
+            name (str): Endpoint class name
+            latency (float): Request processing time in seconds
+        """
+
+        self.__limiter(name).release(latency)
+
+    def retry_after(self, name: str) -> int:
+        """
+        Get Retry-After value for rejected request
+
+        Args:
+            name (str): Endpoint class name
+
+        Returns:
+            int: Return number of seconds
+        """
+
+        return self.__limiter(name).retry_after()
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """
+        Get statistics of all limiters
+
+        Returns:
+            Dict[str, Dict]: Return statistics per endpoint class
+        """
+
+        with self.__lock:
+            limiters: List = list(self.__limiters.items())
+
+        return {name: limiter.get_stats() for name, limiter in limiters}
+
+    def __limiter(self, name: str) -> AdmissionLimiter:
+        """
+        Get or create limiter for endpoint class
+
+        Args:
+            name (str): Endpoint class name
+
+        Returns:
+            AdmissionLimiter: Return limiter
+        """
+
+        limiter: AdmissionLimiter = self.__limiters.get(name)
+
+        if limiter:
+            return limiter
+
+        with self.__lock:
+            if name not in self.__limiters:
+                self.__limiters[name] = AdmissionLimiter(**self.__settings)
+            return self.__limiters[name]
+
+    def __init__(self, initial_limit: int = 32, min_limit: int = 4, max_limit: int = 256, read_queue_size: int = 64, write_queue_size: int = 16, read_priority: int = 0, write_priority: int = 1, queue_timeout: float = 0.05, latency_target: float = 0.25, backoff_ratio: float = 0.9):
+        """
+        Initialize controller settings
+
+        Args:
+            initial_limit (int, optional): Starting in-flight limit. Defaults to 32.
+            min_limit (int, optional): Lowest in-flight limit. Defaults to 4.
+            max_limit (int, optional): Highest in-flight limit. Defaults to 256.
+            read_queue_size (int, optional): Max waiting reads per endpoint. Defaults to 64.
+            write_queue_size (int, optional): Max waiting writes per endpoint. Defaults to 16.
+            read_priority (int, optional): Priority of reads (lower is served first). Defaults to 0.
+            write_priority (int, optional): Priority of writes (lower is served first). Defaults to 1.
+            queue_timeout (float, optional): Max time in seconds spent in queue. Defaults to 0.05.
+            latency_target (float, optional): Latency in seconds above which limit decreases. Defaults to 0.25.
+            backoff_ratio (float, optional): Multiplier applied to limit on decrease. Defaults to 0.9.
+        """
+
+        self.__settings: Dict = {
+            'initial_limit': initial_limit,
+            'min_limit': min_limit,
+            'max_limit': max_limit,
+            'read_queue_size': read_queue_size,
+            'write_queue_size': write_queue_size,
+            'read_priority': read_priority,
+            'write_priority': write_priority,
+            'queue_timeout': queue_timeout,
+            'latency_target': latency_target,
+            'backoff_ratio': backoff_ratio
+        }
+
+        self.__limiters: Dict[str, AdmissionLimiter] = {}
+        self.__lock: threading.Lock = threading.Lock()
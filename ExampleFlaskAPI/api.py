@@ -1,9 +1,28 @@
 import traceback
+from typing import Callable, Dict, List
 from ExampleFlaskAPI.authorization import Authorization
 from ExampleFlaskAPI.database_bridge import DatabaseBridge
 from ExampleFlaskAPI.endpoint_item import EndpointItem
 from ExampleFlaskAPI.endpoint_category import EndpointCategory
 from ExampleFlaskAPI.endpoint_search_items import EndpointSearchItems
+from ExampleFlaskAPI.endpoint_search_suggest import EndpointSearchSuggest
+from ExampleFlaskAPI.item_suggestions import ItemSuggestions
+from ExampleFlaskAPI.search_query import SearchQuery
+from ExampleFlaskAPI.result_cache import ResultCache
+from ExampleFlaskAPI.item_cache import ItemCache
+from ExampleFlaskAPI.serial_filter import SerialFilter
+from ExampleFlaskAPI.write_batcher import WriteBatcher
+from ExampleFlaskAPI.request_coalescer import RequestCoalescer
+from ExampleFlaskAPI.endpoint_stats import EndpointStats
+from ExampleFlaskAPI.endpoint_item_stats import EndpointItemStats
+from ExampleFlaskAPI.item_snapshot import ItemSnapshot
+from ExampleFlaskAPI.inventory_rollups import InventoryRollups
+from ExampleFlaskAPI.category_tree import CategoryTree
+from ExampleFlaskAPI.job_runner import JobRunner
+from ExampleFlaskAPI.endpoint_jobs import EndpointJobs
+from ExampleFlaskAPI.admission_control import AdmissionController
+from ExampleFlaskAPI.endpoint import Endpoint
+from ExampleFlaskAPI.hot_keys import HotKeys
 
 class API:
     """
@@ -28,21 +47,64 @@ class API:
         api_prefix: str = '/api/v1'
         
         self.__endpoints: Dict[str, Endpoint] = {}
+        self.__providers: Dict[str, Callable[[], Dict]] = {
+            'admission': self.__admission.get_stats,
+            'database': self.__mongo.get_stats,
+            'rollups': self.__rollups.get_stats,
+            'category_tree': self.__tree.get_stats,
+            'jobs': self.__jobs.get_stats,
+            'suggestions': self.__suggestions.get_stats,
+            'search_queries': self.__queries.get_stats,
+            'search_cache': self.__cache.get_stats,
+            'item_cache': self.__items.get_stats,
+            'serial_filter': self.__serials.get_stats,
+            'coalescing': self.__coalescer.get_stats,
+            'hot_keys': lambda: {**self.__hot_keys.get_stats(), 'warmed': self.__warmed}
+        }
             
-        self.__endpoints['item'] = EndpointItem(self.__mongo, self.__codes, self.__authorization)
-        self.__endpoints['category'] = EndpointCategory(self.__mongo, self.__codes, self.__authorization)
-        self.__endpoints['search_items'] = EndpointSearchItems(self.__mongo, self.__codes, self.__authorization)
+        self.__endpoints['item'] = EndpointItem(self.__mongo, self.__codes, self.__authorization, self.__admission, self.__rollups, self.__tree, self.__items, self.__serials, self.__batcher, self.__jobs)
+        self.__endpoints['category'] = EndpointCategory(self.__mongo, self.__codes, self.__authorization, self.__admission, self.__tree, self.__rollups, self.__jobs)
+        self.__endpoints['jobs'] = EndpointJobs(self.__mongo, self.__codes, self.__authorization, self.__jobs, self.__admission)
+        self.__endpoints['search_items'] = EndpointSearchItems(self.__mongo, self.__codes, self.__authorization, self.__admission, self.__tree, self.__queries, self.__cache)
+        self.__endpoints['search_suggest'] = EndpointSearchSuggest(self.__mongo, self.__codes, self.__authorization, self.__suggestions, self.__admission)
+        self.__endpoints['stats'] = EndpointStats(self.__mongo, self.__codes, self.__authorization, self.__providers)
+
+        if self.__batcher:
+            self.__providers['write_batching'] = self.__batcher.get_stats
+
+        # Item analytics need NumPy
+        if ItemSnapshot.available():
+            snapshot: ItemSnapshot = ItemSnapshot(self.__mongo)
+
+            self.__providers['snapshot'] = snapshot.get_stats
+            self.__endpoints['item_stats'] = EndpointItemStats(self.__mongo, self.__codes, self.__authorization, snapshot, self.__admission, self.__tree)
+
+        # Identical concurrent reads of any endpoint share one call, their keys are counted
+        for endpoint in self.__endpoints.values():
+            endpoint.coalesce_reads(self.__coalescer)
+            endpoint.count_reads(self.__hot_keys)
 
         # Assign endpoints    
         self.__app.route(api_prefix + '/item/<serial_number>', methods=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])(self.__endpoints['item'].route_item)
         self.__app.route(api_prefix + '/item', methods=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])(self.__endpoints['item'].route_item)
                       
+        # Static tree route takes precedence over category name
+        self.__app.route(api_prefix + '/category/tree', methods=['GET'], defaults={'tree': True})(self.__endpoints['category'].route_category)
         self.__app.route(api_prefix + '/category/<name>', methods=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])(self.__endpoints['category'].route_category)
         self.__app.route(api_prefix + '/category', methods=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])(self.__endpoints['category'].route_category)
             
-        self.__app.route(api_prefix + '/search/items', methods=['GET'])(self.__endpoints['search_items'].route_search_items)
+        self.__app.route(api_prefix + '/search/items', methods=['GET', 'POST'])(self.__endpoints['search_items'].route_search_items)
+        self.__app.route(api_prefix + '/search/suggest', methods=['GET'])(self.__endpoints['search_suggest'].route_search_suggest)
+
+        if 'item_stats' in self.__endpoints:
+            self.__app.route(api_prefix + '/stats/items', methods=['GET'])(self.__endpoints['item_stats'].route_item_stats)
 
-    def __init__(self, app: any, mongo: DatabaseBridge, authorization: Authorization):
+        self.__app.route(api_prefix + '/jobs/<job_id>', methods=['GET'])(self.__endpoints['jobs'].route_jobs)
+
+        self.__app.route(api_prefix + '/stats/<name>', methods=['GET'])(self.__endpoints['stats'].route_stats)
+        self.__app.route(api_prefix + '/stats', methods=['GET'])(self.__endpoints['stats'].route_stats)
+
+    def __init__(self, app: any, mongo: DatabaseBridge, authorization: Authorization, admission: AdmissionController = None, hot_keys: HotKeys = None, batcher: WriteBatcher = None, serials: SerialFilter = None):
         """
         Assign flask app and database bridge, provide custom status codes with messages
 
@@ -50,17 +112,62 @@ class API:
             app (any): Flask app       
             mongo (DatabaseBridge): Bridge to work on mongodb    
             authorization (Authorization): Authorization for API    
+            admission (AdmissionController, optional): Admission control for endpoints. Defaults to None.
+            hot_keys (HotKeys, optional): Frequency of read keys, its restored keys are read before serving. Defaults to sketch kept in memory.
+            batcher (WriteBatcher, optional): Group commit of concurrent single-item POSTs. Defaults to None.
+            serials (SerialFilter, optional): Filter of existing serial numbers, loaded before serving. Defaults to filter sized for a million serials.
         """
 
         self.__app: any = app
         
         self.__mongo: DatabaseBridge = mongo
+
+        self.__admission: AdmissionController = admission or AdmissionController()
+
+        # Inventory rollups maintained by item writes
+        self.__rollups: InventoryRollups = InventoryRollups(mongo)
+
+        # Category paths and counters maintained by category and item writes, tree cached until next write
+        self.__tree: CategoryTree = CategoryTree(mongo)
+
+        # Long running writes, e.g. relabeling items of renamed category
+        self.__jobs: JobRunner = JobRunner(mongo)
+
+        # Name and serial number suggestions, loaded now and followed by item writes
+        self.__suggestions: ItemSuggestions = ItemSuggestions(mongo)
+        self.__suggestions.load()
+
+        # Compiled search queries sent with POST
+        self.__queries: SearchQuery = SearchQuery()
+
+        # Search results kept until a write changes version of their collection, writes of other workers are seen within a second
+        self.__cache: ResultCache = ResultCache(mongo, check_interval=1.0)
+
+        # Items by serial number, encoded once and dropped by item writes
+        self.__items: ItemCache = ItemCache(mongo)
+
+        # Existing serial numbers, loaded now, inserts of surely new serials skip their lookup
+        self.__serials: SerialFilter = serials or SerialFilter(mongo)
+        self.__serials.load()
+
+        # Concurrent identical reads, e.g. at shift change
+        self.__coalescer: RequestCoalescer = RequestCoalescer()
+
+        # Most frequent reads, snapshot of last run pre-warms caches
+        self.__hot_keys: HotKeys = hot_keys or HotKeys()
+
+        # Concurrent single-item POSTs written with one insert_many when enabled
+        self.__batcher: WriteBatcher = batcher
         
         self.__codes: Dict[int, Dict[str, str]] = {                     
             1200: {
                 'en-EN': 'Request done.',
                 'pl-PL': 'Żądanie wykonane.'
             },
+            1202: {
+                'en-EN': 'Request accepted, it is processed by background job.',
+                'pl-PL': 'Żądanie przyjęte, jest przetwarzane przez zadanie w tle.'
+            },
             1401: {
                 'en-EN': 'Serial number(s) must be provided.',
                 'pl-PL': 'Należy podać numer(y) seryjny/e.'
@@ -84,9 +191,80 @@ class API:
             1406: {
                 'en-EN': 'Wrong search type provided.',
                 'pl-PL': 'Błędny typ wyszukiwania.'
+            },
+            1407: {
+                'en-EN': 'If-Match header can be used with a single element only.',
+                'pl-PL': 'Nagłówek If-Match może być użyty tylko z jednym elementem.'
+            },
+            1408: {
+                'en-EN': 'Wrong statistics parameters provided.',
+                'pl-PL': 'Błędne parametry statystyk.'
+            },
+            1409: {
+                'en-EN': 'Search prefix must be provided.',
+                'pl-PL': 'Należy podać prefiks wyszukiwania.'
+            },
+            1410: {
+                'en-EN': 'Sorting is supported on indexed fields only.',
+                'pl-PL': 'Sortowanie jest możliwe tylko według indeksowanych pól.'
+            },
+            1411: {
+                'en-EN': 'Wrong search query provided.',
+                'pl-PL': 'Błędne zapytanie wyszukiwania.'
+            },
+            1412: {
+                'en-EN': 'Document was modified by another request.',
+                'pl-PL': 'Dokument został zmieniony przez inne żądanie.'
+            },
+            1503: {
+                'en-EN': 'Server is overloaded, retry later.',
+                'pl-PL': 'Serwer jest przeciążony, spróbuj ponownie później.'
+            },
+            1504: {
+                'en-EN': 'Database is temporarily unavailable.',
+                'pl-PL': 'Baza danych jest chwilowo niedostępna.'
             }        
         }
         
         self.__setup_authorization(authorization)
         
-        self.__setup_endpoints()
\ No newline at end of file
+        self.__setup_endpoints()
+
+        # Chunked jobs of stopped workers continue here
+        self.__jobs.resume()
+
+        # Fill caches with reads hot in last run before serving traffic
+        self.__warmed: int = 0
+        self.__warmed = self.__warm(self.__hot_keys.restored())
+
+    def __warm(self, keys: List[str]) -> int:
+        """
+        Replay reads by their keys, skipping authorization
+
+        Args:
+            keys (List[str]): Read keys like 'GET /api/v1/item/<serial>?a=1'
+
+        Returns:
+            int: Return number of reads answered with 200
+        """
+
+        adapter: any = self.__app.url_map.bind('localhost')
+        warmed: int = 0
+
+        for key in keys:
+            method, _, rest = key.partition(' ')
+            target, _, body = rest.partition(' ')
+
+            try:
+                name, arguments = adapter.match(target.partition('?')[0], method)
+                endpoint: Endpoint = getattr(self.__app.view_functions[name], '__self__', None)
+
+                if not isinstance(endpoint, Endpoint):
+                    continue
+
+                with self.__app.test_request_context(target, method=method, data=body, content_type='application/json' if body else None):
+                    warmed += endpoint.warm(**arguments) == 200
+            except Exception:
+                traceback.print_exc()
+
+        return warmed
\ No newline at end of file
@@ -38,6 +38,24 @@ class Authorization:
         # Validate permissions
         return any(method in self.__permissions[permission] for permission in self.__sessions[key]["permissions"])
         
+    def get_permissions(self, request: werkzeug.local.LocalProxy) -> List[str]:
+        """
+        Get permissions of provided key
+
+        Args:
+            request (werkzeug.local.LocalProxy): Flask request
+
+        Returns:
+            List[str]: Return sorted permissions, empty if key is missing or unknown
+        """
+
+        key: str = request.headers.get('Authorization') or request.args.get('api_key', type=str)
+
+        if not key or key not in self.__sessions:
+            return []
+
+        return sorted(self.__sessions[key]['permissions'])
+
     def create_session(self, key: str, permissions: List[str]) -> bool:
         """
         Create session with provided key and permissions
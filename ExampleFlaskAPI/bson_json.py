@@ -0,0 +1,206 @@
+import json
+import struct
+import datetime
+import bson
+from bson.raw_bson import RawBSONDocument
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable, Dict, List, Tuple
+
+_INT32: struct.Struct = struct.Struct('<i')
+_INT64: struct.Struct = struct.Struct('<q')
+_DOUBLE: struct.Struct = struct.Struct('<d')
+
+_EPOCH: datetime.datetime = datetime.datetime(1970, 1, 1)
+
+class UnsupportedBSONType(ValueError):
+    """
+    BSON element type without direct JSON encoding
+    """
+
+class BSONJSONEncoder:
+    """
+    Encoder going straight from BSON bytes to JSON text
+
+    Produces the same text as json.dumps(bson.decode(data), default=str) without
+    building intermediate dicts. Documents with element types not handled here
+    are decoded and encoded the usual way.
+
+    Attributes:
+        __names (Dict[bytes, str]): Encoded element names by raw name
+    """
+
+    __names: Dict[bytes, str] = {}
+
+    @staticmethod
+    def encode(document: RawBSONDocument | Dict) -> str:
+        """
+        Encode single document to JSON
+
+        Args:
+            document (RawBSONDocument | Dict): Raw or decoded document
+
+        Returns:
+            str: Return JSON text
+        """
+
+        if isinstance(document, EncodedDocument):
+            return document.json
+
+        if not isinstance(document, RawBSONDocument):
+            return json.dumps(document, default=str)
+
+        data: bytes = document.raw
+
+        try:
+            return BSONJSONEncoder.encode_bytes(data)
+        except (UnsupportedBSONType, OverflowError):
+            return json.dumps(bson.decode(data), default=str)
+
+    @staticmethod
+    def encode_list(documents: List[RawBSONDocument | Dict]) -> str:
+        """
+        Encode list of documents to JSON array
+
+        Args:
+            documents (List[RawBSONDocument | Dict]): Raw or decoded documents
+
+        Returns:
+            str: Return JSON text
+        """
+
+        return '[' + ', '.join([BSONJSONEncoder.encode(document) for document in documents]) + ']'
+
+    @staticmethod
+    def encode_bytes(data: bytes) -> str:
+        """
+        Encode BSON document bytes to JSON
+
+        Args:
+            data (bytes): BSON document
+
+        Returns:
+            str: Return JSON text
+        """
+
+        parts: List[str] = []
+        BSONJSONEncoder.__document(data, 4, _INT32.unpack_from(data, 0)[0] - 1, False, parts)
+
+        return ''.join(parts)
+
+    @staticmethod
+    def __document(data: bytes, position: int, end: int, array: bool, parts: List[str]) -> None:
+        """
+        Encode elements of document or array
+
+        Args:
+            data (bytes): BSON bytes
+            position (int): Offset of first element
+            end (int): Offset of document terminating null byte
+            array (bool): Encode as array
+            parts (List[str]): Container for JSON text parts
+        """
+
+        append: Callable[[str], None] = parts.append
+        names: Dict[bytes, str] = BSONJSONEncoder.__names
+
+        append('[' if array else '{')
+        separator: str = ''
+
+        while position < end:
+            element_type: int = data[position]
+            name_end: int = data.index(0, position + 1)
+
+            # Element names repeat across documents, keep them encoded
+            if array:
+                append(separator)
+            else:
+                name: bytes = data[position + 1:name_end]
+                encoded_name: str = names.get(name)
+
+                if encoded_name is None:
+                    encoded_name = encode_basestring_ascii(name.decode('utf-8')) + ': '
+                    if len(names) < 4096:
+                        names[name] = encoded_name
+
+                append(separator + encoded_name)
+
+            separator = ', '
+            position = name_end + 1
+
+            if element_type == 0x02:
+                size: int = _INT32.unpack_from(data, position)[0]
+                append(encode_basestring_ascii(data[position + 4:position + 3 + size].decode('utf-8')))
+                position += 4 + size
+            elif element_type == 0x01:
+                append(BSONJSONEncoder.__float(_DOUBLE.unpack_from(data, position)[0]))
+                position += 8
+            elif element_type == 0x10:
+                append(str(_INT32.unpack_from(data, position)[0]))
+                position += 4
+            elif element_type == 0x12:
+                append(str(_INT64.unpack_from(data, position)[0]))
+                position += 8
+            elif element_type == 0x03 or element_type == 0x04:
+                size: int = _INT32.unpack_from(data, position)[0]
+                BSONJSONEncoder.__document(data, position + 4, position + size - 1, element_type == 0x04, parts)
+                position += size
+            elif element_type == 0x07:
+                append('"' + data[position:position + 12].hex() + '"')
+                position += 12
+            elif element_type == 0x08:
+                append('true' if data[position] else 'false')
+                position += 1
+            elif element_type == 0x0A:
+                append('null')
+            elif element_type == 0x09:
+                milliseconds: int = _INT64.unpack_from(data, position)[0]
+                append('"' + str(_EPOCH + datetime.timedelta(milliseconds=milliseconds)) + '"')
+                position += 8
+            else:
+                raise UnsupportedBSONType(element_type)
+
+        parts.append(']' if array else '}')
+
+    @staticmethod
+    def __float(value: float) -> str:
+        """
+        Encode float the way json module does
+
+        Args:
+            value (float): Value to encode
+
+        Returns:
+            str: Return JSON number
+        """
+
+        if value != value:
+            return 'NaN'
+        if value == float('inf'):
+            return 'Infinity'
+        if value == -float('inf'):
+            return '-Infinity'
+
+        return float.__repr__(value)
+
+class EncodedDocument(RawBSONDocument):
+    """
+    Raw document carrying its JSON text, encoded once and spliced into every JSON response
+
+    Attributes:
+        json (str): JSON text of document
+    """
+
+    __slots__ = ('json',)
+
+    def __init__(self, data: bytes, text: str = None):
+        """
+        Wrap BSON bytes and encode them to JSON unless text is given
+
+        Args:
+            data (bytes): BSON document
+            text (str, optional): JSON text of document. Defaults to None.
+        """
+
+        super().__init__(data)
+
+        self.json: str = text if text is not None else BSONJSONEncoder.encode(RawBSONDocument(data))
@@ -0,0 +1,242 @@
+import threading
+from typing import Any, Dict, List, Tuple
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure
+
+class CategoryTree:
+    """
+    Ancestor paths, counters and cached tree of categories
+
+    Every category keeps `path`, names of its ancestors from root to parent, updated by
+    category writes. Descendants of a category are then found with one indexed query on
+    `path`. Counters of children and assigned items are changed with $inc next to category
+    and item writes, so checks read a field of the category instead of querying. The nested
+    tree is built from all categories once and dropped by every category write, except
+    counter updates as item writes do not change the tree.
+
+    Attributes:
+        COLLECTION (str): Collection of categories
+        COUNTERS (List[str]): Counter fields of categories
+        __mongo (DatabaseBridge): Bridge to mongodb
+        __lock (threading.Lock): Guards cached tree
+        __tree (List[Dict]): Cached tree, None when not built
+        __version (int): Number of category writes seen, counter updates excluded
+        __builds (int): Number of tree builds
+        __hits (int): Number of tree reads served from cache
+    """
+
+    COLLECTION: str = 'Category'
+    COUNTERS: List[str] = ['child_count', 'item_count']
+
+    @staticmethod
+    def path(parent: Dict) -> List[str]:
+        """
+        Get ancestor path of category placed under parent
+
+        Args:
+            parent (Dict): Parent category, None for root
+
+        Returns:
+            List[str]: Return names from root to parent
+        """
+
+        if not parent:
+            return []
+
+        return list(parent.get('path') or []) + [parent['name']]
+
+    def count(self, name: str, field: str, delta: int) -> bool:
+        """
+        Change counter of category
+
+        Args:
+            name (str): Name of category, empty for none
+            field (str): Counter field
+            delta (int): Change of counter
+
+        Returns:
+            bool: Return False on database error
+        """
+
+        if not name:
+            return True
+
+        return not isinstance(self.__mongo.update_one(self.COLLECTION, {'name': name}, {'$inc': {field: delta}}), DatabaseFailure)
+
+    def move(self, name: str, path: List[str], new_name: str = None) -> bool:
+        """
+        Rewrite paths of descendants after category changed its place or name, in one bulk write
+
+        Args:
+            name (str): Old name of category
+            path (List[str]): New path of category, None if category was removed and its children became roots
+            new_name (str, optional): New name of category. Defaults to old name.
+
+        Returns:
+            bool: Return true if all descendants were rewritten
+        """
+
+        descendants: List[Dict] = self.__mongo.find(self.COLLECTION, {'path': name})
+
+        if isinstance(descendants, DatabaseFailure):
+            return False
+
+        prefix: List[str] = [] if path is None else path + [new_name or name]
+        updates: List[Tuple[Dict, Dict]] = []
+
+        for descendant in descendants:
+            old: List[str] = descendant['path']
+            updates.append(({'name': descendant['name']}, {'$set': {'path': prefix + old[old.index(name) + 1:]}}))
+
+        return not isinstance(self.__mongo.bulk_update(self.COLLECTION, updates), DatabaseFailure)
+
+    def subtree(self, names: List[str]) -> List[str]:
+        """
+        Get names of categories and all their descendants with one query
+
+        Args:
+            names (List[str]): Names of subtree roots
+
+        Returns:
+            List[str]: Return names of subtree categories, None on database error
+        """
+
+        categories: List[Dict] = self.__mongo.find(self.COLLECTION, {'$or': [{'name': {'$in': names}}, {'path': {'$in': names}}]})
+
+        if isinstance(categories, DatabaseFailure):
+            return None
+
+        return [category['name'] for category in categories]
+
+    def get_tree(self) -> List[Dict]:
+        """
+        Get nested tree of all categories, categories with missing parent are roots
+
+        Returns:
+            List[Dict]: Return root categories with children, None on database error
+        """
+
+        with self.__lock:
+            if self.__tree is not None:
+                self.__hits += 1
+                return self.__tree
+
+            version: int = self.__version
+
+        categories: List[Dict] = self.__mongo.find(self.COLLECTION, {})
+
+        if isinstance(categories, DatabaseFailure):
+            return None
+
+        nodes: Dict[str, Dict] = {category['name']: {'name': category['name'], 'children': []} for category in categories}
+        tree: List[Dict] = []
+
+        for category in sorted(categories, key=lambda category: category['name']):
+            parent: Dict = nodes.get(category.get('parent_name'))
+
+            if parent is None or parent is nodes[category['name']]:
+                tree.append(nodes[category['name']])
+            else:
+                parent['children'].append(nodes[category['name']])
+
+        with self.__lock:
+            self.__builds += 1
+
+            # Write during build, keep tree for this request only
+            if version == self.__version:
+                self.__tree = tree
+
+        return tree
+
+    def repair(self) -> int:
+        """
+        Recompute paths and counters of all categories from parent names and items
+
+        Returns:
+            int: Return number of rewritten categories, None on database error
+        """
+
+        categories: List[Dict] = self.__mongo.find(self.COLLECTION, {})
+        items: List[Dict] = self.__mongo.find('Item', {})
+
+        if isinstance(categories, DatabaseFailure) or isinstance(items, DatabaseFailure):
+            return None
+
+        parents: Dict[str, str] = {category['name']: category.get('parent_name') or '' for category in categories}
+        counters: Dict[str, Dict[str, int]] = {name: {field: 0 for field in self.COUNTERS} for name in parents}
+        repaired: int = 0
+
+        for name, parent in parents.items():
+            if parent in counters:
+                counters[parent]['child_count'] += 1
+
+        for item in items:
+            if item.get('category') in counters:
+                counters[item['category']]['item_count'] += 1
+
+        for category in categories:
+            path: List[str] = []
+            parent: str = parents[category['name']]
+
+            # Stop on missing parent or cycle
+            while parent and parent in parents and parent not in path and parent != category['name']:
+                path.insert(0, parent)
+                parent = parents[parent]
+
+            expected: Dict = {'path': path, **counters[category['name']]}
+
+            if any(category.get(field) != value for field, value in expected.items()):
+                self.__mongo.update_one(self.COLLECTION, {'name': category['name']}, {'$set': expected})
+                repaired += 1
+
+        return repaired
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dict[str, Any]: Return cache state, builds and hits
+        """
+
+        with self.__lock:
+            return {'cached': self.__tree is not None, 'builds': self.__builds, 'hits': self.__hits}
+
+    def __invalidate(self, collection: str, condition: Dict, operation: Dict = None) -> None:
+        """
+        Drop cached tree after category write, counter updates leave the tree as it is
+
+        Args:
+            collection (str): Written collection
+            condition (Dict): Condition of write
+            operation (Dict, optional): Update operation, None for other writes. Defaults to None.
+        """
+
+        if collection != self.COLLECTION:
+            return
+
+        if operation and list(operation) == ['$inc'] and set(operation['$inc']) <= set(self.COUNTERS):
+            return
+
+        with self.__lock:
+            self.__version += 1
+            self.__tree = None
+
+    def __init__(self, mongo: DatabaseBridge):
+        """
+        Assign bridge, create index of paths and listen to writes
+
+        Args:
+            mongo (DatabaseBridge): Bridge to mongodb
+        """
+
+        self.__mongo: DatabaseBridge = mongo
+        self.__lock: threading.Lock = threading.Lock()
+        self.__tree: List[Dict] = None
+        self.__version: int = 0
+        self.__builds: int = 0
+        self.__hits: int = 0
+
+        # Subtree queries and moves look descendants up by path
+        mongo.create_index(self.COLLECTION, [('path', 1)])
+
+        mongo.add_listener(self.__invalidate)
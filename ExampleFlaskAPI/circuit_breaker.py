@@ -0,0 +1,126 @@
+import time
+import threading
+from typing import Dict
+
+class CircuitBreaker:
+    """
+    Circuit breaker failing fast while a dependency is down
+
+    Attributes:
+        __state (str): Current state - closed, open or half_open
+        __failures (int): Consecutive failures counted in closed state
+        __opened_at (float): Time when breaker was opened
+        __probing (bool): Probe request is in progress in half_open state
+        __transitions (Dict[str, int]): Number of state transitions
+        __lock (threading.Lock): Guards breaker state
+    """
+
+    CLOSED: str = 'closed'
+    OPEN: str = 'open'
+    HALF_OPEN: str = 'half_open'
+
+    def allow(self) -> bool:
+        """
+        Check if operation can be executed
+
+        Returns:
+            bool: Return true if operation is allowed
+        """
+
+        with self.__lock:
+            if self.__state == self.CLOSED:
+                return True
+
+            if self.__state == self.OPEN:
+                if time.monotonic() - self.__opened_at < self.__recovery_timeout:
+                    self.__rejected += 1
+                    return False
+                self.__transition(self.HALF_OPEN)
+
+            # Let single probe through while half open
+            if self.__probing:
+                self.__rejected += 1
+                return False
+
+            self.__probing = True
+            return True
+
+    def record_success(self) -> None:
+        """
+        Record successful operation
+        """
+
+        with self.__lock:
+            self.__failures = 0
+            self.__probing = False
+
+            if self.__state != self.CLOSED:
+                self.__transition(self.CLOSED)
+
+    def record_failure(self) -> bool:
+        """
+        Record failed operation
+
+        Returns:
+            bool: Return true if breaker was opened by this failure
+        """
+
+        with self.__lock:
+            self.__failures += 1
+            self.__probing = False
+
+            if self.__state == self.HALF_OPEN or (self.__state == self.CLOSED and self.__failures >= self.__failure_threshold):
+                self.__opened_at = time.monotonic()
+                self.__transition(self.OPEN)
+                return True
+
+            return False
+
+    def get_stats(self) -> Dict:
+        """
+        Get breaker statistics
+
+        Returns:
+            Dict: Return state, failures, rejections and transitions
+        """
+
+        with self.__lock:
+            return {
+                'state': self.__state,
+                'failures': self.__failures,
+                'rejected': self.__rejected,
+                'transitions': dict(self.__transitions)
+            }
+
+    def __transition(self, state: str) -> None:
+        """
+        Change breaker state and count transition
+
+        Args:
+            state (str): New state
+        """
+
+        name: str = self.__state + '->' + state
+
+        self.__transitions[name] = self.__transitions.get(name, 0) + 1
+        self.__state = state
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 5.0):
+        """
+        Initialize breaker in closed state
+
+        Args:
+            failure_threshold (int, optional): Consecutive failures opening breaker. Defaults to 5.
+            recovery_timeout (float, optional): Seconds before probing open breaker. Defaults to 5.0.
+        """
+
+        self.__failure_threshold: int = failure_threshold
+        self.__recovery_timeout: float = recovery_timeout
+
+        self.__state: str = self.CLOSED
+        self.__failures: int = 0
+        self.__rejected: int = 0
+        self.__opened_at: float = 0.0
+        self.__probing: bool = False
+        self.__transitions: Dict[str, int] = {}
+        self.__lock: threading.Lock = threading.Lock()
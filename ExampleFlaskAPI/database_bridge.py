@@ -1,29 +1,315 @@
+import time
+import random
+import datetime
+import threading
+import contextlib
+import contextvars
 import traceback
 import pymongo
+from pymongo.errors import ConnectionFailure, PyMongoError
 from pymongo.client_session import ClientSession
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
 from flask_pymongo import PyMongo
-from typing import List, Dict
+from typing import Any, Callable, List, Dict, Tuple
+from ExampleFlaskAPI.circuit_breaker import CircuitBreaker
+from ExampleFlaskAPI.routing_policy import RoutingPolicy
+from ExampleFlaskAPI.shard_router import ShardRouter
+from ExampleFlaskAPI.memory_storage import MemoryQuery
 
-class DatabaseBridge:  
+class DatabaseFailure(list):
+    """
+    Typed result of failed database operation
+
+    Behaves as an empty list of rows and exposes the attributes of pymongo
+    write results, so callers can safely read counters after a failure.
+
+    Attributes:
+        error (Exception): Cause of failure
+        transient (bool): Failure was caused by unavailable database
+    """
+
+    acknowledged: bool = False
+    inserted_id: Any = None
+    upserted_id: Any = None
+    matched_count: int = 0
+    modified_count: int = 0
+    deleted_count: int = 0
+
+    @property
+    def inserted_ids(self) -> List:
+        """
+        No rows were inserted
+
+        Returns:
+            List: Return empty list
+        """
+
+        return []
+
+    def __init__(self, error: Exception, transient: bool):
+        """
+        Assign failure cause
+
+        Args:
+            error (Exception): Cause of failure
+            transient (bool): Failure was caused by unavailable database
+        """
+
+        super().__init__()
+
+        self.error: Exception = error
+        self.transient: bool = transient
+
+class CircuitOpenError(ConnectionFailure):
+    """
+    Operation rejected because circuit breaker is open
+    """
+
+class TransactionAborted(PyMongoError):
+    """
+    Transaction joined from outer unit of work was aborted by inner operation
+    """
+
+class BoundSession:
+    """
+    Mongodb session joined by bridge operations while it is open
+
+    Attributes:
+        __session (ClientSession): Wrapped mongodb session
+        __binding (contextvars.ContextVar): Ambient session of bridge
+        __owner (bool): Session was started here, not joined
+        __started (bool): Transaction was started here, not joined
+        __changes (contextvars.ContextVar): Changes made in session, delivered when it ends
+        __deliver (Callable[[List[Tuple[str, Dict, Dict]]], None]): Delivery of changes to listeners
+    """
+
+    def start_transaction(self, **kwargs) -> contextlib.AbstractContextManager:
+        """
+        Start transaction or join the one in progress
+
+        Args:
+            **kwargs: arguments passed to pymongo start_transaction
+
+        Returns:
+            contextlib.AbstractContextManager: Return transaction context
+        """
+
+        if self.__session.in_transaction:
+            return contextlib.nullcontext(self)
+
+        context: contextlib.AbstractContextManager = self.__session.start_transaction(**kwargs)
+        self.__started = True
+
+        return context
+
+    def abort_transaction(self) -> None:
+        """
+        Roll back transaction started here, joined transaction is rolled back by its owner
+
+        Raises:
+            TransactionAborted: Transaction was joined, outer unit of work must be aborted
+        """
+
+        if not self.__session.in_transaction:
+            return
+
+        if not self.__started:
+            raise TransactionAborted('Joined transaction aborted.')
+
+        self.__session.abort_transaction()
+
+    def __getattr__(self, name: str) -> Any:
+        """
+        Delegate to wrapped session
+
+        Args:
+            name (str): Attribute name
+
+        Returns:
+            Any: Return attribute of wrapped session
+        """
+
+        return getattr(self.__session, name)
+
+    def __enter__(self) -> 'BoundSession':
+        if self.__owner:
+            self.__token = self.__binding.set(self.__session)
+            self.__changes_token = self.__changes.set([]) if self.__changes else None
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self.__owner:
+            changes: List[Tuple[str, Dict, Dict]] = self.__changes.get() if self.__changes_token else []
+
+            self.__binding.reset(self.__token)
+
+            if self.__changes_token:
+                self.__changes.reset(self.__changes_token)
+
+            self.__session.end_session()
+
+            if changes:
+                self.__deliver(changes)
+
+    def __init__(self, session: ClientSession, binding: contextvars.ContextVar, owner: bool, changes: contextvars.ContextVar = None, deliver: Callable[[List[Tuple[str, Dict, Dict]]], None] = None):
+        """
+        Wrap mongodb session
+
+        Args:
+            session (ClientSession): Mongodb session
+            binding (contextvars.ContextVar): Ambient session of bridge
+            owner (bool): Session was started here, not joined
+            changes (contextvars.ContextVar, optional): Changes made in session. Defaults to None.
+            deliver (Callable[[List[Tuple[str, Dict, Dict]]], None], optional): Delivery of changes when session ends. Defaults to None.
+        """
+
+        self.__session: ClientSession = session
+        self.__binding: contextvars.ContextVar = binding
+        self.__owner: bool = owner
+        self.__started: bool = False
+        self.__token: contextvars.Token = None
+        self.__changes: contextvars.ContextVar = changes
+        self.__deliver: Callable[[List[Tuple[str, Dict, Dict]]], None] = deliver
+        self.__changes_token: contextvars.Token = None
+
+class DatabaseBridge:
     """
     A class for sending requests to mongodb as an interface
-    """       
 
-    def start_session(self) -> pymongo.client_session.ClientSession:
+    Attributes:
+        __client (PyMongo): Client for mongodb
+        __secondaries (List[PyMongo]): Clients of secondary nodes used for routed reads
+        __policies (Dict[str, RoutingPolicy]): Routing policies per route
+        __session (contextvars.ContextVar): Ambient session joined by operations
+        __breakers (Dict[str, CircuitBreaker]): Circuit breakers per collection operation
+        __sharding (ShardRouter): Router of sharded collections, sessions and transactions cover unsharded ones only
+        __listeners (List[Callable[[str, Dict, Dict], None]]): Functions notified about changed rows
+        __batch_listeners (List[Callable[[List[Tuple[str, Dict, Dict]]], None]]): Functions notified about all changes of session at once
+        __changes (contextvars.ContextVar): Changes of open session, delivered when it ends
+        __secondary_lag (List[float]): Replication lag of secondaries in seconds, None if unknown
+        __lag_checked (float): Monotonic time of last lag measurement
+    """
+
+    LAG_INTERVAL: float = 10.0
+
+    def begin_request(self, method: str, route: str) -> contextvars.Token:
+        """
+        Bind routing policy of route to current request
+
+        Args:
+            method (str): HTTP method
+            route (str): Route rule, e.g. '/api/v1/item'
+
+        Returns:
+            contextvars.Token: Return token for end_request
+        """
+
+        policy: RoutingPolicy = self.__policies.get(method + ' ' + route) or self.__policies.get(route)
+
+        return self.__request_state.set({'policy': policy, 'wrote': False})
+
+    def end_request(self, token: contextvars.Token) -> None:
         """
-        Start mongodb session
+        Unbind routing policy from current request
+
+        Args:
+            token (contextvars.Token): Token from begin_request
+        """
+
+        self.__request_state.reset(token)
+
+    def set_policy(self, route: str, policy: RoutingPolicy) -> None:
+        """
+        Assign routing policy to route
+
+        Args:
+            route (str): Route rule, optionally prefixed by method, e.g. 'POST /api/v1/item'
+            policy (RoutingPolicy): Routing policy
+        """
+
+        self.__policies[route] = policy
+
+    def add_listener(self, listener: Callable[[str, Dict, Dict], None], batch: bool = False) -> None:
+        """
+        Register function notified after successful writes
+
+        Listener gets collection name, condition pinning changed rows by '_id' or by the
+        condition of write, and the update operation, None for inserts, deletes and bulk
+        updates. Changes made inside session are delivered when it ends. Batch listener
+        gets list of these changes once per session or write outside session.
+
+        Args:
+            listener (Callable[[str, Dict, Dict], None]): Function taking collection name, condition and operation, or list of changes for batch listener
+            batch (bool, optional): Listener takes all changes of session at once. Defaults to False.
+        """
+
+        (self.__batch_listeners if batch else self.__listeners).append(listener)
+
+    def start_session(self) -> BoundSession:
+        """
+        Start mongodb session, operations inside its context join it
 
         Returns:
-            pymongo.client_session.ClientSession: Return mongodb session
+            BoundSession: Return mongodb session, ambient one if already open
         """
-        
-        try:            
-            return self.__client.cx.start_session()
+
+        session: ClientSession = self.__session.get()
+
+        if session:
+            return BoundSession(session, self.__session, False)
+
+        try:
+            return BoundSession(self.__client.cx.start_session(), self.__session, True, self.__changes, self.__deliver)
         except Exception as e:
-            traceback.print_exc() 
-            return None          
-    
-    def find(self, collection: str, condition: Dict, skip: int = 0, limit: int = -1) -> List:
+            traceback.print_exc()
+            return None
+
+    def in_transaction(self) -> bool:
+        """
+        Check if operations join a transaction in progress
+
+        Returns:
+            bool: Return true inside transaction of open session
+        """
+
+        session: ClientSession = self.__session.get()
+
+        return session is not None and session.in_transaction
+
+    def run_transaction(self, function: Callable[[], Any]) -> Any:
+        """
+        Run function as a unit of work in one transaction, retry transient transaction errors
+
+        Without unit of work mode, or inside an open session, function is run directly.
+
+        Args:
+            function (Callable[[], Any]): Function doing bridge operations
+
+        Returns:
+            Any: Return function result
+        """
+
+        if not self.__unit_of_work or self.__session.get():
+            return function()
+
+        for attempt in range(self.__transaction_retries + 1):
+            with self.start_session() as session:
+                try:
+                    session.start_transaction()
+                    result: Any = function()
+                    self.__commit(session)
+                    return result
+                except PyMongoError as e:
+                    if session.in_transaction:
+                        session.abort_transaction()
+
+                    if not e.has_error_label('TransientTransactionError') or attempt >= self.__transaction_retries:
+                        raise
+
+            time.sleep(random.uniform(0, min(self.__max_backoff, self.__base_backoff * 2 ** attempt)))
+
+    def find(self, collection: str, condition: Dict, skip: int = 0, limit: int = -1, raw: bool = False, sort: List[Tuple[str, int]] = None, projection: Dict = None) -> List:
         """
         Find rows with the given condition
 
@@ -32,19 +318,38 @@ class DatabaseBridge:
             condition (Dict): Condition for query
             skip (int, optional): Number of elements to skip. Defaults to 0.
             limit (int, optional): Max number of elements to obtain. Defaults to -1.
+            raw (bool, optional): Caller accepts undecoded RawBSONDocument rows, used when raw reads are enabled. Defaults to False.
+            sort (List[Tuple[str, int]], optional): Sort keys and directions. Defaults to None.
+            projection (Dict, optional): Returned fields, e.g. text score. Defaults to None.
 
         Returns:
-            List: Return rows.
+            List: Return rows, DatabaseFailure on error
         """
 
-        try:
-            if(limit < 0):
-                return list(self.__client.db[collection].find(condition).skip(skip))
-            return list(self.__client.db[collection].find(condition).skip(skip).limit(limit))     
-        except Exception as e:
-            traceback.print_exc() 
-            return []                 
-            
+        raw = raw and self.__raw_reads
+        shards: List[int] = self.__shards(collection, condition)
+
+        def cursor(target: pymongo.collection.Collection, session: ClientSession) -> pymongo.cursor.Cursor:
+            rows: pymongo.cursor.Cursor = self.__codec(target, raw).find(condition, projection, session=session)
+            return rows.sort(sort) if sort else rows
+
+        if shards is None:
+            def operation() -> List:
+                if(limit < 0):
+                    return list(self.__read(collection, lambda target: cursor(target, self.__session.get()).skip(skip)))
+                return list(self.__read(collection, lambda target: cursor(target, self.__session.get()).skip(skip).limit(limit)))
+
+            return self.__execute('find', collection, operation, True)
+
+        # Every shard returns its first skip + limit rows, page is cut after merge
+        window: int = skip + limit if limit > 0 else 0
+        parts: List = self.__scatter('find', collection, shards, lambda target, shard: list(cursor(target, None).limit(window)), True)
+
+        if isinstance(parts, DatabaseFailure):
+            return parts
+
+        return self.__sharding.merge(parts, sort, skip, limit)
+
     def find_one(self, collection: str, condition: Dict) -> Dict:
         """
         Find row with the given condition
@@ -54,16 +359,22 @@ class DatabaseBridge:
             condition (Dict): Condition for query
 
         Returns:
-            Dict: Return row
+            Dict: Return row, DatabaseFailure on error
         """
 
-        try:
-            return self.__client.db[collection].find_one(condition)
-        except Exception as e:
-            traceback.print_exc() 
-            return []    
-            
-    def insert_one(self, collection: str, row: Dict) -> List:
+        shards: List[int] = self.__shards(collection, condition)
+
+        if shards is None:
+            return self.__execute('find_one', collection, lambda: self.__read(collection, lambda target: target.find_one(condition, session=self.__session.get())), True)
+
+        rows: List = self.__scatter('find_one', collection, shards, lambda target, shard: target.find_one(condition), True)
+
+        if isinstance(rows, DatabaseFailure):
+            return rows
+
+        return next((row for row in rows if row is not None), None)
+
+    def insert_one(self, collection: str, row: Dict) -> pymongo.results.InsertOneResult:
         """
         Insert row
 
@@ -72,16 +383,18 @@ class DatabaseBridge:
             row (Dict): Row to insert
 
         Returns:
-            List: Return insertion status
+            pymongo.results.InsertOneResult: Return insertion status, DatabaseFailure on error
         """
 
-        try:
-            return self.__client.db[collection].insert_one(row)
-        except Exception as e:
-            traceback.print_exc() 
-            return []   
+        if not self.__is_sharded(collection):
+            result: pymongo.results.InsertOneResult = self.__execute('insert_one', collection, lambda: self.__write(collection).insert_one(row, session=self.__session.get()), False)
+        else:
+            shard: int = self.__sharding.shard_for(row)
+            result = self.__execute('insert_one', collection + '@' + str(shard), lambda: self.__write(collection, shard).insert_one(row), False)
+
+        return self.__notify(collection, {'_id': {'$in': [row.get('_id')]}}, result)
 
-    def insert_many(self, collection: str, rows: List[Dict]) -> List:
+    def insert_many(self, collection: str, rows: List[Dict]) -> pymongo.results.InsertManyResult:
         """
         Insert many rows
 
@@ -90,16 +403,25 @@ class DatabaseBridge:
             rows (Dict): Rows to insert
 
         Returns:
-            List: Return insertion status
+            pymongo.results.InsertManyResult: Return insertion status, DatabaseFailure on error
         """
 
-        try:
-            return self.__client.db[collection].insert_many(rows)
-        except Exception as e:
-            traceback.print_exc() 
-            return []   
-            
-    def delete_many(self, collection: str, condition: Dict) -> List:
+        if not self.__is_sharded(collection):
+            return self.__notify(collection, {'_id': {'$in': [row.get('_id') for row in rows]}}, self.__execute('insert_many', collection, lambda: self.__write(collection).insert_many(rows, session=self.__session.get()), False))
+
+        groups: Dict[int, List[Dict]] = {}
+
+        for row in rows:
+            groups.setdefault(self.__sharding.shard_for(row), []).append(row)
+
+        results: List = self.__scatter('insert_many', collection, list(groups), lambda target, shard: target.insert_many(groups[shard]), False)
+
+        if isinstance(results, DatabaseFailure):
+            return results
+
+        return self.__notify(collection, {'_id': {'$in': [row['_id'] for row in rows]}}, pymongo.results.InsertManyResult([row['_id'] for row in rows], True))
+
+    def delete_many(self, collection: str, condition: Dict) -> pymongo.results.DeleteResult:
         """
         Delete many rows with given condition
 
@@ -108,16 +430,20 @@ class DatabaseBridge:
             condition (Dict): Condition for query
 
         Returns:
-            List: Return delete status
+            pymongo.results.DeleteResult: Return delete status, DatabaseFailure on error
         """
 
-        try:
-            return self.__client.db[collection].delete_many(condition)
-        except Exception as e:
-            traceback.print_exc() 
-            return []    
+        shards: List[int] = self.__shards(collection, condition)
 
-    def update_one(self, collection: str, condition: Dict, operation: Dict) -> List:
+        if shards is None:
+            result: pymongo.results.DeleteResult = self.__execute('delete_many', collection, lambda: self.__write(collection).delete_many(condition, session=self.__session.get()), False)
+        else:
+            results: List = self.__scatter('delete_many', collection, shards, lambda target, shard: target.delete_many(condition), False)
+            result = results if isinstance(results, DatabaseFailure) else pymongo.results.DeleteResult({'n': sum(result.deleted_count for result in results)}, True)
+
+        return self.__notify(collection, condition, result)
+
+    def update_one(self, collection: str, condition: Dict, operation: Dict, upsert: bool = False) -> pymongo.results.UpdateResult:
         """
         Update row with given condition
 
@@ -125,18 +451,90 @@ class DatabaseBridge:
             collection (str): Collection name
             condition (Dict): Condition for query
             operation (Dict): Values to change in a row
+            upsert (bool, optional): Insert row built from condition when nothing matched. Defaults to False.
 
         Returns:
-            List: Return update status
+            pymongo.results.UpdateResult: Return update status, DatabaseFailure on error
         """
 
-        try:
-            return self.__client.db[collection].update_one(condition, operation)
-        except Exception as e:
-            traceback.print_exc() 
-            return []            
-            
-    def update_many(self, collection: str, condition: Dict, operation: Dict) -> List:
+        shards: List[int] = self.__shards(collection, condition)
+
+        if shards is None:
+            result: pymongo.results.UpdateResult = self.__execute('update_one', collection, lambda: self.__write(collection).update_one(condition, operation, upsert=upsert, session=self.__session.get()), False)
+        elif self.__sharding.touches_key(operation):
+            result = self.__execute('migrate', collection, lambda: self.__migrate(collection, shards, condition, operation, True)[0], False)
+        else:
+            # First shard holding a match is updated, upsert goes to last candidate
+            for shard in shards:
+                result = self.__execute('update_one', collection + '@' + str(shard), lambda: self.__write(collection, shard).update_one(condition, operation, upsert=upsert and shard == shards[-1]), False)
+
+                if isinstance(result, DatabaseFailure) or result.matched_count:
+                    break
+
+        return self.__notify(collection, condition, result, operation)
+
+    def find_one_and_update(self, collection: str, condition: Dict, operation: Dict, projection: Dict = None, before: bool = False) -> Dict:
+        """
+        Update row with given condition and return it after update
+
+        Args:
+            collection (str): Collection name
+            condition (Dict): Condition for query
+            operation (Dict): Values to change in a row
+            projection (Dict, optional): Fields of returned row. Defaults to None.
+            before (bool, optional): Return row as it was before update. Defaults to False.
+
+        Returns:
+            Dict: Return updated row, None if nothing matched, DatabaseFailure on error
+        """
+
+        shards: List[int] = self.__shards(collection, condition)
+        return_document: pymongo.ReturnDocument = pymongo.ReturnDocument.BEFORE if before else pymongo.ReturnDocument.AFTER
+
+        def migrate() -> Dict:
+            rows: List[Tuple[Dict, Dict]] = self.__migrate(collection, shards, condition, operation, True)[1]
+            return MemoryQuery.project(rows[0][0 if before else 1], projection) if rows else None
+
+        if shards is None:
+            row: Dict = self.__execute('find_one_and_update', collection, lambda: self.__write(collection).find_one_and_update(condition, operation, projection=projection, return_document=return_document, session=self.__session.get()), False)
+        elif self.__sharding.touches_key(operation):
+            row = self.__execute('migrate', collection, migrate, False)
+        else:
+            for shard in shards:
+                row = self.__execute('find_one_and_update', collection + '@' + str(shard), lambda: self.__write(collection, shard).find_one_and_update(condition, operation, projection=projection, return_document=return_document), False)
+
+                if row is not None:
+                    break
+
+        return self.__notify(collection, condition, row, operation)
+
+    def find_one_and_delete(self, collection: str, condition: Dict, projection: Dict = None) -> Dict:
+        """
+        Delete row with given condition and return it
+
+        Args:
+            collection (str): Collection name
+            condition (Dict): Condition for query
+            projection (Dict, optional): Fields of returned row. Defaults to None.
+
+        Returns:
+            Dict: Return deleted row, None if nothing matched, DatabaseFailure on error
+        """
+
+        shards: List[int] = self.__shards(collection, condition)
+
+        if shards is None:
+            row: Dict = self.__execute('find_one_and_delete', collection, lambda: self.__write(collection).find_one_and_delete(condition, projection=projection, session=self.__session.get()), False)
+        else:
+            for shard in shards:
+                row = self.__execute('find_one_and_delete', collection + '@' + str(shard), lambda: self.__write(collection, shard).find_one_and_delete(condition, projection=projection), False)
+
+                if row is not None:
+                    break
+
+        return self.__notify(collection, condition, row)
+
+    def update_many(self, collection: str, condition: Dict, operation: Dict) -> pymongo.results.UpdateResult:
         """
         Update rows with given condition
 
@@ -146,35 +544,538 @@ class DatabaseBridge:
             operation (Dict): Values to change in a rows
 
         Returns:
-            List: Return update status
+            pymongo.results.UpdateResult: Return update status, DatabaseFailure on error
         """
 
-        try:
-            return self.__client.db[collection].update_many(condition, operation)
-        except Exception as e:
-            traceback.print_exc() 
-            return [] 
+        shards: List[int] = self.__shards(collection, condition)
+
+        if shards is None:
+            result: pymongo.results.UpdateResult = self.__execute('update_many', collection, lambda: self.__write(collection).update_many(condition, operation, session=self.__session.get()), False)
+        elif self.__sharding.touches_key(operation):
+            result = self.__execute('migrate', collection, lambda: self.__migrate(collection, shards, condition, operation, False)[0], False)
+        else:
+            results: List = self.__scatter('update_many', collection, shards, lambda target, shard: target.update_many(condition, operation), False)
+            result = results if isinstance(results, DatabaseFailure) else pymongo.results.UpdateResult({'n': sum(result.matched_count for result in results), 'nModified': sum(result.modified_count for result in results)}, True)
+
+        return self.__notify(collection, condition, result, operation)
+
+    def bulk_update(self, collection: str, updates: List[Tuple[Dict, Dict]]) -> pymongo.results.BulkWriteResult:
+        """
+        Update many single rows, each with own condition, in one round trip
+
+        Args:
+            collection (str): Collection name
+            updates (List[Tuple[Dict, Dict]]): Conditions and operations of updated rows
+
+        Returns:
+            pymongo.results.BulkWriteResult: Return bulk status, DatabaseFailure on error
+        """
+
+        if self.__is_sharded(collection):
+            # Each update is routed to its own shards
+            results: List = [self.update_one(collection, condition, operation) for condition, operation in updates]
+            failure: DatabaseFailure = next((result for result in results if isinstance(result, DatabaseFailure)), None)
+
+            if failure is not None:
+                return failure
+
+            return pymongo.results.BulkWriteResult({'nMatched': sum(result.matched_count for result in results), 'nModified': sum(result.modified_count for result in results), 'nInserted': 0, 'nUpserted': 0, 'nRemoved': 0, 'upserted': []}, True)
+
+        if not updates:
+            return pymongo.results.BulkWriteResult({'nMatched': 0, 'nModified': 0, 'nInserted': 0, 'nUpserted': 0, 'nRemoved': 0, 'upserted': []}, True)
+
+        requests: List[pymongo.UpdateOne] = [pymongo.UpdateOne(condition, operation) for condition, operation in updates]
+        result: pymongo.results.BulkWriteResult = self.__execute('bulk_write', collection, lambda: self.__write(collection).bulk_write(requests, session=self.__session.get()), False)
+
+        return self.__notify(collection, {'$or': [condition for condition, _ in updates]}, result)
+
+    def create_index(self, collection: str, keys: List[Tuple[str, Any]], unique: bool = False) -> str:
+        """
+        Create index if it does not exist, on every shard of sharded collection
+
+        Args:
+            collection (str): Collection name
+            keys (List[Tuple[str, Any]]): Fields and directions
+            unique (bool, optional): Values must be unique. Defaults to False.
+
+        Returns:
+            str: Return index name, DatabaseFailure on error
+        """
+
+        if not self.__is_sharded(collection):
+            return self.__execute('create_index', collection, lambda: self.__write(collection).create_index(keys, unique=unique), True)
+
+        names: List = self.__scatter('create_index', collection, list(range(len(self.__sharding.shards))), lambda target, shard: target.create_index(keys, unique=unique), True)
+
+        return names if isinstance(names, DatabaseFailure) else names[0]
 
     def get_collection_names(self) -> List[str]:
         """
         Get list of collection names
 
         Returns:
-            List[str]: Return list of collection names
+            List[str]: Return list of collection names, DatabaseFailure on error
+        """
+
+        def operation() -> List[str]:
+            names: List[str] = self.__client.db.list_collection_names()
+
+            for shard in (self.__sharding.shards if self.__sharding else []):
+                names += [name for name in shard.db.list_collection_names() if name not in names]
+
+            return names
+
+        return self.__execute('list_collection_names', '*', operation, True)
+
+    def get_stats(self) -> Dict:
+        """
+        Get circuit breaker statistics
+
+        Returns:
+            Dict: Return breaker states and transitions per collection operation
         """
 
+        with self.__lock:
+            breakers: List = list(self.__breakers.items())
+            secondaries: Dict = {'reads': list(self.__secondary_reads), 'latency': list(self.__secondary_latency), 'lag': list(self.__secondary_lag)}
+
+        stats: Dict = {
+            'breakers': {name: breaker.get_stats() for name, breaker in breakers},
+            'secondaries': secondaries
+        }
+
+        if self.__sharding:
+            stats['shards'] = self.__sharding.get_stats()
+
+        return stats
+
+    def __read(self, collection: str, function: Callable[[pymongo.collection.Collection], Any]) -> Any:
+        """
+        Run read on node selected by routing policy of current request
+
+        Args:
+            collection (str): Collection name
+            function (Callable[[pymongo.collection.Collection], Any]): Read to run on collection
+
+        Returns:
+            Any: Return read result
+        """
+
+        state: Dict = self.__request_state.get()
+        policy: RoutingPolicy = state['policy'] if state else None
+
+        # Read your writes, primary and transaction reads
+        if not policy or policy.reads_primary() or (policy.read_your_writes and state['wrote']) or self.__session.get():
+            return function(self.__client.db[collection])
+
+        # Let driver pick node by read preference
+        if not self.__secondaries:
+            return function(self.__client.db[collection].with_options(read_preference=policy.get_read_preference()))
+
+        self.__check_lag()
+
+        # Pick nearest secondary by observed latency among those within staleness bound
+        with self.__lock:
+            nodes: List[int] = [index for index in range(len(self.__secondaries)) if self.__is_fresh(index, policy.max_staleness)]
+            node: int = min(nodes, key=lambda index: self.__secondary_latency[index]) if nodes else None
+
+        # No secondary fresh enough, driver enforces staleness
+        if node is None:
+            return function(self.__client.db[collection].with_options(read_preference=policy.get_read_preference()))
+
+        start: float = time.monotonic()
+
         try:
-            return self.__client.db.list_collection_names()
+            return function(self.__secondaries[node].db[collection])
+        finally:
+            with self.__lock:
+                self.__secondary_reads[node] += 1
+                self.__secondary_latency[node] = self.__secondary_latency[node] * 0.8 + (time.monotonic() - start) * 0.2
+
+    def __is_fresh(self, node: int, max_staleness: int) -> bool:
+        """
+        Check if secondary may serve reads of staleness bound, caller holds lock
+
+        Like the driver, lag is increased by the measurement interval.
+
+        Args:
+            node (int): Secondary number
+            max_staleness (int): Max replication lag in seconds, -1 for no limit
+
+        Returns:
+            bool: Return true if lag is within bound, false if it exceeds bound or is unknown
+        """
+
+        if max_staleness == -1:
+            return True
+
+        lag: float = self.__secondary_lag[node]
+
+        return lag is not None and lag + self.LAG_INTERVAL <= max_staleness
+
+    def __check_lag(self) -> None:
+        """
+        Measure replication lag of secondaries once per interval
+
+        Lag is the difference of last write dates reported by primary and secondary.
+        """
+
+        with self.__lock:
+            if time.monotonic() - self.__lag_checked < self.LAG_INTERVAL:
+                return
+
+            self.__lag_checked = time.monotonic()
+
+        lags: List[float] = [None] * len(self.__secondaries)
+
+        try:
+            primary: datetime.datetime = self.__client.cx.admin.command('hello')['lastWrite']['lastWriteDate']
         except Exception as e:
-            traceback.print_exc() 
-            return []                                
-  
-    def __init__(self, client: PyMongo):
+            primary = None
+
+        for node, secondary in enumerate(self.__secondaries):
+            if primary is None:
+                break
+
+            try:
+                written: datetime.datetime = secondary.cx.admin.command('hello')['lastWrite']['lastWriteDate']
+                lags[node] = max((primary - written).total_seconds(), 0.0)
+            except Exception as e:
+                continue
+
+        with self.__lock:
+            self.__secondary_lag = lags
+
+    def __codec(self, target: pymongo.collection.Collection, raw: bool) -> pymongo.collection.Collection:
+        """
+        Get collection decoding rows into RawBSONDocument if requested
+
+        Args:
+            target (pymongo.collection.Collection): Collection
+            raw (bool): Keep rows undecoded
+
+        Returns:
+            pymongo.collection.Collection: Return collection
+        """
+
+        if not raw:
+            return target
+
+        try:
+            return target.with_options(codec_options=self.__raw_codec_options)
+        except NotImplementedError:
+            # Backend without raw documents support
+            return target
+
+    def __write(self, collection: str, shard: int = None) -> pymongo.collection.Collection:
+        """
+        Get collection for write with write concern of current request
+
+        Args:
+            collection (str): Collection name
+            shard (int, optional): Shard number, main client if None. Defaults to None.
+
+        Returns:
+            pymongo.collection.Collection: Return collection
+        """
+
+        state: Dict = self.__request_state.get()
+        policy: RoutingPolicy = None
+
+        if state:
+            state['wrote'] = True
+            policy = state['policy']
+
+        write_concern: pymongo.write_concern.WriteConcern = policy.get_write_concern() if policy else None
+        client: PyMongo = self.__client if shard is None else self.__sharding.shards[shard]
+
+        if write_concern:
+            return client.db[collection].with_options(write_concern=write_concern)
+
+        return client.db[collection]
+
+    def __notify(self, collection: str, condition: Dict, result: Any, operation: Dict = None) -> Any:
+        """
+        Notify listeners about write, defer it to end of open session
+
+        Listeners are notified even after failures, as failed bulk writes may be applied partially.
+
+        Args:
+            collection (str): Collection name
+            condition (Dict): Condition pinning changed rows
+            result (Any): Write result
+            operation (Dict, optional): Update operation. Defaults to None.
+
+        Returns:
+            Any: Return write result
+        """
+
+        if not self.__listeners and not self.__batch_listeners:
+            return result
+
+        changes: List[Tuple[str, Dict, Dict]] = self.__changes.get()
+
+        if changes is not None and self.__session.get():
+            changes.append((collection, condition, operation))
+        else:
+            self.__deliver([(collection, condition, operation)])
+
+        return result
+
+    def __deliver(self, changes: List[Tuple[str, Dict, Dict]]) -> None:
+        """
+        Deliver changes to listeners
+
+        Args:
+            changes (List[Tuple[str, Dict, Dict]]): Collection names, conditions and operations
+        """
+
+        for collection, condition, operation in changes:
+            for listener in self.__listeners:
+                try:
+                    listener(collection, condition, operation)
+                except Exception as e:
+                    traceback.print_exc()
+
+        for listener in self.__batch_listeners:
+            try:
+                listener(changes)
+            except Exception as e:
+                traceback.print_exc()
+
+    def __is_sharded(self, collection: str) -> bool:
+        """
+        Check if collection is spread over shards
+
+        Args:
+            collection (str): Collection name
+
+        Returns:
+            bool: Return true for sharded collection
+        """
+
+        return self.__sharding is not None and self.__sharding.is_sharded(collection)
+
+    def __shards(self, collection: str, condition: Dict) -> List[int]:
+        """
+        Get shards possibly holding rows matching condition
+
+        Args:
+            collection (str): Collection name
+            condition (Dict): Condition for query
+
+        Returns:
+            List[int]: Return shard numbers, None for unsharded collection
+        """
+
+        return self.__sharding.shards_for(condition) if self.__is_sharded(collection) else None
+
+    def __scatter(self, operation: str, collection: str, shards: List[int], function: Callable[[pymongo.collection.Collection, int], Any], idempotent: bool) -> List:
+        """
+        Execute operation on shards in parallel, each shard behind its own circuit breaker
+
+        Args:
+            operation (str): Operation name
+            collection (str): Collection name
+            shards (List[int]): Shard numbers
+            function (Callable[[pymongo.collection.Collection, int], Any]): Operation taking shard collection and shard number
+            idempotent (bool): Operation can be safely repeated
+
+        Returns:
+            List: Return results in order of shards, first DatabaseFailure on error
+        """
+
+        def run(shard: int) -> Any:
+            target: pymongo.collection.Collection = self.__write(collection, shard) if not idempotent else self.__sharding.shards[shard].db[collection]
+            return self.__execute(operation, collection + '@' + str(shard), lambda: function(target, shard), idempotent)
+
+        results: List = self.__sharding.map(run, shards)
+
+        return next((result for result in results if isinstance(result, DatabaseFailure)), results)
+
+    def __migrate(self, collection: str, shards: List[int], condition: Dict, operation: Dict, single: bool) -> Tuple[pymongo.results.UpdateResult, List[Tuple[Dict, Dict]]]:
+        """
+        Update rows changing shard key, moving rows to their new shards
+
+        Moves are not atomic, row is inserted into new shard before it is deleted from old one.
+
+        Args:
+            collection (str): Collection name
+            shards (List[int]): Shards possibly holding rows
+            condition (Dict): Condition for query
+            operation (Dict): Values to change in rows
+            single (bool): Update first matched row only
+
+        Returns:
+            Tuple[pymongo.results.UpdateResult, List[Tuple[Dict, Dict]]]: Return update status and rows before and after update
+        """
+
+        matched: int = 0
+        modified: int = 0
+        updated: List[Tuple[Dict, Dict]] = []
+
+        for shard in shards:
+            for row in self.__write(collection, shard).find(condition).limit(1 if single else 0):
+                document: Dict = MemoryQuery.copy(row)
+                matched += 1
+
+                if MemoryQuery.update(document, operation):
+                    modified += 1
+                    target: int = self.__sharding.shard_for(document)
+
+                    if target == shard:
+                        self.__write(collection, shard).replace_one({'_id': row['_id']}, document)
+                    else:
+                        self.__write(collection, target).insert_one(document)
+                        self.__write(collection, shard).delete_one({'_id': row['_id']})
+
+                updated.append((row, document))
+
+            if single and matched:
+                break
+
+        return pymongo.results.UpdateResult({'n': matched, 'nModified': modified}, True), updated
+
+    def __execute(self, operation: str, collection: str, function: Callable[[], Any], idempotent: bool) -> Any:
+        """
+        Execute database operation behind circuit breaker, retry idempotent operations
+
+        Args:
+            operation (str): Operation name
+            collection (str): Collection name
+            function (Callable[[], Any]): Operation to execute
+            idempotent (bool): Operation can be safely repeated
+
+        Returns:
+            Any: Return operation result, DatabaseFailure on error
+        """
+
+        breaker: CircuitBreaker = self.__breaker(collection + '.' + operation)
+
+        # Fail fast while database is down
+        if not breaker.allow():
+            return DatabaseFailure(CircuitOpenError(collection + '.' + operation + ' circuit is open.'), True)
+
+        # Inside transaction whole unit of work is retried instead
+        in_session: bool = self.__session.get() is not None
+
+        attempts: int = self.__retries + 1 if idempotent and not in_session else 1
+        error: Exception = None
+
+        for attempt in range(attempts):
+            try:
+                result: Any = function()
+                breaker.record_success()
+                return result
+            except ConnectionFailure as e:
+                error = e
+
+                if in_session and e.has_error_label('TransientTransactionError'):
+                    breaker.record_failure()
+                    raise
+
+                # Full jitter exponential backoff
+                if attempt + 1 < attempts:
+                    time.sleep(random.uniform(0, min(self.__max_backoff, self.__base_backoff * 2 ** attempt)))
+            except Exception as e:
+                # Database answered, so it is not a reason to open breaker
+                breaker.record_success()
+
+                # Let unit of work retry conflicting transaction
+                if in_session and isinstance(e, PyMongoError) and e.has_error_label('TransientTransactionError'):
+                    raise
+
+                traceback.print_exc()
+                return DatabaseFailure(e, False)
+
+        # Report only failure which opened the breaker
+        if breaker.record_failure():
+            traceback.print_exception(error)
+
+        return DatabaseFailure(error, True)
+
+    def __commit(self, session: BoundSession) -> None:
+        """
+        Commit transaction, retry when commit result is unknown
+
+        Args:
+            session (BoundSession): Session with transaction in progress
+        """
+
+        for attempt in range(self.__transaction_retries + 1):
+            try:
+                session.commit_transaction()
+                return
+            except PyMongoError as e:
+                if not e.has_error_label('UnknownTransactionCommitResult') or attempt >= self.__transaction_retries:
+                    raise
+
+    def __breaker(self, name: str) -> CircuitBreaker:
+        """
+        Get or create circuit breaker
+
+        Args:
+            name (str): Breaker name
+
+        Returns:
+            CircuitBreaker: Return breaker
+        """
+
+        breaker: CircuitBreaker = self.__breakers.get(name)
+
+        if breaker:
+            return breaker
+
+        with self.__lock:
+            if name not in self.__breakers:
+                self.__breakers[name] = CircuitBreaker(self.__failure_threshold, self.__recovery_timeout)
+            return self.__breakers[name]
+
+    def __init__(self, client: PyMongo, retries: int = 3, base_backoff: float = 0.05, max_backoff: float = 1.0, failure_threshold: int = 5, recovery_timeout: float = 5.0, policies: Dict[str, RoutingPolicy] = None, secondaries: List[PyMongo] = None, unit_of_work: bool = False, transaction_retries: int = 3, raw_reads: bool = False, sharding: ShardRouter = None):
         """
         Assign mongo interface
 
         Args:
             client (PyMongo): Client for mongodb
+            retries (int, optional): Retries of idempotent reads on transient errors. Defaults to 3.
+            base_backoff (float, optional): Base backoff in seconds. Defaults to 0.05.
+            max_backoff (float, optional): Max backoff in seconds. Defaults to 1.0.
+            failure_threshold (int, optional): Consecutive failures opening breaker. Defaults to 5.
+            recovery_timeout (float, optional): Seconds before probing open breaker. Defaults to 5.0.
+            policies (Dict[str, RoutingPolicy], optional): Routing policies per route. Defaults to None.
+            secondaries (List[PyMongo], optional): Clients of secondary nodes, by default driver routes reads. Defaults to None.
+            unit_of_work (bool, optional): Run whole bulk requests in one transaction. Defaults to False.
+            transaction_retries (int, optional): Retries of transient transaction and commit errors. Defaults to 3.
+            raw_reads (bool, optional): Serve raw reads as RawBSONDocument rows encoded straight to JSON. Defaults to False.
+            sharding (ShardRouter, optional): Router spreading sharded collections over shard clients. Defaults to None.
         """
 
-        self.__client = client
\ No newline at end of file
+        self.__client = client
+        self.__secondaries: List[PyMongo] = secondaries or []
+        self.__sharding: ShardRouter = sharding
+        self.__listeners: List[Callable[[str, Dict, Dict], None]] = []
+        self.__batch_listeners: List[Callable[[List[Tuple[str, Dict, Dict]]], None]] = []
+        self.__changes: contextvars.ContextVar = contextvars.ContextVar('changes', default=None)
+        self.__policies: Dict[str, RoutingPolicy] = dict(policies or {})
+        self.__request_state: contextvars.ContextVar = contextvars.ContextVar('request_state', default=None)
+        self.__session: contextvars.ContextVar = contextvars.ContextVar('session', default=None)
+
+        self.__unit_of_work: bool = unit_of_work
+        self.__transaction_retries: int = transaction_retries
+
+        self.__raw_reads: bool = raw_reads
+        self.__raw_codec_options: CodecOptions = CodecOptions(document_class=RawBSONDocument)
+
+        self.__secondary_reads: List[int] = [0] * len(self.__secondaries)
+        self.__secondary_latency: List[float] = [0.0] * len(self.__secondaries)
+        self.__secondary_lag: List[float] = [None] * len(self.__secondaries)
+        self.__lag_checked: float = -self.LAG_INTERVAL
+
+        self.__retries: int = retries
+        self.__base_backoff: float = base_backoff
+        self.__max_backoff: float = max_backoff
+        self.__failure_threshold: int = failure_threshold
+        self.__recovery_timeout: float = recovery_timeout
+
+        self.__breakers: Dict[str, CircuitBreaker] = {}
+        self.__lock: threading.Lock = threading.Lock()
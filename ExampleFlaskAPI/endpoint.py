@@ -1,12 +1,18 @@
 import time
 import json
+import contextvars
 import werkzeug
+import urllib.parse
 import traceback
-from typing import Callable, Dict, Union, List, TypedDict, Tuple
+from typing import Callable, Dict, Union, List, TypedDict, NotRequired, Tuple
 from flask import Flask, jsonify, request
 from ExampleFlaskAPI.utils import StructureDict, Utils
 from ExampleFlaskAPI.database_bridge import DatabaseBridge
 from ExampleFlaskAPI.authorization import Authorization
+from ExampleFlaskAPI.admission_control import AdmissionController
+from ExampleFlaskAPI.media_types import MediaTypes
+from ExampleFlaskAPI.request_coalescer import RequestCoalescer
+from ExampleFlaskAPI.hot_keys import HotKeys
 
 class Endpoint: 
     """
@@ -16,9 +22,17 @@ class Endpoint:
         _mongo (DatabaseBridge): Bridge to mongodb
         _codes (Dict[int, Dict[str, str]]): List of internal server messages    
         _authorization (Authorization): Inteface for user authorization
+        _admission (AdmissionController): Admission control in front of method hooks
+        _coalescer (RequestCoalescer): Coalescer of identical concurrent reads, None when disabled
+        _hot_keys (HotKeys): Frequency of read keys, None when not counted
+        MAX_KEY_BODY (int): Max size of body counted as part of read key
         __http_status_codes (Dict[int, str]): List of HTTP codes
     """       
 
+    REVISION_MISMATCH: str = 'Revision mismatch.'
+
+    MAX_KEY_BODY: int = 1024
+
     def _route(self, **kwargs) -> str:
         """
         Initialize authorization and forward request
@@ -33,9 +47,85 @@ class Endpoint:
         # Setup default language
         language: str = 'en-EN'
         
+        access: str = self._access_method(request)
+
         # Authorize user
-        if not self._authorization.is_authorized(request, request.method):
+        if not self._authorization.is_authorized(request, access):
             return self.__response(language, 401, False, 0)
+
+        if self._hot_keys and access in ['GET', 'HEAD']:
+            key: str = Endpoint.read_key(request)
+
+            if key:
+                self._hot_keys.add(key)
+
+        # Identical concurrent reads share one call and its encoded response
+        if self._coalescer and access in ['GET', 'HEAD']:
+            return self._coalescer.run(self.__coalescing_key(request, kwargs), lambda: self.__dispatch(language, access, **kwargs))
+
+        return self.__dispatch(language, access, **kwargs)
+
+    def coalesce_reads(self, coalescer: RequestCoalescer) -> None:
+        """
+        Share calls of identical concurrent reads
+
+        Args:
+            coalescer (RequestCoalescer): Coalescer of calls, None to disable
+        """
+
+        self._coalescer = coalescer
+
+    def count_reads(self, hot_keys: HotKeys) -> None:
+        """
+        Count keys of reads to find the most frequent ones
+
+        Args:
+            hot_keys (HotKeys): Frequency sketch, None to disable
+        """
+
+        self._hot_keys = hot_keys
+
+    def warm(self, **kwargs) -> int:
+        """
+        Run method hook of current request without authorization and admission, e.g. to fill caches before serving traffic
+
+        Args:
+            **kwargs: arguments of route
+
+        Returns:
+            int: Return HTTP status of hook
+        """
+
+        routing_token: contextvars.Token = self._mongo.begin_request(request.method, request.url_rule.rule if request.url_rule else request.path)
+
+        try:
+            return getattr(self, '_' + request.method, self._NOT_ALLOWED)(request, **kwargs)[0]
+        finally:
+            self._mongo.end_request(routing_token)
+
+    def __dispatch(self, language: str, access: str, **kwargs) -> str:
+        """
+        Apply admission control and call method hook
+
+        Args:
+            language (str): Default language
+            access (str): Method checked by admission control
+            **kwargs: arguments passed by Flask
+
+        Returns:
+            str: Return server response
+        """
+
+        # Apply admission control
+        admission_name: str = type(self).__name__
+
+        if self._admission and not self._admission.acquire(admission_name, access not in ['GET', 'HEAD']):
+            return self.__response(language, 503, False, 1503, headers={'Retry-After': str(self._admission.retry_after(admission_name))})
+
+        start: float = time.monotonic()
+
+        # Bind database routing policy of route
+        routing_token: contextvars.Token = self._mongo.begin_request(request.method, request.url_rule.rule if request.url_rule else request.path)
         
         try:
             # Check for best fitting language
@@ -61,14 +151,19 @@ class Endpoint:
                 return self.__response(language, 405, False, 0)
             
             # Process request
-            response: int; success: bool; code: int; result: List
+            response: int; success: bool; code: int; result: List; headers: Dict[str, str]
 
-            response, success, code, result, *_ = method_hook(request, **kwargs) + ([],) * 4
+            response, success, code, result, headers, *_ = method_hook(request, **kwargs) + ([],) * 4
                       
-            return self.__response(language, response, success, code, result)
+            return self.__response(language, response, success, code, result, headers or None)
         except Exception as e:
             traceback.print_exc() 
             return self.__response(language, 500, False, 0)
+        finally:
+            self._mongo.end_request(routing_token)
+
+            if self._admission:
+                self._admission.release(admission_name, time.monotonic() - start)
                       
     def _GET(self, request: werkzeug.local.LocalProxy, **kwargs) -> Tuple[int, bool, int, List]:
         """
@@ -161,6 +256,92 @@ class Endpoint:
         # Return not found error
         return 404, False, 0
       
+    def __coalescing_key(self, request: werkzeug.local.LocalProxy, kwargs: Dict) -> Tuple:
+        """
+        Get key of identical reads, responses differ by route, arguments, body, permissions, language and media type
+
+        Args:
+            request (werkzeug.local.LocalProxy): Flask request
+            kwargs (Dict): arguments passed by Flask
+
+        Returns:
+            Tuple: Return hashable key
+        """
+
+        # API key is left out, keys with the same permissions see the same response
+        arguments: Tuple = tuple(sorted((name, value) for name, value in request.args.items(multi=True) if name != 'api_key'))
+
+        return (
+            id(self),
+            request.method,
+            request.url_rule.rule if request.url_rule else request.path,
+            repr(sorted(kwargs.items())),
+            arguments,
+            request.get_data(),
+            tuple(self._authorization.get_permissions(request)),
+            str(request.accept_languages.best),
+            MediaTypes.negotiate(request.accept_mimetypes)
+        )
+
+    @staticmethod
+    def read_key(request: werkzeug.local.LocalProxy) -> str:
+        """
+        Get key of read: method, path, sorted arguments without API key and body
+
+        Args:
+            request (werkzeug.local.LocalProxy): Flask request
+
+        Returns:
+            str: Return key like 'GET /api/v1/item/<serial>?a=1', None if body is above MAX_KEY_BODY
+        """
+
+        body: bytes = request.get_data()
+
+        if len(body) > Endpoint.MAX_KEY_BODY:
+            return None
+
+        arguments: str = urllib.parse.urlencode(sorted((name, value) for name, value in request.args.items(multi=True) if name != 'api_key'))
+        key: str = request.method + ' ' + urllib.parse.quote(request.path) + ('?' + arguments if arguments else '')
+
+        return key + ' ' + body.decode('utf-8', 'replace') if body else key
+
+    def _access_method(self, request: werkzeug.local.LocalProxy) -> str:
+        """
+        Get method checked by authorization and admission control, e.g. reads sent with POST body
+
+        Args:
+            request (werkzeug.local.LocalProxy): Flask request
+
+        Returns:
+            str: Return HTTP method
+        """
+
+        return request.method
+
+    def _revision_conflict(self, collection: str, condition: Dict, id: str, revision: int) -> 'OperationStatusDict':
+        """
+        Check if conditional write failed because document has other revision
+
+        Args:
+            collection (str): Collection name
+            condition (Dict): Condition to find document
+            id (str): Identifier reported in status
+            revision (int): Required revision, None if write was not conditional
+
+        Returns:
+            OperationStatusDict: Return conflict status with current revision, None if there is no conflict
+        """
+
+        if revision is None:
+            return None
+
+        document: Dict = self._mongo.find_one(collection, condition)
+
+        if not document:
+            return None
+
+        return {'id': id, 'status': False, 'message': self.REVISION_MISMATCH, 'rev': document.get('_rev', 0)}
+
     def _NOT_ALLOWED(self, request: werkzeug.local.LocalProxy, **kwargs) -> Tuple[int, bool, int, List]:
         """
         Template for NOT ALLOWED method
@@ -176,7 +357,7 @@ class Endpoint:
         # Return not allowed error
         return 405, False, 0
    
-    def __response(self, language: str, response: int, success: bool, code: int, result: List = []) -> str:
+    def __response(self, language: str, response: int, success: bool, code: int, result: List = [], headers: Dict[str, str] = None) -> str:
         """
         Build final server response
 
@@ -186,6 +367,7 @@ class Endpoint:
             success (bool): Success state
             code (int): HTTP code
             result (List): Results of operation
+            headers (Dict[str, str], optional): Additional response headers. Defaults to None.
 
         Returns:
             str: Return created final server response
@@ -199,7 +381,10 @@ class Endpoint:
 
         code, message = self.__status(language, code)                    
          
-        return json.dumps({
+        # Negotiate response format
+        media_type: str = MediaTypes.negotiate(request.accept_mimetypes)
+
+        return MediaTypes.encode({
             'response': {
                 'code': response,
                 'status': self.__http_status_codes[response]
@@ -211,7 +396,7 @@ class Endpoint:
             }, 
             'timestamp': int(time.time()), 
             'result': result
-        }, default=str), response, {'Content-Type': 'text/html; charset=utf-8'}
+        }, media_type), response, {'Content-Type': media_type + ('; charset=utf-8' if media_type == MediaTypes.JSON else ''), 'Vary': 'Accept', **(headers or {})}
         
     def __status(self, language: str, code: int) -> Tuple[int, str]:
         """
@@ -240,6 +425,67 @@ class Endpoint:
             traceback.print_exc() 
             return 0, ''
             
+    @staticmethod
+    def request_body(request: werkzeug.local.LocalProxy) -> List[Dict]:
+        """
+        Get request body decoded by its Content-Type (JSON, BSON or MessagePack)
+
+        Args:
+            request (werkzeug.local.LocalProxy): Flask request
+
+        Returns:
+            List[Dict]: Return decoded body
+        """
+
+        # Decode body once per request
+        if 'ExampleFlaskAPI.body' not in request.environ:
+            request.environ['ExampleFlaskAPI.body'] = MediaTypes.decode(request)
+
+        return request.environ['ExampleFlaskAPI.body']
+
+    @staticmethod
+    def expected_revision(request: werkzeug.local.LocalProxy) -> int:
+        """
+        Get document revision required by If-Match header
+
+        Args:
+            request (werkzeug.local.LocalProxy): Flask request
+
+        Returns:
+            int: Return expected revision, None if header is missing or '*'
+        """
+
+        if not request.if_match or request.if_match.star_tag:
+            return None
+
+        try:
+            return int(next(iter(request.if_match.as_set())))
+        except (StopIteration, ValueError):
+            # Revisions start at 1, so unparsable tag never matches
+            return 0
+
+    @staticmethod
+    def revision_response(statuses: List['OperationStatusDict'], revision: int) -> Tuple[int, bool, int, List, Dict[str, str]]:
+        """
+        Build response for operation statuses of conditional request
+
+        Args:
+            statuses (List[OperationStatusDict]): Statuses of operations
+            revision (int): Revision required by If-Match header, None if not conditional
+
+        Returns:
+            Tuple[int, bool, int, List, Dict[str, str]]: Return response, 412 on revision conflict
+        """
+
+        if revision is not None and statuses and statuses[0]['message'] == Endpoint.REVISION_MISMATCH:
+            return 412, False, 1412, statuses
+
+        # Single element reports its current revision as ETag
+        if len(statuses) == 1 and statuses[0]['status'] and 'rev' in statuses[0]:
+            return 200, True, 1200, statuses, {'ETag': '"' + str(statuses[0]['rev']) + '"'}
+
+        return 200, True, 1200, statuses
+
     @staticmethod
     def required_structure(structure: StructureDict) -> Tuple[int, bool, int, List]:
         """
@@ -256,7 +502,7 @@ class Endpoint:
             def wrapper(*args, **kwargs):
                 try:
                     # Get input data
-                    data: List[Dict] = args[1].get_json()
+                    data: List[Dict] = Endpoint.request_body(args[1])
 
                     # Check data structure
                     if not isinstance(data, list) or not Utils.check_structure(data, structure):
@@ -269,7 +515,7 @@ class Endpoint:
             return wrapper
         return decorator      
 
-    def __init__(self, mongo: DatabaseBridge, codes: Dict[int, Dict[str, str]], authorization: Authorization):   
+    def __init__(self, mongo: DatabaseBridge, codes: Dict[int, Dict[str, str]], authorization: Authorization, admission: AdmissionController = None):   
         """
         Initialize default Endpoint
 
@@ -277,11 +523,15 @@ class Endpoint:
             mongo (DatabaseBridge): Assign mongodb bridge
             codes (Dict[int, Dict[str, str]]): Assign internal server messages
             authorization (Authorization): Assign authorization class
+            admission (AdmissionController, optional): Assign admission controller. Defaults to None.
         """          
 
         self._mongo: DatabaseBridge = mongo
         self._codes: Dict[int, Dict[str, str]] = codes      
         self._authorization: Authorization = authorization
+        self._admission: AdmissionController = admission
+        self._coalescer: RequestCoalescer = None
+        self._hot_keys: HotKeys = None
         
         # HTTP status codes
         self.__http_status_codes: Dict[int, str] = {
@@ -357,4 +607,5 @@ class OperationStatusDict(TypedDict):
 
     id: str
     status: bool
-    message: str
\ No newline at end of file
+    message: str
+    rev: NotRequired[int]
\ No newline at end of file
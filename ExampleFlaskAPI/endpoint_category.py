@@ -1,13 +1,29 @@
 import werkzeug
 import traceback
-from typing import List, Dict, Tuple
+from typing import Any, Callable, List, Dict, Tuple
 from ExampleFlaskAPI.endpoint import Endpoint, OperationStatusDict
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure
+from ExampleFlaskAPI.authorization import Authorization
+from ExampleFlaskAPI.admission_control import AdmissionController
+from ExampleFlaskAPI.category_tree import CategoryTree
+from ExampleFlaskAPI.inventory_rollups import InventoryRollups
+from ExampleFlaskAPI.job_runner import JobRunner
 
 class EndpointCategory(Endpoint): 
     """
     A child class to handle category-related requests
+
+    Attributes:
+        RENAME_JOB_ITEMS (int): Renamed category with more items relabels them in background job
+        RENAME_CHUNK (int): Number of items relabeled at once by background job
+        __tree (CategoryTree): Ancestor paths, counters and cached tree of categories
+        __rollups (InventoryRollups): Rollups keyed by category name, None if not maintained
+        __jobs (JobRunner): Runner of background jobs
     """   
 
+    RENAME_JOB_ITEMS: int = 1000
+    RENAME_CHUNK: int = 500
+
     def route_category(self, **kwargs) -> str:
         """
         Forwarding to the main routing function
@@ -21,18 +37,27 @@ class EndpointCategory(Endpoint):
 
         return self._route(**kwargs)
      
-    def _GET(self, request: werkzeug.local.LocalProxy, name: str = None) -> Tuple[int, bool, int, List]:
+    def _GET(self, request: werkzeug.local.LocalProxy, name: str = None, tree: bool = False) -> Tuple[int, bool, int, List]:
         """
         Implementation of GET method for getting categories
 
         Args:
             request (werkzeug.local.LocalProxy): Flask request
             name (str): Name of category
+            tree (bool, optional): Return nested tree of all categories. Defaults to False.
 
         Returns:
             Tuple[int, bool, int, List]: Return response
         """
 
+        if tree:
+            roots: List[Dict] = self.__tree.get_tree()
+
+            if roots is None:
+                return 503, False, 1504
+
+            return 200, True, 1200, roots
+
         # Get category names
         category_names: str | List[str]= request.args.get('name', type=str)
 
@@ -45,7 +70,16 @@ class EndpointCategory(Endpoint):
             else:
                 return 400, False, 1404             
 
-        return 200, True, 1200, self._mongo.find('Category', {'name': {'$in': category_names}})
+        categories: List[Dict] = self._mongo.find('Category', {'name': {'$in': category_names}})
+
+        if isinstance(categories, DatabaseFailure):
+            return 503, False, 1504
+
+        # Single category reports its revision for If-Match
+        if len(category_names) == 1 and len(categories) == 1 and '_rev' in categories[0]:
+            return 200, True, 1200, categories, {'ETag': '"' + str(categories[0]['_rev']) + '"'}
+
+        return 200, True, 1200, categories
         
     @Endpoint.required_structure({
         'name': (str, True),             
@@ -63,25 +97,31 @@ class EndpointCategory(Endpoint):
         """
 
         # Get categories
-        categories: List = request.get_json()
+        categories: List = self.request_body(request)
         
-        names: List[str] = []
+        def process() -> List[OperationStatusDict]:
+            names: List[str] = []
                
-        statuses: List[OperationStatusDict] = []
+            statuses: List[OperationStatusDict] = []
         
-        for category in categories:
-            name: str; status: OperationStatusDict
-            name, status = self.__post_process(category, names)
+            for category in categories:
+                name: str; status: OperationStatusDict
+                name, status = self.__post_process(category, names)
             
-            names.append(name)
-            statuses.append(status)
+                names.append(name)
+                statuses.append(status)
             
-        return 200, True, 1200, statuses 
+            return statuses
+
+        # Run whole request as one unit of work when enabled
+        return 200, True, 1200, self._mongo.run_transaction(process)
     
     @Endpoint.required_structure({
         'name': (str, True),
+        '_rev': (int, False),
         'change': (
             {
+                'name': (str, False),
                 'parent_name': (str, True)
             },
             True
@@ -102,8 +142,10 @@ class EndpointCategory(Endpoint):
         
     @Endpoint.required_structure({
         'name': (str, True),
+        '_rev': (int, False),
         'change': (
             {
+                'name': (str, False),
                 'parent_name': (str, False)
             },
             False
@@ -145,13 +187,22 @@ class EndpointCategory(Endpoint):
                 categories_names = [name]
             else:
                 return 400, False, 1404
+
+        revision: int = self.expected_revision(request)
+
+        if revision is not None and len(categories_names) != 1:
+            return 400, False, 1407
         
-        statuses: OperationStatusDict = []
+        def process() -> List[OperationStatusDict]:
+            statuses: OperationStatusDict = []
         
-        for category_name in categories_names:
-            statuses.append(self.__delete_process(category_name))
+            for category_name in categories_names:
+                statuses.append(self.__delete_process(category_name, revision))
             
-        return 200, True, 1200, statuses        
+            return statuses
+
+        # Run whole request as one unit of work when enabled
+        return self.revision_response(self._mongo.run_transaction(process), revision)
 
     def __post_process(self, category: Dict, names: List[str]) -> Tuple[str, OperationStatusDict]:
         """
@@ -179,19 +230,37 @@ class EndpointCategory(Endpoint):
                     return name_response, {'id': name_response, 'status': False, 'message': 'Name already exist.'}
                     
                 # Check for parent category    
-                if len(category['parent_name']) > 0 and self._mongo.find_one('Item', {'category': category['parent_name']}):
-                    category['name'], {'id': name_response, 'status': True, 'message': 'Parent category cannot have assigned items.'}  
+                parent: Dict = None
+
+                if len(category['parent_name']) > 0:
+                    parent = self._mongo.find_one('Category', {'name': category['parent_name']})
+
+                    if not parent:
+                        return name_response, {'id': name_response, 'status': False, 'message': 'Parent category not exists.'}
+
+                    if parent.get('item_count', 0) > 0:
+                        return name_response, {'id': name_response, 'status': False, 'message': 'Parent category cannot have assigned items.'}  
+
+                # First revision of document, ancestors for subtree queries
+                category['_rev'] = 1
+                category['path'] = CategoryTree.path(parent)
+                category['child_count'] = 0
+                category['item_count'] = 0
                         
-                self._mongo.insert_one('Category', category)
+                if isinstance(self._mongo.insert_one('Category', category), DatabaseFailure):
+                    return name_response, {'id': name_response, 'status': False, 'message': 'Database operation failed.'}
+
+                self.__tree.count(category['parent_name'], 'child_count', 1)
                                                           
-        return category['name'], {'id': name_response, 'status': True, 'message': 'Category added to database.'}      
+        return category['name'], {'id': name_response, 'status': True, 'message': 'Category added to database.', 'rev': 1}      
 
-    def __delete_process(self, category_name: str) -> OperationStatusDict:
+    def __delete_process(self, category_name: str, revision: int = None) -> OperationStatusDict:
         """
         Process deletion of each category
 
         Args:
             category_name (str): Name of category
+            revision (int, optional): Required revision of category. Defaults to None.
 
         Returns:
             OperationStatusDict: Return status of operation
@@ -208,39 +277,39 @@ class EndpointCategory(Endpoint):
                 if not category:
                     return {'id': category_name, 'status': False, 'message': 'Name does not exist.'}
 
-                categories_to_check: List[str] = self.__categories_to_check(category_name)
-                
+                if revision is not None and category.get('_rev', 0) != revision:
+                    return {'id': category_name, 'status': False, 'message': self.REVISION_MISMATCH, 'rev': category.get('_rev', 0)}
+
                 # Check if have items                      
-                if self._mongo.find_one('Item', {'category': category_name}):
+                if category.get('item_count', 0) > 0:
                     return {'id': category_name, 'status': False, 'message': 'Category cannot be deleted, because have items assigned.'}
 
-                # Remove parents              
-                if len(categories_to_check) > 0 and self._mongo.update_many('Category', {'name': {'$in': categories_to_check}}, {'$set': {'parent_name': ''}}).modified_count <= 0:
-                    return {'id': category_name, 'status': False, 'message': 'Category cannot be deleted.'}
+                if category.get('child_count', 0) > 0:
+                    # Remove parents              
+                    if self._mongo.update_many('Category', {'parent_name': category_name}, {'$set': {'parent_name': ''}}).modified_count <= 0:
+                        session.abort_transaction()
+                        return {'id': category_name, 'status': False, 'message': 'Category cannot be deleted.'}
+
+                    # Children become roots, descendants drop removed ancestors
+                    if not self.__tree.move(category_name, None):
+                        session.abort_transaction()
+                        return {'id': category_name, 'status': False, 'message': 'Database operation failed.'}
                  
-                # Delete category
-                if self._mongo.delete_many('Category', {'name': category_name}).deleted_count > 0:
-                    return {'id': category_name, 'status': True, 'message': 'Category deleted.'}
+                # Delete category, revision guards against concurrent edit
+                condition: Dict = {'name': category_name}
 
-        return {'id': category_name, 'status': False, 'message': 'Category not deleted.'}        
+                if revision is not None:
+                    condition['_rev'] = revision
 
-    def __categories_to_check(self, category_name: str) -> List[str]:
-        """
-        Get the categories to check further
+                if self._mongo.delete_many('Category', condition).deleted_count > 0:
+                    self.__tree.count(category.get('parent_name'), 'child_count', -1)
 
-        Args:
-            category_name (str): Name of category
+                    return {'id': category_name, 'status': True, 'message': 'Category deleted.'}
 
-        Returns:
-            List[str]: Return list of categories
-        """
-                      
-        categories_to_check: List = self._mongo.find('Category', {'parent_name': category_name})
-                        
-        if not categories_to_check:
-            return []
+                # Children are not re-parented when category stays
+                session.abort_transaction()
 
-        return categories_to_check                     
+        return {'id': category_name, 'status': False, 'message': 'Category not deleted.'}        
 
     def __update(self, request: werkzeug.local.LocalProxy) -> Tuple[int, bool, int, List]:
         """
@@ -254,21 +323,39 @@ class EndpointCategory(Endpoint):
         """
 
         # Get categories
-        categories: List = request.get_json()        
+        categories: List = self.request_body(request)        
+
+        revision: int = self.expected_revision(request)
+
+        if revision is not None and len(categories) != 1:
+            return 400, False, 1407
                
-        statuses: List[OperationStatusDict] = []
+        def process() -> Tuple[List[OperationStatusDict], List[Tuple[OperationStatusDict, str, str, int]]]:
+            statuses: List[OperationStatusDict] = []
+            renames: List[Tuple[OperationStatusDict, str, str, int]] = []
 
-        for category in categories:
-            statuses.append(self.__update_process(category))
+            for category in categories:
+                statuses.append(self.__update_process(category, category.get('_rev', revision), renames))
             
-        return 200, True, 1200, statuses
+            return statuses, renames
+
+        # Run whole request as one unit of work when enabled
+        statuses, renames = self._mongo.run_transaction(process)
+
+        # Items of large categories are relabeled in background once renames are committed
+        for status, name, new_name, item_count in renames:
+            status['job'] = self.__relabel(name, new_name, item_count)
 
-    def __update_process(self, category: Dict) -> OperationStatusDict:
+        return self.revision_response(statuses, revision)
+
+    def __update_process(self, category: Dict, revision: int = None, renames: List[Tuple[OperationStatusDict, str, str, int]] = None) -> OperationStatusDict:
         """
         Process each category update
 
         Args:
             category (Dict): Category informations
+            revision (int, optional): Required revision of category. Defaults to None.
+            renames (List[Tuple[OperationStatusDict, str, str, int]], optional): Receives status, old and new name and item count of renamed categories whose items are relabeled after commit. Defaults to None.
 
         Returns:
             OperationStatusDict: Return status of operation
@@ -279,33 +366,175 @@ class EndpointCategory(Endpoint):
         if len(name_response) < 1:
             return {'id': name_response, 'status': False, 'message': 'Missing name.'}
         
-        # Begin mongodb transaction
-        with self._mongo.start_session() as session:
-            with session.start_transaction(): 
-                # Check if category exist
-                if not self._mongo.find_one('Category', {'name': name_response}):
-                    return {'id': name_response, 'status': False, 'message': 'Name not exists.'}
-                    
-                update: Dict = category['change']
-                  
-                if 'parent_name' in update and len(update['parent_name']) > 0:
-                    if name_response == update['parent_name']:
-                        return {'id': name_response, 'status': False, 'message': 'Cannot set same category as parent.'}
-
-                    # Check if already exist
-                    if not self._mongo.find_one('Category', {'name': update['parent_name']}):
-                        return {'id': name_response, 'status': False, 'message': 'Parent category not exists.'}
-
-                    # Check if parent have items assigned
-                    if self._mongo.find_one('Item', {'category': update['parent_name']}):                  
-                        return {'id': name_response, 'status': False, 'message': 'Category cannot be parent.'} 
-                                                      
-                # Update category               
-                if self._mongo.update_one('Category', {'name': name_response}, {'$set': update}).modified_count > 0:
-                    return {'id': name_response, 'status': True, 'message': 'Category changed.'}
-                
-                return {'id': name_response, 'status': False, 'message': 'No modifications were made.'}    
+        update: Dict = category.get('change', {})
+        path: List[str] = []
+          
+        if 'parent_name' in update and len(update['parent_name']) > 0:
+            if name_response == update['parent_name']:
+                return {'id': name_response, 'status': False, 'message': 'Cannot set same category as parent.'}
+
+            # Check if already exist
+            parent: Dict = self._mongo.find_one('Category', {'name': update['parent_name']})
+
+            if not parent:
+                return {'id': name_response, 'status': False, 'message': 'Parent category not exists.'}
+
+            path = CategoryTree.path(parent)
+
+            if name_response in path:
+                return {'id': name_response, 'status': False, 'message': 'Cannot set descendant category as parent.'}
+
+            # Check if parent have items assigned
+            if parent.get('item_count', 0) > 0:                  
+                return {'id': name_response, 'status': False, 'message': 'Category cannot be parent.'} 
+
+        new_name: str = update.get('name', name_response)
+
+        if 'name' in update:
+            if len(new_name) < 1:
+                return {'id': name_response, 'status': False, 'message': 'Need to provide name.'}
+
+            if new_name != name_response and self._mongo.find_one('Category', {'name': new_name}):
+                return {'id': name_response, 'status': False, 'message': 'Name already exist.'}
+
+        if not update:
+            return {'id': name_response, 'status': False, 'message': 'No modifications were made.'}
+                                              
+        condition: Dict = {'name': name_response}
+
+        if revision is not None:
+            condition['_rev'] = revision
+
+        document: Dict
+        item_count: int = None
+
+        if 'parent_name' not in update and new_name == name_response:
+            # Single conditional write, no transaction needed
+            document = self._mongo.find_one_and_update('Category', condition, {'$set': update, '$inc': {'_rev': 1}}, {'_rev': True})
+        else:
+            # Moved or renamed category rewrites its subtree, child counters of parents and items
+            with self._mongo.start_session() as session:
+                with session.start_transaction():
+                    changes: Dict = {**update, 'path': path} if 'parent_name' in update else update
+
+                    previous: Dict = self._mongo.find_one_and_update('Category', condition, {'$set': changes, '$inc': {'_rev': 1}}, {'_rev': True, 'parent_name': True, 'path': True, 'item_count': True}, before=True)
+                    document = {'_rev': previous.get('_rev', 0) + 1} if previous else None
+
+                    if previous:
+                        parent_name: str = update.get('parent_name', previous.get('parent_name'))
+
+                        if 'parent_name' not in update:
+                            path = previous.get('path') or []
+
+                        if previous.get('parent_name') != parent_name:
+                            self.__tree.count(previous.get('parent_name'), 'child_count', -1)
+                            self.__tree.count(parent_name, 'child_count', 1)
+
+                        renamed: bool = True
+
+                        if new_name != name_response:
+                            item_count = previous.get('item_count', 0)
+                            renamed = self.__rename_process(name_response, new_name, item_count)
+
+                        # Rename, counters and paths are kept or dropped together
+                        if not renamed or not self.__tree.move(name_response, path, new_name):
+                            session.abort_transaction()
+                            return {'id': name_response, 'status': False, 'message': 'Database operation failed.'}
+
+        if document:
+            status: OperationStatusDict = {'id': name_response, 'status': True, 'message': 'Category changed.', 'rev': document['_rev']}
+
+            # Items of large category are relabeled after commit
+            if item_count is not None and item_count > self.RENAME_JOB_ITEMS and renames is not None:
+                renames.append((status, name_response, new_name, item_count))
+
+            return status
+        
+        return self._revision_conflict('Category', {'name': name_response}, name_response, revision) or {'id': name_response, 'status': False, 'message': 'Name not exists.'}    
         
+    def __rename_process(self, name: str, new_name: str, item_count: int) -> bool:
+        """
+        Follow category rename in children, rollups and items, items of large category are left to background job
+
+        Args:
+            name (str): Old name of category
+            new_name (str): New name of category
+            item_count (int): Number of items assigned to category
+
+        Returns:
+            bool: Return true if done
+        """
+
+        # Children keep their parent under new name
+        if isinstance(self._mongo.update_many('Category', {'parent_name': name}, {'$set': {'parent_name': new_name}}), DatabaseFailure):
+            return False
+
+        if self.__rollups:
+            self.__rollups.rename('category', name, new_name)
+
+        if item_count <= self.RENAME_JOB_ITEMS:
+            return not isinstance(self._mongo.update_many('Item', {'category': name}, {'$set': {'category': new_name}, '$inc': {'_rev': 1}}), DatabaseFailure)
+
+        return True
+
+    def __relabel(self, name: str, new_name: str, item_count: int) -> str:
+        """
+        Relabel items of committed rename in background job, at once when job cannot be stored
+
+        Args:
+            name (str): Old name of category
+            new_name (str): New name of category
+            item_count (int): Number of items assigned to category
+
+        Returns:
+            str: Return id of background job, None if items were relabeled at once
+        """
+
+        job: str = self.__jobs.submit('category_rename', item_count, lambda progress: self.__relabel_items(name, new_name, progress))
+
+        if job is None:
+            try:
+                self.__relabel_items(name, new_name, lambda done: None)
+            except Exception:
+                traceback.print_exc()
+
+        return job
+
+    def __relabel_items(self, name: str, new_name: str, progress: Callable[[int], None]) -> Dict:
+        """
+        Background job moving items to renamed category in chunks
+
+        Args:
+            name (str): Old name of category
+            new_name (str): New name of category
+            progress (Callable[[int], None]): Reports number of relabeled items
+
+        Raises:
+            Exception: Database operation failed
+
+        Returns:
+            Dict: Return number of relabeled items
+        """
+
+        done: int = 0
+
+        while True:
+            items: List[Dict] = self._mongo.find('Item', {'category': name}, 0, self.RENAME_CHUNK)
+
+            if isinstance(items, DatabaseFailure):
+                raise items.error
+
+            if not items:
+                return {'items': done}
+
+            result: Any = self._mongo.update_many('Item', {'_id': {'$in': [item['_id'] for item in items]}, 'category': name}, {'$set': {'category': new_name}, '$inc': {'_rev': 1}})
+
+            if isinstance(result, DatabaseFailure):
+                raise result.error
+
+            done += result.modified_count
+            progress(done)
+
     def __category_name(self, category: Dict) -> str:
         """
         Get category name
@@ -346,3 +575,23 @@ class EndpointCategory(Endpoint):
             return {'id': name, 'status': False, 'message': 'Choose base category as parent.'}
             
         return None
+
+    def __init__(self, mongo: DatabaseBridge, codes: Dict[int, Dict[str, str]], authorization: Authorization, admission: AdmissionController = None, tree: CategoryTree = None, rollups: InventoryRollups = None, jobs: JobRunner = None):
+        """
+        Initialize category endpoint
+
+        Args:
+            mongo (DatabaseBridge): Assign mongodb bridge
+            codes (Dict[int, Dict[str, str]]): Assign internal server messages
+            authorization (Authorization): Assign authorization class
+            admission (AdmissionController, optional): Assign admission controller. Defaults to None.
+            tree (CategoryTree, optional): Ancestor paths, counters and cached tree of categories. Defaults to own tree.
+            rollups (InventoryRollups, optional): Rollups keyed by category name. Defaults to None.
+            jobs (JobRunner, optional): Runner of background jobs. Defaults to own runner.
+        """
+
+        super().__init__(mongo, codes, authorization, admission)
+
+        self.__tree: CategoryTree = tree or CategoryTree(mongo)
+        self.__rollups: InventoryRollups = rollups
+        self.__jobs: JobRunner = jobs or JobRunner(mongo)
@@ -1,13 +1,35 @@
 import werkzeug
 import traceback
-from typing import Callable, Dict, Union, List, Tuple
+from typing import Any, Callable, Dict, Union, List, Set, Tuple
 from ExampleFlaskAPI.endpoint import Endpoint, OperationStatusDict
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure
+from ExampleFlaskAPI.authorization import Authorization
+from ExampleFlaskAPI.admission_control import AdmissionController
+from ExampleFlaskAPI.inventory_rollups import InventoryRollups
+from ExampleFlaskAPI.category_tree import CategoryTree
+from ExampleFlaskAPI.memory_storage import MemoryQuery
+from ExampleFlaskAPI.item_cache import ItemCache
+from ExampleFlaskAPI.serial_filter import SerialFilter
+from ExampleFlaskAPI.write_batcher import WriteBatcher
+from ExampleFlaskAPI.job_runner import JobRunner
+from pymongo.errors import DuplicateKeyError
 
 class EndpointItem(Endpoint):  
     """
     A child class to handle item-related requests
+
+    Attributes:
+        __rollups (InventoryRollups): Rollups updated by item writes, None if not maintained
+        __tree (CategoryTree): Keeps item counters of categories
+        __cache (ItemCache): Items by serial number, None if reads go to database
+        __filter (SerialFilter): Existing serial numbers, None if every insert looks serial up
+        __batcher (WriteBatcher): Group commit of concurrent single-item POSTs, None if each is written alone
+        __jobs (JobRunner): Runner of asynchronous bulk writes
+        ASYNC_CHUNK (int): Items processed in one transaction by asynchronous bulk write
     """   
 
+    ASYNC_CHUNK: int = 1000
+
     def route_item(self, **kwargs) -> str:
         """
         Forwarding to the main routing function
@@ -45,7 +67,19 @@ class EndpointItem(Endpoint):
             else:
                 return 400, False, 1401       
         
-        return 200, True, 1200, self._mongo.find('Item', {'serial_number': {'$in': item_serials}})
+        if self.__cache:
+            items: List[Dict] = self.__cache.get_many(item_serials)
+        else:
+            items: List[Dict] = self._mongo.find('Item', {'serial_number': {'$in': item_serials}}, raw=True)
+
+        if isinstance(items, DatabaseFailure):
+            return 503, False, 1504
+
+        # Single item reports its revision for If-Match
+        if len(item_serials) == 1 and len(items) == 1 and '_rev' in items[0]:
+            return 200, True, 1200, items, {'ETag': '"' + str(items[0]['_rev']) + '"'}
+
+        return 200, True, 1200, items
 
     @Endpoint.required_structure({
         'serial_number': (str, True),
@@ -77,24 +111,21 @@ class EndpointItem(Endpoint):
         """
 
         # Get items
-        items: List = request.get_json()        
-        
-        serials: List[str] = []
-               
-        statuses: List[OperationStatusDict] = []
-      
-        for item in items:
-            serial: str; status: OperationStatusDict
+        items: List = self.request_body(request)        
 
-            serial, status = self.__post_process(item, serials)
-            
-            serials.append(serial)
-            statuses.append(status)
-            
-        return 200, True, 1200, statuses
+        if self.__is_async(request):
+            return self.__submit('item_post', items, {})
+
+        # Single items of concurrent requests are written together
+        if self.__batcher and len(items) == 1:
+            return 200, True, 1200, [self.__batcher.submit(items[0], self.__post_batch)]
+
+        # Run whole request as one unit of work when enabled
+        return 200, True, 1200, self._mongo.run_transaction(lambda: self.__post_chunk(items, {}))
 
     @Endpoint.required_structure({
         'serial_number': (str, True),
+        '_rev': (int, False),
         'change': (
             {
                 'name': (str, True),
@@ -131,6 +162,7 @@ class EndpointItem(Endpoint):
         
     @Endpoint.required_structure({
         'serial_number': (str, True),
+        '_rev': (int, False),
         'change': (
             {
                 'name': (str, False),
@@ -187,19 +219,115 @@ class EndpointItem(Endpoint):
             if not serial_number:
                 return 400, False, 1401                
             items_serials = [serial_number]        
+
+        revision: int = self.expected_revision(request)
+
+        if revision is not None and len(items_serials) != 1:
+            return 400, False, 1407
         
+        if self.__is_async(request):
+            return self.__submit('item_delete', items_serials, {'revision': revision})
+
+        # Run whole request as one unit of work when enabled
+        return self.revision_response(self._mongo.run_transaction(lambda: self.__delete_chunk(items_serials, {'revision': revision})), revision)
+
+    def __post_chunk(self, items: List[Dict], options: Dict) -> List[OperationStatusDict]:
+        """
+        Add items one by one, used by POST and asynchronous POST jobs
+
+        Args:
+            items (List[Dict]): Items
+            options (Dict): Job options, none used
+
+        Returns:
+            List[OperationStatusDict]: Return status of each item
+        """
+
         serials: List[str] = []
-        
-        statuses: List[OperationStatusDict] = []     
-        
-        for item in items_serials:
-            serial: str; status: OperationStatusDict            
-            serial, status = self.__delete_process(item, serials)
+        statuses: List[OperationStatusDict] = []
+
+        for item in items:
+            serial: str; status: OperationStatusDict
+
+            serial, status = self.__post_process(item, serials)
 
             serials.append(serial)
             statuses.append(status)
-                    
-        return 200, True, 1200, statuses   
+
+        return statuses
+
+    def __update_chunk(self, items: List[Dict], options: Dict) -> List[OperationStatusDict]:
+        """
+        Update items one by one, used by PUT, PATCH and asynchronous update jobs
+
+        Args:
+            items (List[Dict]): Serial numbers with changes
+            options (Dict): Job options, 'revision' required for items without own '_rev'
+
+        Returns:
+            List[OperationStatusDict]: Return status of each item
+        """
+
+        return [self.__update_process(item, item.get('_rev', options.get('revision'))) for item in items]
+
+    def __delete_chunk(self, items: List[str], options: Dict) -> List[OperationStatusDict]:
+        """
+        Delete items one by one, used by DELETE and asynchronous DELETE jobs
+
+        Args:
+            items (List[str]): Serial numbers
+            options (Dict): Job options, 'revision' required for items
+
+        Returns:
+            List[OperationStatusDict]: Return status of each item
+        """
+
+        serials: List[str] = []
+        statuses: List[OperationStatusDict] = []
+
+        for item in items:
+            serial: str; status: OperationStatusDict
+
+            serial, status = self.__delete_process(item, serials, options.get('revision'))
+
+            serials.append(serial)
+            statuses.append(status)
+
+        return statuses
+
+    @staticmethod
+    def __is_async(request: werkzeug.local.LocalProxy) -> bool:
+        """
+        Check if bulk write is asked to run in background job
+
+        Args:
+            request (werkzeug.local.LocalProxy): Flask request
+
+        Returns:
+            bool: Return True for async=true
+        """
+
+        return str(request.args.get('async', '')).lower() in ['true', '1']
+
+    def __submit(self, kind: str, items: List, options: Dict) -> Tuple[int, bool, int, List]:
+        """
+        Submit bulk write as chunked background job
+
+        Args:
+            kind (str): Kind of job
+            items (List): Items or serial numbers
+            options (Dict): Job options
+
+        Returns:
+            Tuple[int, bool, int, List]: Return 202 with job id, 503 on database error
+        """
+
+        job: str = self.__jobs.submit_chunked(kind, items, options, self.ASYNC_CHUNK)
+
+        if job is None:
+            return 503, False, 1504
+
+        return 202, True, 1202, [{'job': job, 'total': len(items)}]
 
     def __post_process(self, item: Dict, serials: List[str]) -> Tuple[str, OperationStatusDict]:
         """
@@ -219,34 +347,169 @@ class EndpointItem(Endpoint):
         if 'serial_number' in item:
             serial_number_response: str = str(item['serial_number'])                   
         
+        # Duplicate key error would abort transaction of outer unit of work, serial is looked up there
+        joined: bool = self._mongo.in_transaction()
+
         # Start mongo transaction
         with self._mongo.start_session() as session:
             with session.start_transaction():
-                # Check if serial number exists
-                if self._mongo.find_one('Item', {'serial_number': item['serial_number']}) or item['serial_number'] in serials:
+                # Check if serial number exists, serial surely missing from filter is left to unique index
+                if item['serial_number'] in serials or self.__exists(item['serial_number'], not joined):
                     return serial_number_response, {'id': serial_number_response, 'status': False, 'message': 'Serial number already exist.'}
                 
                 # Get category
                 if len(item['category']) > 0:
                     category: OperationStatusDict = self.__check_category(serial_number_response, item['category'])
                     if (category):
-                        return category
+                        return serial_number_response, category
 
                 # Validate price
                 if item['price'] < 0:
                     return serial_number_response, {'id': serial_number_response, 'status': False, 'message': 'Price must be greater than 0.'}            
+
+                # First revision of document
+                item['_rev'] = 1
                         
-                self._mongo.insert_one('Item', item)
+                result: Any = self._mongo.insert_one('Item', item)
+
+                if isinstance(result, DatabaseFailure):
+                    # Server aborted transaction already, commit would fail
+                    session.abort_transaction()
+
+                    if isinstance(result.error, DuplicateKeyError):
+                        return serial_number_response, {'id': serial_number_response, 'status': False, 'message': 'Serial number already exist.'}
+
+                    return serial_number_response, {'id': serial_number_response, 'status': False, 'message': 'Database operation failed.'}
+
+                if self.__filter:
+                    self.__filter.add(item['serial_number'])
+
+                self.__tree.count(item['category'], 'item_count', 1)
+
+                if self.__rollups:
+                    self.__rollups.apply(None, item)
                     
-        return serial_number_response, {'id': serial_number_response, 'status': True, 'message': 'Item added to database.'}       
+        return serial_number_response, {'id': serial_number_response, 'status': True, 'message': 'Item added to database.', 'rev': 1}       
+
+    def __post_batch(self, items: List[Dict]) -> List[OperationStatusDict]:
+        """
+        Validate items of concurrent POSTs together and insert valid ones with one insert_many
+
+        Args:
+            items (List[Dict]): Items in order of arrival, the first of repeated serial numbers wins
+
+        Returns:
+            List[OperationStatusDict]: Return status of each item
+        """
+
+        serials: List[str] = [str(item['serial_number']) for item in items]
+        statuses: List[OperationStatusDict] = [None] * len(items)
+
+        # One lookup of serials which may exist
+        candidates: List[str] = [serial for serial in dict.fromkeys(serials) if not self.__filter or self.__filter.might_contain(serial)]
+        existing: List[Dict] = self._mongo.find('Item', {'serial_number': {'$in': candidates}}, projection={'serial_number': True}) if candidates else []
+
+        if isinstance(existing, DatabaseFailure):
+            return [self.__post_process(item, [])[1] for item in items]
+
+        found: Set[str] = {row['serial_number'] for row in existing}
+
+        if self.__filter:
+            for serial in candidates:
+                if serial not in found:
+                    self.__filter.record_false_positive()
+
+        # One check of every category
+        categories: Dict[str, OperationStatusDict] = {name: self.__check_category('', name) for name in {item['category'] for item in items if len(item['category']) > 0}}
+        valid: List[int] = []
+
+        for index, item in enumerate(items):
+            serial: str = serials[index]
+
+            if serial in found:
+                statuses[index] = {'id': serial, 'status': False, 'message': 'Serial number already exist.'}
+            elif categories.get(item['category']):
+                statuses[index] = {**categories[item['category']], 'id': serial}
+            elif item['price'] < 0:
+                statuses[index] = {'id': serial, 'status': False, 'message': 'Price must be greater than 0.'}
+            else:
+                # First revision of document
+                item['_rev'] = 1
+                found.add(serial)
+                valid.append(index)
+
+        if not valid:
+            return statuses
+
+        inserted: List[int] = valid
+
+        with self._mongo.start_session() as session:
+            with session.start_transaction():
+                result: Any = self._mongo.insert_many('Item', [items[index] for index in valid])
+
+                if isinstance(result, DatabaseFailure):
+                    # Server aborted transaction already, commit would fail
+                    session.abort_transaction()
+                else:
+                    self.__post_inserted([items[index] for index in valid])
+
+        if isinstance(result, DatabaseFailure):
+            # Rows of sharded collection are written outside of transaction and may stay, the rest is written one by one
+            rows: List[Dict] = self._mongo.find('Item', {'_id': {'$in': [items[index]['_id'] for index in valid if '_id' in items[index]]}}, projection={'_id': True})
+
+            # Unknown which rows were written, counters are fixed by repair
+            if isinstance(rows, DatabaseFailure):
+                for index in valid:
+                    statuses[index] = {'id': serials[index], 'status': False, 'message': 'Database operation failed.'}
+
+                return statuses
+
+            written: Set = {row['_id'] for row in rows}
+            inserted = [index for index in valid if items[index].get('_id') in written]
+
+            self.__post_inserted([items[index] for index in inserted])
+
+            for index in valid:
+                if index not in inserted:
+                    items[index].pop('_id', None)
+                    del items[index]['_rev']
+                    statuses[index] = self.__post_process(items[index], [])[1]
+
+        for index in inserted:
+            statuses[index] = {'id': serials[index], 'status': True, 'message': 'Item added to database.', 'rev': 1}
+
+        return statuses
+
+    def __post_inserted(self, items: List[Dict]) -> None:
+        """
+        Update category counters, rollups and serial filter after insert of items
+
+        Args:
+            items (List[Dict]): Inserted items
+        """
+
+        counts: Dict[str, int] = {}
+
+        for item in items:
+            counts[item['category']] = counts.get(item['category'], 0) + 1
+
+            if self.__rollups:
+                self.__rollups.apply(None, item)
+
+            if self.__filter:
+                self.__filter.add(item['serial_number'])
+
+        for category, count in counts.items():
+            self.__tree.count(category, 'item_count', count)
 
-    def __delete_process(self, item: str, serials: List[str]) -> Tuple[str, OperationStatusDict]:
+    def __delete_process(self, item: str, serials: List[str], revision: int = None) -> Tuple[str, OperationStatusDict]:
         """
         Process delete of each item
 
         Args:
             item (str): Serial number
             serials (List[str]): List of serials already deleted in current DELETE operation
+            revision (int, optional): Required revision of item. Defaults to None.
 
         Returns:
             Tuple[str, OperationStatusDict]: Return serial number and status of operation
@@ -254,17 +517,33 @@ class EndpointItem(Endpoint):
 
         serial_number_response: str = item              
         
-        # Start mongo transaction
+        # Check if serial number exists
+        if item in serials:
+            return serial_number_response, {'id': serial_number_response, 'status': False, 'message': 'Serial number already deleted.'}
+
+        # Conditional write, counters and rollups follow it in the same transaction
+        condition: Dict = {'serial_number': item}
+
+        if revision is not None:
+            condition['_rev'] = revision
+
         with self._mongo.start_session() as session:
             with session.start_transaction():
-                # Check if serial number exists
-                if item in serials:
-                    return serial_number_response, {'id': serial_number_response, 'status': False, 'message': 'Serial number already deleted.'}
+                # Deleted item is needed to update its category and rollups
+                document: Dict = self._mongo.find_one_and_delete('Item', condition, InventoryRollups.PROJECTION)
+
+                if document:
+                    if not self.__tree.count(document.get('category'), 'item_count', -1) or (self.__rollups and not self.__rollups.apply(document, None)):
+                        session.abort_transaction()
+                        return serial_number_response, {'id': serial_number_response, 'status': False, 'message': 'Database operation failed.'}
+
+        if document:
+            if self.__filter:
+                self.__filter.remove(item)
 
-                if self._mongo.delete_many('Item', {'serial_number': {'$in': [item]}}).deleted_count > 0:
-                    return serial_number_response, {'id': serial_number_response, 'status': True, 'message': 'Item deleted from database.'} 
+            return serial_number_response, {'id': serial_number_response, 'status': True, 'message': 'Item deleted from database.'} 
 
-        return serial_number_response, {'id': serial_number_response, 'status': False, 'message': 'Delete action failed.'}            
+        return serial_number_response, self._revision_conflict('Item', {'serial_number': item}, item, revision) or {'id': serial_number_response, 'status': False, 'message': 'Delete action failed.'}            
 
     def __update(self, request: werkzeug.local.LocalProxy) -> Tuple[int, bool, int, List]:
         """
@@ -278,24 +557,29 @@ class EndpointItem(Endpoint):
         """
 
         # Get items
-        items: List = request.get_json()
+        items: List = self.request_body(request)
         
         if not isinstance(items, list):
             return 400, False, 1403
+
+        revision: int = self.expected_revision(request)
+
+        if revision is not None and len(items) != 1:
+            return 400, False, 1407
         
-        statuses: List[OperationStatusDict] = []     
-        
-        for item in items:            
-            statuses.append(self.__update_process(item))
-                    
-        return 200, True, 1200, statuses   
+        if self.__is_async(request):
+            return self.__submit('item_update', items, {'revision': revision})
+
+        # Run whole request as one unit of work when enabled
+        return self.revision_response(self._mongo.run_transaction(lambda: self.__update_chunk(items, {'revision': revision})), revision)
 
-    def __update_process(self, item: Dict) -> OperationStatusDict:
+    def __update_process(self, item: Dict, revision: int = None) -> OperationStatusDict:
         """
         Process update of each item
 
         Args:
             item (Dict): Item informations
+            revision (int, optional): Required revision of item. Defaults to None.
 
         Returns:
             OperationStatusDict: Return status of operation
@@ -305,27 +589,80 @@ class EndpointItem(Endpoint):
         
         update: Dict = item['change']
         
-        # Begin mongodb transaction
-        with self._mongo.start_session() as session:
-            with session.start_transaction():
-                # Get category
-                if len(update['category']) > 0:
-                    category: OperationStatusDict = self.__check_category(serial_number_response, update['category'])
-                    if (category):
-                        return category
+        # Get category
+        if 'category' in update and len(update['category']) > 0:
+            category: OperationStatusDict = self.__check_category(serial_number_response, update['category'])
+            if (category):
+                return category
 
-                # Validate price
-                if 'price' in update and update['price'] < 0:
-                    return serial_number_response, {'id': serial_number_response, 'status': False, 'message': 'Price must be greater than 0.'}                   
+        # Validate price
+        if 'price' in update and update['price'] < 0:
+            return {'id': serial_number_response, 'status': False, 'message': 'Price must be greater than 0.'}                   
+
+        if not update:
+            return {'id': serial_number_response, 'status': False, 'message': 'No modifications were made.'}
+
+        # Conditional write, counters and rollups follow it in the same transaction
+        condition: Dict = {'serial_number': serial_number_response}
+
+        if revision is not None:
+            condition['_rev'] = revision
+
+        operation: Dict = {'$set': update, '$inc': {'_rev': 1}}
+        document: Dict
+
+        # Item before update is needed to move it between categories and rollups
+        if self.__rollups or 'category' in update:
+            with self._mongo.start_session() as session:
+                with session.start_transaction():
+                    document = self._mongo.find_one_and_update('Item', condition, operation, InventoryRollups.PROJECTION, before=True)
+
+                    if document:
+                        previous: Dict = document
+                        document = MemoryQuery.copy(previous)
+                        MemoryQuery.update(document, operation)
 
-                if self._mongo.update_one('Item', {'serial_number': item['serial_number']}, {'$set': update}).modified_count > 0:
-                    return {'id': serial_number_response, 'status': True, 'message': 'Item updated.'}  
+                        counted: bool = previous.get('category') == document.get('category') or (self.__tree.count(previous.get('category'), 'item_count', -1) and self.__tree.count(document.get('category'), 'item_count', 1))
+
+                        if not counted or (self.__rollups and not self.__rollups.apply(previous, document)):
+                            session.abort_transaction()
+                            return {'id': serial_number_response, 'status': False, 'message': 'Database operation failed.'}
+        else:
+            document = self._mongo.find_one_and_update('Item', condition, operation, {'_rev': True})
+
+        if document:
+            return {'id': serial_number_response, 'status': True, 'message': 'Item updated.', 'rev': document['_rev']}  
                     
-        return {'id': serial_number_response, 'status': False, 'message': 'No modifications were made.'}
+        return self._revision_conflict('Item', {'serial_number': serial_number_response}, serial_number_response, revision) or {'id': serial_number_response, 'status': False, 'message': 'No modifications were made.'}
+
+    def __exists(self, serial_number: str, skip: bool = True) -> bool:
+        """
+        Check if item with serial number exists, skip lookup of serial surely missing from filter
+
+        Args:
+            serial_number (str): Serial number
+            skip (bool, optional): Serial surely missing from filter is not looked up. Defaults to True.
+
+        Returns:
+            bool: Return True if item exists
+        """
+
+        if skip and self.__filter and not self.__filter.might_contain(serial_number):
+            return False
+
+        document: Dict = self._mongo.find_one('Item', {'serial_number': serial_number})
+
+        if document:
+            return True
+
+        if self.__filter and not isinstance(document, DatabaseFailure):
+            self.__filter.record_false_positive()
+
+        return False
 
     def __check_category(self, serial_number: str, category_name: str) -> OperationStatusDict:
         """
-        Check if category exist and if have parent
+        Check if category exist and has no children
 
         Args:
             serial_number (str): Serial number of item
@@ -340,7 +677,38 @@ class EndpointItem(Endpoint):
         if not category:
             return {'id': serial_number, 'status': False, 'message': 'Category does not exist.'}
 
-        if self._mongo.find_one('Category', {'parent_name': category_name}):    
+        if category.get('child_count', 0) > 0:    
             return {'id': serial_number, 'status': False, 'message': 'Choose other category than parent.'}      
 
         return None
+
+    def __init__(self, mongo: DatabaseBridge, codes: Dict[int, Dict[str, str]], authorization: Authorization, admission: AdmissionController = None, rollups: InventoryRollups = None, tree: CategoryTree = None, cache: ItemCache = None, serials: SerialFilter = None, batcher: WriteBatcher = None, jobs: JobRunner = None):
+        """
+        Initialize item endpoint
+
+        Args:
+            mongo (DatabaseBridge): Assign mongodb bridge
+            codes (Dict[int, Dict[str, str]]): Assign internal server messages
+            authorization (Authorization): Assign authorization class
+            admission (AdmissionController, optional): Assign admission controller. Defaults to None.
+            rollups (InventoryRollups, optional): Rollups to update with item writes. Defaults to None.
+            tree (CategoryTree, optional): Keeps item counters of categories. Defaults to own tree.
+            cache (ItemCache, optional): Cache of items by serial number. Defaults to None.
+            serials (SerialFilter, optional): Filter of existing serial numbers. Defaults to None.
+            batcher (WriteBatcher, optional): Group commit of concurrent single-item POSTs. Defaults to None.
+            jobs (JobRunner, optional): Runner of asynchronous bulk writes. Defaults to own runner.
+        """
+
+        super().__init__(mongo, codes, authorization, admission)
+
+        self.__rollups: InventoryRollups = rollups
+        self.__tree: CategoryTree = tree or CategoryTree(mongo)
+        self.__cache: ItemCache = cache
+        self.__filter: SerialFilter = serials
+        self.__batcher: WriteBatcher = batcher
+        self.__jobs: JobRunner = jobs or JobRunner(mongo)
+
+        # Chunks of asynchronous bulk writes, also of jobs resumed after restart
+        self.__jobs.register('item_post', self.__post_chunk)
+        self.__jobs.register('item_update', self.__update_chunk)
+        self.__jobs.register('item_delete', self.__delete_chunk)
@@ -0,0 +1,86 @@
+import werkzeug
+from typing import Dict, List, Tuple
+from ExampleFlaskAPI.endpoint_search_items import EndpointSearchItems
+from ExampleFlaskAPI.database_bridge import DatabaseBridge
+from ExampleFlaskAPI.authorization import Authorization
+from ExampleFlaskAPI.admission_control import AdmissionController
+from ExampleFlaskAPI.item_snapshot import ItemSnapshot
+from ExampleFlaskAPI.category_tree import CategoryTree
+
+class EndpointItemStats(EndpointSearchItems):
+    """
+    A child class to compute item statistics from columnar snapshot, filtered like item search
+
+    Attributes:
+        __snapshot (ItemSnapshot): Columnar snapshot of items
+    """
+
+    def route_item_stats(self, **kwargs) -> str:
+        """
+        Forwarding to the main routing function
+
+        Args:
+            **kwargs: arguments passed by Flask
+
+        Returns:
+            str: Return server response
+        """
+
+        return self._route(**kwargs)
+
+    def _GET(self, request: werkzeug.local.LocalProxy) -> Tuple[int, bool, int, List]:
+        """
+        Implementation of GET method to compute item statistics
+
+        Args:
+            request (werkzeug.local.LocalProxy): Flask request
+
+        Returns:
+            Tuple[int, bool, int, List]: Return response
+        """
+
+        query: Dict
+
+        _, query = self._GET_items(request)
+
+        if query is None:
+            return 503, False, 1504
+
+        group_by: str = request.args.get('group_by')
+
+        try:
+            percentiles: List[float] = [float(value) for value in request.args.get('percentiles', '50,90,99').split(',')]
+            bins: int = int(request.args.get('bins', '10'))
+        except ValueError:
+            return 400, False, 1408, []
+
+        if group_by:
+            group_by = group_by.replace('_', '.')
+
+        # Snapshot holds no text, full-text search is not supported here
+        if (group_by and group_by not in ItemSnapshot.GROUPS) or '$text' in query or not all(0 <= percentile <= 100 for percentile in percentiles) or not 1 <= bins <= 1000:
+            return 400, False, 1408, []
+
+        stats: Dict = self.__snapshot.aggregate(query, group_by, percentiles, bins)
+
+        if stats is None:
+            return 503, False, 1504
+
+        return 200, True, 1200, [stats]
+
+    def __init__(self, mongo: DatabaseBridge, codes: Dict[int, Dict[str, str]], authorization: Authorization, snapshot: ItemSnapshot, admission: AdmissionController = None, tree: CategoryTree = None):
+        """
+        Initialize item statistics endpoint
+
+        Args:
+            mongo (DatabaseBridge): Assign mongodb bridge
+            codes (Dict[int, Dict[str, str]]): Assign internal server messages
+            authorization (Authorization): Assign authorization class
+            snapshot (ItemSnapshot): Columnar snapshot of items
+            admission (AdmissionController, optional): Assign admission controller. Defaults to None.
+            tree (CategoryTree, optional): Resolves category subtrees. Defaults to own tree.
+        """
+
+        super().__init__(mongo, codes, authorization, admission, tree)
+
+        self.__snapshot: ItemSnapshot = snapshot
@@ -0,0 +1,79 @@
+import werkzeug
+from typing import Dict, List, Tuple
+from ExampleFlaskAPI.endpoint import Endpoint
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure
+from ExampleFlaskAPI.authorization import Authorization
+from ExampleFlaskAPI.admission_control import AdmissionController
+from ExampleFlaskAPI.job_runner import JobRunner
+
+class EndpointJobs(Endpoint):
+    """
+    A child class to report state of background jobs
+
+    Attributes:
+        __jobs (JobRunner): Runner of background jobs
+        MAX_LIMIT (int): Max number of unit statuses in one page
+    """
+
+    MAX_LIMIT: int = 1000
+
+    def route_jobs(self, **kwargs) -> str:
+        """
+        Forwarding to the main routing function
+
+        Args:
+            **kwargs: arguments passed by Flask
+
+        Returns:
+            str: Return server response
+        """
+
+        return self._route(**kwargs)
+
+    def _GET(self, request: werkzeug.local.LocalProxy, job_id: str = None) -> Tuple[int, bool, int, List]:
+        """
+        Implementation of GET method for getting job state, chunked jobs add page of unit statuses chosen by skip and limit
+
+        Args:
+            request (werkzeug.local.LocalProxy): Flask request
+            job_id (str): Job id
+
+        Returns:
+            Tuple[int, bool, int, List]: Return response
+        """
+
+        job: Dict = self.__jobs.get(job_id)
+
+        if job is None:
+            return 503, False, 1504
+
+        if not job:
+            return 404, False, 0
+
+        if 'chunk' in job:
+            skip: int = max(request.args.get('skip', 0, type=int), 0)
+            limit: int = min(max(request.args.get('limit', 100, type=int), 1), self.MAX_LIMIT)
+            statuses: List[Dict] = self.__jobs.get_statuses(job_id, skip, limit)
+
+            if isinstance(statuses, DatabaseFailure):
+                return 503, False, 1504
+
+            job = {**job, 'statuses': list(statuses), 'skip': skip, 'limit': limit}
+
+        return 200, True, 1200, [job]
+
+    def __init__(self, mongo: DatabaseBridge, codes: Dict[int, Dict[str, str]], authorization: Authorization, jobs: JobRunner, admission: AdmissionController = None):
+        """
+        Initialize jobs endpoint
+
+        Args:
+            mongo (DatabaseBridge): Assign mongodb bridge
+            codes (Dict[int, Dict[str, str]]): Assign internal server messages
+            authorization (Authorization): Assign authorization class
+            jobs (JobRunner): Runner of background jobs
+            admission (AdmissionController, optional): Assign admission controller. Defaults to None.
+        """
+
+        super().__init__(mongo, codes, authorization, admission)
+
+        self.__jobs: JobRunner = jobs
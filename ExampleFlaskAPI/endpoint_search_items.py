@@ -1,14 +1,28 @@
 import werkzeug
 import traceback
 from flask import Flask, jsonify, request
-from typing import List, Dict, Tuple
+from typing import Any, List, Dict, Tuple
 from ExampleFlaskAPI.endpoint import Endpoint
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure
+from ExampleFlaskAPI.authorization import Authorization
+from ExampleFlaskAPI.admission_control import AdmissionController
+from ExampleFlaskAPI.category_tree import CategoryTree
+from ExampleFlaskAPI.search_query import SearchQuery
+from ExampleFlaskAPI.result_cache import ResultCache
 
 class EndpointSearchItems(Endpoint):
     """
     A child class to handle item search requests
+
+    Attributes:
+        SORTABLE (List[str]): Parameter names of fields allowed in sort, backed by indexes created with endpoint
+        __tree (CategoryTree): Resolves category subtrees
+        __queries (SearchQuery): Compiler of search queries sent with POST
+        __cache (ResultCache): Cache of search results, None for no caching
     """   
 
+    SORTABLE: List[str] = ['price', 'location_room', 'location_bookcase', 'location_shelf', 'location_cuvette', 'location_column', 'location_row']
+
     def route_search_items(self, **kwargs) -> str:
         """
         Forwarding to the main routing function
@@ -36,11 +50,14 @@ class EndpointSearchItems(Endpoint):
         collection_name: str = ''
         query: Dict = {}
          
-        collection_name, query = self.__GET_items(request)
+        collection_name, query = self._GET_items(request)
 
         if len(collection_name) <= 0:
             return 400, False, 1406, []
 
+        if query is None:
+            return 503, False, 1504
+
         skip: int = 0
         limit: int = -1
 
@@ -52,9 +69,98 @@ class EndpointSearchItems(Endpoint):
         if limit_value:
             limit = int(float(limit_value))            
 
-        return 200, True, 1200, list(self._mongo.find(collection_name, query, skip, limit))
+        return self.__find(collection_name, query, skip, limit, request.args.get('sort', type=str))
+
+    def _POST(self, request: werkzeug.local.LocalProxy) -> Tuple[int, bool, int, List]:
+        """
+        Implementation of POST method to search items with query in body, e.g.
+        {"filter": {"or": [{"field": "location_room", "in": [3]}, {"field": "price", "lt": 5}]}, "sort": "price", "skip": 0, "limit": 10},
+        sent as JSON, BSON or MessagePack
+
+        Args:
+            request (werkzeug.local.LocalProxy): Flask request
+
+        Returns:
+            Tuple[int, bool, int, List]: Return response
+        """
+
+        try:
+            body: Dict = self.request_body(request)
+        except Exception:
+            body = None
+
+        if not isinstance(body, dict):
+            return 400, False, 1411, [{'message': 'Search body must be an object.'}]
+
+        try:
+            query: Dict = self.__queries.compile(body.get('filter') or {})
+            skip: int = int(body.get('skip', 0))
+            limit: int = int(body.get('limit', -1))
+        except (TypeError, ValueError) as error:
+            return 400, False, 1411, [{'message': str(error)}]
+
+        text: Any = body.get('q')
+
+        if isinstance(text, str) and text.strip():
+            query['$text'] = {'$search': text.strip()}
+
+        return self.__find('Item', query, skip, limit, body.get('sort'))
+
+    def _access_method(self, request: werkzeug.local.LocalProxy) -> str:
+        """
+        Search sent with POST body is a read
+
+        Args:
+            request (werkzeug.local.LocalProxy): Flask request
+
+        Returns:
+            str: Return HTTP method
+        """
+
+        return 'GET' if request.method == 'POST' else request.method
+
+    def __find(self, collection_name: str, query: Dict, skip: int, limit: int, sort_value: str) -> Tuple[int, bool, int, List]:
+        """
+        Find page of items matching query
+
+        Args:
+            collection_name (str): Collection name
+            query (Dict): Mongo filter
+            skip (int): Number of items to skip
+            limit (int): Max number of items, no limit when negative
+            sort_value (str): Sort parameter, e.g. 'price,-location_room'
+
+        Returns:
+            Tuple[int, bool, int, List]: Return response
+        """
+
+        sort: List[Tuple[str, Any]] = self.__sort(sort_value) if sort_value is None or isinstance(sort_value, str) else None
+
+        if sort is None:
+            return 400, False, 1410, []
+
+        projection: Dict = None
+
+        # Full-text matches come with their relevance, best first unless sorted otherwise
+        if '$text' in query:
+            projection = {'score': {'$meta': 'textScore'}}
+            sort = sort or [('score', {'$meta': 'textScore'})]
+
+        # Unique tiebreaker keeps pages stable
+        if sort:
+            sort.append(('_id', 1))
 
-    def __GET_items(self, request: werkzeug.local.LocalProxy) -> Tuple [str, Dict]:
+        def load() -> List:
+            return self._mongo.find(collection_name, query, skip, limit, raw=True, sort=sort, projection=projection)
+
+        items: List[Dict] = self.__cache.fetch(collection_name, ResultCache.key(collection_name, query, skip, limit, sort, projection), load) if self.__cache else load()
+
+        if isinstance(items, DatabaseFailure):
+            return 503, False, 1504
+
+        return 200, True, 1200, list(items)
+
+    def _GET_items(self, request: werkzeug.local.LocalProxy) -> Tuple [str, Dict]:
         """
         Implementation of GET method to search items
 
@@ -62,7 +168,7 @@ class EndpointSearchItems(Endpoint):
             request (werkzeug.local.LocalProxy): Flask request
 
         Returns:
-            Tuple[str, Dict]: Return collection name and query
+            Tuple[str, Dict]: Return collection name and query, query is None on database error
         """   
 
         query: Dict = {}
@@ -79,6 +185,26 @@ class EndpointSearchItems(Endpoint):
         self.__split_values_list(query, 'location_column', request, True, int)
         self.__split_values_list(query, 'location_row', request, True, int)
 
+        # Full-text search over name and description
+        text: str = request.args.get('q', type=str)
+
+        if text and text.strip():
+            query['$text'] = {'$search': text.strip()}
+
+        # Categories with all their descendants
+        subtree: str = request.args.get('category_subtree', type=str)
+
+        if subtree:
+            names: List[str] = self.__tree.subtree([name.strip() for name in subtree.split(',')])
+
+            if names is None:
+                return 'Item', None
+
+            if 'category' in query:
+                names = [name for name in names if name in query['category']['$in']]
+
+            query['category'] = {'$in': names}
+
         return 'Item', query
 
     def __split_values_list(self, query: Dict, name: str, values: request, range: bool, value_type: type) -> None:
@@ -112,15 +238,85 @@ class EndpointSearchItems(Endpoint):
                     temp_query["$lte"] = value_type(float(max))
 
                 if len(temp_query) > 0:
-                    query[name.replace("_", ".")] = temp_query    
+                    query[EndpointSearchItems.__path(name)] = temp_query    
                     return
 
             direct: str = values.args.get(name, type=str)
 
             if direct:
-                query[name.replace("_", ".")] = {"$in": [value_type(v.strip()) for v in direct.split(',')]}
+                query[EndpointSearchItems.__path(name)] = {"$in": [value_type(v.strip()) for v in direct.split(',')]}
                 
             return None
         except:
             traceback.print_exc()
-            return      
\ No newline at end of file
+            return
+
+    def __sort(self, value: str) -> List[Tuple[str, int]]:
+        """
+        Translate sort parameter, e.g. 'price,-location_room', to sort keys and directions
+
+        Args:
+            value (str): Comma separated parameter names, '-' prefix for descending order
+
+        Returns:
+            List[Tuple[str, int]]: Return sort keys and directions, empty if not given, None if a field is not sortable
+        """
+
+        sort: List[Tuple[str, int]] = []
+
+        for name in (value or '').split(','):
+            name = name.strip()
+
+            if not name:
+                continue
+
+            direction: int = -1 if name.startswith('-') else 1
+            name = name.lstrip('+-')
+
+            if name not in self.SORTABLE:
+                return None
+
+            sort.append((EndpointSearchItems.__path(name), direction))
+
+        return sort
+
+    @staticmethod
+    def __path(name: str) -> str:
+        """
+        Translate parameter name to document path, e.g. location_room to location.room
+
+        Args:
+            name (str): Parameter name
+
+        Returns:
+            str: Return dotted path
+        """
+
+        return name.replace('location_', 'location.', 1) if name.startswith('location_') else name
+
+    def __init__(self, mongo: DatabaseBridge, codes: Dict[int, Dict[str, str]], authorization: Authorization, admission: AdmissionController = None, tree: CategoryTree = None, queries: SearchQuery = None, cache: ResultCache = None):
+        """
+        Initialize item search endpoint
+
+        Args:
+            mongo (DatabaseBridge): Assign mongodb bridge
+            codes (Dict[int, Dict[str, str]]): Assign internal server messages
+            authorization (Authorization): Assign authorization class
+            admission (AdmissionController, optional): Assign admission controller. Defaults to None.
+            tree (CategoryTree, optional): Resolves category subtrees. Defaults to own tree.
+            queries (SearchQuery, optional): Compiler of search queries. Defaults to own compiler.
+            cache (ResultCache, optional): Cache of search results. Defaults to None.
+        """
+
+        super().__init__(mongo, codes, authorization, admission)
+
+        # Full-text search of q parameter
+        mongo.create_index('Item', [('name', 'text'), ('description', 'text')])
+
+        # Sorts end with '_id' tiebreaker, so one index serves whole sort
+        for name in self.SORTABLE:
+            mongo.create_index('Item', [(EndpointSearchItems.__path(name), 1), ('_id', 1)])
+
+        self.__tree: CategoryTree = tree or CategoryTree(mongo)
+        self.__queries: SearchQuery = queries or SearchQuery()
+        self.__cache: ResultCache = cache
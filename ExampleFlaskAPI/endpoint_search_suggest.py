@@ -0,0 +1,71 @@
+import werkzeug
+from typing import Dict, List, Tuple
+from ExampleFlaskAPI.endpoint import Endpoint
+from ExampleFlaskAPI.database_bridge import DatabaseBridge
+from ExampleFlaskAPI.authorization import Authorization
+from ExampleFlaskAPI.admission_control import AdmissionController
+from ExampleFlaskAPI.item_suggestions import ItemSuggestions
+
+class EndpointSearchSuggest(Endpoint):
+    """
+    A child class to suggest item names and serial numbers for typed prefix
+
+    Attributes:
+        MAX_LIMIT (int): Max number of suggestions per request
+        __suggestions (ItemSuggestions): Sorted array of names and serial numbers
+    """
+
+    MAX_LIMIT: int = 100
+
+    def route_search_suggest(self, **kwargs) -> str:
+        """
+        Forwarding to the main routing function
+
+        Args:
+            **kwargs: arguments passed by Flask
+
+        Returns:
+            str: Return server response
+        """
+
+        return self._route(**kwargs)
+
+    def _GET(self, request: werkzeug.local.LocalProxy) -> Tuple[int, bool, int, List]:
+        """
+        Implementation of GET method to suggest items, served without database round trip
+
+        Args:
+            request (werkzeug.local.LocalProxy): Flask request
+
+        Returns:
+            Tuple[int, bool, int, List]: Return response
+        """
+
+        prefix: str = request.args.get('prefix', type=str)
+        limit: int = request.args.get('limit', 10, type=int)
+
+        if not prefix or not prefix.strip():
+            return 400, False, 1409, []
+
+        suggestions: List[Dict] = self.__suggestions.suggest(prefix.strip(), max(1, min(limit, self.MAX_LIMIT)))
+
+        if suggestions is None:
+            return 503, False, 1504
+
+        return 200, True, 1200, suggestions
+
+    def __init__(self, mongo: DatabaseBridge, codes: Dict[int, Dict[str, str]], authorization: Authorization, suggestions: ItemSuggestions, admission: AdmissionController = None):
+        """
+        Initialize suggestion endpoint
+
+        Args:
+            mongo (DatabaseBridge): Assign mongodb bridge
+            codes (Dict[int, Dict[str, str]]): Assign internal server messages
+            authorization (Authorization): Assign authorization class
+            suggestions (ItemSuggestions): Sorted array of names and serial numbers
+            admission (AdmissionController, optional): Assign admission controller. Defaults to None.
+        """
+
+        super().__init__(mongo, codes, authorization, admission)
+
+        self.__suggestions: ItemSuggestions = suggestions
@@ -0,0 +1,67 @@
+import werkzeug
+from typing import Callable, Dict, List, Tuple
+from ExampleFlaskAPI.endpoint import Endpoint
+from ExampleFlaskAPI.database_bridge import DatabaseBridge
+from ExampleFlaskAPI.authorization import Authorization
+
+class EndpointStats(Endpoint):
+    """
+    A child class to expose runtime statistics
+
+    Attributes:
+        __providers (Dict[str, Callable[[], Dict]]): Statistics providers by name
+    """
+
+    def route_stats(self, **kwargs) -> str:
+        """
+        Forwarding to the main routing function
+
+        Args:
+            **kwargs: arguments passed by Flask
+
+        Returns:
+            str: Return server response
+        """
+
+        return self._route(**kwargs)
+
+    def _GET(self, request: werkzeug.local.LocalProxy, name: str = None) -> Tuple[int, bool, int, List]:
+        """
+        Implementation of GET method for getting statistics
+
+        Args:
+            request (werkzeug.local.LocalProxy): Flask request
+            name (str): Name of statistics provider
+
+        Returns:
+            Tuple[int, bool, int, List]: Return response
+        """
+
+        if not name:
+            return 200, True, 1200, [{name: provider() for name, provider in self.__providers.items()}]
+
+        if name not in self.__providers:
+            return 404, False, 0
+
+        stats: Dict = self.__providers[name]()
+
+        # Providers reading database return None when it is unavailable
+        if stats is None:
+            return 503, False, 1504
+
+        return 200, True, 1200, [stats]
+
+    def __init__(self, mongo: DatabaseBridge, codes: Dict[int, Dict[str, str]], authorization: Authorization, providers: Dict[str, Callable[[], Dict]]):
+        """
+        Initialize statistics endpoint
+
+        Args:
+            mongo (DatabaseBridge): Assign mongodb bridge
+            codes (Dict[int, Dict[str, str]]): Assign internal server messages
+            authorization (Authorization): Assign authorization class
+            providers (Dict[str, Callable[[], Dict]]): Statistics providers by name
+        """
+
+        super().__init__(mongo, codes, authorization)
+
+        self.__providers: Dict[str, Callable[[], Dict]] = providers
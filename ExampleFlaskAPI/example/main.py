@@ -4,16 +4,34 @@ import random
 import math
 import traceback
 import uuid
+import atexit
+import sys
 from flask import Flask, jsonify, request
 from flask_pymongo import PyMongo
 from typing import Dict, List
 from ExampleFlaskAPI.database_bridge import DatabaseBridge
 from ExampleFlaskAPI.authorization import Authorization
 from ExampleFlaskAPI.api import API
+from ExampleFlaskAPI.routing_policy import RoutingPolicy
+from ExampleFlaskAPI.memory_storage import MemoryStorage
+from ExampleFlaskAPI.shard_router import ShardRouter
+from ExampleFlaskAPI.inventory_rollups import InventoryRollups
+from ExampleFlaskAPI.category_tree import CategoryTree
+from ExampleFlaskAPI.hot_keys import HotKeys
+from ExampleFlaskAPI.write_batcher import WriteBatcher
 
 # Custom MongoDB URI
 MONGODB_URI: str = 'mongodb+srv://<nickname>:<password>@<server_ip>/<database_name>?retryWrites=true&w=majority'
 
+# Snapshot file of local in-memory storage, set to run without MongoDB
+MEMORY_STORAGE_PATH: str = None
+
+# MongoDB URIs of shards holding items, empty keeps items in main database
+SHARD_URIS: List[str] = []
+
+# Snapshot file of most frequent reads, saved on exit and read on start to pre-warm caches
+HOT_KEYS_PATH: str = None
+
 # Example list of 50 parts
 example_industrial_communication_elements: Dict[str, str] = {
     "PLC module": "Controls industrial processes with programmable logic.",
@@ -115,18 +133,74 @@ def input_random_data(mongo: DatabaseBridge, category_count: int = 2, part_count
     mongo.insert_many('Category', category_rows)
     mongo.insert_many('Item', part_rows)
 
-def main():  
-    # Initialize Flask app
-    app: any = Flask(__name__)
+    # Compute paths and counters of categories
+    CategoryTree(mongo).repair()
+
+def create_client(app: any) -> PyMongo | MemoryStorage:
+    """
+    Create database client, local storage if its path is set
+
+    Args:
+        app (any): Flask app
+
+    Returns:
+        PyMongo | MemoryStorage: Return database client
+    """
+
+    if MEMORY_STORAGE_PATH:
+        # Use local storage, saved on exit
+        client: MemoryStorage = MemoryStorage(MEMORY_STORAGE_PATH)
+        atexit.register(client.snapshot)
+        return client
 
     # Provide mongodb URI
     app.config['MONGO_URI'] = MONGODB_URI
-    
+
     # Create database client
-    client: PyMongo = PyMongo(app)
+    return PyMongo(app)
+
+def rollups():
+    """
+    Rebuild inventory rollups from items and print drift, only report it with --verify
+    """
+
+    app: any = Flask(__name__)
 
-    # Create mongo bridge
-    mongo: DatabaseBridge = DatabaseBridge(client)
+    report: Dict = InventoryRollups(DatabaseBridge(create_client(app))).rebuild('--verify' in sys.argv[1:])
+
+    print(json.dumps(report, indent=2, default=str))
+
+    sys.exit(1 if report is None or (report['drift'] and not report['rebuilt']) else 0)
+
+def categories():
+    """
+    Recompute ancestor paths and counters of categories and print number of repaired ones
+    """
+
+    app: any = Flask(__name__)
+
+    repaired: int = CategoryTree(DatabaseBridge(create_client(app))).repair()
+
+    print(json.dumps({'repaired': repaired}, indent=2))
+
+    sys.exit(1 if repaired is None else 0)
+
+def main():  
+    # Initialize Flask app
+    app: any = Flask(__name__)
+
+    client: PyMongo | MemoryStorage = create_client(app)
+
+    # Spread items over shards by serial number
+    sharding: ShardRouter = ShardRouter([PyMongo(app, uri) for uri in SHARD_URIS]) if SHARD_URIS else None
+
+    # Create mongo bridge, serve hot reads from secondaries
+    mongo: DatabaseBridge = DatabaseBridge(client, sharding=sharding, policies={
+        'GET /api/v1/item': RoutingPolicy('nearest', 90),
+        'GET /api/v1/item/<serial_number>': RoutingPolicy('nearest', 90),
+        'GET /api/v1/search/items': RoutingPolicy('nearest', 90),
+        'POST /api/v1/item': RoutingPolicy(write_concern={'w': 1})
+    })
 
     authorization: Authorization = Authorization()
 
@@ -137,10 +211,15 @@ def main():
     authorization.create_session('example_delete', ['DELETE'])
     authorization.create_session('example_all', ['READ', 'CREATE', 'UPDATE', 'DELETE']) 
 
-    # Initialize API object
-    API(app, mongo, authorization)
-    
+    # Count reads, saved on exit
+    hot_keys: HotKeys = HotKeys(HOT_KEYS_PATH)
+    atexit.register(hot_keys.save)
+
+    # Seed data first, API loads serial filter and suggestions from it
     input_random_data(mongo)
 
+    # Initialize API object, scanners posting single items are written in batches
+    API(app, mongo, authorization, hot_keys=hot_keys, batcher=WriteBatcher())
+
     # Run app
     app.run(debug=True)
\ No newline at end of file
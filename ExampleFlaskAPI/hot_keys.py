@@ -0,0 +1,226 @@
+import os
+import json
+import math
+import array
+import heapq
+import hashlib
+import threading
+from typing import Dict, List, Tuple
+
+class HotKeys:
+    """
+    Frequency of request keys estimated by a count-min sketch, with the most frequent keys kept
+
+    The sketch is a table of counters, every key raises one counter in each row, chosen by
+    its hash. The smallest of them is an estimate never below the true count, above it by at
+    most e / width of all counts with high probability. Only counters equal to the smallest
+    are raised, which keeps estimates closer. The most frequent keys are kept in a min-heap
+    of estimates: a key enters when its estimate passes the smallest kept one. Memory does
+    not grow with the number of distinct keys.
+
+    Snapshot on disk holds the top keys with their counts. A started worker restores it with
+    counts halved, so keys hot yesterday but not today fade out over days.
+
+    Attributes:
+        __path (str): Snapshot file, None if not saved
+        __width (int): Counters in a row
+        __depth (int): Rows of counters
+        __size (int): Number of kept keys
+        __rows (List[array.array]): Counters
+        __top (Dict[str, int]): Estimates of kept keys
+        __heap (List[Tuple[int, str]]): Estimates and keys, entries not matching kept estimates are stale
+        __total (int): Sum of counts
+        __restored (List[str]): Keys of restored snapshot, most frequent first
+        __lock (threading.Lock): Guards sketch and kept keys
+    """
+
+    def add(self, key: str, count: int = 1) -> int:
+        """
+        Count key
+
+        Args:
+            key (str): Request key
+            count (int, optional): Occurrences. Defaults to 1.
+
+        Returns:
+            int: Return estimated count of key
+        """
+
+        cells: List[int] = self.__cells(key)
+
+        with self.__lock:
+            estimate: int = min(row[cell] for row, cell in zip(self.__rows, cells)) + count
+
+            for row, cell in zip(self.__rows, cells):
+                if row[cell] < estimate:
+                    row[cell] = estimate
+
+            self.__total += count
+            self.__offer(key, estimate)
+
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        """
+        Get estimated count of key
+
+        Args:
+            key (str): Request key
+
+        Returns:
+            int: Return estimate, never below true count
+        """
+
+        cells: List[int] = self.__cells(key)
+
+        with self.__lock:
+            return min(row[cell] for row, cell in zip(self.__rows, cells))
+
+    def top(self, limit: int = None) -> List[Tuple[str, int]]:
+        """
+        Get most frequent keys
+
+        Args:
+            limit (int, optional): Max number of keys. Defaults to all kept keys.
+
+        Returns:
+            List[Tuple[str, int]]: Return keys and estimates, most frequent first
+        """
+
+        with self.__lock:
+            keys: List[Tuple[str, int]] = sorted(self.__top.items(), key=lambda entry: (-entry[1], entry[0]))
+
+        return keys[:limit] if limit is not None else keys
+
+    def save(self) -> bool:
+        """
+        Write top keys to snapshot file, replacing it at once
+
+        Returns:
+            bool: Return True if written, False if no path is set
+        """
+
+        if not self.__path:
+            return False
+
+        temporary: str = self.__path + '.tmp'
+
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump({'keys': self.top()}, file)
+
+        os.replace(temporary, self.__path)
+
+        return True
+
+    def restored(self) -> List[str]:
+        """
+        Get keys of snapshot restored at start, e.g. to pre-warm caches
+
+        Returns:
+            List[str]: Return keys, most frequent first
+        """
+
+        return list(self.__restored)
+
+    def get_stats(self) -> Dict:
+        """
+        Get sketch statistics and top keys
+
+        Returns:
+            Dict: Return counted requests, sketch shape, memory, error bound and top keys
+        """
+
+        with self.__lock:
+            total: int = self.__total
+
+        return {
+            'requests': total,
+            'width': self.__width,
+            'depth': self.__depth,
+            'memory': sum(row.itemsize * len(row) for row in self.__rows),
+            'error': math.ceil(math.e / self.__width * total),
+            'confidence': 1 - math.exp(-self.__depth),
+            'top': [{'key': key, 'count': count} for key, count in self.top()]
+        }
+
+    def __offer(self, key: str, estimate: int) -> None:
+        """
+        Keep key if among most frequent, caller holds the lock
+
+        Args:
+            key (str): Request key
+            estimate (int): Estimated count of key
+        """
+
+        if key not in self.__top and len(self.__top) >= self.__size:
+            # Drop stale entries from top of heap
+            while self.__top.get(self.__heap[0][1]) != self.__heap[0][0]:
+                heapq.heappop(self.__heap)
+
+            if estimate <= self.__heap[0][0]:
+                return
+
+            del self.__top[heapq.heappop(self.__heap)[1]]
+
+        self.__top[key] = estimate
+        heapq.heappush(self.__heap, (estimate, key))
+
+        # Every update of kept key leaves a stale entry behind
+        if len(self.__heap) > 4 * self.__size:
+            self.__heap = [(count, name) for name, count in self.__top.items()]
+            heapq.heapify(self.__heap)
+
+    def __cells(self, key: str) -> List[int]:
+        """
+        Get counter of key in every row, each row hashed by its own 4 bytes of one digest
+
+        Args:
+            key (str): Request key
+
+        Returns:
+            List[int]: Return counter index by row
+        """
+
+        digest: bytes = hashlib.blake2b(key.encode('utf-8'), digest_size=4 * self.__depth).digest()
+
+        return [int.from_bytes(digest[4 * row:4 * row + 4], 'little') % self.__width for row in range(self.__depth)]
+
+    def __restore(self) -> None:
+        """
+        Count keys of snapshot file with halved counts
+        """
+
+        with open(self.__path, 'r', encoding='utf-8') as file:
+            keys: List = json.load(file).get('keys', [])
+
+        for key, count in keys:
+            if count // 2:
+                self.add(key, count // 2)
+
+        self.__restored = [key for key, _ in keys]
+
+    def __init__(self, path: str = None, width: int = 4096, depth: int = 4, size: int = 50):
+        """
+        Create empty sketch, restore snapshot if its file exists
+
+        Args:
+            path (str, optional): Snapshot file. Defaults to None.
+            width (int, optional): Counters in a row, error bound is e / width of all counts. Defaults to 4096.
+            depth (int, optional): Rows of counters, up to 16, bound holds with probability 1 - e ^ -depth. Defaults to 4.
+            size (int, optional): Number of kept keys. Defaults to 50.
+        """
+
+        self.__path: str = path
+        self.__width: int = width
+        self.__depth: int = depth
+        self.__size: int = size
+
+        self.__rows: List[array.array] = [array.array('q', bytes(8 * width)) for _ in range(depth)]
+        self.__top: Dict[str, int] = {}
+        self.__heap: List[Tuple[int, str]] = []
+        self.__total: int = 0
+        self.__restored: List[str] = []
+        self.__lock: threading.Lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            self.__restore()
@@ -0,0 +1,259 @@
+import math
+from typing import Any, Dict, List, Tuple
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure
+from ExampleFlaskAPI.memory_storage import MemoryQuery
+
+class InventoryRollups:
+    """
+    Materialized item count, price sum and price bounds per category and per room
+
+    Rollup rows are keyed by dimension and group key and updated with $inc, $min and $max
+    next to every item write, so reads cost one row per group. Removing an item holding
+    a price bound marks bounds of its group as loose, they are recomputed on next read.
+
+    Attributes:
+        COLLECTION (str): Collection of rollup rows
+        DIMENSIONS (Dict[str, str]): Item paths of rollup dimensions
+        PROJECTION (Dict[str, bool]): Item fields needed to apply a change
+        TOLERANCE (float): Difference of price sums not reported as drift
+        __mongo (DatabaseBridge): Bridge to mongodb
+    """
+
+    COLLECTION: str = 'Rollup'
+    DIMENSIONS: Dict[str, str] = {'category': 'category', 'room': 'location.room'}
+    PROJECTION: Dict[str, bool] = {'_rev': True, 'price': True, 'category': True, 'location.room': True}
+    TOLERANCE: float = 1e-6
+
+    def apply(self, before: Dict, after: Dict) -> bool:
+        """
+        Update rollups of groups touched by item change
+
+        Args:
+            before (Dict): Item before change, None for insert
+            after (Dict): Item after change, None for delete
+
+        Returns:
+            bool: Return False if any rollup write failed
+        """
+
+        results: List[Any] = []
+
+        for dimension, path in self.DIMENSIONS.items():
+            old_key: Any; old_price: float; new_key: Any; new_price: float
+            old_key, old_price = InventoryRollups.__group(before, path)
+            new_key, new_price = InventoryRollups.__group(after, path)
+
+            same: bool = before is not None and after is not None and MemoryQuery.hash_key(old_key) == MemoryQuery.hash_key(new_key)
+
+            if same and old_price == new_price:
+                continue
+
+            if after is not None:
+                increments: Dict[str, float] = {'count': 0, 'sum': new_price - old_price} if same else {'count': 1, 'sum': new_price}
+                results.append(self.__mongo.update_one(self.COLLECTION, {'_id': InventoryRollups.__id(dimension, new_key)}, {'$inc': increments, '$min': {'min': new_price}, '$max': {'max': new_price}}, True))
+
+            if before is not None:
+                if not same:
+                    results.append(self.__mongo.update_one(self.COLLECTION, {'_id': InventoryRollups.__id(dimension, old_key)}, {'$inc': {'count': -1, 'sum': -old_price}}))
+
+                # Removed price may have been a bound of its group
+                results.append(self.__mongo.update_one(self.COLLECTION, {'_id': InventoryRollups.__id(dimension, old_key), '$or': [{'min': {'$gte': old_price}}, {'max': {'$lte': old_price}}]}, {'$set': {'loose': True}}))
+
+        return not any(isinstance(result, DatabaseFailure) for result in results)
+
+    def rename(self, dimension: str, key: Any, new_key: Any) -> None:
+        """
+        Move rollup of group to new key, merge it with rollup already stored there
+
+        Args:
+            dimension (str): Dimension name
+            key (Any): Old group key
+            new_key (Any): New group key
+        """
+
+        row: Dict = self.__mongo.find_one_and_delete(self.COLLECTION, {'_id': InventoryRollups.__id(dimension, key)})
+
+        if not row:
+            return
+
+        operation: Dict = {'$inc': {'count': row.get('count', 0), 'sum': row.get('sum', 0.0)}}
+
+        if row.get('min') is not None:
+            operation['$min'] = {'min': row['min']}
+            operation['$max'] = {'max': row['max']}
+
+        if row.get('loose'):
+            operation['$set'] = {'loose': True}
+
+        self.__mongo.update_one(self.COLLECTION, {'_id': InventoryRollups.__id(dimension, new_key)}, operation, True)
+
+    def get_stats(self) -> Dict[str, List[Dict]]:
+        """
+        Get rollups of all groups, recompute loose price bounds
+
+        Returns:
+            Dict[str, List[Dict]]: Return count, sum, min and max per group of each dimension, None on database error
+        """
+
+        rows: List[Dict] = self.__mongo.find(self.COLLECTION, {})
+
+        if isinstance(rows, DatabaseFailure):
+            return None
+
+        stats: Dict[str, List[Dict]] = {dimension: [] for dimension in self.DIMENSIONS}
+
+        for row in rows:
+            dimension: str = row['_id']['dimension']
+            key: Any = row['_id']['key']
+
+            if dimension not in stats or row.get('count', 0) <= 0:
+                continue
+
+            if row.get('loose'):
+                row = {**row, **self.__bounds(dimension, key)}
+
+            stats[dimension].append({'key': key, 'count': row['count'], 'sum': row['sum'], 'min': row.get('min'), 'max': row.get('max')})
+
+        for groups in stats.values():
+            groups.sort(key=lambda group: MemoryQuery.sort_key(group['key']))
+
+        return stats
+
+    def rebuild(self, verify: bool = False) -> Dict:
+        """
+        Recompute rollups from all items and report drift of stored ones
+
+        Args:
+            verify (bool, optional): Only report drift, keep stored rollups. Defaults to False.
+
+        Returns:
+            Dict: Return number of groups, drift per group field and rebuild state, None on database error
+        """
+
+        items: List[Dict] = self.__mongo.find('Item', {})
+        rows: List[Dict] = self.__mongo.find(self.COLLECTION, {})
+
+        if isinstance(items, DatabaseFailure) or isinstance(rows, DatabaseFailure):
+            return None
+
+        actual: Dict[Tuple, Dict] = {}
+
+        for item in items:
+            for dimension, path in self.DIMENSIONS.items():
+                key: Any; price: float
+                key, price = InventoryRollups.__group(item, path)
+
+                group: Dict = actual.setdefault((dimension, MemoryQuery.hash_key(key)), {'_id': InventoryRollups.__id(dimension, key), 'count': 0, 'sum': 0.0, 'min': price, 'max': price})
+                group['count'] += 1
+                group['sum'] += price
+                group['min'] = min(group['min'], price)
+                group['max'] = max(group['max'], price)
+
+        stored: Dict[Tuple, Dict] = {(row['_id']['dimension'], MemoryQuery.hash_key(row['_id']['key'])): row for row in rows}
+        drift: List[Dict] = []
+
+        for name in list(actual) + [name for name in stored if name not in actual]:
+            expected: Dict = actual.get(name, {'count': 0, 'sum': 0.0})
+            row: Dict = stored.get(name, {'count': 0, 'sum': 0.0})
+            fields: List[str] = ['count', 'sum'] + (['min', 'max'] if expected['count'] and not row.get('loose') else [])
+
+            for field in fields:
+                if not InventoryRollups.__equal(row.get(field), expected.get(field)):
+                    drift.append({'dimension': name[0], 'key': (expected.get('_id') or row['_id'])['key'], 'field': field, 'stored': row.get(field), 'actual': expected.get(field)})
+
+        if not verify:
+            self.__mongo.delete_many(self.COLLECTION, {})
+
+            if actual:
+                self.__mongo.insert_many(self.COLLECTION, list(actual.values()))
+
+        return {'groups': len(actual), 'drift': drift, 'rebuilt': not verify}
+
+    def __bounds(self, dimension: str, key: Any) -> Dict:
+        """
+        Recompute price bounds of group with two indexed queries and store them
+
+        Args:
+            dimension (str): Dimension name
+            key (Any): Group key
+
+        Returns:
+            Dict: Return min and max, empty if database failed
+        """
+
+        path: str = self.DIMENSIONS[dimension]
+
+        lowest: List[Dict] = self.__mongo.find('Item', {path: key}, 0, 1, sort=[('price', 1)])
+        highest: List[Dict] = self.__mongo.find('Item', {path: key}, 0, 1, sort=[('price', -1)])
+
+        if isinstance(lowest, DatabaseFailure) or isinstance(highest, DatabaseFailure):
+            return {}
+
+        bounds: Dict = {'min': lowest[0]['price'] if lowest else None, 'max': highest[0]['price'] if highest else None}
+
+        self.__mongo.update_one(self.COLLECTION, {'_id': InventoryRollups.__id(dimension, key)}, {'$set': bounds, '$unset': {'loose': ''}})
+
+        return bounds
+
+    @staticmethod
+    def __group(item: Dict, path: str) -> Tuple[Any, float]:
+        """
+        Get group key and price of item
+
+        Args:
+            item (Dict): Item, None if missing
+            path (str): Dotted path of group key
+
+        Returns:
+            Tuple[Any, float]: Return group key and price
+        """
+
+        if item is None:
+            return None, 0.0
+
+        values: List = MemoryQuery.values(item, path)
+
+        return values[0] if values else None, float(item.get('price') or 0.0)
+
+    @staticmethod
+    def __id(dimension: str, key: Any) -> Dict:
+        """
+        Get _id of rollup row
+
+        Args:
+            dimension (str): Dimension name
+            key (Any): Group key
+
+        Returns:
+            Dict: Return _id
+        """
+
+        return {'dimension': dimension, 'key': key}
+
+    @staticmethod
+    def __equal(stored: Any, actual: Any) -> bool:
+        """
+        Compare stored and recomputed value, price sums within tolerance
+
+        Args:
+            stored (Any): Stored value
+            actual (Any): Recomputed value
+
+        Returns:
+            bool: Return true if values match
+        """
+
+        if isinstance(stored, (int, float)) and isinstance(actual, (int, float)):
+            return math.isclose(stored, actual, rel_tol=InventoryRollups.TOLERANCE, abs_tol=InventoryRollups.TOLERANCE)
+
+        return stored == actual
+
+    def __init__(self, mongo: DatabaseBridge):
+        """
+        Assign bridge
+
+        Args:
+            mongo (DatabaseBridge): Bridge to mongodb
+        """
+
+        self.__mongo: DatabaseBridge = mongo
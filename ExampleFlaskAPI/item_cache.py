@@ -0,0 +1,251 @@
+import bson
+import time
+import threading
+import collections
+from typing import Any, Dict, List, Tuple
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure
+from ExampleFlaskAPI.bson_json import EncodedDocument
+
+class ItemCache:
+    """
+    Read-through cache of items by serial number
+
+    Items are kept as BSON bytes with their JSON text encoded once, JSON responses splice the
+    text as is. Serials not found are cached as misses for a shorter time. Lookups of several
+    serials are served from cache where possible, the rest is read by one $in query. Writes of
+    this worker drop changed items at once through bridge listener, entries expire after TTL
+    so writes of other workers are seen within it. Entries are evicted least recently used
+    first when their size exceeds capacity.
+
+    Attributes:
+        OVERHEAD (int): Estimated bytes of bookkeeping per entry
+        __mongo (DatabaseBridge): Bridge to mongodb
+        __collection (str): Collection of items
+        __capacity (int): Max size of entries in bytes
+        __ttl (float): Seconds item is served from cache
+        __miss_ttl (float): Seconds missing serial is served from cache
+        __entries (collections.OrderedDict): Expiry, document or None for miss and size by serial, least recently used first
+        __ids (Dict[Any, str]): Serials of cached items by _id
+        __size (int): Size of entries in bytes
+        __generation (int): Number of invalidations, loads started before one are not cached
+        __lock (threading.Lock): Guards entries
+    """
+
+    OVERHEAD: int = 100
+
+    def get_many(self, serials: List[str]) -> List[EncodedDocument]:
+        """
+        Get items by serial numbers, reading uncached serials in one query
+
+        Args:
+            serials (List[str]): Serial numbers
+
+        Returns:
+            List[EncodedDocument]: Return found items in order of serials, DatabaseFailure on error
+        """
+
+        serials = list(dict.fromkeys(serials))
+        found: Dict[str, EncodedDocument] = {}
+        missing: List[str] = []
+        now: float = time.monotonic()
+
+        with self.__lock:
+            generation: int = self.__generation
+
+            for serial in serials:
+                entry: Tuple = self.__entries.get(serial)
+
+                if entry is None or entry[0] <= now:
+                    missing.append(serial)
+                    continue
+
+                self.__entries.move_to_end(serial)
+
+                if entry[1] is None:
+                    self.__miss_hits += 1
+                else:
+                    self.__hits += 1
+                    found[serial] = entry[1]
+
+            self.__misses += len(missing)
+
+        if missing:
+            rows: List = self.__mongo.find(self.__collection, {'serial_number': {'$in': missing}}, raw=True)
+
+            if isinstance(rows, DatabaseFailure):
+                return rows
+
+            loaded: Dict[str, EncodedDocument] = {}
+
+            for row in rows:
+                document: EncodedDocument = EncodedDocument(row.raw if hasattr(row, 'raw') else bson.encode(row))
+                loaded[document['serial_number']] = document
+
+            found.update(loaded)
+            self.__store(missing, loaded, generation)
+
+        return [found[serial] for serial in serials if serial in found]
+
+    def invalidate(self, collection: str, condition: Dict, operation: Dict = None) -> None:
+        """
+        Drop items changed by write, used as bridge listener
+
+        Args:
+            collection (str): Collection name
+            condition (Dict): Condition pinning changed items
+            operation (Dict, optional): Update operation, unused. Defaults to None.
+        """
+
+        if collection != self.__collection:
+            return
+
+        ids: List = ItemCache.__pinned(condition, '_id')
+        serials: List = ItemCache.__pinned(condition, 'serial_number')
+
+        with self.__lock:
+            self.__generation += 1
+
+            if serials is not None:
+                for serial in serials:
+                    self.__discard(serial)
+            elif ids is not None:
+                for _id in ids:
+                    self.__discard(self.__ids.get(_id))
+
+                # Inserted item may have been cached as a miss
+                for serial in [serial for serial, entry in self.__entries.items() if entry[1] is None]:
+                    self.__discard(serial)
+            else:
+                self.__entries.clear()
+                self.__ids.clear()
+                self.__size = 0
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dict: Return entries, cached misses, size, capacity, hit rate and counters
+        """
+
+        with self.__lock:
+            lookups: int = self.__hits + self.__miss_hits + self.__misses
+
+            return {
+                'entries': len(self.__entries),
+                'missing': len(self.__entries) - len(self.__ids),
+                'memory': self.__size,
+                'capacity': self.__capacity,
+                'hits': self.__hits,
+                'miss_hits': self.__miss_hits,
+                'misses': self.__misses,
+                'hit_rate': (self.__hits + self.__miss_hits) / lookups if lookups else 0.0,
+                'evictions': self.__evictions
+            }
+
+    def __store(self, serials: List[str], loaded: Dict[str, EncodedDocument], generation: int) -> None:
+        """
+        Cache loaded items and misses unless a write happened during load
+
+        Args:
+            serials (List[str]): Serial numbers read
+            loaded (Dict[str, EncodedDocument]): Found items by serial
+            generation (int): Number of invalidations before load
+        """
+
+        now: float = time.monotonic()
+
+        with self.__lock:
+            if generation != self.__generation:
+                return
+
+            for serial in serials:
+                document: EncodedDocument = loaded.get(serial)
+                self.__discard(serial)
+
+                if document is None:
+                    self.__entries[serial] = (now + self.__miss_ttl, None, self.OVERHEAD + len(serial))
+                else:
+                    self.__entries[serial] = (now + self.__ttl, document, self.OVERHEAD + len(document.raw) + len(document.json))
+                    self.__ids[document['_id']] = serial
+
+                self.__size += self.__entries[serial][2]
+
+            while self.__size > self.__capacity and self.__entries:
+                self.__discard(next(iter(self.__entries)))
+                self.__evictions += 1
+
+    def __discard(self, serial: str) -> None:
+        """
+        Remove entry, caller holds the lock
+
+        Args:
+            serial (str): Serial number, None is ignored
+        """
+
+        entry: Tuple = self.__entries.pop(serial, None)
+
+        if entry is None:
+            return
+
+        self.__size -= entry[2]
+
+        if entry[1] is not None:
+            self.__ids.pop(entry[1]['_id'], None)
+
+    @staticmethod
+    def __pinned(condition: Dict, field: str) -> List:
+        """
+        Get values of field pinned by equality or $in
+
+        Args:
+            condition (Dict): Condition
+            field (str): Field name
+
+        Returns:
+            List: Return values, None if field is not pinned
+        """
+
+        expected: Any = condition.get(field)
+
+        if expected is None or isinstance(expected, list):
+            return None
+        if not isinstance(expected, dict):
+            return [expected]
+        if len(expected) == 1 and '$in' in expected:
+            return list(expected['$in'])
+        if len(expected) == 1 and '$eq' in expected:
+            return [expected['$eq']]
+
+        return None
+
+    def __init__(self, mongo: DatabaseBridge, capacity: int = 16 * 1024 * 1024, ttl: float = 30.0, miss_ttl: float = 5.0, collection: str = 'Item'):
+        """
+        Create empty cache and listen to writes of bridge
+
+        Args:
+            mongo (DatabaseBridge): Bridge to mongodb
+            capacity (int, optional): Max size of entries in bytes. Defaults to 16 MiB.
+            ttl (float, optional): Seconds item is served from cache, writes of other workers may be missed for this long. Defaults to 30.0.
+            miss_ttl (float, optional): Seconds missing serial is served from cache. Defaults to 5.0.
+            collection (str, optional): Collection of items. Defaults to 'Item'.
+        """
+
+        self.__mongo: DatabaseBridge = mongo
+        self.__collection: str = collection
+        self.__capacity: int = capacity
+        self.__ttl: float = ttl
+        self.__miss_ttl: float = miss_ttl
+
+        self.__entries: collections.OrderedDict = collections.OrderedDict()
+        self.__ids: Dict[Any, str] = {}
+        self.__size: int = 0
+        self.__generation: int = 0
+
+        self.__hits: int = 0
+        self.__miss_hits: int = 0
+        self.__misses: int = 0
+        self.__evictions: int = 0
+        self.__lock: threading.Lock = threading.Lock()
+
+        mongo.add_listener(self.invalidate)
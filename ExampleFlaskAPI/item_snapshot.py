@@ -0,0 +1,522 @@
+import math
+import threading
+from typing import Any, Dict, List, Set, Tuple
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class ItemSnapshot:
+    """
+    Columnar snapshot of items as NumPy arrays for vectorized analytics
+
+    Snapshot is loaded on first use. Writes reported by bridge listener mark changed rows,
+    which are fetched again by '_id' or serial number before next aggregation. Writes
+    with other conditions make the whole snapshot reload.
+
+    Attributes:
+        LOCATION (List[str]): Location fields stored as integer columns
+        GROUPS (List[str]): Fields statistics can be grouped by
+        MISSING (int): Location value of items without it
+        __mongo (DatabaseBridge): Bridge to mongodb
+        __collection (str): Collection name
+        __prices (numpy.ndarray): Prices, NaN when missing
+        __codes (Dict[str, numpy.ndarray]): Dictionary codes of categories and names
+        __locations (numpy.ndarray): Location integers, one column per location field
+        __dictionaries (Dict[str, Dict[Any, int]]): Codes of category and name values
+        __values (Dict[str, List[Any]]): Values of category and name codes
+        __size (int): Number of rows in use
+        __ids (Dict[Any, int]): Rows by _id
+        __serials (Dict[str, int]): Rows by serial number
+        __keys (List[Tuple[Any, str]]): _id and serial number of rows
+        __pending_ids (Set[Any]): _ids of rows changed since last aggregation
+        __pending_serials (Set[str]): Serial numbers of rows changed since last aggregation
+        __stale (bool): Snapshot has to be reloaded
+    """
+
+    LOCATION: List[str] = ['room', 'bookcase', 'shelf', 'cuvette', 'column', 'row']
+    GROUPS: List[str] = ['category', 'name'] + ['location.' + name for name in LOCATION]
+    MISSING: int = -2 ** 63
+
+    @staticmethod
+    def available() -> bool:
+        """
+        Check if NumPy is installed
+
+        Returns:
+            bool: Return true if snapshot can be used
+        """
+
+        return numpy is not None
+
+    def invalidate(self, collection: str, condition: Dict, operation: Dict = None) -> None:
+        """
+        Mark rows changed by write, used as bridge listener
+
+        Args:
+            collection (str): Collection name
+            condition (Dict): Condition pinning changed rows
+            operation (Dict, optional): Update operation, unused. Defaults to None.
+        """
+
+        if collection != self.__collection:
+            return
+
+        ids: List = ItemSnapshot.__pinned(condition, '_id')
+        serials: List = ItemSnapshot.__pinned(condition, 'serial_number')
+
+        with self.__lock:
+            if ids is None and serials is None:
+                self.__stale = True
+                return
+
+            self.__pending_ids.update(ids or [])
+            self.__pending_serials.update(serials or [])
+
+    def aggregate(self, query: Dict, group_by: str = None, percentiles: List[float] = [50.0], bins: int = 10) -> Dict:
+        """
+        Compute price statistics of items matching query
+
+        Args:
+            query (Dict): Conditions built by search, fields with $in, $gte and $lte
+            group_by (str, optional): Field from GROUPS, None for single group. Defaults to None.
+            percentiles (List[float], optional): Price percentiles to compute. Defaults to [50.0].
+            bins (int, optional): Number of price histogram bins. Defaults to 10.
+
+        Returns:
+            Dict: Return matched count, histogram edges and statistics per group, None if snapshot cannot be loaded
+        """
+
+        with self.__lock:
+            if self.__stale and not self.__reload():
+                return None
+
+            if self.__pending_ids or self.__pending_serials:
+                self.__refresh()
+
+            mask: numpy.ndarray = self.__mask(query)
+
+            prices: numpy.ndarray = self.__prices[:self.__size][mask]
+            groups: numpy.ndarray = self.__column(group_by)[mask] if group_by else numpy.zeros(len(prices), dtype=numpy.int64)
+
+            # Codes stay valid for these lists even if snapshot is reloaded meanwhile
+            decoded: Dict[str, List[Any]] = self.__values
+
+        keys: numpy.ndarray; inverse: numpy.ndarray
+        keys, inverse = numpy.unique(groups, return_inverse=True)
+
+        counts: numpy.ndarray = numpy.bincount(inverse, minlength=len(keys))
+
+        # Statistics of priced items
+        priced: numpy.ndarray = ~numpy.isnan(prices)
+        inverse_priced: numpy.ndarray = inverse[priced]
+        prices = prices[priced]
+
+        priced_counts: numpy.ndarray = numpy.bincount(inverse_priced, minlength=len(keys))
+        sums: numpy.ndarray = numpy.bincount(inverse_priced, weights=prices, minlength=len(keys))
+
+        # Prices sorted by group, then by price
+        ordered: numpy.ndarray = prices[numpy.lexsort((prices, inverse_priced))]
+        starts: numpy.ndarray = numpy.concatenate(([0], numpy.cumsum(priced_counts)[:-1])).astype(numpy.int64)
+        has_prices: numpy.ndarray = priced_counts > 0
+
+        minimums: numpy.ndarray = numpy.where(has_prices, ordered[numpy.minimum(starts, len(ordered) - 1)] if len(ordered) else 0.0, numpy.nan)
+        maximums: numpy.ndarray = numpy.where(has_prices, ordered[numpy.maximum(starts + priced_counts - 1, 0)] if len(ordered) else 0.0, numpy.nan)
+
+        # Linear interpolation between closest ranks, as numpy.percentile does
+        positions: numpy.ndarray = numpy.maximum(priced_counts - 1, 0)[:, None] * (numpy.asarray(percentiles, dtype=numpy.float64) / 100.0)[None, :]
+        lower: numpy.ndarray = numpy.floor(positions).astype(numpy.int64)
+        upper: numpy.ndarray = numpy.ceil(positions).astype(numpy.int64)
+        values: numpy.ndarray = numpy.full(positions.shape, numpy.nan)
+
+        if len(ordered):
+            lower_values: numpy.ndarray = ordered[numpy.minimum(starts[:, None] + lower, len(ordered) - 1)]
+            upper_values: numpy.ndarray = ordered[numpy.minimum(starts[:, None] + upper, len(ordered) - 1)]
+            values = numpy.where(has_prices[:, None], lower_values + (upper_values - lower_values) * (positions - lower), numpy.nan)
+
+        # Histogram with edges shared by all groups
+        edges: numpy.ndarray = numpy.histogram_bin_edges(prices, bins) if len(prices) else numpy.array([])
+        histograms: numpy.ndarray = numpy.zeros((len(keys), bins), dtype=numpy.int64)
+
+        if len(prices):
+            positions_in_bins: numpy.ndarray = numpy.clip(numpy.searchsorted(edges, prices, side='right') - 1, 0, bins - 1)
+            histograms = numpy.bincount(inverse_priced * bins + positions_in_bins, minlength=len(keys) * bins).reshape(len(keys), bins)
+
+        return {
+            'count': int(len(groups)),
+            'edges': edges.tolist(),
+            'groups': [{
+                'group': ItemSnapshot.__group_value(group_by, key, decoded) if group_by else None,
+                'count': int(counts[index]),
+                'sum': float(sums[index]),
+                'mean': float(sums[index] / priced_counts[index]) if priced_counts[index] else None,
+                'min': ItemSnapshot.__number(minimums[index]),
+                'max': ItemSnapshot.__number(maximums[index]),
+                'percentiles': {ItemSnapshot.__label(percentile): ItemSnapshot.__number(values[index][position]) for position, percentile in enumerate(percentiles)},
+                'histogram': histograms[index].tolist()
+            } for index, key in enumerate(keys.tolist())]
+        }
+
+    def get_stats(self) -> Dict:
+        """
+        Get snapshot statistics
+
+        Returns:
+            Dict: Return rows, capacity, memory of columns in bytes and pending changes
+        """
+
+        with self.__lock:
+            return {
+                'rows': self.__size,
+                'capacity': len(self.__prices),
+                'memory': int(self.__prices.nbytes + self.__locations.nbytes + sum(codes.nbytes for codes in self.__codes.values())),
+                'pending': len(self.__pending_ids) + len(self.__pending_serials),
+                'stale': self.__stale,
+                'reloads': self.__reloads,
+                'refreshes': self.__refreshes
+            }
+
+    def __reload(self) -> bool:
+        """
+        Load all items into columns, caller holds the lock
+
+        Returns:
+            bool: Return true if snapshot was loaded
+        """
+
+        # Changes reported from now on are applied on top of loaded rows
+        pending_ids: Set = self.__pending_ids
+        pending_serials: Set = self.__pending_serials
+
+        self.__pending_ids, self.__pending_serials, self.__stale = set(), set(), False
+
+        documents: List[Dict] = self.__mongo.find(self.__collection, {})
+
+        if isinstance(documents, DatabaseFailure):
+            self.__pending_ids, self.__pending_serials, self.__stale = pending_ids, pending_serials, True
+            return False
+
+        self.__allocate(max(1024, len(documents)))
+
+        for document in documents:
+            self.__put(document)
+
+        self.__reloads += 1
+
+        return True
+
+    def __refresh(self) -> None:
+        """
+        Fetch changed rows again, caller holds the lock
+        """
+
+        ids: Set = self.__pending_ids
+        serials: Set = self.__pending_serials
+
+        self.__pending_ids, self.__pending_serials = set(), set()
+
+        conditions: List[Dict] = ([{'_id': {'$in': list(ids)}}] if ids else []) + ([{'serial_number': {'$in': list(serials)}}] if serials else [])
+        documents: List[Dict] = self.__mongo.find(self.__collection, conditions[0] if len(conditions) == 1 else {'$or': conditions})
+
+        if isinstance(documents, DatabaseFailure):
+            self.__pending_ids.update(ids)
+            self.__pending_serials.update(serials)
+            return
+
+        for document in documents:
+            self.__put(document)
+
+            ids.discard(document.get('_id'))
+            serials.discard(document.get('serial_number'))
+
+        # Rows not found anymore were deleted
+        for key, rows in [(id, self.__ids) for id in ids] + [(serial, self.__serials) for serial in serials]:
+            if key in rows:
+                self.__remove(rows[key])
+
+        self.__refreshes += 1
+
+    def __allocate(self, capacity: int) -> None:
+        """
+        Allocate empty columns, caller holds the lock
+
+        Args:
+            capacity (int): Number of rows
+        """
+
+        self.__prices = numpy.full(capacity, numpy.nan)
+        self.__codes = {field: numpy.full(capacity, -1, dtype=numpy.int32) for field in ['category', 'name']}
+        self.__locations = numpy.full((capacity, len(self.LOCATION)), self.MISSING, dtype=numpy.int64)
+
+        self.__dictionaries = {field: {} for field in self.__codes}
+        self.__values = {field: [] for field in self.__codes}
+
+        self.__size = 0
+        self.__ids = {}
+        self.__serials = {}
+        self.__keys = []
+
+    def __grow(self) -> None:
+        """
+        Double capacity of columns, caller holds the lock
+        """
+
+        capacity: int = max(1024, len(self.__prices) * 2)
+
+        self.__prices = numpy.concatenate((self.__prices, numpy.full(capacity - len(self.__prices), numpy.nan)))
+        self.__codes = {field: numpy.concatenate((codes, numpy.full(capacity - len(codes), -1, dtype=numpy.int32))) for field, codes in self.__codes.items()}
+        self.__locations = numpy.concatenate((self.__locations, numpy.full((capacity - len(self.__locations), len(self.LOCATION)), self.MISSING, dtype=numpy.int64)))
+
+    def __put(self, document: Dict) -> None:
+        """
+        Insert or replace row of item, caller holds the lock
+
+        Args:
+            document (Dict): Item
+        """
+
+        id: Any = document.get('_id')
+        serial: str = document.get('serial_number')
+
+        # Row of item with same _id, or of replaced item with same serial number
+        row: int = self.__ids.get(id, self.__serials.get(serial))
+
+        if row is None:
+            if self.__size == len(self.__prices):
+                self.__grow()
+
+            row = self.__size
+            self.__size += 1
+            self.__keys.append((None, None))
+        else:
+            old_id, old_serial = self.__keys[row]
+            self.__ids.pop(old_id, None)
+            self.__serials.pop(old_serial, None)
+
+        price: Any = document.get('price')
+        location: Dict = document.get('location') if isinstance(document.get('location'), dict) else {}
+
+        self.__prices[row] = float(price) if isinstance(price, (int, float)) and not isinstance(price, bool) else numpy.nan
+        self.__locations[row] = [location[name] if isinstance(location.get(name), int) and not isinstance(location.get(name), bool) else self.MISSING for name in self.LOCATION]
+
+        for field, codes in self.__codes.items():
+            codes[row] = self.__code(field, document.get(field))
+
+        self.__ids[id] = row
+        self.__serials[serial] = row
+        self.__keys[row] = (id, serial)
+
+    def __remove(self, row: int) -> None:
+        """
+        Remove row, last row takes its place, caller holds the lock
+
+        Args:
+            row (int): Row number
+        """
+
+        last: int = self.__size - 1
+        id, serial = self.__keys[row]
+
+        self.__ids.pop(id, None)
+        self.__serials.pop(serial, None)
+
+        if row != last:
+            self.__prices[row] = self.__prices[last]
+            self.__locations[row] = self.__locations[last]
+
+            for codes in self.__codes.values():
+                codes[row] = codes[last]
+
+            self.__keys[row] = self.__keys[last]
+            self.__ids[self.__keys[row][0]] = row
+            self.__serials[self.__keys[row][1]] = row
+
+        self.__keys.pop()
+        self.__size = last
+
+    def __code(self, field: str, value: Any) -> int:
+        """
+        Get dictionary code of value, caller holds the lock
+
+        Args:
+            field (str): Field name
+            value (Any): Value
+
+        Returns:
+            int: Return code
+        """
+
+        # Unhashable values are not searchable by $in anyway
+        if isinstance(value, (dict, list)):
+            return -1
+
+        dictionary: Dict[Any, int] = self.__dictionaries[field]
+
+        if value not in dictionary:
+            dictionary[value] = len(self.__values[field])
+            self.__values[field].append(value)
+
+        return dictionary[value]
+
+    def __column(self, field: str) -> numpy.ndarray:
+        """
+        Get column of used rows, caller holds the lock
+
+        Args:
+            field (str): Field name from GROUPS or 'price'
+
+        Returns:
+            numpy.ndarray: Return column
+        """
+
+        if field == 'price':
+            return self.__prices[:self.__size]
+        if field in self.__codes:
+            return self.__codes[field][:self.__size]
+
+        return self.__locations[:self.__size, self.LOCATION.index(field.split('.', 1)[1])]
+
+    def __mask(self, query: Dict) -> numpy.ndarray:
+        """
+        Evaluate query on columns, caller holds the lock
+
+        Args:
+            query (Dict): Conditions built by search
+
+        Returns:
+            numpy.ndarray: Return mask of matched rows
+
+        Raises:
+            ValueError: Query has field or operator not held by snapshot
+        """
+
+        mask: numpy.ndarray = numpy.ones(self.__size, dtype=bool)
+
+        for field, expected in query.items():
+            if field == 'serial_number':
+                selected: numpy.ndarray = numpy.zeros(self.__size, dtype=bool)
+                selected[[self.__serials[value] for value in expected.get('$in', []) if value in self.__serials]] = True
+                mask &= selected
+                continue
+
+            if field not in self.GROUPS and field != 'price':
+                raise ValueError('Field ' + field + ' is not held by snapshot.')
+
+            column: numpy.ndarray = self.__column(field)
+
+            for operator, bound in expected.items():
+                if operator == '$in' and field in self.__codes:
+                    mask &= numpy.isin(column, [self.__dictionaries[field][value] for value in bound if value in self.__dictionaries[field]])
+                elif operator == '$in':
+                    mask &= numpy.isin(column, bound)
+                elif operator == '$gte':
+                    mask &= column >= bound
+                elif operator == '$lte':
+                    mask &= column <= bound
+                else:
+                    raise ValueError('Operator ' + operator + ' is not supported by snapshot.')
+
+            # Missing locations never match
+            if field.startswith('location.'):
+                mask &= column != self.MISSING
+
+        return mask
+
+    @staticmethod
+    def __group_value(field: str, key: int, decoded: Dict[str, List[Any]]) -> Any:
+        """
+        Decode group key
+
+        Args:
+            field (str): Field name from GROUPS
+            key (int): Code or location value
+            decoded (Dict[str, List[Any]]): Values of codes per field
+
+        Returns:
+            Any: Return group value, None if missing
+        """
+
+        if field in decoded:
+            return decoded[field][key] if key >= 0 else None
+
+        return key if key != ItemSnapshot.MISSING else None
+
+    @staticmethod
+    def __pinned(condition: Dict, field: str) -> List:
+        """
+        Get values of field pinned by equality or $in
+
+        Args:
+            condition (Dict): Condition
+            field (str): Field name
+
+        Returns:
+            List: Return values, None if field is not pinned
+        """
+
+        expected: Any = condition.get(field)
+
+        if expected is None or isinstance(expected, list):
+            return None
+        if not isinstance(expected, dict):
+            return [expected]
+        if len(expected) == 1 and '$in' in expected:
+            return list(expected['$in'])
+        if len(expected) == 1 and '$eq' in expected:
+            return [expected['$eq']]
+
+        return None
+
+    @staticmethod
+    def __number(value: float) -> float:
+        """
+        Convert NaN to None for JSON
+
+        Args:
+            value (float): Value
+
+        Returns:
+            float: Return value, None for NaN
+        """
+
+        return None if math.isnan(value) else float(value)
+
+    @staticmethod
+    def __label(percentile: float) -> str:
+        """
+        Get label of percentile, e.g. 'p50' or 'p99.9'
+
+        Args:
+            percentile (float): Percentile
+
+        Returns:
+            str: Return label
+        """
+
+        return 'p' + (str(int(percentile)) if float(percentile).is_integer() else str(percentile))
+
+    def __init__(self, mongo: DatabaseBridge, collection: str = 'Item'):
+        """
+        Create empty snapshot and listen to writes of bridge
+
+        Args:
+            mongo (DatabaseBridge): Bridge to mongodb
+            collection (str, optional): Collection name. Defaults to 'Item'.
+        """
+
+        self.__mongo: DatabaseBridge = mongo
+        self.__collection: str = collection
+
+        self.__pending_ids: Set = set()
+        self.__pending_serials: Set[str] = set()
+        self.__stale: bool = True
+
+        self.__reloads: int = 0
+        self.__refreshes: int = 0
+        self.__lock: threading.RLock = threading.RLock()
+
+        self.__allocate(0)
+
+        mongo.add_listener(self.invalidate)
@@ -0,0 +1,339 @@
+import sys
+import bisect
+import itertools
+import threading
+from typing import Any, Dict, List, Set, Tuple
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure
+
+class ItemSuggestions:
+    """
+    Prefix suggestions of item names and serial numbers from sorted arrays kept in process
+
+    Entries are lowercased values with their field, each entry counts items holding its value.
+    Entries are kept in sorted arrays, one per count, so entries starting with a prefix form one
+    range of every array found by binary search. Suggestions walk arrays from the highest count
+    and take ranges until the limit is reached, ties are ordered alphabetically. Writes reported
+    by bridge listener fetch changed items by '_id' or serial number at once, writes with other
+    conditions make the arrays reload before next suggestion.
+
+    Attributes:
+        FIELDS (List[str]): Suggested item fields
+        SAMPLE (int): Number of entries measured to estimate memory
+        __mongo (DatabaseBridge): Bridge to mongodb
+        __collection (str): Collection name
+        __buckets (Dict[int, List[Tuple[str, str]]]): Sorted lowercased values and fields by count
+        __counts (List[int]): Counts of buckets, ascending
+        __entries (Dict[Tuple[str, str], List]): Shown value and count by key
+        __items (Dict[Any, Tuple[str, str]]): Name and serial number by item _id
+        __serials (Dict[str, Any]): Item _id by serial number
+        __pending_ids (Set[Any]): _ids of items changed and not applied yet
+        __pending_serials (Set[str]): Serial numbers of items changed and not applied yet
+        __stale (bool): Arrays have to be reloaded
+    """
+
+    FIELDS: List[str] = ['name', 'serial_number']
+    SAMPLE: int = 1000
+
+    def load(self) -> bool:
+        """
+        Load all items, used at startup
+
+        Returns:
+            bool: Return true if arrays were loaded
+        """
+
+        with self.__lock:
+            return self.__reload()
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """
+        Get most frequent names and serial numbers starting with prefix, case insensitive
+
+        Args:
+            prefix (str): Typed prefix
+            limit (int, optional): Max number of suggestions. Defaults to 10.
+
+        Returns:
+            List[Dict]: Return value, field and number of items, most frequent first, None if arrays cannot be loaded
+        """
+
+        prefix = prefix.lower()
+        suggestions: List[Dict] = []
+
+        with self.__lock:
+            if self.__stale and not self.__reload():
+                return None
+
+            if self.__pending_ids or self.__pending_serials:
+                self.__refresh()
+
+            for count in reversed(self.__counts):
+                if len(suggestions) >= limit:
+                    break
+
+                keys: List[Tuple[str, str]] = self.__buckets[count]
+                start: int = bisect.bisect_left(keys, (prefix,))
+                end: int = min(bisect.bisect_left(keys, (prefix + '\U0010ffff',)), start + limit - len(suggestions))
+
+                suggestions.extend({'value': self.__entries[key][0], 'field': key[1], 'count': count} for key in keys[start:end])
+
+            self.__suggestions += 1
+
+        return suggestions
+
+    def invalidate(self, collection: str, condition: Dict, operation: Dict = None) -> None:
+        """
+        Apply items changed by write, used as bridge listener
+
+        Args:
+            collection (str): Collection name
+            condition (Dict): Condition pinning changed items
+            operation (Dict, optional): Update operation, unused. Defaults to None.
+        """
+
+        if collection != self.__collection:
+            return
+
+        ids: List = ItemSuggestions.__pinned(condition, '_id')
+        serials: List = ItemSuggestions.__pinned(condition, 'serial_number')
+
+        with self.__lock:
+            if ids is None and serials is None:
+                self.__stale = True
+                return
+
+            self.__pending_ids.update(ids or [])
+            self.__pending_serials.update(serials or [])
+
+            if not self.__stale:
+                self.__refresh()
+
+    def get_stats(self) -> Dict:
+        """
+        Get array statistics, memory is estimated from a sample of entries
+
+        Returns:
+            Dict: Return entries, items, buckets, memory in bytes and memory per million entries
+        """
+
+        with self.__lock:
+            keys: List[Tuple[str, str]] = list(itertools.islice(self.__entries, self.SAMPLE))
+
+            # Array slot, key tuple, lowercased and shown strings and count of every entry
+            per_entry: float = sum(8 + sys.getsizeof(key) + sys.getsizeof(key[0]) + sys.getsizeof(self.__entries[key]) + sys.getsizeof(self.__entries[key][0]) for key in keys) / len(keys) if keys else 0.0
+            tables: int = sum(sys.getsizeof(bucket) - 8 * len(bucket) for bucket in self.__buckets.values()) + sys.getsizeof(self.__entries) + sys.getsizeof(self.__items) + sys.getsizeof(self.__serials)
+            memory: int = int(tables + per_entry * len(self.__entries))
+
+            return {
+                'entries': len(self.__entries),
+                'items': len(self.__items),
+                'buckets': len(self.__counts),
+                'memory': memory,
+                'memory_per_million': int(memory / len(self.__entries) * 1000000) if self.__entries else 0,
+                'pending': len(self.__pending_ids) + len(self.__pending_serials),
+                'stale': self.__stale,
+                'reloads': self.__reloads,
+                'suggestions': self.__suggestions
+            }
+
+    def __reload(self) -> bool:
+        """
+        Load all items into arrays, caller holds the lock
+
+        Returns:
+            bool: Return true if arrays were loaded
+        """
+
+        # Changes reported from now on are applied on top of loaded items
+        pending_ids: Set = self.__pending_ids
+        pending_serials: Set = self.__pending_serials
+
+        self.__pending_ids, self.__pending_serials, self.__stale = set(), set(), False
+
+        documents: List[Dict] = self.__mongo.find(self.__collection, {})
+
+        if isinstance(documents, DatabaseFailure):
+            self.__pending_ids, self.__pending_serials, self.__stale = pending_ids, pending_serials, True
+            return False
+
+        self.__entries, self.__items, self.__serials, self.__buckets = {}, {}, {}, {}
+
+        for document in documents:
+            self.__put(document, False)
+
+        # Arrays are sorted once after counting
+        for key, entry in self.__entries.items():
+            self.__buckets.setdefault(entry[1], []).append(key)
+
+        for bucket in self.__buckets.values():
+            bucket.sort()
+
+        self.__counts = sorted(self.__buckets)
+        self.__reloads += 1
+
+        return True
+
+    def __refresh(self) -> None:
+        """
+        Fetch changed items again, caller holds the lock
+        """
+
+        ids: Set = self.__pending_ids
+        serials: Set = self.__pending_serials
+
+        self.__pending_ids, self.__pending_serials = set(), set()
+
+        conditions: List[Dict] = ([{'_id': {'$in': list(ids)}}] if ids else []) + ([{'serial_number': {'$in': list(serials)}}] if serials else [])
+        documents: List[Dict] = self.__mongo.find(self.__collection, conditions[0] if len(conditions) == 1 else {'$or': conditions})
+
+        if isinstance(documents, DatabaseFailure):
+            self.__pending_ids.update(ids)
+            self.__pending_serials.update(serials)
+            return
+
+        for document in documents:
+            self.__put(document, True)
+
+            ids.discard(document.get('_id'))
+            serials.discard(document.get('serial_number'))
+
+        # Items not found anymore were deleted
+        for id in ids | {self.__serials[serial] for serial in serials if serial in self.__serials}:
+            self.__remove(id)
+
+    def __put(self, document: Dict, arrange: bool) -> None:
+        """
+        Add or replace entries of item, caller holds the lock
+
+        Args:
+            document (Dict): Item
+            arrange (bool): Move changed entries between arrays, false while reloading
+        """
+
+        id: Any = document.get('_id')
+        values: Tuple[str, str] = tuple(document.get(field) for field in self.FIELDS)
+
+        if self.__items.get(id) == values:
+            return
+
+        self.__remove(id)
+
+        self.__items[id] = values
+
+        if values[1] is not None:
+            self.__serials[values[1]] = id
+
+        for field, value in zip(self.FIELDS, values):
+            if isinstance(value, str) and value:
+                self.__count((value.lower(), field), value, 1, arrange)
+
+    def __remove(self, id: Any) -> None:
+        """
+        Remove entries of item, caller holds the lock
+
+        Args:
+            id (Any): Item _id
+        """
+
+        values: Tuple[str, str] = self.__items.pop(id, None)
+
+        if values is None:
+            return
+
+        if self.__serials.get(values[1]) == id:
+            del self.__serials[values[1]]
+
+        for field, value in zip(self.FIELDS, values):
+            if isinstance(value, str) and value:
+                self.__count((value.lower(), field), value, -1, True)
+
+    def __count(self, key: Tuple[str, str], value: str, delta: int, arrange: bool) -> None:
+        """
+        Change count of entry and move it to array of new count, caller holds the lock
+
+        Args:
+            key (Tuple[str, str]): Lowercased value and field
+            value (str): Shown value, used when entry is created
+            delta (int): Change of count
+            arrange (bool): Move entry between arrays
+        """
+
+        entry: List = self.__entries.setdefault(key, [value, 0])
+        old: int = entry[1]
+
+        entry[1] += delta
+
+        if entry[1] <= 0:
+            del self.__entries[key]
+
+        if not arrange:
+            return
+
+        if old > 0:
+            bucket: List[Tuple[str, str]] = self.__buckets[old]
+            del bucket[bisect.bisect_left(bucket, key)]
+
+            if not bucket:
+                del self.__buckets[old]
+                del self.__counts[bisect.bisect_left(self.__counts, old)]
+
+        if entry[1] > 0:
+            if entry[1] not in self.__buckets:
+                self.__buckets[entry[1]] = []
+                bisect.insort(self.__counts, entry[1])
+
+            bisect.insort(self.__buckets[entry[1]], key)
+
+    @staticmethod
+    def __pinned(condition: Dict, field: str) -> List:
+        """
+        Get values of field pinned by equality or $in
+
+        Args:
+            condition (Dict): Condition
+            field (str): Field name
+
+        Returns:
+            List: Return values, None if field is not pinned
+        """
+
+        expected: Any = condition.get(field)
+
+        if expected is None or isinstance(expected, list):
+            return None
+        if not isinstance(expected, dict):
+            return [expected]
+        if len(expected) == 1 and '$in' in expected:
+            return list(expected['$in'])
+        if len(expected) == 1 and '$eq' in expected:
+            return [expected['$eq']]
+
+        return None
+
+    def __init__(self, mongo: DatabaseBridge, collection: str = 'Item'):
+        """
+        Create empty arrays and listen to writes of bridge
+
+        Args:
+            mongo (DatabaseBridge): Bridge to mongodb
+            collection (str, optional): Collection name. Defaults to 'Item'.
+        """
+
+        self.__mongo: DatabaseBridge = mongo
+        self.__collection: str = collection
+
+        self.__buckets: Dict[int, List[Tuple[str, str]]] = {}
+        self.__counts: List[int] = []
+        self.__entries: Dict[Tuple[str, str], List] = {}
+        self.__items: Dict[Any, Tuple[str, str]] = {}
+        self.__serials: Dict[str, Any] = {}
+
+        self.__pending_ids: Set = set()
+        self.__pending_serials: Set[str] = set()
+        self.__stale: bool = True
+
+        self.__reloads: int = 0
+        self.__suggestions: int = 0
+        self.__lock: threading.RLock = threading.RLock()
+
+        mongo.add_listener(self.invalidate)
@@ -0,0 +1,406 @@
+import time
+import uuid
+import threading
+import traceback
+import contextvars
+import concurrent.futures
+from typing import Any, Callable, Dict, List, Set
+from pymongo.errors import PyMongoError
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure
+
+class JobRunner:
+    """
+    Background jobs run by a thread pool, state and progress persisted in the Job collection
+
+    Job documents are written outside of any request session, so state is visible to all
+    workers at once and a job does not depend on the transaction that submitted it.
+
+    Chunked jobs keep their payload in chunk documents and the status of every unit in status
+    documents. Each chunk is processed by the handler registered for the kind of job, its
+    statuses, the chunk and job counters are written in one transaction. When a failed write
+    of one unit aborts that transaction, the chunk is processed again unit by unit, each unit
+    in its own transactions followed by its status, so the failure is the status of that unit
+    only. A job not updated for STALE seconds, e.g. because its worker was restarted, is
+    resumed from its first unfinished chunk by resume(), units of the chunk with a status are
+    not processed again.
+
+    Attributes:
+        COLLECTION (str): Collection of job documents
+        CHUNK_COLLECTION (str): Collection of payload chunks of chunked jobs
+        STATUS_COLLECTION (str): Collection of unit statuses of chunked jobs
+        STALE (float): Seconds without update after which a queued or running chunked job is resumed
+        __mongo (DatabaseBridge): Bridge to mongodb
+        __executor (concurrent.futures.ThreadPoolExecutor): Pool running jobs
+        __handlers (Dict[str, Callable[[List, Dict], List[Dict]]]): Chunk handlers by kind of job
+        __lock (threading.Lock): Guards counters
+        __submitted (int): Number of submitted jobs
+        __running (int): Number of running jobs
+        __failed (int): Number of failed jobs
+    """
+
+    COLLECTION: str = 'Job'
+    CHUNK_COLLECTION: str = 'JobChunk'
+    STATUS_COLLECTION: str = 'JobStatus'
+    STALE: float = 60.0
+
+    def submit(self, kind: str, total: int, function: Callable[[Callable[[int], None]], Dict]) -> str:
+        """
+        Persist job and schedule it
+
+        Args:
+            kind (str): Kind of job
+            total (int): Number of units of work
+            function (Callable[[Callable[[int], None]], Dict]): Job body, called with progress callback taking number of done units, returns job result
+
+        Returns:
+            str: Return job id, None on database error
+        """
+
+        now: float = time.time()
+        job: Dict = {'_id': uuid.uuid4().hex, 'kind': kind, 'state': 'queued', 'total': total, 'done': 0, 'created': now, 'updated': now, 'result': None, 'error': None}
+
+        # Fresh context, job document is not part of request transaction
+        if isinstance(contextvars.Context().run(self.__mongo.insert_one, self.COLLECTION, job), DatabaseFailure):
+            return None
+
+        with self.__lock:
+            self.__submitted += 1
+
+        self.__executor.submit(self.__run, job['_id'], function)
+
+        return job['_id']
+
+    def register(self, kind: str, handler: Callable[[List, Dict], List[Dict]]) -> None:
+        """
+        Register handler of chunked jobs
+
+        Args:
+            kind (str): Kind of job
+            handler (Callable[[List, Dict], List[Dict]]): Processes units of chunk with job options, returns status of each unit with boolean 'status'
+        """
+
+        self.__handlers[kind] = handler
+
+    def submit_chunked(self, kind: str, units: List, options: Dict = None, chunk: int = 1000) -> str:
+        """
+        Persist payload in chunks and schedule chunked job
+
+        Args:
+            kind (str): Kind of job, registered handler
+            units (List): Units of work
+            options (Dict, optional): Options passed to handler. Defaults to None.
+            chunk (int, optional): Units processed in one transaction. Defaults to 1000.
+
+        Returns:
+            str: Return job id, None on database error
+        """
+
+        now: float = time.time()
+        job: Dict = {'_id': uuid.uuid4().hex, 'kind': kind, 'state': 'queued', 'total': len(units), 'done': 0, 'succeeded': 0, 'failed': 0, 'chunk': chunk, 'options': options or {}, 'created': now, 'updated': now, 'result': None, 'error': None}
+        chunks: List[Dict] = [{'_id': job['_id'] + ':' + str(number), 'job': job['_id'], 'number': number, 'units': units[start:start + chunk], 'done': False} for number, start in enumerate(range(0, len(units), chunk))]
+
+        def persist() -> bool:
+            if chunks and isinstance(self.__mongo.insert_many(self.CHUNK_COLLECTION, chunks), DatabaseFailure):
+                return False
+
+            return not isinstance(self.__mongo.insert_one(self.COLLECTION, job), DatabaseFailure)
+
+        # Fresh context, job documents are not part of request transaction
+        if not contextvars.Context().run(persist):
+            return None
+
+        with self.__lock:
+            self.__submitted += 1
+
+        self.__executor.submit(self.__run, job['_id'], lambda progress: self.__process(job['_id']))
+
+        return job['_id']
+
+    def resume(self) -> int:
+        """
+        Claim and schedule chunked jobs left unfinished by stopped workers
+
+        Returns:
+            int: Return number of resumed jobs
+        """
+
+        now: float = time.time()
+        jobs: List[Dict] = self.__mongo.find(self.COLLECTION, {'kind': {'$in': list(self.__handlers)}, 'state': {'$in': ['queued', 'running']}, 'updated': {'$lt': now - self.STALE}})
+        resumed: int = 0
+
+        for job in jobs:
+            # Only one worker wins the claim of a job
+            claim: Any = self.__mongo.update_one(self.COLLECTION, {'_id': job['_id'], 'updated': job['updated']}, {'$set': {'state': 'queued', 'updated': now}})
+
+            if claim.matched_count != 1:
+                continue
+
+            with self.__lock:
+                self.__submitted += 1
+
+            self.__executor.submit(self.__run, job['_id'], lambda progress, job_id=job['_id']: self.__process(job_id))
+            resumed += 1
+
+        return resumed
+
+    def get_statuses(self, job_id: str, skip: int = 0, limit: int = 100) -> List[Dict]:
+        """
+        Get page of unit statuses of chunked job
+
+        Args:
+            job_id (str): Job id
+            skip (int, optional): Number of skipped statuses. Defaults to 0.
+            limit (int, optional): Max number of statuses. Defaults to 100.
+
+        Returns:
+            List[Dict]: Return statuses with 'index' of unit in payload, DatabaseFailure on error
+        """
+
+        return self.__mongo.find(self.STATUS_COLLECTION, {'job': job_id}, skip, limit, sort=[('index', 1)], projection={'_id': False, 'job': False, 'chunk': False})
+
+    def get(self, job_id: str) -> Dict:
+        """
+        Get job state
+
+        Args:
+            job_id (str): Job id
+
+        Returns:
+            Dict: Return job document, empty if job does not exist, None on database error
+        """
+
+        job: Dict = self.__mongo.find_one(self.COLLECTION, {'_id': job_id})
+
+        if isinstance(job, DatabaseFailure):
+            return None
+
+        return job or {}
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get job counters of this worker
+
+        Returns:
+            Dict[str, int]: Return submitted, running and failed jobs
+        """
+
+        with self.__lock:
+            return {'submitted': self.__submitted, 'running': self.__running, 'failed': self.__failed}
+
+    def __run(self, job_id: str, function: Callable[[Callable[[int], None]], Dict]) -> None:
+        """
+        Run job and record its state
+
+        Args:
+            job_id (str): Job id
+            function (Callable[[Callable[[int], None]], Dict]): Job body
+        """
+
+        def progress(done: int) -> None:
+            self.__set(job_id, {'done': done})
+
+        with self.__lock:
+            self.__running += 1
+
+        self.__set(job_id, {'state': 'running'})
+
+        try:
+            result: Dict = function(progress)
+            self.__set(job_id, {'state': 'done', 'result': result})
+        except Exception as error:
+            traceback.print_exc()
+
+            with self.__lock:
+                self.__failed += 1
+
+            self.__set(job_id, {'state': 'failed', 'error': str(error)})
+        finally:
+            with self.__lock:
+                self.__running -= 1
+
+    def __process(self, job_id: str) -> Dict:
+        """
+        Body of chunked job, process unfinished chunks in order
+
+        Args:
+            job_id (str): Job id
+
+        Raises:
+            RuntimeError: Database operation failed
+
+        Returns:
+            Dict: Return number of succeeded and failed units
+        """
+
+        job: Dict = self.__mongo.find_one(self.COLLECTION, {'_id': job_id})
+
+        if not job:
+            raise RuntimeError('Job document cannot be read.')
+
+        handler: Callable[[List, Dict], List[Dict]] = self.__handlers[job['kind']]
+
+        while True:
+            chunks: List[Dict] = self.__mongo.find(self.CHUNK_COLLECTION, {'job': job_id, 'done': False}, 0, 1, sort=[('number', 1)])
+
+            if isinstance(chunks, DatabaseFailure):
+                raise RuntimeError('Job chunk cannot be read.')
+
+            if not chunks:
+                break
+
+            written: List[Dict] = self.__mongo.find(self.STATUS_COLLECTION, {'job': job_id, 'chunk': chunks[0]['number']}, projection={'index': True, 'status': True})
+
+            if isinstance(written, DatabaseFailure):
+                raise RuntimeError('Job statuses cannot be read.')
+
+            # Chunk interrupted after some of its units continues unit by unit
+            if written or not self.__process_chunk(job, chunks[0], handler):
+                self.__process_units(job, chunks[0], handler, written)
+
+        job = self.__mongo.find_one(self.COLLECTION, {'_id': job_id}) or job
+
+        return {'succeeded': job['succeeded'], 'failed': job['failed']}
+
+    def __process_chunk(self, job: Dict, chunk: Dict, handler: Callable[[List, Dict], List[Dict]]) -> bool:
+        """
+        Process all units of chunk and write their statuses in one transaction
+
+        Args:
+            job (Dict): Job document
+            chunk (Dict): Chunk document
+            handler (Callable[[List, Dict], List[Dict]]): Handler of kind of job
+
+        Raises:
+            RuntimeError: Database operation failed
+
+        Returns:
+            bool: Return True if chunk is done, False if transaction was aborted by a unit
+        """
+
+        first: int = chunk['number'] * job['chunk']
+        atomic: List[bool] = [False]
+
+        def work() -> None:
+            atomic[0] = self.__mongo.in_transaction()
+
+            statuses: List[Dict] = handler(chunk['units'], job['options'])
+            rows: List[Dict] = [self.__status(job['_id'], chunk['number'], first + index, status) for index, status in enumerate(statuses)]
+
+            if rows and isinstance(self.__mongo.insert_many(self.STATUS_COLLECTION, rows), DatabaseFailure):
+                raise RuntimeError('Job statuses cannot be written.')
+
+            self.__finish(job['_id'], chunk, rows)
+
+        try:
+            self.__mongo.run_transaction(work)
+        except PyMongoError:
+            # Units written without transaction cannot be processed again
+            if not atomic[0]:
+                raise
+
+            return False
+
+        return True
+
+    def __process_units(self, job: Dict, chunk: Dict, handler: Callable[[List, Dict], List[Dict]], written: List[Dict]) -> None:
+        """
+        Process units of chunk one by one, each followed by its status
+
+        Args:
+            job (Dict): Job document
+            chunk (Dict): Chunk document
+            handler (Callable[[List, Dict], List[Dict]]): Handler of kind of job
+            written (List[Dict]): Statuses of units already processed
+
+        Raises:
+            RuntimeError: Database operation failed
+        """
+
+        first: int = chunk['number'] * job['chunk']
+        done: Set[int] = {row['index'] for row in written}
+        rows: List[Dict] = list(written)
+
+        for index, unit in enumerate(chunk['units']):
+            if first + index in done:
+                continue
+
+            # Unit runs its own transactions, its failure is its status
+            row: Dict = self.__status(job['_id'], chunk['number'], first + index, handler([unit], job['options'])[0])
+
+            if isinstance(self.__mongo.insert_one(self.STATUS_COLLECTION, row), DatabaseFailure):
+                raise RuntimeError('Job status cannot be written.')
+
+            rows.append(row)
+
+        self.__mongo.run_transaction(lambda: self.__finish(job['_id'], chunk, rows))
+
+    def __finish(self, job_id: str, chunk: Dict, rows: List[Dict]) -> None:
+        """
+        Mark chunk done and add its statuses to job counters
+
+        Args:
+            job_id (str): Job id
+            chunk (Dict): Chunk document
+            rows (List[Dict]): Statuses of all units of chunk
+
+        Raises:
+            RuntimeError: Database operation failed, chunk would be processed again
+        """
+
+        succeeded: int = sum(1 for row in rows if row.get('status'))
+
+        if isinstance(self.__mongo.update_one(self.CHUNK_COLLECTION, {'_id': chunk['_id']}, {'$set': {'done': True}, '$unset': {'units': ''}}), DatabaseFailure):
+            raise RuntimeError('Job chunk cannot be marked done.')
+
+        if isinstance(self.__mongo.update_one(self.COLLECTION, {'_id': job_id}, {'$inc': {'done': len(rows), 'succeeded': succeeded, 'failed': len(rows) - succeeded}, '$set': {'updated': time.time()}}), DatabaseFailure):
+            raise RuntimeError('Job counters cannot be written.')
+
+    @staticmethod
+    def __status(job_id: str, number: int, index: int, status: Dict) -> Dict:
+        """
+        Build status document of unit
+
+        Args:
+            job_id (str): Job id
+            number (int): Chunk number
+            index (int): Index of unit in payload
+            status (Dict): Status returned by handler
+
+        Returns:
+            Dict: Return status document
+        """
+
+        return {**status, '_id': job_id + ':' + str(index), 'job': job_id, 'chunk': number, 'index': index}
+
+    def __set(self, job_id: str, fields: Dict[str, Any]) -> None:
+        """
+        Update job document
+
+        Args:
+            job_id (str): Job id
+            fields (Dict[str, Any]): Changed fields
+        """
+
+        self.__mongo.update_one(self.COLLECTION, {'_id': job_id}, {'$set': {**fields, 'updated': time.time()}})
+
+    def __init__(self, mongo: DatabaseBridge, workers: int = 2):
+        """
+        Assign bridge, create indexes of chunks and statuses and create thread pool
+
+        Args:
+            mongo (DatabaseBridge): Bridge to mongodb
+            workers (int, optional): Number of jobs running at once. Defaults to 2.
+        """
+
+        self.__mongo: DatabaseBridge = mongo
+
+        # Chunks are resumed in order, statuses are paged in order of units
+        mongo.create_index(self.CHUNK_COLLECTION, [('job', 1), ('number', 1)])
+        mongo.create_index(self.STATUS_COLLECTION, [('job', 1), ('index', 1)])
+
+        self.__executor: concurrent.futures.ThreadPoolExecutor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self.__handlers: Dict[str, Callable[[List, Dict], List[Dict]]] = {}
+        self.__lock: threading.Lock = threading.Lock()
+        self.__submitted: int = 0
+        self.__running: int = 0
+        self.__failed: int = 0
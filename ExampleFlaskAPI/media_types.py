@@ -0,0 +1,143 @@
+import json
+import datetime
+import bson
+import werkzeug
+from bson.raw_bson import RawBSONDocument
+from bson.decimal128 import Decimal128
+from typing import Any, Dict, List
+from ExampleFlaskAPI.bson_json import BSONJSONEncoder
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+class MediaTypes:
+    """
+    Content negotiation, encoding and decoding of JSON, BSON and MessagePack bodies
+
+    BSON documents cannot be lists, so BSON request bodies carry their list in a 'data' key.
+    In MessagePack, ObjectId and Decimal128 are extension types 1 and 2, datetimes are timestamps.
+    """
+
+    JSON: str = 'application/json'
+    BSON: str = 'application/bson'
+    MSGPACK: List[str] = ['application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack']
+
+    OBJECT_ID_EXT: int = 1
+    DECIMAL128_EXT: int = 2
+
+    @staticmethod
+    def available() -> List[str]:
+        """
+        Get media types supported in current environment
+
+        Returns:
+            List[str]: Return media types, preferred first
+        """
+
+        return [MediaTypes.JSON, MediaTypes.BSON] + (MediaTypes.MSGPACK if msgpack else [])
+
+    @staticmethod
+    def negotiate(accept: werkzeug.datastructures.MIMEAccept) -> str:
+        """
+        Choose response media type for Accept header
+
+        Args:
+            accept (werkzeug.datastructures.MIMEAccept): Parsed Accept header
+
+        Returns:
+            str: Return best media type, JSON if none matches
+        """
+
+        return accept.best_match(MediaTypes.available(), default=MediaTypes.JSON) or MediaTypes.JSON
+
+    @staticmethod
+    def encode(envelope: Dict, media_type: str) -> str | bytes:
+        """
+        Encode response envelope
+
+        Args:
+            envelope (Dict): Response envelope with result as last key
+            media_type (str): Negotiated media type
+
+        Returns:
+            str | bytes: Return encoded envelope
+        """
+
+        if media_type == MediaTypes.BSON:
+            return bson.encode(envelope)
+
+        if media_type in MediaTypes.MSGPACK:
+            return msgpack.packb(envelope, default=MediaTypes.__msgpack_default)
+
+        result: List = envelope['result']
+
+        if not isinstance(result, list) or not any(isinstance(row, RawBSONDocument) for row in result):
+            return json.dumps(envelope, default=str)
+
+        # Splice raw documents encoded straight from BSON in place of last key
+        return json.dumps({**envelope, 'result': None}, default=str)[:-len('null}')] + BSONJSONEncoder.encode_list(result) + '}'
+
+    @staticmethod
+    def decode(request: werkzeug.local.LocalProxy) -> Any:
+        """
+        Decode request body by its Content-Type
+
+        Args:
+            request (werkzeug.local.LocalProxy): Flask request
+
+        Returns:
+            Any: Return decoded body
+        """
+
+        if request.mimetype == MediaTypes.BSON:
+            return bson.decode(request.get_data()).get('data')
+
+        if request.mimetype in MediaTypes.MSGPACK and msgpack:
+            return msgpack.unpackb(request.get_data(), ext_hook=MediaTypes.__msgpack_ext_hook, timestamp=3)
+
+        return request.get_json()
+
+    @staticmethod
+    def __msgpack_default(value: Any) -> Any:
+        """
+        Convert types unknown to MessagePack
+
+        Args:
+            value (Any): Value to convert
+
+        Returns:
+            Any: Return packable value
+        """
+
+        if isinstance(value, bson.ObjectId):
+            return msgpack.ExtType(MediaTypes.OBJECT_ID_EXT, value.binary)
+        if isinstance(value, Decimal128):
+            return msgpack.ExtType(MediaTypes.DECIMAL128_EXT, value.bid)
+        if isinstance(value, datetime.datetime):
+            return msgpack.Timestamp.from_datetime(value if value.tzinfo else value.replace(tzinfo=datetime.timezone.utc))
+        if isinstance(value, RawBSONDocument):
+            return bson.decode(value.raw)
+
+        return str(value)
+
+    @staticmethod
+    def __msgpack_ext_hook(code: int, data: bytes) -> Any:
+        """
+        Restore extension types of MessagePack
+
+        Args:
+            code (int): Extension type code
+            data (bytes): Extension payload
+
+        Returns:
+            Any: Return restored value
+        """
+
+        if code == MediaTypes.OBJECT_ID_EXT:
+            return bson.ObjectId(data)
+        if code == MediaTypes.DECIMAL128_EXT:
+            return Decimal128.from_bid(data)
+
+        return msgpack.ExtType(code, data)
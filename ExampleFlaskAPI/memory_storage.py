@@ -0,0 +1,2380 @@
+import os
+import re
+import bson
+import math
+import bisect
+import operator
+import itertools
+import threading
+import contextlib
+import datetime
+from bson.objectid import ObjectId
+from bson.codec_options import CodecOptions
+from pymongo.errors import DuplicateKeyError, InvalidOperation, OperationFailure
+from pymongo.operations import InsertOne, UpdateOne, UpdateMany, DeleteOne, DeleteMany
+from pymongo.results import InsertOneResult, InsertManyResult, UpdateResult, DeleteResult, BulkWriteResult
+from typing import Any, Callable, Dict, Iterator, List, Set, Tuple
+
+class MemoryQuery:
+    """
+    Matching, update and ordering rules of the Mongo query subset used by endpoints
+
+    Supports equality on dotted paths (arrays are traversed), $eq, $ne, $in, $nin, $gt, $gte, $lt, $lte,
+    $exists, $regex, $not, $size, $all, $and, $or, $nor, top level $text answered by text index and update operators $set, $setOnInsert, $unset,
+    $inc, $min, $max, $push, $addToSet and $pull.
+    """
+
+    # Types whose values are ordered within their rank
+    COMPARABLE_RANKS: Set[int] = {2, 3, 6, 7, 8, 9}
+
+    COMPARISONS: Dict[str, Callable[[Any, Any], bool]] = {
+        '$gt': operator.gt,
+        '$gte': operator.ge,
+        '$lt': operator.lt,
+        '$lte': operator.le
+    }
+
+    @staticmethod
+    def rank(value: Any) -> int:
+        """
+        Get rank of value type in Mongo comparison order
+
+        Args:
+            value (Any): Value
+
+        Returns:
+            int: Return rank, values of different ranks are never equal
+        """
+
+        if value is None:
+            return 1
+        if isinstance(value, bool):
+            return 8
+        if isinstance(value, (int, float)):
+            return 2
+        if isinstance(value, str):
+            return 3
+        if isinstance(value, dict):
+            return 4
+        if isinstance(value, list):
+            return 5
+        if isinstance(value, bytes):
+            return 6
+        if isinstance(value, ObjectId):
+            return 7
+        if isinstance(value, datetime.datetime):
+            return 9
+
+        return 10
+
+    @staticmethod
+    def sort_key(value: Any) -> Tuple:
+        """
+        Get key ordering values like Mongo does
+
+        Args:
+            value (Any): Value
+
+        Returns:
+            Tuple: Return sort key
+        """
+
+        rank: int = MemoryQuery.rank(value)
+
+        if rank in MemoryQuery.COMPARABLE_RANKS:
+            return rank, value
+        if rank == 1:
+            return rank, None
+
+        return rank, str(value)
+
+    @staticmethod
+    def hash_key(value: Any) -> Any:
+        """
+        Get hashable key equal for values Mongo considers equal
+
+        Args:
+            value (Any): Value
+
+        Returns:
+            Any: Return hashable key
+        """
+
+        if isinstance(value, dict):
+            return 4, tuple((key, MemoryQuery.hash_key(element)) for key, element in value.items())
+        if isinstance(value, list):
+            return 5, tuple(MemoryQuery.hash_key(element) for element in value)
+
+        return MemoryQuery.rank(value), value
+
+    @staticmethod
+    def copy(value: Any) -> Any:
+        """
+        Copy document, faster than copy.deepcopy for BSON types
+
+        Args:
+            value (Any): Document or value
+
+        Returns:
+            Any: Return copy
+        """
+
+        if isinstance(value, dict):
+            return {key: MemoryQuery.copy(element) for key, element in value.items()}
+        if isinstance(value, list):
+            return [MemoryQuery.copy(element) for element in value]
+
+        return value
+
+    @staticmethod
+    def values(document: Dict, path: str) -> List:
+        """
+        Get values at dotted path, arrays on the way are traversed
+
+        Args:
+            document (Dict): Document
+            path (str): Dotted path, e.g. 'location.room'
+
+        Returns:
+            List: Return found values, empty if path is missing
+        """
+
+        current: List = [document]
+
+        for part in path.split('.'):
+            found: List = []
+
+            for value in current:
+                if isinstance(value, dict):
+                    if part in value:
+                        found.append(value[part])
+                elif isinstance(value, list):
+                    found.extend(element[part] for element in value if isinstance(element, dict) and part in element)
+
+                    if part.isdigit() and int(part) < len(value):
+                        found.append(value[int(part)])
+
+            current = found
+
+        return current
+
+    @staticmethod
+    def match(document: Dict, condition: Dict) -> bool:
+        """
+        Check if document matches query
+
+        Args:
+            document (Dict): Document
+            condition (Dict): Query
+
+        Returns:
+            bool: Return true if document matches
+        """
+
+        for field, expected in condition.items():
+            if field == '$and':
+                matched: bool = all(MemoryQuery.match(document, part) for part in expected)
+            elif field == '$or':
+                matched = any(MemoryQuery.match(document, part) for part in expected)
+            elif field == '$nor':
+                matched = not any(MemoryQuery.match(document, part) for part in expected)
+            elif field == '$text':
+                # Answered by text index before matching
+                matched = True
+            elif field.startswith('$'):
+                raise OperationFailure('Unsupported query operator ' + field + '.')
+            elif MemoryQuery.is_operator(expected):
+                matched = MemoryQuery.__test_all(MemoryQuery.values(document, field), expected)
+            else:
+                matched = MemoryQuery.__equals(MemoryQuery.values(document, field), expected)
+
+            if not matched:
+                return False
+
+        return True
+
+    @staticmethod
+    def is_operator(expected: Any) -> bool:
+        """
+        Check if condition value is operator expression, e.g. {'$gte': 1}
+
+        Args:
+            expected (Any): Condition value
+
+        Returns:
+            bool: Return true for operator expression
+        """
+
+        return isinstance(expected, dict) and len(expected) > 0 and next(iter(expected)).startswith('$')
+
+    @staticmethod
+    def validate_update(operation: Dict) -> None:
+        """
+        Check that update consists of operators only
+
+        Args:
+            operation (Dict): Update
+
+        Raises:
+            ValueError: Update is empty or is a replacement document
+        """
+
+        if not operation or not all(key.startswith('$') for key in operation):
+            raise ValueError('Update only works with $ operators.')
+
+    @staticmethod
+    def update(document: Dict, operation: Dict, inserting: bool = False) -> bool:
+        """
+        Apply update operators to document in place
+
+        Args:
+            document (Dict): Document
+            operation (Dict): Update
+            inserting (bool, optional): Document is being upserted, apply $setOnInsert. Defaults to False.
+
+        Returns:
+            bool: Return true if document was modified
+        """
+
+        MemoryQuery.validate_update(operation)
+
+        modified: bool = False
+
+        for name, fields in operation.items():
+            if name == '$setOnInsert' and not inserting:
+                continue
+
+            for path, argument in fields.items():
+                if path == '_id' or path.startswith('_id.'):
+                    if name not in ['$set', '$setOnInsert'] or (not inserting and argument != document.get('_id')):
+                        raise OperationFailure("Performing an update on the path '_id' would modify the immutable field '_id'.")
+
+                parent: Dict; key: str
+                parent, key = MemoryQuery.__parent(document, path, name != '$unset')
+
+                if parent is None:
+                    continue
+
+                exists: bool = key in parent
+                current: Any = parent.get(key)
+
+                if name == '$unset':
+                    if exists:
+                        del parent[key]
+                        modified = True
+                    continue
+
+                value: Any = MemoryQuery.__updated(name, current, exists, argument)
+
+                if not exists or MemoryQuery.hash_key(current) != MemoryQuery.hash_key(value) or type(current) != type(value):
+                    parent[key] = value
+                    modified = True
+
+        return modified
+
+    @staticmethod
+    def upsert_document(condition: Dict) -> Dict:
+        """
+        Build document inserted by upsert from equality conditions
+
+        Args:
+            condition (Dict): Query
+
+        Returns:
+            Dict: Return document
+        """
+
+        document: Dict = {}
+
+        for field, expected in condition.items():
+            if field.startswith('$'):
+                continue
+
+            if MemoryQuery.is_operator(expected):
+                if '$eq' not in expected:
+                    continue
+                expected = expected['$eq']
+
+            parent: Dict; key: str
+            parent, key = MemoryQuery.__parent(document, field, True)
+            parent[key] = MemoryQuery.copy(expected)
+
+        return document
+
+    @staticmethod
+    def project(document: Dict, projection: Dict | List[str]) -> Dict:
+        """
+        Copy document keeping fields of projection
+
+        Args:
+            document (Dict): Document
+            projection (Dict | List[str]): Included or excluded fields, None for all
+
+        Returns:
+            Dict: Return projected copy
+        """
+
+        if not projection:
+            return MemoryQuery.copy(document)
+
+        if isinstance(projection, list):
+            projection = {field: True for field in projection}
+
+        including: bool = any(value for field, value in projection.items() if field != '_id')
+
+        if not including:
+            result: Dict = MemoryQuery.copy(document)
+
+            for field, value in projection.items():
+                parent: Dict; key: str
+                parent, key = MemoryQuery.__parent(result, field, False)
+
+                if not value and parent is not None:
+                    parent.pop(key, None)
+
+            return result
+
+        result = {}
+
+        if projection.get('_id', True) and '_id' in document:
+            result['_id'] = document['_id']
+
+        for field, value in projection.items():
+            if not value or field == '_id':
+                continue
+
+            values: List = MemoryQuery.values(document, field)
+
+            if values:
+                parent, key = MemoryQuery.__parent(result, field, True)
+                parent[key] = MemoryQuery.copy(values[0])
+
+        return result
+
+    @staticmethod
+    def __test_all(values: List, expression: Dict) -> bool:
+        """
+        Check values against all operators of expression
+
+        Args:
+            values (List): Values at path
+            expression (Dict): Operator expression
+
+        Returns:
+            bool: Return true if all operators match
+        """
+
+        for name, argument in expression.items():
+            if name == '$options':
+                continue
+
+            if name == '$regex':
+                pattern: re.Pattern = argument if isinstance(argument, re.Pattern) else re.compile(argument, MemoryQuery.__flags(expression.get('$options', '')))
+                matched: bool = MemoryQuery.__equals(values, pattern)
+            elif name == '$eq':
+                matched = MemoryQuery.__equals(values, argument)
+            elif name == '$ne':
+                matched = not MemoryQuery.__equals(values, argument)
+            elif name == '$in':
+                matched = any(MemoryQuery.__equals(values, element) for element in argument)
+            elif name == '$nin':
+                matched = not any(MemoryQuery.__equals(values, element) for element in argument)
+            elif name in MemoryQuery.COMPARISONS:
+                matched = MemoryQuery.__compare(values, MemoryQuery.COMPARISONS[name], argument)
+            elif name == '$exists':
+                matched = bool(values) == bool(argument)
+            elif name == '$not':
+                matched = not (MemoryQuery.__test_all(values, argument) if isinstance(argument, dict) else MemoryQuery.__equals(values, argument))
+            elif name == '$size':
+                matched = any(isinstance(value, list) and len(value) == argument for value in values)
+            elif name == '$all':
+                matched = all(MemoryQuery.__equals(values, element) for element in argument)
+            else:
+                raise OperationFailure('Unsupported query operator ' + name + '.')
+
+            if not matched:
+                return False
+
+        return True
+
+    @staticmethod
+    def __expand(values: List) -> List:
+        """
+        Add elements of arrays to values
+
+        Args:
+            values (List): Values at path
+
+        Returns:
+            List: Return values and array elements
+        """
+
+        expanded: List = list(values)
+
+        for value in values:
+            if isinstance(value, list):
+                expanded.extend(value)
+
+        return expanded
+
+    @staticmethod
+    def __equals(values: List, expected: Any) -> bool:
+        """
+        Check equality condition, missing path equals None
+
+        Args:
+            values (List): Values at path
+            expected (Any): Expected value or regex
+
+        Returns:
+            bool: Return true if any value matches
+        """
+
+        if isinstance(expected, re.Pattern):
+            return any(isinstance(value, str) and expected.search(value) for value in MemoryQuery.__expand(values))
+
+        if not values:
+            return expected is None
+
+        key: Any = MemoryQuery.hash_key(expected)
+
+        return any(MemoryQuery.hash_key(value) == key for value in MemoryQuery.__expand(values))
+
+    @staticmethod
+    def __compare(values: List, comparison: Callable[[Any, Any], bool], bound: Any) -> bool:
+        """
+        Check range condition, only values of the same type as bound are compared
+
+        Args:
+            values (List): Values at path
+            comparison (Callable[[Any, Any], bool]): Comparison operator
+            bound (Any): Bound of range
+
+        Returns:
+            bool: Return true if any value is in range
+        """
+
+        rank: int = MemoryQuery.rank(bound)
+
+        if rank not in MemoryQuery.COMPARABLE_RANKS:
+            return False
+
+        return any(MemoryQuery.rank(value) == rank and comparison(value, bound) for value in MemoryQuery.__expand(values))
+
+    @staticmethod
+    def __updated(name: str, current: Any, exists: bool, argument: Any) -> Any:
+        """
+        Compute new value of field for update operator
+
+        Args:
+            name (str): Update operator
+            current (Any): Current value
+            exists (bool): Field exists
+            argument (Any): Operator argument
+
+        Returns:
+            Any: Return new value
+        """
+
+        if name in ['$set', '$setOnInsert']:
+            return MemoryQuery.copy(argument)
+
+        if name == '$inc':
+            if exists and MemoryQuery.rank(current) != 2:
+                raise OperationFailure('Cannot apply $inc to a value of non-numeric type.')
+            return (current if exists else 0) + argument
+
+        if name in ['$min', '$max']:
+            if not exists:
+                return MemoryQuery.copy(argument)
+
+            argument_key: Tuple = MemoryQuery.sort_key(argument)
+            current_key: Tuple = MemoryQuery.sort_key(current)
+
+            if (name == '$min' and argument_key < current_key) or (name == '$max' and argument_key > current_key):
+                return MemoryQuery.copy(argument)
+
+            return current
+
+        if name in ['$push', '$addToSet', '$pull']:
+            if exists and not isinstance(current, list):
+                raise OperationFailure('Cannot apply ' + name + ' to a non-array field.')
+
+            elements: List = list(current) if exists else []
+
+            if name == '$pull':
+                return [element for element in elements if not MemoryQuery.__pulled(element, argument)]
+
+            added: List = argument['$each'] if isinstance(argument, dict) and '$each' in argument else [argument]
+
+            for element in added:
+                if name == '$push' or not MemoryQuery.__equals(elements, element):
+                    elements.append(MemoryQuery.copy(element))
+
+            return elements
+
+        raise OperationFailure('Unsupported update operator ' + name + '.')
+
+    @staticmethod
+    def __pulled(element: Any, condition: Any) -> bool:
+        """
+        Check if array element matches $pull condition
+
+        Args:
+            element (Any): Array element
+            condition (Any): Value, operator expression or query of embedded documents
+
+        Returns:
+            bool: Return true if element is removed
+        """
+
+        if MemoryQuery.is_operator(condition):
+            return MemoryQuery.__test_all([element], condition)
+        if isinstance(condition, dict) and isinstance(element, dict):
+            return MemoryQuery.match(element, condition)
+
+        return MemoryQuery.__equals([element], condition)
+
+    @staticmethod
+    def __parent(document: Dict, path: str, create: bool) -> Tuple[Dict, str]:
+        """
+        Get container and key of dotted path
+
+        Args:
+            document (Dict): Document
+            path (str): Dotted path
+            create (bool): Create missing embedded documents
+
+        Returns:
+            Tuple[Dict, str]: Return container and last key, None container if path is missing
+        """
+
+        parts: List[str] = path.split('.')
+        parent: Dict = document
+
+        for part in parts[:-1]:
+            if part not in parent:
+                if not create:
+                    return None, parts[-1]
+                parent[part] = {}
+
+            parent = parent[part]
+
+            if not isinstance(parent, dict):
+                if not create:
+                    return None, parts[-1]
+                raise OperationFailure("Cannot create field '" + parts[-1] + "' in element of type " + type(parent).__name__ + '.')
+
+        return parent, parts[-1]
+
+    @staticmethod
+    def __flags(options: str) -> int:
+        """
+        Convert Mongo regex options to re flags
+
+        Args:
+            options (str): Options, e.g. 'im'
+
+        Returns:
+            int: Return re flags
+        """
+
+        flags: int = 0
+
+        for option, flag in [('i', re.IGNORECASE), ('m', re.MULTILINE), ('s', re.DOTALL), ('x', re.VERBOSE)]:
+            if option in options:
+                flags |= flag
+
+        return flags
+
+class HashIndex:
+    """
+    Hash index answering equality and $in conditions of one field
+
+    Attributes:
+        path (str): Dotted path of indexed field
+        direction (str): Index direction as given to create_index
+        unique (bool): Values must be unique across documents
+        __entries (Dict[Any, Set[int]]): Sequences of documents by value key
+    """
+
+    def keys(self, document: Dict) -> Set:
+        """
+        Get index keys of document, array fields produce key per element
+
+        Args:
+            document (Dict): Document
+
+        Returns:
+            Set: Return keys, missing field is indexed as None
+        """
+
+        values: List = MemoryQuery.values(document, self.path)
+
+        if not values:
+            return {MemoryQuery.hash_key(None)}
+
+        keys: Set = set()
+
+        for value in values:
+            keys.add(MemoryQuery.hash_key(value))
+
+            if isinstance(value, list):
+                keys.update(MemoryQuery.hash_key(element) for element in value)
+
+        return keys
+
+    def add(self, sequence: int, keys: Set, bulk: bool = False) -> None:
+        """
+        Add document to index
+
+        Args:
+            sequence (int): Document sequence
+            keys (Set): Index keys of document
+            bulk (bool, optional): Part of bulk load. Defaults to False.
+        """
+
+        for key in keys:
+            self.__entries.setdefault(key, set()).add(sequence)
+
+    def remove(self, sequence: int, keys: Set) -> None:
+        """
+        Remove document from index
+
+        Args:
+            sequence (int): Document sequence
+            keys (Set): Index keys of document
+        """
+
+        for key in keys:
+            sequences: Set[int] = self.__entries.get(key)
+
+            if sequences is not None:
+                sequences.discard(sequence)
+
+                if not sequences:
+                    del self.__entries[key]
+
+    def conflicts(self, keys: Set, sequence: int = None) -> bool:
+        """
+        Check if keys are taken by other document
+
+        Args:
+            keys (Set): Index keys
+            sequence (int, optional): Sequence of document owning keys. Defaults to None.
+
+        Returns:
+            bool: Return true on conflict
+        """
+
+        return any(self.__entries.get(key, set()) - {sequence} for key in keys)
+
+    def lookup(self, expected: Any) -> Set[int]:
+        """
+        Get sequences of documents possibly matching condition
+
+        Args:
+            expected (Any): Condition value of indexed field
+
+        Returns:
+            Set[int]: Return candidate sequences, None if index cannot answer condition
+        """
+
+        if MemoryQuery.is_operator(expected):
+            if len(expected) != 1 or next(iter(expected)) not in ['$eq', '$in']:
+                return None
+
+            values: List = expected['$eq'] if '$eq' in expected else expected['$in']
+            values = [values] if '$eq' in expected else list(values)
+        else:
+            values = [expected]
+
+        if any(isinstance(value, re.Pattern) or MemoryQuery.is_operator(value) for value in values):
+            return None
+
+        candidates: Set[int] = set()
+
+        for value in values:
+            candidates |= self.__entries.get(MemoryQuery.hash_key(value), set())
+
+        return candidates
+
+    def get_stats(self) -> Dict:
+        """
+        Get index statistics
+
+        Returns:
+            Dict: Return index type, path and number of distinct keys
+        """
+
+        return {'type': 'hash', 'key': self.path, 'unique': self.unique, 'distinct': len(self.__entries)}
+
+    def __init__(self, path: str, direction: str = 'hashed', unique: bool = False):
+        """
+        Initialize empty index
+
+        Args:
+            path (str): Dotted path of indexed field
+            direction (str, optional): Index direction. Defaults to 'hashed'.
+            unique (bool, optional): Values must be unique. Defaults to False.
+        """
+
+        self.path: str = path
+        self.direction: str = direction
+        self.unique: bool = unique
+        self.__entries: Dict[Any, Set[int]] = {}
+
+class SortedIndex:
+    """
+    Sorted index answering equality, $in and range conditions of one field
+
+    Attributes:
+        path (str): Dotted path of indexed field
+        direction (int): Index direction as given to create_index
+        unique (bool): Values must be unique across documents
+        __entries (List[Tuple]): Sorted (rank, value, sequence) entries
+        __other (Dict[int, int]): Documents with embedded document or array values, always candidates
+        __dirty (bool): Entries appended by bulk load are not sorted yet
+    """
+
+    def keys(self, document: Dict) -> Set:
+        """
+        Get index keys of document, array fields produce key per element
+
+        Args:
+            document (Dict): Document
+
+        Returns:
+            Set: Return sort keys, None for values which are not ordered
+        """
+
+        values: List = MemoryQuery.values(document, self.path)
+
+        if not values:
+            return {MemoryQuery.sort_key(None)}
+
+        keys: Set = set()
+
+        for value in values:
+            for element in ([value] + value if isinstance(value, list) else [value]):
+                rank: int = MemoryQuery.rank(element)
+                keys.add(MemoryQuery.sort_key(element) if rank == 1 or rank in MemoryQuery.COMPARABLE_RANKS else None)
+
+        return keys
+
+    def add(self, sequence: int, keys: Set, bulk: bool = False) -> None:
+        """
+        Add document to index
+
+        Args:
+            sequence (int): Document sequence
+            keys (Set): Index keys of document
+            bulk (bool, optional): Append and sort on next lookup. Defaults to False.
+        """
+
+        for key in keys:
+            if key is None:
+                self.__other[sequence] = self.__other.get(sequence, 0) + 1
+            elif bulk or self.__dirty:
+                self.__entries.append(key + (sequence,))
+                self.__dirty = True
+            else:
+                bisect.insort(self.__entries, key + (sequence,))
+
+    def remove(self, sequence: int, keys: Set) -> None:
+        """
+        Remove document from index
+
+        Args:
+            sequence (int): Document sequence
+            keys (Set): Index keys of document
+        """
+
+        self.__sort()
+
+        for key in keys:
+            if key is None:
+                self.__other.pop(sequence, None)
+                continue
+
+            position: int = bisect.bisect_left(self.__entries, key + (sequence,))
+
+            if position < len(self.__entries) and self.__entries[position] == key + (sequence,):
+                del self.__entries[position]
+
+    def conflicts(self, keys: Set, sequence: int = None) -> bool:
+        """
+        Check if keys are taken by other document
+
+        Args:
+            keys (Set): Index keys
+            sequence (int, optional): Sequence of document owning keys. Defaults to None.
+
+        Returns:
+            bool: Return true on conflict
+        """
+
+        self.__sort()
+
+        return any(key is not None and self.__range(key, True, key, True) - {sequence} for key in keys)
+
+    def lookup(self, expected: Any) -> Set[int]:
+        """
+        Get sequences of documents possibly matching condition
+
+        Args:
+            expected (Any): Condition value of indexed field
+
+        Returns:
+            Set[int]: Return candidate sequences, None if index cannot answer condition
+        """
+
+        if not MemoryQuery.is_operator(expected):
+            expected = {'$eq': expected}
+
+        if not all(name in ['$eq', '$in'] + list(MemoryQuery.COMPARISONS) for name in expected):
+            return None
+
+        self.__sort()
+
+        candidates: Set[int] = None
+        lower: Tuple = None; lower_inclusive: bool = True
+        upper: Tuple = None; upper_inclusive: bool = True
+
+        for name, argument in expected.items():
+            if name in ['$eq', '$in']:
+                values: List = [argument] if name == '$eq' else list(argument)
+                keys: List = [MemoryQuery.sort_key(value) for value in values]
+
+                if any(key[0] not in MemoryQuery.COMPARABLE_RANKS and key[0] != 1 for key in keys):
+                    return None
+
+                found: Set[int] = set()
+
+                for key in keys:
+                    found |= self.__range(key, True, key, True)
+
+                candidates = found if candidates is None else candidates & found
+                continue
+
+            key = MemoryQuery.sort_key(argument)
+
+            if key[0] not in MemoryQuery.COMPARABLE_RANKS:
+                return None
+
+            # Keep tightest bounds
+            if name in ['$gt', '$gte']:
+                if lower is None or key > lower or (key == lower and name == '$gt'):
+                    lower, lower_inclusive = key, name == '$gte'
+            elif upper is None or key < upper or (key == upper and name == '$lt'):
+                upper, upper_inclusive = key, name == '$lte'
+
+        if lower is not None or upper is not None:
+            # Range stays within values of the same type
+            if lower is not None and upper is not None and lower[0] != upper[0]:
+                found = set()
+            else:
+                found = self.__range(lower if lower is not None else (upper[0],), lower_inclusive or lower is None, upper if upper is not None else (lower[0] + 1,), upper_inclusive and upper is not None)
+
+            candidates = found if candidates is None else candidates & found
+
+        return candidates | set(self.__other)
+
+    def get_stats(self) -> Dict:
+        """
+        Get index statistics
+
+        Returns:
+            Dict: Return index type, path and number of entries
+        """
+
+        return {'type': 'sorted', 'key': self.path, 'unique': self.unique, 'entries': len(self.__entries) + len(self.__other)}
+
+    def __range(self, lower: Tuple, lower_inclusive: bool, upper: Tuple, upper_inclusive: bool) -> Set[int]:
+        """
+        Get sequences of entries between keys
+
+        Args:
+            lower (Tuple): Lower key
+            lower_inclusive (bool): Include entries equal to lower key
+            upper (Tuple): Upper key
+            upper_inclusive (bool): Include entries equal to upper key
+
+        Returns:
+            Set[int]: Return sequences
+        """
+
+        start: int = bisect.bisect_left(self.__entries, lower if lower_inclusive else lower + (math.inf,))
+        end: int = bisect.bisect_left(self.__entries, upper + (math.inf,) if upper_inclusive else upper)
+
+        return set(map(operator.itemgetter(-1), self.__entries[start:end]))
+
+    def __sort(self) -> None:
+        """
+        Sort entries appended by bulk load
+        """
+
+        if self.__dirty:
+            self.__entries.sort()
+            self.__dirty = False
+
+    def __init__(self, path: str, direction: int = 1, unique: bool = False):
+        """
+        Initialize empty index
+
+        Args:
+            path (str): Dotted path of indexed field
+            direction (int, optional): Index direction. Defaults to 1.
+            unique (bool, optional): Values must be unique. Defaults to False.
+        """
+
+        self.path: str = path
+        self.direction: int = direction
+        self.unique: bool = unique
+        self.__entries: List[Tuple] = []
+        self.__other: Dict[int, int] = {}
+        self.__dirty: bool = False
+
+class TextIndex:
+    """
+    Inverted index answering $text conditions over string fields
+
+    Terms are lowercased words, without stemming and stop words of MongoDB. Search matches
+    documents holding any term, quoted phrases are required and terms prefixed with '-' are
+    excluded. Scores follow the MongoDB formula: field weight times damped term frequency
+    scaled by field length.
+
+    Attributes:
+        TOKEN (re.Pattern): Word pattern
+        path (str): Query key answered by index, always $text
+        direction (str): Index direction, always 'text'
+        unique (bool): Always false
+        fields (Dict[str, int]): Weights of indexed fields by dotted path
+        __postings (Dict[str, Set[int]]): Documents by term
+        __tokens (Dict[int, Dict[str, List[str]]]): Terms of indexed fields by document
+    """
+
+    TOKEN: re.Pattern = re.compile(r'\w+')
+
+    @staticmethod
+    def parse(search: str) -> Tuple[List[str], List[List[str]], List[str]]:
+        """
+        Split search string into terms, phrases and negated terms
+
+        Args:
+            search (str): Search string
+
+        Returns:
+            Tuple[List[str], List[List[str]], List[str]]: Return terms, terms of quoted phrases and negated terms
+        """
+
+        phrases: List[List[str]] = [TextIndex.tokenize(phrase) for phrase in re.findall(r'"([^"]*)"', search)]
+        terms: List[str] = [term for phrase in phrases for term in phrase]
+        negated: List[str] = []
+
+        for word in re.sub(r'"[^"]*"', ' ', search).split():
+            target: List[str] = negated if word.startswith('-') else terms
+            target.extend(TextIndex.tokenize(word))
+
+        return terms, [phrase for phrase in phrases if phrase], negated
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        """
+        Split text into lowercased terms
+
+        Args:
+            text (str): Text
+
+        Returns:
+            List[str]: Return terms in order
+        """
+
+        return TextIndex.TOKEN.findall(text.lower())
+
+    def keys(self, document: Dict) -> Set:
+        """
+        Get index keys of document, one per term occurrence
+
+        Args:
+            document (Dict): Document
+
+        Returns:
+            Set: Return (field, value, position, term) keys
+        """
+
+        keys: Set = set()
+
+        for field in self.fields:
+            for index, value in enumerate(MemoryQuery.values(document, field)):
+                if isinstance(value, str):
+                    keys.update((field, index, position, term) for position, term in enumerate(TextIndex.tokenize(value)))
+
+        return keys
+
+    def add(self, sequence: int, keys: Set, bulk: bool = False) -> None:
+        """
+        Add document to index
+
+        Args:
+            sequence (int): Document sequence
+            keys (Set): Keys of document
+            bulk (bool, optional): Part of bulk load. Defaults to False.
+        """
+
+        tokens: Dict[str, List[str]] = {}
+
+        for field, _, _, term in sorted(keys):
+            tokens.setdefault(field, []).append(term)
+            self.__postings.setdefault(term, set()).add(sequence)
+
+        self.__tokens[sequence] = tokens
+
+    def remove(self, sequence: int, keys: Set) -> None:
+        """
+        Remove document from index
+
+        Args:
+            sequence (int): Document sequence
+            keys (Set): Keys of document
+        """
+
+        for terms in self.__tokens.pop(sequence, {}).values():
+            for term in set(terms):
+                postings: Set[int] = self.__postings.get(term)
+
+                if postings is not None:
+                    postings.discard(sequence)
+
+                    if not postings:
+                        del self.__postings[term]
+
+    def conflicts(self, keys: Set, sequence: int = None) -> bool:
+        """
+        Text index is never unique
+
+        Args:
+            keys (Set): Keys of document
+            sequence (int, optional): Sequence of updated document. Defaults to None.
+
+        Returns:
+            bool: Return false
+        """
+
+        return False
+
+    def lookup(self, expected: Any) -> Set[int]:
+        """
+        Get documents matching text search
+
+        Args:
+            expected (Any): Expression {'$search': str}
+
+        Raises:
+            OperationFailure: Search string is missing
+
+        Returns:
+            Set[int]: Return sequences of matched documents
+        """
+
+        if not isinstance(expected, dict) or not isinstance(expected.get('$search'), str):
+            raise OperationFailure('$text needs a $search string.')
+
+        terms: List[str]; phrases: List[List[str]]; negated: List[str]
+        terms, phrases, negated = TextIndex.parse(expected['$search'])
+
+        candidates: Set[int] = set().union(*[self.__postings.get(term, set()) for term in terms])
+
+        if phrases:
+            candidates = {sequence for sequence in candidates if all(self.__contains(sequence, phrase) for phrase in phrases)}
+
+        for term in negated:
+            candidates -= self.__postings.get(term, set())
+
+        return candidates
+
+    def score(self, sequence: int, expected: Dict) -> float:
+        """
+        Get relevance of document to text search
+
+        Args:
+            sequence (int): Document sequence
+            expected (Dict): Expression {'$search': str}
+
+        Returns:
+            float: Return text score
+        """
+
+        terms: Set[str] = set(TextIndex.parse(expected['$search'])[0])
+        score: float = 0.0
+
+        for field, tokens in self.__tokens.get(sequence, {}).items():
+            for term in terms:
+                count: int = tokens.count(term)
+
+                if count:
+                    score += self.fields[field] * (2 - 2 ** (1 - count)) * (0.5 * count / len(tokens) + 0.5)
+
+        return score
+
+    def get_stats(self) -> Dict:
+        """
+        Get index statistics
+
+        Returns:
+            Dict: Return index type, fields and number of distinct terms
+        """
+
+        return {'type': 'text', 'key': list(self.fields), 'unique': False, 'terms': len(self.__postings)}
+
+    def __contains(self, sequence: int, phrase: List[str]) -> bool:
+        """
+        Check if a field of document holds phrase
+
+        Args:
+            sequence (int): Document sequence
+            phrase (List[str]): Terms of phrase
+
+        Returns:
+            bool: Return true if terms follow each other in a field
+        """
+
+        for tokens in self.__tokens.get(sequence, {}).values():
+            if any(tokens[start:start + len(phrase)] == phrase for start in range(len(tokens) - len(phrase) + 1)):
+                return True
+
+        return False
+
+    def __init__(self, fields: List[str], weights: Dict[str, int] = None):
+        """
+        Initialize empty index
+
+        Args:
+            fields (List[str]): Dotted paths of indexed fields
+            weights (Dict[str, int], optional): Weights of fields, 1 when missing. Defaults to None.
+        """
+
+        self.path: str = '$text'
+        self.direction: str = 'text'
+        self.unique: bool = False
+        self.fields: Dict[str, int] = {field: (weights or {}).get(field, 1) for field in fields}
+        self.__postings: Dict[str, Set[int]] = {}
+        self.__tokens: Dict[int, Dict[str, List[str]]] = {}
+
+class MemorySession:
+    """
+    Session of in-memory storage
+
+    Transactions hold the storage lock until commit, so they are serialized, and are rolled back with an undo log.
+
+    Attributes:
+        __lock (threading.RLock): Storage lock
+        __undo (List[Callable[[], None]]): Undo log of transaction in progress, None outside transaction
+        __ended (bool): Session was ended
+    """
+
+    @property
+    def in_transaction(self) -> bool:
+        """
+        Check if transaction is in progress
+
+        Returns:
+            bool: Return true inside transaction
+        """
+
+        return self.__undo is not None
+
+    @property
+    def has_ended(self) -> bool:
+        """
+        Check if session was ended
+
+        Returns:
+            bool: Return true after end_session
+        """
+
+        return self.__ended
+
+    def start_transaction(self, **kwargs) -> contextlib.AbstractContextManager:
+        """
+        Start transaction
+
+        Args:
+            **kwargs: pymongo transaction options, ignored
+
+        Returns:
+            contextlib.AbstractContextManager: Return context committing on success and aborting on error
+        """
+
+        if self.in_transaction:
+            raise InvalidOperation('Transaction already in progress.')
+
+        self.__lock.acquire()
+        self.__undo = []
+
+        return self.__transaction()
+
+    def commit_transaction(self) -> None:
+        """
+        Commit transaction in progress
+        """
+
+        if not self.in_transaction:
+            raise InvalidOperation('No transaction started.')
+
+        self.__undo = None
+        self.__lock.release()
+
+    def abort_transaction(self) -> None:
+        """
+        Roll back transaction in progress
+        """
+
+        if not self.in_transaction:
+            raise InvalidOperation('No transaction started.')
+
+        try:
+            for undo in reversed(self.__undo):
+                undo()
+        finally:
+            self.__undo = None
+            self.__lock.release()
+
+    def record_undo(self, undo: Callable[[], None]) -> None:
+        """
+        Record how to revert write done in transaction
+
+        Args:
+            undo (Callable[[], None]): Function reverting write
+        """
+
+        self.__undo.append(undo)
+
+    def end_session(self) -> None:
+        """
+        End session, abort transaction in progress
+        """
+
+        if self.in_transaction:
+            self.abort_transaction()
+
+        self.__ended = True
+
+    @contextlib.contextmanager
+    def __transaction(self) -> Iterator['MemorySession']:
+        """
+        Commit transaction on success, abort on error
+
+        Returns:
+            Iterator[MemorySession]: Return session
+        """
+
+        try:
+            yield self
+        except BaseException:
+            if self.in_transaction:
+                self.abort_transaction()
+            raise
+
+        if self.in_transaction:
+            self.commit_transaction()
+
+    def __enter__(self) -> 'MemorySession':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.end_session()
+
+    def __init__(self, lock: threading.RLock):
+        """
+        Initialize session
+
+        Args:
+            lock (threading.RLock): Storage lock
+        """
+
+        self.__lock: threading.RLock = lock
+        self.__undo: List[Callable[[], None]] = None
+        self.__ended: bool = False
+
+class MemoryCursor:
+    """
+    Lazy result of MemoryCollection.find supporting skip, limit and sort chaining
+
+    Attributes:
+        __collection (MemoryCollection): Queried collection
+        __condition (Dict): Query
+        __projection (Dict): Projection
+        __skip (int): Number of documents to skip
+        __limit (int): Max number of documents, 0 for no limit
+        __sort (List[Tuple[str, int]]): Sort keys and directions
+    """
+
+    def skip(self, skip: int) -> 'MemoryCursor':
+        """
+        Skip documents
+
+        Args:
+            skip (int): Number of documents to skip
+
+        Returns:
+            MemoryCursor: Return cursor
+        """
+
+        self.__skip = skip
+        return self
+
+    def limit(self, limit: int) -> 'MemoryCursor':
+        """
+        Limit number of documents
+
+        Args:
+            limit (int): Max number of documents, 0 for no limit
+
+        Returns:
+            MemoryCursor: Return cursor
+        """
+
+        self.__limit = abs(limit)
+        return self
+
+    def sort(self, key: str | List[Tuple[str, int]], direction: int = 1) -> 'MemoryCursor':
+        """
+        Sort documents
+
+        Args:
+            key (str | List[Tuple[str, int]]): Field or list of fields and directions
+            direction (int, optional): Direction of single field. Defaults to 1.
+
+        Returns:
+            MemoryCursor: Return cursor
+        """
+
+        self.__sort = [(key, direction)] if isinstance(key, str) else list(key)
+        return self
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.__collection.query(self.__condition, self.__projection, self.__skip, self.__limit, self.__sort))
+
+    def __init__(self, collection: 'MemoryCollection', condition: Dict, projection: Dict = None, skip: int = 0, limit: int = 0, sort: List[Tuple[str, int]] = None):
+        """
+        Initialize cursor
+
+        Args:
+            collection (MemoryCollection): Queried collection
+            condition (Dict): Query
+            projection (Dict, optional): Projection. Defaults to None.
+            skip (int, optional): Number of documents to skip. Defaults to 0.
+            limit (int, optional): Max number of documents, 0 for no limit. Defaults to 0.
+            sort (List[Tuple[str, int]], optional): Sort keys and directions. Defaults to None.
+        """
+
+        self.__collection: MemoryCollection = collection
+        self.__condition: Dict = condition
+        self.__projection: Dict = projection
+        self.__skip: int = skip
+        self.__limit: int = limit
+        self.__sort: List[Tuple[str, int]] = sort
+
+class MemoryCollection:
+    """
+    Collection of in-memory storage with pymongo Collection methods used by DatabaseBridge
+
+    Stored documents are never mutated, updates replace them with changed copies, so snapshots
+    can take references without copying.
+
+    Attributes:
+        name (str): Collection name
+        __lock (threading.RLock): Storage lock
+        __documents (Dict[int, Dict]): Documents by insertion sequence
+        __ids (Dict[Any, int]): Sequences by _id key
+        __sequence (int): Last insertion sequence
+        __indexes (Dict[str, HashIndex | SortedIndex | TextIndex]): Secondary indexes by name
+        __lookups (int): Queries answered by index
+        __scans (int): Queries answered by full scan
+    """
+
+    def with_options(self, codec_options: CodecOptions = None, **kwargs) -> 'MemoryCollection':
+        """
+        Get collection with options, read preference and write concern do not apply to memory
+
+        Args:
+            codec_options (CodecOptions, optional): Codec options. Defaults to None.
+            **kwargs: Other pymongo options, ignored
+
+        Returns:
+            MemoryCollection: Return collection
+        """
+
+        if codec_options is not None and codec_options.document_class is not dict:
+            raise NotImplementedError('In-memory storage returns decoded documents only.')
+
+        return self
+
+    def create_index(self, keys: str | List[Tuple[str, Any]], unique: bool = False, name: str = None, **kwargs) -> str:
+        """
+        Create single field index, 'hashed' direction builds hash index, 1 or -1 sorted index,
+        one or more 'text' fields build the text index of collection. A field indexed already
+        keeps its index, unless uniqueness is added, as index types are chosen per field by
+        DEFAULT_INDEXES, e.g. arrays of category paths are served by a hash index. Compound index
+        is served by index of its first field, in-memory sorts order by the other fields.
+
+        Args:
+            keys (str | List[Tuple[str, Any]]): Field or list of fields and directions, or text fields
+            unique (bool, optional): Values must be unique. Defaults to False.
+            name (str, optional): Index name. Defaults to None.
+            **kwargs: Other pymongo index options, 'weights' of text fields is used, others ignored
+
+        Returns:
+            str: Return index name
+        """
+
+        keys = [(keys, 1)] if isinstance(keys, str) else list(keys)
+
+        if keys and all(direction == 'text' for _, direction in keys):
+            index: HashIndex | SortedIndex | TextIndex = TextIndex([path for path, _ in keys], kwargs.get('weights'))
+            name = name or '_'.join(path + '_text' for path, _ in keys)
+        else:
+            if not keys or (len(keys) > 1 and unique):
+                raise OperationFailure('In-memory storage supports unique single field indexes only.')
+
+            path: str; direction: Any
+            path, direction = keys[0]
+
+            if direction == 'hashed':
+                index = HashIndex(path, direction, unique)
+            elif direction in [1, -1]:
+                index = SortedIndex(path, direction, unique)
+            else:
+                raise OperationFailure('Unsupported index type ' + str(direction) + '.')
+
+            name = name or path + '_' + str(direction)
+
+        with self.__lock:
+            if name in self.__indexes:
+                return name
+
+            if not isinstance(index, TextIndex):
+                for existing_name, existing in self.__indexes.items():
+                    if not isinstance(existing, TextIndex) and existing.path == index.path and (existing.unique or not unique):
+                        return existing_name
+
+            if isinstance(index, TextIndex) and self.__text() is not None:
+                raise OperationFailure('Collection ' + self.name + ' already has a text index.')
+
+            for sequence, document in self.__documents.items():
+                document_keys: Set = index.keys(document)
+
+                if unique and index.conflicts(document_keys):
+                    raise DuplicateKeyError('E11000 duplicate key error collection: ' + self.name + ' index: ' + name)
+
+                index.add(sequence, document_keys, True)
+
+            self.__indexes[name] = index
+
+        return name
+
+    def find(self, filter: Dict = None, projection: Dict = None, skip: int = 0, limit: int = 0, sort: List[Tuple[str, int]] = None, session: MemorySession = None) -> MemoryCursor:
+        """
+        Find documents
+
+        Args:
+            filter (Dict, optional): Query. Defaults to None.
+            projection (Dict, optional): Projection. Defaults to None.
+            skip (int, optional): Number of documents to skip. Defaults to 0.
+            limit (int, optional): Max number of documents, 0 for no limit. Defaults to 0.
+            sort (List[Tuple[str, int]], optional): Sort keys and directions. Defaults to None.
+            session (MemorySession, optional): Session. Defaults to None.
+
+        Returns:
+            MemoryCursor: Return cursor
+        """
+
+        return MemoryCursor(self, filter or {}, projection, skip, limit, sort)
+
+    def find_one(self, filter: Dict = None, projection: Dict = None, sort: List[Tuple[str, int]] = None, session: MemorySession = None) -> Dict:
+        """
+        Find first document
+
+        Args:
+            filter (Dict, optional): Query. Defaults to None.
+            projection (Dict, optional): Projection. Defaults to None.
+            sort (List[Tuple[str, int]], optional): Sort keys and directions. Defaults to None.
+            session (MemorySession, optional): Session. Defaults to None.
+
+        Returns:
+            Dict: Return document, None if nothing matched
+        """
+
+        documents: List[Dict] = self.query(filter or {}, projection, 0, 1, sort)
+
+        return documents[0] if documents else None
+
+    def count_documents(self, filter: Dict, session: MemorySession = None, **kwargs) -> int:
+        """
+        Count documents
+
+        Args:
+            filter (Dict): Query
+            session (MemorySession, optional): Session. Defaults to None.
+            **kwargs: Other pymongo options, ignored
+
+        Returns:
+            int: Return number of matched documents
+        """
+
+        with self.__lock:
+            return sum(1 for _ in self.__select(filter))
+
+    def query(self, condition: Dict, projection: Dict = None, skip: int = 0, limit: int = 0, sort: List[Tuple[str, int]] = None) -> List[Dict]:
+        """
+        Run query, used by cursors
+
+        Args:
+            condition (Dict): Query
+            projection (Dict, optional): Projection, {'$meta': 'textScore'} fields receive text score. Defaults to None.
+            skip (int, optional): Number of documents to skip. Defaults to 0.
+            limit (int, optional): Max number of documents, 0 for no limit. Defaults to 0.
+            sort (List[Tuple[str, int]], optional): Sort keys and directions, {'$meta': 'textScore'} direction sorts by text score. Defaults to None.
+
+        Returns:
+            List[Dict]: Return copies of matched documents
+        """
+
+        scores: List[str] = [field for field, value in (projection or {}).items() if isinstance(value, dict)] if isinstance(projection, dict) else []
+
+        with self.__lock:
+            documents: List[Tuple[int, Dict]] = self.__ordered(condition, sort, skip + limit if limit else None)[skip:]
+            scored: List[float] = [self.__score(sequence, condition) for sequence, _ in documents] if scores else []
+
+        if scores:
+            projection = {field: value for field, value in projection.items() if field not in scores}
+
+        results: List[Dict] = [MemoryQuery.project(document, projection) for _, document in documents]
+
+        for result, score in zip(results, scored):
+            result.update({field: score for field in scores})
+
+        return results
+
+    def insert_one(self, document: Dict, session: MemorySession = None) -> InsertOneResult:
+        """
+        Insert document, _id is added to it when missing
+
+        Args:
+            document (Dict): Document
+            session (MemorySession, optional): Session. Defaults to None.
+
+        Returns:
+            InsertOneResult: Return insert result
+        """
+
+        with self.__lock:
+            self.__insert(document, session)
+
+        return InsertOneResult(document['_id'], True)
+
+    def insert_many(self, documents: List[Dict], ordered: bool = True, session: MemorySession = None) -> InsertManyResult:
+        """
+        Insert documents, _id is added to them when missing
+
+        Args:
+            documents (List[Dict]): Documents
+            ordered (bool, optional): Stop on first error, documents before it stay inserted. Defaults to True.
+            session (MemorySession, optional): Session. Defaults to None.
+
+        Returns:
+            InsertManyResult: Return insert result
+        """
+
+        documents = list(documents)
+
+        with self.__lock:
+            for document in documents:
+                self.__insert(document, session, True)
+
+        return InsertManyResult([document['_id'] for document in documents], True)
+
+    def update_one(self, filter: Dict, update: Dict, upsert: bool = False, session: MemorySession = None) -> UpdateResult:
+        """
+        Update first matched document
+
+        Args:
+            filter (Dict): Query
+            update (Dict): Update operators
+            upsert (bool, optional): Insert document when nothing matched. Defaults to False.
+            session (MemorySession, optional): Session. Defaults to None.
+
+        Returns:
+            UpdateResult: Return update result
+        """
+
+        with self.__lock:
+            return self.__update(filter, update, upsert, False, session)[0]
+
+    def update_many(self, filter: Dict, update: Dict, upsert: bool = False, session: MemorySession = None) -> UpdateResult:
+        """
+        Update all matched documents
+
+        Args:
+            filter (Dict): Query
+            update (Dict): Update operators
+            upsert (bool, optional): Insert document when nothing matched. Defaults to False.
+            session (MemorySession, optional): Session. Defaults to None.
+
+        Returns:
+            UpdateResult: Return update result
+        """
+
+        with self.__lock:
+            return self.__update(filter, update, upsert, True, session)[0]
+
+    def find_one_and_update(self, filter: Dict, update: Dict, projection: Dict = None, sort: List[Tuple[str, int]] = None, upsert: bool = False, return_document: bool = False, session: MemorySession = None) -> Dict:
+        """
+        Update first matched document and return it
+
+        Args:
+            filter (Dict): Query
+            update (Dict): Update operators
+            projection (Dict, optional): Projection. Defaults to None.
+            sort (List[Tuple[str, int]], optional): Sort keys and directions. Defaults to None.
+            upsert (bool, optional): Insert document when nothing matched. Defaults to False.
+            return_document (bool, optional): ReturnDocument.AFTER to return updated document. Defaults to False.
+            session (MemorySession, optional): Session. Defaults to None.
+
+        Returns:
+            Dict: Return document before or after update, None if nothing matched
+        """
+
+        with self.__lock:
+            before: Dict; after: Dict
+            before, after = self.__update(filter, update, upsert, False, session, sort)[1:]
+
+        document: Dict = after if return_document else before
+
+        return MemoryQuery.project(document, projection) if document is not None else None
+
+    def replace_one(self, filter: Dict, replacement: Dict, upsert: bool = False, session: MemorySession = None) -> UpdateResult:
+        """
+        Replace first matched document, keeping its _id
+
+        Args:
+            filter (Dict): Query
+            replacement (Dict): New document without update operators
+            upsert (bool, optional): Insert replacement when nothing matched. Defaults to False.
+            session (MemorySession, optional): Session. Defaults to None.
+
+        Returns:
+            UpdateResult: Return update result
+        """
+
+        if any(key.startswith('$') for key in replacement):
+            raise ValueError('Replacement can not include $ operators.')
+
+        with self.__lock:
+            matched: List[Tuple[int, Dict]] = self.__ordered(filter, None, 1)
+
+            if not matched:
+                if not upsert:
+                    return UpdateResult({'n': 0, 'nModified': 0}, True)
+
+                document: Dict = {**MemoryQuery.upsert_document(filter), **MemoryQuery.copy(replacement)}
+                self.__insert(document, session)
+
+                return UpdateResult({'n': 1, 'nModified': 0, 'upserted': document['_id']}, True)
+
+            sequence: int; current: Dict
+            sequence, current = matched[0]
+
+            if '_id' in replacement and MemoryQuery.hash_key(replacement['_id']) != MemoryQuery.hash_key(current['_id']):
+                raise OperationFailure("Performing an update on the path '_id' would modify the immutable field '_id'.")
+
+            document = {'_id': current['_id'], **{key: MemoryQuery.copy(value) for key, value in replacement.items() if key != '_id'}}
+            modified: bool = MemoryQuery.hash_key(document) != MemoryQuery.hash_key(current)
+
+            if modified:
+                self.__replace(sequence, document, session)
+
+        return UpdateResult({'n': 1, 'nModified': int(modified)}, True)
+
+    def find_one_and_delete(self, filter: Dict, projection: Dict = None, sort: List[Tuple[str, int]] = None, session: MemorySession = None) -> Dict:
+        """
+        Delete first matched document and return it
+
+        Args:
+            filter (Dict): Query
+            projection (Dict, optional): Projection. Defaults to None.
+            sort (List[Tuple[str, int]], optional): Sort keys and directions. Defaults to None.
+            session (MemorySession, optional): Session. Defaults to None.
+
+        Returns:
+            Dict: Return deleted document, None if nothing matched
+        """
+
+        with self.__lock:
+            matched: List[Tuple[int, Dict]] = self.__ordered(filter, sort, 1)
+
+            if not matched:
+                return None
+
+            self.__delete(matched[0][0], session)
+
+        return MemoryQuery.project(matched[0][1], projection)
+
+    def delete_one(self, filter: Dict, session: MemorySession = None) -> DeleteResult:
+        """
+        Delete first matched document
+
+        Args:
+            filter (Dict): Query
+            session (MemorySession, optional): Session. Defaults to None.
+
+        Returns:
+            DeleteResult: Return delete result
+        """
+
+        with self.__lock:
+            sequences: List[int] = [sequence for sequence, _ in itertools.islice(self.__select(filter), 1)]
+
+            for sequence in sequences:
+                self.__delete(sequence, session)
+
+        return DeleteResult({'n': len(sequences)}, True)
+
+    def delete_many(self, filter: Dict, session: MemorySession = None) -> DeleteResult:
+        """
+        Delete all matched documents
+
+        Args:
+            filter (Dict): Query
+            session (MemorySession, optional): Session. Defaults to None.
+
+        Returns:
+            DeleteResult: Return delete result
+        """
+
+        with self.__lock:
+            sequences: List[int] = [sequence for sequence, _ in self.__select(filter)]
+
+            for sequence in sequences:
+                self.__delete(sequence, session)
+
+        return DeleteResult({'n': len(sequences)}, True)
+
+    def bulk_write(self, requests: List[InsertOne | UpdateOne | UpdateMany | DeleteOne | DeleteMany], ordered: bool = True, session: MemorySession = None) -> BulkWriteResult:
+        """
+        Apply write operations in order under one lock
+
+        Args:
+            requests (List[InsertOne | UpdateOne | UpdateMany | DeleteOne | DeleteMany]): pymongo write operations
+            ordered (bool, optional): Stop on first error, operations before it stay applied. Defaults to True.
+            session (MemorySession, optional): Session. Defaults to None.
+
+        Returns:
+            BulkWriteResult: Return bulk write result
+        """
+
+        counts: Dict[str, Any] = {'nInserted': 0, 'nMatched': 0, 'nModified': 0, 'nUpserted': 0, 'nRemoved': 0, 'upserted': []}
+
+        with self.__lock:
+            for index, request in enumerate(requests):
+                if isinstance(request, InsertOne):
+                    self.__insert(request._doc, session)
+                    counts['nInserted'] += 1
+                elif isinstance(request, (UpdateOne, UpdateMany)):
+                    result: UpdateResult = self.__update(request._filter, request._doc, bool(request._upsert), isinstance(request, UpdateMany), session)[0]
+
+                    counts['nMatched'] += result.matched_count
+                    counts['nModified'] += result.modified_count
+
+                    if result.upserted_id is not None:
+                        counts['nUpserted'] += 1
+                        counts['upserted'].append({'index': index, '_id': result.upserted_id})
+                elif isinstance(request, (DeleteOne, DeleteMany)):
+                    selected: Iterator[Tuple[int, Dict]] = self.__select(request._filter)
+                    sequences: List[int] = [sequence for sequence, _ in (selected if isinstance(request, DeleteMany) else itertools.islice(selected, 1))]
+
+                    for sequence in sequences:
+                        self.__delete(sequence, session)
+
+                    counts['nRemoved'] += len(sequences)
+                else:
+                    raise InvalidOperation('Unsupported bulk write operation ' + type(request).__name__ + '.')
+
+        return BulkWriteResult(counts, True)
+
+    def dump(self) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Get index definitions and documents for snapshot
+
+        Returns:
+            Tuple[List[Dict], List[Dict]]: Return index definitions and stored documents, which must not be mutated
+        """
+
+        with self.__lock:
+            indexes: List[Dict] = [{'name': name, 'key': index.path, 'direction': index.direction, 'unique': index.unique, **({'weights': index.fields} if isinstance(index, TextIndex) else {})} for name, index in self.__indexes.items()]
+            return indexes, list(self.__documents.values())
+
+    def get_stats(self) -> Dict:
+        """
+        Get collection statistics
+
+        Returns:
+            Dict: Return number of documents, index and scan counts and index statistics
+        """
+
+        with self.__lock:
+            return {
+                'documents': len(self.__documents),
+                'index_lookups': self.__lookups,
+                'scans': self.__scans,
+                'indexes': {name: index.get_stats() for name, index in self.__indexes.items()}
+            }
+
+    def __len__(self) -> int:
+        return len(self.__documents)
+
+    def __select(self, condition: Dict) -> Iterator[Tuple[int, Dict]]:
+        """
+        Iterate matched documents in insertion order, caller holds the lock
+
+        Args:
+            condition (Dict): Query
+
+        Returns:
+            Iterator[Tuple[int, Dict]]: Return sequences and stored documents
+        """
+
+        condition = condition or {}
+        candidates: Set[int] = None
+
+        # Intersect candidates of all indexes answering conditions
+        for field, expected in condition.items():
+            for index in self.__indexes.values():
+                if index.path != field:
+                    continue
+
+                found: Set[int] = index.lookup(expected)
+
+                if found is not None:
+                    candidates = found if candidates is None else candidates & found
+
+        if candidates is None:
+            if '$text' in condition:
+                raise OperationFailure('text index required for $text query')
+
+            self.__scans += 1
+
+            for sequence, document in list(self.__documents.items()):
+                if MemoryQuery.match(document, condition):
+                    yield sequence, document
+
+            return
+
+        self.__lookups += 1
+
+        for sequence in sorted(candidates):
+            document: Dict = self.__documents[sequence]
+
+            if MemoryQuery.match(document, condition):
+                yield sequence, document
+
+    def __ordered(self, condition: Dict, sort: List[Tuple[str, int]], count: int = None) -> List[Tuple[int, Dict]]:
+        """
+        Get matched documents in requested order, caller holds the lock
+
+        Args:
+            condition (Dict): Query
+            sort (List[Tuple[str, int]]): Sort keys and directions, None for insertion order
+            count (int, optional): Number of documents needed. Defaults to None.
+
+        Returns:
+            List[Tuple[int, Dict]]: Return sequences and stored documents
+        """
+
+        if not sort:
+            return list(itertools.islice(self.__select(condition), count))
+
+        matched: List[Tuple[int, Dict]] = list(self.__select(condition))
+
+        # Stable sorts from last key to first
+        for path, direction in reversed(sort):
+            if isinstance(direction, dict):
+                matched.sort(key=lambda item: self.__score(item[0], condition), reverse=True)
+            else:
+                matched.sort(key=lambda item: MemoryQuery.sort_key(next(iter(MemoryQuery.values(item[1], path)), None)), reverse=direction == -1)
+
+        return matched[:count]
+
+    def __text(self) -> TextIndex:
+        """
+        Get text index of collection, caller holds the lock
+
+        Returns:
+            TextIndex: Return text index, None if collection has none
+        """
+
+        return next((index for index in self.__indexes.values() if isinstance(index, TextIndex)), None)
+
+    def __score(self, sequence: int, condition: Dict) -> float:
+        """
+        Get text score of document, caller holds the lock
+
+        Args:
+            sequence (int): Document sequence
+            condition (Dict): Query
+
+        Raises:
+            OperationFailure: Query has no $text condition
+
+        Returns:
+            float: Return text score
+        """
+
+        if '$text' not in condition or self.__text() is None:
+            raise OperationFailure('query requires text score metadata, but it is not available')
+
+        return self.__text().score(sequence, condition['$text'])
+
+    def __insert(self, document: Dict, session: MemorySession, bulk: bool = False) -> None:
+        """
+        Store copy of document, caller holds the lock
+
+        Args:
+            document (Dict): Document, _id is added when missing
+            session (MemorySession): Session
+            bulk (bool, optional): Part of bulk insert. Defaults to False.
+        """
+
+        if '_id' not in document:
+            document['_id'] = ObjectId()
+
+        if MemoryQuery.hash_key(document['_id']) in self.__ids:
+            raise DuplicateKeyError('E11000 duplicate key error collection: ' + self.name + ' index: _id_')
+
+        stored: Dict = MemoryQuery.copy(document)
+        keys: List[Tuple[HashIndex | SortedIndex | TextIndex, Set]] = self.__keys(stored)
+
+        self.__sequence += 1
+        sequence: int = self.__sequence
+
+        self.__store(sequence, stored, keys, bulk)
+        self.__record(session, lambda: self.__discard(sequence))
+
+    def __update(self, condition: Dict, operation: Dict, upsert: bool, multi: bool, session: MemorySession, sort: List[Tuple[str, int]] = None) -> Tuple[UpdateResult, Dict, Dict]:
+        """
+        Update matched documents, caller holds the lock
+
+        Args:
+            condition (Dict): Query
+            operation (Dict): Update operators
+            upsert (bool): Insert document when nothing matched
+            multi (bool): Update all matched documents
+            session (MemorySession): Session
+            sort (List[Tuple[str, int]], optional): Order choosing single document. Defaults to None.
+
+        Returns:
+            Tuple[UpdateResult, Dict, Dict]: Return result and last document before and after update
+        """
+
+        MemoryQuery.validate_update(operation)
+
+        matched: List[Tuple[int, Dict]] = self.__ordered(condition, sort, None if multi else 1)
+        modified: int = 0
+        before: Dict = None; after: Dict = None
+
+        for sequence, document in matched:
+            updated: Dict = MemoryQuery.copy(document)
+
+            if MemoryQuery.update(updated, operation):
+                self.__replace(sequence, updated, session)
+                modified += 1
+
+            before, after = document, self.__documents[sequence]
+
+        if not matched and upsert:
+            document = MemoryQuery.upsert_document(condition)
+            MemoryQuery.update(document, operation, True)
+            self.__insert(document, session)
+
+            return UpdateResult({'n': 1, 'nModified': 0, 'upserted': document['_id']}, True), None, document
+
+        return UpdateResult({'n': len(matched), 'nModified': modified}, True), before, after
+
+    def __replace(self, sequence: int, document: Dict, session: MemorySession) -> None:
+        """
+        Replace stored document and its index entries, caller holds the lock
+
+        Args:
+            sequence (int): Document sequence
+            document (Dict): New document
+            session (MemorySession): Session
+        """
+
+        previous: Dict = self.__documents[sequence]
+        changes: List[Tuple[HashIndex | SortedIndex | TextIndex, Set, Set]] = []
+
+        for name, index in self.__indexes.items():
+            old_keys: Set = index.keys(previous)
+            new_keys: Set = index.keys(document)
+
+            if old_keys == new_keys:
+                continue
+
+            if index.unique and index.conflicts(new_keys, sequence):
+                raise DuplicateKeyError('E11000 duplicate key error collection: ' + self.name + ' index: ' + name)
+
+            changes.append((index, old_keys, new_keys))
+
+        for index, old_keys, new_keys in changes:
+            index.remove(sequence, old_keys)
+            index.add(sequence, new_keys)
+
+        self.__documents[sequence] = document
+        self.__record(session, lambda: self.__replace(sequence, previous, None))
+
+    def __delete(self, sequence: int, session: MemorySession) -> None:
+        """
+        Delete stored document, caller holds the lock
+
+        Args:
+            sequence (int): Document sequence
+            session (MemorySession): Session
+        """
+
+        document: Dict = self.__discard(sequence)
+        self.__record(session, lambda: self.__store(sequence, document, self.__keys(document)))
+
+    def __keys(self, document: Dict) -> List[Tuple[HashIndex | SortedIndex | TextIndex, Set]]:
+        """
+        Get index keys of document, check unique indexes
+
+        Args:
+            document (Dict): Document
+
+        Returns:
+            List[Tuple[HashIndex | SortedIndex | TextIndex, Set]]: Return indexes and their keys
+        """
+
+        keys: List[Tuple[HashIndex | SortedIndex | TextIndex, Set]] = []
+
+        for name, index in self.__indexes.items():
+            index_keys: Set = index.keys(document)
+
+            if index.unique and index.conflicts(index_keys):
+                raise DuplicateKeyError('E11000 duplicate key error collection: ' + self.name + ' index: ' + name)
+
+            keys.append((index, index_keys))
+
+        return keys
+
+    def __store(self, sequence: int, document: Dict, keys: List[Tuple[HashIndex | SortedIndex | TextIndex, Set]], bulk: bool = False) -> None:
+        """
+        Add document and its index entries
+
+        Args:
+            sequence (int): Document sequence
+            document (Dict): Document
+            keys (List[Tuple[HashIndex | SortedIndex | TextIndex, Set]]): Indexes and keys of document
+            bulk (bool, optional): Part of bulk insert. Defaults to False.
+        """
+
+        self.__documents[sequence] = document
+        self.__ids[MemoryQuery.hash_key(document['_id'])] = sequence
+
+        for index, index_keys in keys:
+            index.add(sequence, index_keys, bulk)
+
+    def __discard(self, sequence: int) -> Dict:
+        """
+        Remove document and its index entries
+
+        Args:
+            sequence (int): Document sequence
+
+        Returns:
+            Dict: Return removed document
+        """
+
+        document: Dict = self.__documents.pop(sequence)
+        del self.__ids[MemoryQuery.hash_key(document['_id'])]
+
+        for index in self.__indexes.values():
+            index.remove(sequence, index.keys(document))
+
+        return document
+
+    def __record(self, session: MemorySession, undo: Callable[[], None]) -> None:
+        """
+        Record undo of write done in transaction
+
+        Args:
+            session (MemorySession): Session, None outside transaction
+            undo (Callable[[], None]): Function reverting write
+        """
+
+        if session is not None and session.in_transaction:
+            session.record_undo(undo)
+
+    def __init__(self, name: str, lock: threading.RLock):
+        """
+        Initialize empty collection
+
+        Args:
+            name (str): Collection name
+            lock (threading.RLock): Storage lock
+        """
+
+        self.name: str = name
+        self.__lock: threading.RLock = lock
+        self.__documents: Dict[int, Dict] = {}
+        self.__ids: Dict[Any, int] = {}
+        self.__sequence: int = 0
+        self.__indexes: Dict[str, HashIndex | SortedIndex | TextIndex] = {}
+        self.__lookups: int = 0
+        self.__scans: int = 0
+
+class MemoryDatabase:
+    """
+    Database of in-memory storage, collections are created on first access
+
+    Attributes:
+        __collections (Dict[str, MemoryCollection]): Collections by name
+        __indexes (Dict[str, List[Tuple[str, Any]]]): Indexes created with new collections
+        __lock (threading.RLock): Storage lock
+    """
+
+    def list_collection_names(self, session: MemorySession = None) -> List[str]:
+        """
+        Get names of collections holding documents
+
+        Args:
+            session (MemorySession, optional): Session. Defaults to None.
+
+        Returns:
+            List[str]: Return collection names
+        """
+
+        with self.__lock:
+            return [name for name, collection in self.__collections.items() if len(collection) > 0]
+
+    def drop_collection(self, name: str, session: MemorySession = None) -> None:
+        """
+        Drop collection
+
+        Args:
+            name (str): Collection name
+            session (MemorySession, optional): Session. Defaults to None.
+        """
+
+        with self.__lock:
+            self.__collections.pop(name, None)
+
+    def collections(self) -> Dict[str, MemoryCollection]:
+        """
+        Get existing collections
+
+        Returns:
+            Dict[str, MemoryCollection]: Return collections by name
+        """
+
+        with self.__lock:
+            return dict(self.__collections)
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        collection: MemoryCollection = self.__collections.get(name)
+
+        if collection:
+            return collection
+
+        with self.__lock:
+            if name not in self.__collections:
+                collection = MemoryCollection(name, self.__lock)
+
+                indexes: List[Tuple[str, Any]] = self.__indexes.get(name, [])
+
+                # Optional third element marks unique index
+                for path, direction, *unique in indexes:
+                    if direction != 'text':
+                        collection.create_index([(path, direction)], unique=bool(unique and unique[0]))
+
+                # Text fields form one compound index
+                if any(direction == 'text' for _, direction, *_ in indexes):
+                    collection.create_index([(path, direction) for path, direction, *_ in indexes if direction == 'text'])
+
+                self.__collections[name] = collection
+
+            return self.__collections[name]
+
+    def __init__(self, lock: threading.RLock, indexes: Dict[str, List[Tuple[str, Any]]]):
+        """
+        Initialize empty database
+
+        Args:
+            lock (threading.RLock): Storage lock
+            indexes (Dict[str, List[Tuple[str, Any]]]): Indexes created with new collections
+        """
+
+        self.__lock: threading.RLock = lock
+        self.__indexes: Dict[str, List[Tuple[str, Any]]] = indexes
+        self.__collections: Dict[str, MemoryCollection] = {}
+
+class MemoryStorage:
+    """
+    In-memory storage engine used in place of mongodb client by DatabaseBridge, e.g. DatabaseBridge(MemoryStorage(path))
+
+    Snapshot is a stream of BSON documents written atomically to a file and loaded on start.
+
+    Attributes:
+        db (MemoryDatabase): Database of storage
+        cx (MemoryStorage): Client of storage, storage itself
+        __path (str): Snapshot file, None for no persistence
+        __lock (threading.RLock): Guards all collections and transactions
+    """
+
+    DEFAULT_INDEXES: Dict[str, List[Tuple[str, Any]]] = {
+        'Item': [
+            ('serial_number', 1, True),
+            ('category', 'hashed'),
+            ('price', 1),
+            ('location.room', 1),
+            ('location.bookcase', 1),
+            ('location.shelf', 1),
+            ('location.cuvette', 1),
+            ('location.column', 1),
+            ('location.row', 1),
+            ('name', 'text'),
+            ('description', 'text')
+        ],
+        'JobChunk': [
+            ('job', 'hashed')
+        ],
+        'JobStatus': [
+            ('job', 'hashed')
+        ],
+        'Category': [
+            ('name', 'hashed'),
+            ('parent_name', 'hashed'),
+            ('path', 'hashed')
+        ]
+    }
+
+    def start_session(self, **kwargs) -> MemorySession:
+        """
+        Start session
+
+        Args:
+            **kwargs: pymongo session options, ignored
+
+        Returns:
+            MemorySession: Return session
+        """
+
+        return MemorySession(self.__lock)
+
+    def snapshot(self, path: str = None) -> int:
+        """
+        Write all collections to snapshot file
+
+        Args:
+            path (str, optional): Snapshot file. Defaults to path given to storage.
+
+        Returns:
+            int: Return number of written documents
+        """
+
+        path = path or self.__path
+
+        if not path:
+            raise ValueError('Snapshot path is not set.')
+
+        # Stored documents are replaced, not mutated, so references stay consistent outside the lock
+        with self.__lock:
+            dumps: Dict[str, Tuple[List[Dict], List[Dict]]] = {name: collection.dump() for name, collection in self.db.collections().items()}
+
+        count: int = 0
+        temporary: str = path + '.tmp'
+
+        with open(temporary, 'wb') as file:
+            for name, (indexes, documents) in dumps.items():
+                file.write(bson.encode({'collection': name, 'indexes': indexes}))
+
+                for document in documents:
+                    file.write(bson.encode({'collection': name, 'document': document}))
+
+                count += len(documents)
+
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(temporary, path)
+
+        return count
+
+    def restore(self, path: str = None) -> int:
+        """
+        Load collections from snapshot file
+
+        Args:
+            path (str, optional): Snapshot file. Defaults to path given to storage.
+
+        Returns:
+            int: Return number of loaded documents
+        """
+
+        path = path or self.__path
+        count: int = 0
+
+        with self.__lock, open(path, 'rb') as file:
+            batch: List[Dict] = []
+            collection: MemoryCollection = None
+
+            for record in bson.decode_file_iter(file):
+                if 'indexes' in record:
+                    if batch:
+                        collection.insert_many(batch)
+                        batch = []
+
+                    collection = self.db[record['collection']]
+
+                    for index in record['indexes']:
+                        if index['direction'] == 'text':
+                            collection.create_index([(field, 'text') for field in index['weights']], name=index['name'], weights=index['weights'])
+                        else:
+                            collection.create_index([(index['key'], index['direction'])], index['unique'], index['name'])
+                else:
+                    batch.append(record['document'])
+                    count += 1
+
+            if batch:
+                collection.insert_many(batch)
+
+        return count
+
+    def get_stats(self) -> Dict:
+        """
+        Get storage statistics
+
+        Returns:
+            Dict: Return statistics per collection
+        """
+
+        return {name: collection.get_stats() for name, collection in self.db.collections().items()}
+
+    def __init__(self, path: str = None, indexes: Dict[str, List[Tuple[str, Any]]] = None):
+        """
+        Initialize storage, load snapshot if it exists
+
+        Args:
+            path (str, optional): Snapshot file. Defaults to None.
+            indexes (Dict[str, List[Tuple[str, Any]]], optional): Indexes created with new collections. Defaults to DEFAULT_INDEXES.
+        """
+
+        self.__path: str = path
+        self.__lock: threading.RLock = threading.RLock()
+
+        self.db: MemoryDatabase = MemoryDatabase(self.__lock, self.DEFAULT_INDEXES if indexes is None else indexes)
+        self.cx: MemoryStorage = self
+
+        if path and os.path.exists(path):
+            self.restore(path)
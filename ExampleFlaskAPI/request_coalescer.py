@@ -0,0 +1,78 @@
+import threading
+import concurrent.futures
+from typing import Any, Callable, Dict, Hashable
+
+class RequestCoalescer:
+    """
+    Single-flight execution of identical concurrent calls
+
+    The first caller of a key runs the call, callers arriving with the same key while it runs
+    wait for it and get the same result or exception. Nothing is kept after the call ends, so
+    later callers run it again.
+
+    Attributes:
+        __calls (Dict[Hashable, concurrent.futures.Future]): Running calls by key
+        __lock (threading.Lock): Guards running calls
+        __leaders (int): Calls run
+        __coalesced (int): Callers served by a call of another caller
+    """
+
+    def run(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """
+        Run call or join identical running call
+
+        Args:
+            key (Hashable): Key of identical calls
+            function (Callable[[], Any]): Call
+
+        Returns:
+            Any: Return result of call, exception of call is raised to all callers
+        """
+
+        with self.__lock:
+            future: concurrent.futures.Future = self.__calls.get(key)
+            leader: bool = future is None
+
+            if leader:
+                future = concurrent.futures.Future()
+                self.__calls[key] = future
+                self.__leaders += 1
+            else:
+                self.__coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result: Any = function()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+
+        return result
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get coalescing counters
+
+        Returns:
+            Dict[str, int]: Return run calls, coalesced callers and calls running now
+        """
+
+        with self.__lock:
+            return {'calls': self.__leaders, 'coalesced': self.__coalesced, 'running': len(self.__calls)}
+
+    def __init__(self):
+        """
+        Initialize empty registry of running calls
+        """
+
+        self.__calls: Dict[Hashable, concurrent.futures.Future] = {}
+        self.__lock: threading.Lock = threading.Lock()
+        self.__leaders: int = 0
+        self.__coalesced: int = 0
@@ -0,0 +1,226 @@
+import json
+import time
+import bson
+import threading
+import collections
+from typing import Any, Callable, Dict, List, Tuple
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure
+
+class ResultCache:
+    """
+    Cache of query results bounded by memory, invalidated by collection versions
+
+    Every collection has a version, bumped by bridge writes to it. Results are stored with
+    the version seen before the query and served only while the version is unchanged. Writes
+    of this worker bump a local counter at once and a version document in Mongo shared by all
+    workers, once per session or single write, so a bulk request costs one bump. The version
+    document is read before serving a hit, at most once per check interval, so results written
+    by other workers are dropped too, after that interval at the latest.
+    Entries are evicted least recently used first when their encoded size exceeds capacity.
+
+    Attributes:
+        COLLECTION (str): Collection of version documents
+        __mongo (DatabaseBridge): Bridge to mongodb
+        __collections (List[str]): Cached collections
+        __capacity (int): Max size of cached results in bytes
+        __check_interval (float): Seconds a read version document is trusted, 0 to read it for every hit
+        __entries (collections.OrderedDict): Version, rows and size by key, least recently used first
+        __local (Dict[str, int]): Writes of this worker by collection
+        __remote (Dict[str, Tuple[float, int]]): Time of read and version document by collection
+        __size (int): Size of cached results in bytes
+        __lock (threading.Lock): Guards entries and versions
+    """
+
+    COLLECTION: str = 'Version'
+
+    @staticmethod
+    def key(collection: str, query: Dict, skip: int, limit: int, sort: List[Tuple[str, Any]] = None, projection: Dict = None) -> str:
+        """
+        Get cache key of query, equal for filters differing in key order only
+
+        Args:
+            collection (str): Collection name
+            query (Dict): Filter
+            skip (int): Number of skipped rows
+            limit (int): Max number of rows
+            sort (List[Tuple[str, Any]], optional): Sort keys and directions. Defaults to None.
+            projection (Dict, optional): Projection. Defaults to None.
+
+        Returns:
+            str: Return key
+        """
+
+        return json.dumps([collection, query, skip, limit, sort, projection], sort_keys=True, default=repr)
+
+    def fetch(self, collection: str, key: str, load: Callable[[], List]) -> List:
+        """
+        Get cached rows of query or load and cache them
+
+        Args:
+            collection (str): Collection name
+            key (str): Key of query
+            load (Callable[[], List]): Runs query, returns rows or DatabaseFailure
+
+        Returns:
+            List: Return rows, DatabaseFailure on error
+        """
+
+        version: Tuple[int, int] = self.__version(collection)
+
+        with self.__lock:
+            entry: Tuple = self.__entries.get(key)
+
+            if entry is not None and version is not None and entry[0] == version:
+                self.__entries.move_to_end(key)
+                self.__hits += 1
+                return list(entry[1])
+
+            self.__misses += 1
+
+        rows: List = load()
+
+        if isinstance(rows, DatabaseFailure) or version is None:
+            return rows
+
+        rows = list(rows)
+        size: int = sum(ResultCache.__size_of(row) for row in rows)
+
+        with self.__lock:
+            self.__discard(key)
+
+            # Single result taking most of capacity would flush everything else
+            if size > self.__capacity // 4:
+                return rows
+
+            self.__entries[key] = (version, tuple(rows), size)
+            self.__size += size
+
+            while self.__size > self.__capacity:
+                self.__discard(next(iter(self.__entries)))
+                self.__evictions += 1
+
+        return rows
+
+    def invalidate(self, changes: List[Tuple[str, Dict, Dict]]) -> None:
+        """
+        Bump versions of written collections once per session, used as bridge batch listener
+
+        Args:
+            changes (List[Tuple[str, Dict, Dict]]): Collection names, conditions and operations of writes
+        """
+
+        written: List[str] = [name for name in self.__collections if any(collection == name for collection, _, _ in changes)]
+
+        with self.__lock:
+            for collection in written:
+                self.__local[collection] = self.__local.get(collection, 0) + 1
+
+        for collection in written:
+            self.__mongo.update_one(self.COLLECTION, {'_id': collection}, {'$inc': {'version': 1}}, True)
+
+    def get_stats(self) -> Dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dict: Return entries, size, capacity, hit rate and counters
+        """
+
+        with self.__lock:
+            return {
+                'entries': len(self.__entries),
+                'memory': self.__size,
+                'capacity': self.__capacity,
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'hit_rate': self.__hits / (self.__hits + self.__misses) if self.__hits + self.__misses else 0.0,
+                'evictions': self.__evictions,
+                'versions': dict(self.__local)
+            }
+
+    def __version(self, collection: str) -> Tuple[int, int]:
+        """
+        Get local and shared version of collection
+
+        Args:
+            collection (str): Collection name
+
+        Returns:
+            Tuple[int, int]: Return writes of this worker and version document, None if document cannot be read
+        """
+
+        now: float = time.monotonic()
+
+        with self.__lock:
+            local: int = self.__local.get(collection, 0)
+            remote: Tuple[float, int] = self.__remote.get(collection)
+
+        if remote is None or now - remote[0] >= self.__check_interval:
+            document: Dict = self.__mongo.find_one(self.COLLECTION, {'_id': collection})
+
+            if isinstance(document, DatabaseFailure):
+                return None
+
+            remote = (now, (document or {}).get('version', 0))
+
+            with self.__lock:
+                self.__remote[collection] = remote
+
+        return local, remote[1]
+
+    def __discard(self, key: str) -> None:
+        """
+        Remove entry, caller holds the lock
+
+        Args:
+            key (str): Key of entry
+        """
+
+        entry: Tuple = self.__entries.pop(key, None)
+
+        if entry is not None:
+            self.__size -= entry[2]
+
+    @staticmethod
+    def __size_of(row: Any) -> int:
+        """
+        Get encoded size of row
+
+        Args:
+            row (Any): Row, RawBSONDocument or dict
+
+        Returns:
+            int: Return size in bytes
+        """
+
+        raw: bytes = getattr(row, 'raw', None)
+
+        return len(raw) if raw is not None else len(bson.encode(row))
+
+    def __init__(self, mongo: DatabaseBridge, capacity: int = 64 * 1024 * 1024, names: List[str] = ['Item'], check_interval: float = 0.0):
+        """
+        Create empty cache and listen to writes of bridge
+
+        Args:
+            mongo (DatabaseBridge): Bridge to mongodb
+            capacity (int, optional): Max size of cached results in bytes. Defaults to 64 MiB.
+            names (List[str], optional): Names of cached collections. Defaults to ['Item'].
+            check_interval (float, optional): Seconds a read version document is trusted, writes of other workers may be missed for this long. Defaults to 0.0.
+        """
+
+        self.__mongo: DatabaseBridge = mongo
+        self.__collections: List[str] = list(names)
+        self.__capacity: int = capacity
+        self.__check_interval: float = check_interval
+
+        self.__entries: collections.OrderedDict = collections.OrderedDict()
+        self.__local: Dict[str, int] = {}
+        self.__remote: Dict[str, Tuple[float, int]] = {}
+        self.__size: int = 0
+
+        self.__hits: int = 0
+        self.__misses: int = 0
+        self.__evictions: int = 0
+        self.__lock: threading.Lock = threading.Lock()
+
+        mongo.add_listener(self.invalidate, True)
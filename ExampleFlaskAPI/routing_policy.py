@@ -0,0 +1,82 @@
+import pymongo
+from pymongo.read_preferences import Primary, PrimaryPreferred, Secondary, SecondaryPreferred, Nearest
+from pymongo.write_concern import WriteConcern
+from typing import Dict, List
+
+class RoutingPolicy:
+    """
+    Read/write routing policy for database operations of a route
+
+    Attributes:
+        read_preference (str): Mongo read preference mode
+        max_staleness (int): Max replication lag in seconds of secondary used for reads, -1 for no limit
+        write_concern (Dict): Write concern options, e.g. {'w': 1}
+        read_your_writes (bool): Read from primary after a write in the same request
+    """
+
+    READ_PREFERENCES: Dict[str, type] = {
+        'primary': Primary,
+        'primaryPreferred': PrimaryPreferred,
+        'secondary': Secondary,
+        'secondaryPreferred': SecondaryPreferred,
+        'nearest': Nearest
+    }
+
+    def reads_primary(self) -> bool:
+        """
+        Check if reads must be served by primary
+
+        Returns:
+            bool: Return true if primary is required
+        """
+
+        return self.read_preference == 'primary'
+
+    def get_read_preference(self) -> pymongo.read_preferences._ServerMode:
+        """
+        Build pymongo read preference
+
+        Returns:
+            pymongo.read_preferences._ServerMode: Return read preference
+        """
+
+        if self.reads_primary():
+            return Primary()
+
+        return self.READ_PREFERENCES[self.read_preference](max_staleness=self.max_staleness)
+
+    def get_write_concern(self) -> WriteConcern:
+        """
+        Build pymongo write concern
+
+        Returns:
+            WriteConcern: Return write concern, None for client default
+        """
+
+        if not self.write_concern:
+            return None
+
+        return WriteConcern(**self.write_concern)
+
+    def __init__(self, read_preference: str = 'primary', max_staleness: int = -1, write_concern: Dict = None, read_your_writes: bool = True):
+        """
+        Initialize policy
+
+        Args:
+            read_preference (str, optional): Mongo read preference mode. Defaults to 'primary'.
+            max_staleness (int, optional): Max replication lag in seconds, -1 for no limit. Defaults to -1.
+            write_concern (Dict, optional): Write concern options. Defaults to None.
+            read_your_writes (bool, optional): Read from primary after a write in the same request. Defaults to True.
+        """
+
+        if read_preference not in self.READ_PREFERENCES:
+            raise ValueError("Unknown read preference.")
+
+        # Mongo requires at least 90 seconds for maxStalenessSeconds
+        if max_staleness != -1 and (max_staleness < 90 or read_preference == 'primary'):
+            raise ValueError("Max staleness must be -1 or at least 90 seconds for non-primary reads.")
+
+        self.read_preference: str = read_preference
+        self.max_staleness: int = max_staleness
+        self.write_concern: Dict = write_concern
+        self.read_your_writes: bool = read_your_writes
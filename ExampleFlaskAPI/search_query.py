@@ -0,0 +1,276 @@
+import re
+import json
+import threading
+import collections
+from typing import Any, Dict, List, Tuple
+from ExampleFlaskAPI.memory_storage import MemoryQuery
+
+class SearchQuery:
+    """
+    Compiler of JSON search queries into one Mongo filter
+
+    A query is a tree of nodes: {"and": [...]}, {"or": [...]}, {"not": node} and field
+    conditions like {"field": "price", "gte": 1, "lt": 5}, {"field": "location_room", "in": [1, 3]}
+    or {"field": "name", "prefix": "Oak"}. Fields and operators are checked against whitelists
+    and values are converted to field types. Trees are normalized before compiling: nested
+    groups of the same kind are flattened, single children unwrapped, duplicates dropped and
+    children and values ordered, so equivalent queries compile to equal filters. Compiled
+    filters are cached by normalized tree, equivalent queries share one entry.
+
+    Attributes:
+        FIELDS (Dict[str, type]): Queryable parameter names and their value types
+        OPERATORS (Dict[str, str]): Mongo operators of field condition operators
+        MAX_DEPTH (int): Max nesting of nodes
+        MAX_NODES (int): Max number of nodes
+        CACHE (int): Max number of cached filters
+        __cache (collections.OrderedDict): Compiled filters by normalized tree, least recently used first
+        __lock (threading.Lock): Guards cache
+        __hits (int): Queries served from cache
+        __misses (int): Compiled queries
+    """
+
+    FIELDS: Dict[str, type] = {
+        'serial_number': str,
+        'name': str,
+        'category': str,
+        'price': float,
+        'location_room': int,
+        'location_bookcase': int,
+        'location_shelf': int,
+        'location_cuvette': int,
+        'location_column': int,
+        'location_row': int
+    }
+
+    OPERATORS: Dict[str, str] = {
+        'eq': '$eq',
+        'ne': '$ne',
+        'in': '$in',
+        'nin': '$nin',
+        'gt': '$gt',
+        'gte': '$gte',
+        'lt': '$lt',
+        'lte': '$lte',
+        'prefix': '$regex'
+    }
+
+    MAX_DEPTH: int = 8
+    MAX_NODES: int = 200
+    CACHE: int = 1024
+
+    def compile(self, query: Dict) -> Dict:
+        """
+        Validate and compile query into Mongo filter
+
+        Args:
+            query (Dict): Query tree, empty for all items
+
+        Raises:
+            ValueError: Query is not valid
+
+        Returns:
+            Dict: Return Mongo filter, a copy owned by caller
+        """
+
+        if query and not isinstance(query, dict):
+            raise ValueError('Query must be a JSON object.')
+
+        normalized: Tuple = self.__normalize(query, 0, [0]) if query else None
+        key: str = repr(normalized)
+
+        with self.__lock:
+            compiled: Dict = self.__cache.get(key)
+
+            if compiled is not None:
+                self.__cache.move_to_end(key)
+                self.__hits += 1
+                return MemoryQuery.copy(compiled)
+
+        compiled = SearchQuery.__compile(normalized) if normalized else {}
+
+        with self.__lock:
+            self.__cache[key] = compiled
+            self.__misses += 1
+
+            if len(self.__cache) > self.CACHE:
+                self.__cache.popitem(False)
+
+        return MemoryQuery.copy(compiled)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dict[str, int]: Return cached filters, hits and misses
+        """
+
+        with self.__lock:
+            return {'cached': len(self.__cache), 'hits': self.__hits, 'misses': self.__misses}
+
+    def __normalize(self, node: Any, depth: int, nodes: List[int]) -> Tuple:
+        """
+        Validate node and bring it to canonical form
+
+        Args:
+            node (Any): Query node
+            depth (int): Nesting of node
+            nodes (List[int]): Counter of visited nodes
+
+        Raises:
+            ValueError: Node is not valid
+
+        Returns:
+            Tuple: Return ('and' | 'or', children), ('not', child) or ('field', path, conditions)
+        """
+
+        nodes[0] += 1
+
+        if depth > self.MAX_DEPTH or nodes[0] > self.MAX_NODES:
+            raise ValueError('Query is too complex.')
+
+        if not isinstance(node, dict) or not node:
+            raise ValueError('Query node must be a non-empty object.')
+
+        if 'and' in node or 'or' in node:
+            kind: str = 'and' if 'and' in node else 'or'
+
+            if len(node) != 1 or not isinstance(node[kind], list) or not node[kind]:
+                raise ValueError("'" + kind + "' must be the only key of its node and hold a non-empty list.")
+
+            children: Dict[str, Tuple] = {}
+
+            for child in node[kind]:
+                normalized: Tuple = self.__normalize(child, depth + 1, nodes)
+
+                # Nested group of same kind joins its parent
+                for part in normalized[1] if normalized[0] == kind else [normalized]:
+                    children[repr(part)] = part
+
+            if len(children) == 1:
+                return next(iter(children.values()))
+
+            return kind, [children[name] for name in sorted(children)]
+
+        if 'not' in node:
+            if len(node) != 1:
+                raise ValueError("'not' must be the only key of its node.")
+
+            child: Tuple = self.__normalize(node['not'], depth + 1, nodes)
+
+            return child[1] if child[0] == 'not' else ('not', child)
+
+        return SearchQuery.__condition(node)
+
+    @staticmethod
+    def __condition(node: Dict) -> Tuple:
+        """
+        Validate field condition and convert its values
+
+        Args:
+            node (Dict): Field condition
+
+        Raises:
+            ValueError: Condition is not valid
+
+        Returns:
+            Tuple: Return ('field', path, conditions) with conditions ordered by operator
+        """
+
+        name: Any = node.get('field')
+
+        if name not in SearchQuery.FIELDS:
+            raise ValueError('Unknown field ' + str(name) + '.')
+
+        value_type: type = SearchQuery.FIELDS[name]
+        conditions: List[Tuple[str, Any]] = []
+
+        for operator, value in sorted(node.items()):
+            if operator == 'field':
+                continue
+
+            if operator not in SearchQuery.OPERATORS:
+                raise ValueError('Unknown operator ' + str(operator) + ' of field ' + name + '.')
+
+            if operator in ['in', 'nin']:
+                if not isinstance(value, list):
+                    raise ValueError("'" + operator + "' of field " + name + ' must hold a list.')
+
+                values: Dict = {MemoryQuery.hash_key(converted): converted for converted in [SearchQuery.__value(name, value_type, element) for element in value]}
+                conditions.append((operator, sorted(values.values(), key=MemoryQuery.sort_key)))
+            elif operator == 'prefix':
+                if value_type is not str or not isinstance(value, str):
+                    raise ValueError("'prefix' needs a text field and text value.")
+
+                conditions.append((operator, value))
+            else:
+                conditions.append((operator, SearchQuery.__value(name, value_type, value)))
+
+        if not conditions:
+            raise ValueError('Field ' + name + ' needs an operator.')
+
+        path: str = name.replace('location_', 'location.', 1) if name.startswith('location_') else name
+
+        return 'field', path, conditions
+
+    @staticmethod
+    def __value(name: str, value_type: type, value: Any) -> Any:
+        """
+        Convert value to type of field
+
+        Args:
+            name (str): Parameter name of field
+            value_type (type): Type of field
+            value (Any): Value from query
+
+        Raises:
+            ValueError: Value does not fit field
+
+        Returns:
+            Any: Return converted value
+        """
+
+        if value_type is str and isinstance(value, str):
+            return value
+        if value_type is float and isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        if value_type is int and isinstance(value, (int, float)) and not isinstance(value, bool) and float(value).is_integer():
+            return int(value)
+
+        raise ValueError('Value ' + json.dumps(value) + ' does not fit field ' + name + '.')
+
+    @staticmethod
+    def __compile(node: Tuple) -> Dict:
+        """
+        Compile normalized node into Mongo filter
+
+        Args:
+            node (Tuple): Normalized node
+
+        Returns:
+            Dict: Return Mongo filter
+        """
+
+        if node[0] in ['and', 'or']:
+            return {'$' + node[0]: [SearchQuery.__compile(child) for child in node[1]]}
+
+        if node[0] == 'not':
+            return {'$nor': [SearchQuery.__compile(node[1])]}
+
+        expression: Dict = {}
+
+        for operator, value in node[2]:
+            # Anchored pattern can use index of field
+            expression[SearchQuery.OPERATORS[operator]] = '^' + re.escape(value) if operator == 'prefix' else value
+
+        return {node[1]: expression}
+
+    def __init__(self):
+        """
+        Create empty cache
+        """
+
+        self.__cache: collections.OrderedDict = collections.OrderedDict()
+        self.__lock: threading.Lock = threading.Lock()
+        self.__hits: int = 0
+        self.__misses: int = 0
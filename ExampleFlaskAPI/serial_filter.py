@@ -0,0 +1,226 @@
+import math
+import hashlib
+import threading
+from typing import Dict, List, Tuple
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure
+
+class SerialFilter:
+    """
+    Counting Bloom filter over serial numbers of items
+
+    Every serial raises k counters chosen by its hash, deleting it lowers them again. A serial
+    with any counter at zero was never added, so its lookup can be skipped; a serial with all
+    counters set may exist and is looked up. Counters are bytes, saturated counters stay put.
+    Size is derived from expected number of serials and wanted false positive rate.
+
+    The filter only saves lookups, uniqueness is kept by the unique index on serial_number,
+    created by load: serials inserted by other workers are not in this filter, inserts of them
+    are rejected by the index. Without the index the filter is not loaded.
+
+    Attributes:
+        __mongo (DatabaseBridge): Bridge to mongodb
+        __collection (str): Collection of items
+        __capacity (int): Expected number of serials
+        __error_rate (float): Wanted false positive rate at capacity
+        __size (int): Number of counters
+        __hashes (int): Counters per serial
+        __counters (bytearray): Counters
+        __count (int): Serials in filter
+        __loaded (bool): Filter was built from collection
+        __lock (threading.Lock): Guards counters
+    """
+
+    def load(self) -> bool:
+        """
+        Create unique index on serial numbers and build filter from serials of collection, sized for at least twice their number
+
+        Returns:
+            bool: Return True if built, False on database error or when index cannot be created
+        """
+
+        if isinstance(self.__mongo.create_index(self.__collection, [('serial_number', 1)], True), DatabaseFailure):
+            return False
+
+        rows: List[Dict] = self.__mongo.find(self.__collection, {}, projection={'serial_number': True, '_id': False})
+
+        if isinstance(rows, DatabaseFailure):
+            return False
+
+        serials: List[str] = [str(row['serial_number']) for row in rows if 'serial_number' in row]
+        size, hashes = SerialFilter.__shape(max(self.__capacity, 2 * len(serials)), self.__error_rate)
+        counters: bytearray = bytearray(size)
+
+        for serial in serials:
+            for cell in SerialFilter.__cells(serial, size, hashes):
+                if counters[cell] < 255:
+                    counters[cell] += 1
+
+        with self.__lock:
+            self.__size, self.__hashes, self.__counters = size, hashes, counters
+            self.__count = len(serials)
+            self.__loaded = True
+
+        return True
+
+    def might_contain(self, serial: str) -> bool:
+        """
+        Check if serial may exist
+
+        Args:
+            serial (str): Serial number
+
+        Returns:
+            bool: Return False if serial surely does not exist, True if it may exist or filter is not loaded
+        """
+
+        with self.__lock:
+            if not self.__loaded:
+                return True
+
+            self.__lookups += 1
+
+            if all(self.__counters[cell] for cell in SerialFilter.__cells(str(serial), self.__size, self.__hashes)):
+                self.__maybe += 1
+                return True
+
+            return False
+
+    def add(self, serial: str) -> None:
+        """
+        Add inserted serial, ignored until load
+
+        Args:
+            serial (str): Serial number
+        """
+
+        with self.__lock:
+            if not self.__loaded:
+                return
+
+            for cell in SerialFilter.__cells(str(serial), self.__size, self.__hashes):
+                if self.__counters[cell] < 255:
+                    self.__counters[cell] += 1
+
+            self.__count += 1
+
+    def remove(self, serial: str) -> None:
+        """
+        Remove deleted serial, serials not in filter are ignored
+
+        Args:
+            serial (str): Serial number
+        """
+
+        with self.__lock:
+            if not self.__loaded:
+                return
+
+            cells: List[int] = SerialFilter.__cells(str(serial), self.__size, self.__hashes)
+
+            if not all(self.__counters[cell] for cell in cells):
+                return
+
+            for cell in cells:
+                if self.__counters[cell] < 255:
+                    self.__counters[cell] -= 1
+
+            self.__count = max(self.__count - 1, 0)
+
+    def record_false_positive(self) -> None:
+        """
+        Count possible hit not found by lookup
+        """
+
+        with self.__lock:
+            self.__false_positives += 1
+
+    def get_stats(self) -> Dict:
+        """
+        Get filter statistics
+
+        Returns:
+            Dict: Return shape, memory, expected and observed false positive rates and counters
+        """
+
+        with self.__lock:
+            misses: int = self.__lookups - self.__maybe + self.__false_positives
+
+            return {
+                'loaded': self.__loaded,
+                'serials': self.__count,
+                'capacity': self.__capacity,
+                'counters': self.__size,
+                'hashes': self.__hashes,
+                'memory': len(self.__counters),
+                'error_rate': self.__error_rate,
+                'expected_error_rate': (1 - math.exp(-self.__hashes * self.__count / self.__size)) ** self.__hashes,
+                'observed_error_rate': self.__false_positives / misses if misses else 0.0,
+                'lookups': self.__lookups,
+                'skipped': self.__lookups - self.__maybe,
+                'false_positives': self.__false_positives
+            }
+
+    @staticmethod
+    def __shape(capacity: int, error_rate: float) -> Tuple[int, int]:
+        """
+        Get number of counters and hashes reaching error rate at capacity
+
+        Args:
+            capacity (int): Expected number of serials
+            error_rate (float): Wanted false positive rate
+
+        Returns:
+            Tuple[int, int]: Return number of counters and number of hashes
+        """
+
+        size: int = max(int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)), 64)
+        hashes: int = max(int(round(size / capacity * math.log(2))), 1)
+
+        return size, hashes
+
+    @staticmethod
+    def __cells(serial: str, size: int, hashes: int) -> List[int]:
+        """
+        Get counters of serial, derived from two halves of one digest
+
+        Args:
+            serial (str): Serial number
+            size (int): Number of counters
+            hashes (int): Counters per serial
+
+        Returns:
+            List[int]: Return counter indexes
+        """
+
+        digest: bytes = hashlib.blake2b(serial.encode('utf-8'), digest_size=16).digest()
+        first: int = int.from_bytes(digest[:8], 'little')
+        second: int = int.from_bytes(digest[8:], 'little') | 1
+
+        return [(first + i * second) % size for i in range(hashes)]
+
+    def __init__(self, mongo: DatabaseBridge, capacity: int = 1000000, error_rate: float = 0.01, collection: str = 'Item'):
+        """
+        Create empty filter, every serial may exist until load
+
+        Args:
+            mongo (DatabaseBridge): Bridge to mongodb
+            capacity (int, optional): Expected number of serials, load sizes for twice the existing ones if more. Defaults to 1000000.
+            error_rate (float, optional): Wanted false positive rate at capacity. Defaults to 0.01.
+            collection (str, optional): Collection of items. Defaults to 'Item'.
+        """
+
+        self.__mongo: DatabaseBridge = mongo
+        self.__collection: str = collection
+        self.__capacity: int = capacity
+        self.__error_rate: float = error_rate
+
+        self.__size: int; self.__hashes: int
+        self.__size, self.__hashes = SerialFilter.__shape(capacity, error_rate)
+        self.__counters: bytearray = bytearray(0)
+        self.__count: int = 0
+        self.__loaded: bool = False
+
+        self.__lookups: int = 0
+        self.__maybe: int = 0
+        self.__false_positives: int = 0
+        self.__lock: threading.Lock = threading.Lock()
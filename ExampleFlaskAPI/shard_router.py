@@ -0,0 +1,251 @@
+import re
+import zlib
+import heapq
+import functools
+import itertools
+import threading
+import contextvars
+import concurrent.futures
+from flask_pymongo import PyMongo
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+from ExampleFlaskAPI.memory_storage import MemoryQuery
+
+class ShardRouter:
+    """
+    Routing of sharded collections to backing databases by shard key
+
+    Documents go to shard given by mapping of shard key value, or by stable hash of it.
+    Conditions pinning shard key by equality or $in are sent to owning shards only,
+    other conditions are scattered to all shards in parallel.
+
+    Attributes:
+        shards (List[PyMongo]): Clients of shards
+        key (str): Dotted path of shard key, e.g. 'serial_number' or 'location.room'
+        collections (List[str]): Sharded collections, other collections stay on main client
+        __mapping (Dict[Any, int]): Shards of shard key values, e.g. rooms of warehouse
+        __executor (concurrent.futures.ThreadPoolExecutor): Pool running scattered operations
+        __targeted (int): Operations sent to single shard
+        __scattered (int): Operations sent to several shards
+    """
+
+    def is_sharded(self, collection: str) -> bool:
+        """
+        Check if collection is sharded
+
+        Args:
+            collection (str): Collection name
+
+        Returns:
+            bool: Return true for sharded collection
+        """
+
+        return collection in self.collections
+
+    def shard_of(self, value: Any) -> int:
+        """
+        Get shard owning shard key value
+
+        Args:
+            value (Any): Shard key value
+
+        Returns:
+            int: Return shard number
+        """
+
+        # Integral floats are equal to ints in Mongo
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+
+        if self.__mapping and value in self.__mapping:
+            return self.__mapping[value]
+
+        return zlib.crc32(repr(value).encode('utf-8')) % len(self.shards)
+
+    def shard_for(self, document: Dict) -> int:
+        """
+        Get shard owning document
+
+        Args:
+            document (Dict): Document
+
+        Returns:
+            int: Return shard number
+        """
+
+        values: List = MemoryQuery.values(document, self.key)
+
+        return self.shard_of(values[0] if values else None)
+
+    def shards_for(self, condition: Dict) -> List[int]:
+        """
+        Get shards possibly holding documents matching condition
+
+        Args:
+            condition (Dict): Query
+
+        Returns:
+            List[int]: Return shard numbers
+        """
+
+        expected: Any = condition.get(self.key) if condition else None
+        values: List = None
+
+        if expected is not None and not isinstance(expected, (dict, list)):
+            values = [expected]
+        elif MemoryQuery.is_operator(expected) and len(expected) == 1 and ('$eq' in expected or '$in' in expected):
+            values = [expected['$eq']] if '$eq' in expected else list(expected['$in'])
+
+        if values is None or any(isinstance(value, (dict, list, re.Pattern)) for value in values):
+            shards: List[int] = list(range(len(self.shards)))
+        else:
+            shards = sorted({self.shard_of(value) for value in values})
+
+        with self.__lock:
+            if len(shards) == 1:
+                self.__targeted += 1
+            else:
+                self.__scattered += 1
+
+        return shards
+
+    def touches_key(self, operation: Dict) -> bool:
+        """
+        Check if update may change shard key
+
+        Args:
+            operation (Dict): Update operators
+
+        Returns:
+            bool: Return true if any updated path overlaps shard key
+        """
+
+        return any(
+            path == self.key or self.key.startswith(path + '.') or path.startswith(self.key + '.')
+            for fields in operation.values() if isinstance(fields, dict)
+            for path in fields
+        )
+
+    def map(self, function: Callable[[int], Any], shards: List[int]) -> List:
+        """
+        Run function for shards in parallel, keeping context of caller
+
+        Args:
+            function (Callable[[int], Any]): Function taking shard number
+            shards (List[int]): Shard numbers
+
+        Returns:
+            List: Return results in order of shards
+        """
+
+        if len(shards) == 1:
+            return [function(shards[0])]
+
+        futures: List[concurrent.futures.Future] = [self.__executor.submit(contextvars.copy_context().run, function, shard) for shard in shards]
+
+        return [future.result() for future in futures]
+
+    def merge(self, parts: List[List], sort: List[Tuple[str, int]], skip: int, limit: int) -> List:
+        """
+        Merge rows of shards into one page
+
+        Every part has to be sorted by sort and hold at least skip + limit rows when available.
+
+        Args:
+            parts (List[List]): Rows of shards
+            sort (List[Tuple[str, int]]): Sort keys and directions, None keeps order of shards
+            skip (int): Number of rows to skip
+            limit (int): Max number of rows, no limit when not positive
+
+        Returns:
+            List: Return page of rows
+        """
+
+        rows: Iterator = heapq.merge(*parts, key=ShardRouter.__sort_key(sort)) if sort else itertools.chain(*parts)
+
+        return list(itertools.islice(rows, skip, skip + limit if limit > 0 else None))
+
+    def get_stats(self) -> Dict:
+        """
+        Get routing statistics
+
+        Returns:
+            Dict: Return shard key, number of shards and targeted and scattered operations
+        """
+
+        with self.__lock:
+            return {'key': self.key, 'shards': len(self.shards), 'targeted': self.__targeted, 'scattered': self.__scattered}
+
+    @staticmethod
+    def __sort_key(sort: List[Tuple[str, int]]) -> Callable[[Mapping], Any]:
+        """
+        Get key ordering rows like Mongo sort does
+
+        Args:
+            sort (List[Tuple[str, int]]): Sort keys and directions, {'$meta': 'textScore'} sorts projected score descending
+
+        Returns:
+            Callable[[Mapping], Any]: Return key function
+        """
+
+        def compare(first: Mapping, second: Mapping) -> int:
+            for path, direction in sort:
+                direction = -1 if isinstance(direction, Mapping) else direction
+                first_key: Tuple = MemoryQuery.sort_key(ShardRouter.__value(first, path))
+                second_key: Tuple = MemoryQuery.sort_key(ShardRouter.__value(second, path))
+
+                if first_key != second_key:
+                    return direction if first_key > second_key else -direction
+
+            return 0
+
+        return functools.cmp_to_key(compare)
+
+    @staticmethod
+    def __value(row: Mapping, path: str) -> Any:
+        """
+        Get value at dotted path of decoded or raw row
+
+        Args:
+            row (Mapping): Row, dict or RawBSONDocument
+            path (str): Dotted path
+
+        Returns:
+            Any: Return value, None if path is missing
+        """
+
+        for part in path.split('.'):
+            if not isinstance(row, Mapping) or part not in row:
+                return None
+            row = row[part]
+
+        return row
+
+    def __init__(self, shards: List[PyMongo], key: str = 'serial_number', collections: List[str] = None, mapping: Dict[Any, int] = None, workers: int = 8):
+        """
+        Initialize router
+
+        Args:
+            shards (List[PyMongo]): Clients of shards
+            key (str, optional): Dotted path of shard key. Defaults to 'serial_number'.
+            collections (List[str], optional): Sharded collections. Defaults to ['Item'].
+            mapping (Dict[Any, int], optional): Shards of shard key values, others are hashed. Defaults to None.
+            workers (int, optional): Threads running scattered operations. Defaults to 8.
+        """
+
+        if not shards:
+            raise ValueError("At least one shard is required.")
+
+        if mapping and any(shard < 0 or shard >= len(shards) for shard in mapping.values()):
+            raise ValueError("Mapping points to unknown shard.")
+
+        self.shards: List[PyMongo] = list(shards)
+        self.key: str = key
+        self.collections: List[str] = list(collections or ['Item'])
+
+        self.__mapping: Dict[Any, int] = dict(mapping or {})
+        self.__executor: concurrent.futures.ThreadPoolExecutor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='shard')
+
+        self.__targeted: int = 0
+        self.__scattered: int = 0
+        self.__lock: threading.Lock = threading.Lock()
@@ -0,0 +1,134 @@
+import time
+import threading
+import concurrent.futures
+from typing import Any, Callable, Dict, List, Tuple
+
+class WriteBatcher:
+    """
+    Group commit of concurrent writes
+
+    The first caller opens a batch and waits up to max_delay for other callers to join it, or
+    until max_items joined, then flushes all values with one call and hands every caller its
+    own result. Callers joining wait for the flush. A full batch is closed at once, later
+    callers open a new one. Batches are kept apart by flush function.
+
+    Attributes:
+        __max_items (int): Max values in a batch
+        __max_delay (float): Seconds the first caller waits for others
+        __open (Dict[Callable, List[Tuple[Any, concurrent.futures.Future, float]]]): Open batch by flush function, values with their futures and arrival times
+        __condition (threading.Condition): Guards open batches, wakes caller waiting for full batch
+        __sizes (Dict[int, int]): Number of flushed batches by size
+        __wait (float): Sum of seconds values waited for flush
+        __max_wait (float): Longest wait of value for flush in seconds
+        __failures (int): Flushes that raised
+    """
+
+    def submit(self, value: Any, flush: Callable[[List[Any]], List[Any]]) -> Any:
+        """
+        Add value to open batch and get its result once batch is flushed
+
+        Args:
+            value (Any): Value to write
+            flush (Callable[[List[Any]], List[Any]]): Writes values, returns result of each in order
+
+        Returns:
+            Any: Return result of value, exception of flush is raised to all callers of batch
+        """
+
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        arrival: float = time.monotonic()
+
+        with self.__condition:
+            batch: List[Tuple[Any, concurrent.futures.Future, float]] = self.__open.get(flush)
+            leader: bool = batch is None
+
+            if leader:
+                batch = []
+                self.__open[flush] = batch
+
+            batch.append((value, future, arrival))
+
+            # Full batch takes no more values
+            if len(batch) >= self.__max_items:
+                del self.__open[flush]
+                self.__condition.notify_all()
+
+        if not leader:
+            return future.result()
+
+        deadline: float = arrival + self.__max_delay
+
+        with self.__condition:
+            while self.__open.get(flush) is batch and time.monotonic() < deadline:
+                self.__condition.wait(deadline - time.monotonic())
+
+            if self.__open.get(flush) is batch:
+                del self.__open[flush]
+
+        start: float = time.monotonic()
+
+        try:
+            results: List[Any] = flush([entry[0] for entry in batch])
+        except BaseException as error:
+            for _, waiting, _ in batch[1:]:
+                waiting.set_exception(error)
+
+            with self.__condition:
+                self.__failures += 1
+
+            raise
+
+        for (_, waiting, _), result in zip(batch[1:], results[1:]):
+            waiting.set_result(result)
+
+        with self.__condition:
+            self.__sizes[len(batch)] = self.__sizes.get(len(batch), 0) + 1
+
+            for _, _, time_of_arrival in batch:
+                self.__wait += start - time_of_arrival
+                self.__max_wait = max(self.__max_wait, start - time_of_arrival)
+
+        return results[0]
+
+    def get_stats(self) -> Dict:
+        """
+        Get batch sizes and latency added by waiting for batches
+
+        Returns:
+            Dict: Return batches, values, mean and max batch size, batches by size and mean and max wait in milliseconds
+        """
+
+        with self.__condition:
+            batches: int = sum(self.__sizes.values())
+            values: int = sum(size * count for size, count in self.__sizes.items())
+
+            return {
+                'batches': batches,
+                'items': values,
+                'mean_size': values / batches if batches else 0.0,
+                'max_size': max(self.__sizes, default=0),
+                'sizes': {str(size): self.__sizes[size] for size in sorted(self.__sizes)},
+                'mean_wait_ms': self.__wait / values * 1000 if values else 0.0,
+                'max_wait_ms': self.__max_wait * 1000,
+                'failures': self.__failures,
+                'open': len(self.__open)
+            }
+
+    def __init__(self, max_items: int = 64, max_delay: float = 0.005):
+        """
+        Create batcher without open batches
+
+        Args:
+            max_items (int, optional): Max values in a batch. Defaults to 64.
+            max_delay (float, optional): Seconds the first caller waits for others, added to latency of writes. Defaults to 0.005.
+        """
+
+        self.__max_items: int = max_items
+        self.__max_delay: float = max_delay
+
+        self.__open: Dict[Callable, List[Tuple[Any, concurrent.futures.Future, float]]] = {}
+        self.__condition: threading.Condition = threading.Condition()
+        self.__sizes: Dict[int, int] = {}
+        self.__wait: float = 0.0
+        self.__max_wait: float = 0.0
+        self.__failures: int = 0
@@ -0,0 +1,74 @@
+import time
+import uuid
+import random
+from typing import Dict, List
+from ExampleFlaskAPI.database_bridge import DatabaseBridge
+from ExampleFlaskAPI.memory_storage import MemoryStorage
+from ExampleFlaskAPI.item_snapshot import ItemSnapshot
+
+def create_items(count: int) -> List[Dict]:
+    """
+    Create example items
+
+    Args:
+        count (int): Number of items
+
+    Returns:
+        List[Dict]: Return items
+    """
+
+    return [{
+        'serial_number': str(uuid.uuid4()),
+        'name': 'Industrial switch',
+        'description': 'Connects devices in industrial Ethernet networks.',
+        'category': 'Category_' + str(random.randint(1, 10)),
+        'price': round(random.uniform(1, 10), 2),
+        'location': {name: random.randint(1, 10) for name in ['room', 'bookcase', 'shelf', 'cuvette', 'column', 'row']}
+    } for i in range(count)]
+
+def python_valuation(bridge: DatabaseBridge, query: Dict) -> Dict[str, float]:
+    """
+    Sum prices per category from searched rows, as report clients do
+
+    Args:
+        bridge (DatabaseBridge): Bridge over storage
+        query (Dict): Search query
+
+    Returns:
+        Dict[str, float]: Return sums per category
+    """
+
+    sums: Dict[str, float] = {}
+
+    for item in bridge.find('Item', query):
+        sums[item['category']] = sums.get(item['category'], 0.0) + item['price']
+
+    return sums
+
+def main(count: int = 100000, operations: int = 20) -> None:
+    bridge: DatabaseBridge = DatabaseBridge(MemoryStorage())
+    bridge.insert_many('Item', create_items(count))
+
+    snapshot: ItemSnapshot = ItemSnapshot(bridge)
+    query: Dict = {'location.room': {'$gte': 2, '$lte': 8}}
+
+    start: float = time.perf_counter()
+    snapshot.aggregate({})
+    print(f'snapshot load          {(time.perf_counter() - start) * 1000:10.1f} ms')
+
+    start = time.perf_counter()
+    for i in range(operations):
+        python_valuation(bridge, query)
+    python_ms: float = (time.perf_counter() - start) * 1000 / operations
+
+    start = time.perf_counter()
+    for i in range(operations):
+        snapshot.aggregate(query, 'category', [50, 90, 99], 20)
+    snapshot_ms: float = (time.perf_counter() - start) * 1000 / operations
+
+    print(f'search + python sums   {python_ms:10.1f} ms')
+    print(f'snapshot aggregate     {snapshot_ms:10.1f} ms   {python_ms / snapshot_ms:8.1f}x')
+    print(f'snapshot memory        {snapshot.get_stats()["memory"] / 2 ** 20:10.1f} MiB')
+
+if __name__ == '__main__':
+    main()
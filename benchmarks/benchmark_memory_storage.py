@@ -0,0 +1,93 @@
+import time
+import uuid
+import random
+import mongomock
+from typing import Any, Callable, Dict, List
+from ExampleFlaskAPI.database_bridge import DatabaseBridge
+from ExampleFlaskAPI.memory_storage import MemoryStorage
+
+class MongomockClient:
+    """
+    Mongomock client shaped like Flask-PyMongo
+    """
+
+    def __init__(self):
+        self.cx = mongomock.MongoClient()
+        self.db = self.cx['benchmark']
+
+def create_items(count: int) -> List[Dict]:
+    """
+    Create example items
+
+    Args:
+        count (int): Number of items
+
+    Returns:
+        List[Dict]: Return items
+    """
+
+    return [{
+        'serial_number': str(uuid.uuid4()),
+        'name': 'Industrial switch',
+        'description': 'Connects devices in industrial Ethernet networks.',
+        'category': 'Category_' + str(random.randint(1, 10)),
+        'price': round(random.uniform(1, 10), 2),
+        'location': {name: random.randint(1, 10) for name in ['room', 'bookcase', 'shelf', 'cuvette', 'column', 'row']}
+    } for i in range(count)]
+
+def measure(function: Callable[[int], Any], operations: int) -> float:
+    """
+    Measure operations per second
+
+    Args:
+        function (Callable[[int], Any]): Operation taking its number
+        operations (int): Number of operations
+
+    Returns:
+        float: Return operations per second
+    """
+
+    start: float = time.perf_counter()
+
+    for i in range(operations):
+        function(i)
+
+    return operations / (time.perf_counter() - start)
+
+def run(bridge: DatabaseBridge, items: List[Dict], operations: int) -> Dict[str, float]:
+    """
+    Run benchmark suite on bridge
+
+    Args:
+        bridge (DatabaseBridge): Bridge over benchmarked backend
+        items (List[Dict]): Items to insert
+        operations (int): Number of operations per case
+
+    Returns:
+        Dict[str, float]: Return operations per second per case
+    """
+
+    serials: List[str] = [item['serial_number'] for item in items]
+    results: Dict[str, float] = {}
+
+    start: float = time.perf_counter()
+    bridge.insert_many('Item', [dict(item) for item in items])
+    results['insert_many'] = len(items) / (time.perf_counter() - start)
+
+    results['find_one serial_number'] = measure(lambda i: bridge.find_one('Item', {'serial_number': serials[i % len(serials)]}), operations)
+    results['find category + room range'] = measure(lambda i: bridge.find('Item', {'category': {'$in': ['Category_' + str(i % 10 + 1)]}, 'location.room': {'$gte': 2, '$lte': 3}}, 0, 50), operations)
+    results['update_one serial_number'] = measure(lambda i: bridge.update_one('Item', {'serial_number': serials[i % len(serials)]}, {'$set': {'price': 1.0}, '$inc': {'_rev': 1}}), operations)
+
+    return results
+
+def main(count: int = 20000, operations: int = 200) -> None:
+    items: List[Dict] = create_items(count)
+
+    mongomock_results: Dict[str, float] = run(DatabaseBridge(MongomockClient()), items, operations)
+    memory_results: Dict[str, float] = run(DatabaseBridge(MemoryStorage()), items, operations)
+
+    for name in memory_results:
+        print(f'{name:28} mongomock {mongomock_results[name]:10.0f} ops/s   memory {memory_results[name]:10.0f} ops/s   {memory_results[name] / mongomock_results[name]:8.1f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import time
+import json
+import uuid
+import random
+import tracemalloc
+import bson
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from typing import Callable, Dict, List, Tuple
+from ExampleFlaskAPI.bson_json import BSONJSONEncoder
+
+def create_batch(count: int) -> bytes:
+    """
+    Create BSON batch of example items, as returned by mongodb cursor
+
+    Args:
+        count (int): Number of items
+
+    Returns:
+        bytes: Return concatenated BSON documents
+    """
+
+    return b''.join(bson.encode({
+        '_id': bson.ObjectId(),
+        'serial_number': str(uuid.uuid4()),
+        'name': 'Industrial switch',
+        'description': 'Connects devices in industrial Ethernet networks.',
+        'category': 'Category_' + str(random.randint(1, 10)),
+        'price': round(random.uniform(1, 10), 2),
+        'location': {name: random.randint(1, 10) for name in ['room', 'bookcase', 'shelf', 'cuvette', 'column', 'row']}
+    }) for i in range(count))
+
+def decoded_path(batch: bytes) -> str:
+    """
+    Decode documents into dicts and encode them with json module
+
+    Args:
+        batch (bytes): BSON batch
+
+    Returns:
+        str: Return JSON text
+    """
+
+    return json.dumps(bson.decode_all(batch), default=str)
+
+def raw_path(batch: bytes) -> str:
+    """
+    Keep documents raw and encode them straight from BSON bytes
+
+    Args:
+        batch (bytes): BSON batch
+
+    Returns:
+        str: Return JSON text
+    """
+
+    return BSONJSONEncoder.encode_list(bson.decode_all(batch, CodecOptions(document_class=RawBSONDocument)))
+
+def measure(function: Callable[[bytes], str], batch: bytes, repeats: int) -> Tuple[float, int]:
+    """
+    Measure best time and peak allocations of function
+
+    Args:
+        function (Callable[[bytes], str]): Path to measure
+        batch (bytes): BSON batch
+        repeats (int): Number of timed runs
+
+    Returns:
+        Tuple[float, int]: Return best time in seconds and peak allocated bytes
+    """
+
+    best: float = float('inf')
+
+    for i in range(repeats):
+        start: float = time.perf_counter()
+        function(batch)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    function(batch)
+    peak: int = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return best, peak
+
+def main(count: int = 20000, repeats: int = 10) -> None:
+    batch: bytes = create_batch(count)
+
+    assert decoded_path(batch) == raw_path(batch)
+
+    for name, function in [('decoded (dict + json.dumps)', decoded_path), ('raw (RawBSONDocument + BSONJSONEncoder)', raw_path)]:
+        best, peak = measure(function, batch, repeats)
+        print(f'{name:42} {count / best:12.0f} docs/s {peak / 2 ** 20:8.1f} MiB peak')
+
+if __name__ == '__main__':
+    main()
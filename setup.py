@@ -30,7 +30,13 @@ setup(
     entry_points={
         'console_scripts': [
             'ExampleFlaskAPI = ExampleFlaskAPI.example.main:main',
+            'ExampleFlaskAPI-rollups = ExampleFlaskAPI.example.main:rollups',
+            'ExampleFlaskAPI-categories = ExampleFlaskAPI.example.main:categories',
         ],
     },
     install_requires=requirements,
+    extras_require={
+        'msgpack': ['msgpack'],
+        'analytics': ['numpy'],
+    },
 )
@@ -0,0 +1,86 @@
+import pytest
+import mongomock
+from flask_pymongo import PyMongo
+from flask import Flask
+from typing import Dict
+from ExampleFlaskAPI.database_bridge import DatabaseBridge
+from ExampleFlaskAPI.endpoint_item import EndpointItem
+from ExampleFlaskAPI.authorization import Authorization
+from ExampleFlaskAPI.admission_control import AdmissionController
+
+def test_acquire_release():
+    """Test admitting requests up to the in-flight limit"""
+
+    admission: AdmissionController = AdmissionController(initial_limit=2, min_limit=1, read_queue_size=0, write_queue_size=0)
+
+    assert admission.acquire('Endpoint', False) == True
+    assert admission.acquire('Endpoint', True) == True
+    assert admission.acquire('Endpoint', False) == False
+    assert admission.acquire('Other', False) == True # Limits are kept per endpoint class
+
+    admission.release('Endpoint', 0.01)
+
+    assert admission.acquire('Endpoint', False) == True
+
+    stats: Dict = admission.get_stats()['Endpoint']
+
+    assert stats['in_flight'] == 2
+    assert stats['rejected'] == {'read': 1, 'write': 0}
+
+def test_queue_timeout():
+    """Test rejecting request after waiting in queue"""
+
+    admission: AdmissionController = AdmissionController(initial_limit=1, min_limit=1, queue_timeout=0.01)
+
+    assert admission.acquire('Endpoint', True) == True
+    assert admission.acquire('Endpoint', True) == False
+    assert admission.get_stats()['Endpoint']['queue_depth'] == {'read': 0, 'write': 0}
+    assert admission.retry_after('Endpoint') >= 1
+
+def test_adaptive_limit():
+    """Test decreasing limit on slow requests and increasing on fast ones"""
+
+    admission: AdmissionController = AdmissionController(initial_limit=10, min_limit=2, latency_target=0.1, backoff_ratio=0.5)
+
+    admission.acquire('Endpoint', False)
+    admission.release('Endpoint', 1.0)
+
+    assert admission.get_stats()['Endpoint']['limit'] == 5
+
+    for i in range(20):
+        admission.acquire('Endpoint', False)
+        admission.release('Endpoint', 0.01)
+
+    assert admission.get_stats()['Endpoint']['limit'] > 5
+
+def test_route_shedding():
+    """Test fast 503 response with Retry-After header"""
+
+    app = Flask(__name__)
+
+    app.config["MONGO_URI"] = "mongodb://testdb"  
+    app.config["TESTING"] = True 
+    mongo = PyMongo(app)
+
+    mongo.cx = mongomock.MongoClient()
+    mongo.db = mongo.cx["testdb"]
+
+    authorization: Authorization = Authorization()
+    authorization.create_session('test', ['READ'])
+
+    admission: AdmissionController = AdmissionController(initial_limit=1, min_limit=1, read_queue_size=0)
+    admission.acquire('EndpointItem', False) # Occupy the only slot
+
+    endpoint: EndpointItem = EndpointItem(DatabaseBridge(mongo), {}, authorization, admission)
+    app.route('/api/v1/item/<serial_number>', methods=['GET'])(endpoint.route_item)
+
+    response = app.test_client().get('/api/v1/item/test', headers={'Authorization': 'test'})
+
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+
+    admission.release('EndpointItem', 0.01)
+
+    response = app.test_client().get('/api/v1/item/test', headers={'Authorization': 'test'})
+
+    assert response.status_code == 200
@@ -0,0 +1,67 @@
+import pytest
+import json
+import datetime
+import bson
+import werkzeug
+import mongomock
+from flask import Flask
+from flask_pymongo import PyMongo
+from bson.raw_bson import RawBSONDocument
+from bson.decimal128 import Decimal128
+from typing import List, Dict, Tuple
+from ExampleFlaskAPI.bson_json import BSONJSONEncoder
+from ExampleFlaskAPI.endpoint import Endpoint
+from ExampleFlaskAPI.authorization import Authorization
+from ExampleFlaskAPI.database_bridge import DatabaseBridge
+
+def test_encode():
+    """Test encoding raw documents same as json module"""
+
+    document: Dict = {
+        '_id': bson.ObjectId(),
+        'serial_number': 'test "ąę"',
+        'price': 1.5,
+        'count': 3,
+        'big': 2 ** 40,
+        'active': True,
+        'missing': None,
+        'created': datetime.datetime(2024, 1, 2, 3, 4, 5, 6000),
+        'location': {'room': 1, 'tags': ['a', 2, {'b': False}]},
+        'empty': {}
+    }
+
+    raw: RawBSONDocument = RawBSONDocument(bson.encode(document))
+
+    assert BSONJSONEncoder.encode(raw) == json.dumps(bson.decode(raw.raw), default=str)
+    assert BSONJSONEncoder.encode_list([raw, {'name': 'test'}]) == json.dumps([bson.decode(raw.raw), {'name': 'test'}], default=str)
+
+def test_encode_fallback():
+    """Test encoding documents with types without direct encoding"""
+
+    raw: RawBSONDocument = RawBSONDocument(bson.encode({'price': Decimal128('1.10'), 'data': b'test'}))
+
+    assert BSONJSONEncoder.encode(raw) == json.dumps(bson.decode(raw.raw), default=str)
+
+def test_response():
+    """Test splicing raw documents into response"""
+
+    class EndpointTest(Endpoint):
+        def _GET(self, request: werkzeug.local.LocalProxy) -> Tuple[int, bool, int, List]:
+            return 200, True, 1200, [RawBSONDocument(bson.encode({'name': 'test'}))]
+
+    app = Flask(__name__)
+
+    app.config["MONGO_URI"] = "mongodb://testdb"
+    mongo = PyMongo(app)
+    mongo.cx = mongomock.MongoClient()
+    mongo.db = mongo.cx["testdb"]
+
+    authorization: Authorization = Authorization()
+    authorization.create_session('test', ['READ'])
+
+    endpoint: EndpointTest = EndpointTest(DatabaseBridge(mongo), {}, authorization)
+    app.route('/test', methods=['GET'])(endpoint._route)
+
+    response = app.test_client().get('/test', headers={'Authorization': 'test'})
+
+    assert json.loads(response.data)['result'] == [{'name': 'test'}]
@@ -0,0 +1,174 @@
+import time
+from flask import Flask, request
+from unittest import mock
+from typing import Any, Callable, List, Dict
+from pymongo.errors import DuplicateKeyError
+from ExampleFlaskAPI.memory_storage import MemoryStorage
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure
+from ExampleFlaskAPI.endpoint_item import EndpointItem
+from ExampleFlaskAPI.endpoint_jobs import EndpointJobs
+from ExampleFlaskAPI.job_runner import JobRunner
+from ExampleFlaskAPI.authorization import Authorization
+
+def item(serial: str, price: float = 1.0) -> Dict:
+    return {
+        'serial_number': serial,
+        'name': 'test_name',
+        'description': 'test_description',
+        'category': '',
+        'price': price,
+        'location': {'room': 1, 'bookcase': 1, 'shelf': 1, 'cuvette': 1, 'column': 1, 'row': 1}
+    }
+
+def wait(jobs: JobRunner, job_id: str) -> Dict:
+    deadline: float = time.monotonic() + 5
+    job: Dict = jobs.get(job_id)
+
+    while job['state'] not in ['done', 'failed'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+        job = jobs.get(job_id)
+
+    return job
+
+def test_async_writes():
+    """Test bulk writes run as chunked jobs with paginated statuses"""
+
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+
+    database_bridge: DatabaseBridge = DatabaseBridge(MemoryStorage())
+    database_bridge.insert_one('Item', item('existing'))
+
+    jobs: JobRunner = JobRunner(database_bridge)
+    endpoint: EndpointItem = EndpointItem(database_bridge, [], Authorization(), jobs=jobs)
+    endpoint.ASYNC_CHUNK = 3
+
+    rows: List[Dict] = [item('new_' + str(i)) for i in range(7)] + [item('existing'), item('negative', -1.0)]
+
+    with app.test_request_context('/api/v1/item?async=true', method='POST', json=rows) as context:
+        response: tuple = endpoint._POST(request)
+
+    assert response[:3] == (202, True, 1202)
+    assert response[3][0]['total'] == 9
+
+    job: Dict = wait(jobs, response[3][0]['job'])
+
+    assert (job['state'], job['done'], job['result']) == ('done', 9, {'succeeded': 7, 'failed': 2})
+    assert len(database_bridge.find('Item', {'serial_number': {'$regex': '^new_'}})) == 7
+
+    # Statuses are paginated in payload order
+    with app.test_request_context('/api/v1/jobs/' + job['_id'] + '?skip=6&limit=2', method='GET') as context:
+        page: Dict = EndpointJobs(database_bridge, [], Authorization(), jobs)._GET(request, job['_id'])[3][0]
+
+    assert [(status['index'], status['id'], status['status']) for status in page['statuses']] == [(6, 'new_6', True), (7, 'existing', False)]
+
+    with app.test_request_context('/api/v1/item?async=true', method='PATCH', json=[{'serial_number': 'new_' + str(i), 'change': {'price': 2.0}} for i in range(4)]) as context:
+        job = wait(jobs, endpoint._PATCH(request)[3][0]['job'])
+
+    assert job['result'] == {'succeeded': 4, 'failed': 0}
+
+    with app.test_request_context('/api/v1/item?async=true&serial_number=new_0,new_1,missing', method='DELETE') as context:
+        job = wait(jobs, endpoint._DELETE(request, None)[3][0]['job'])
+
+    assert job['result'] == {'succeeded': 2, 'failed': 1}
+    assert len(database_bridge.find('Item', {'price': 2.0})) == 2
+
+def test_unit_failure():
+    """Test failed write of one unit recorded as its status, not aborting its chunk"""
+
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+
+    database_bridge: DatabaseBridge = DatabaseBridge(MemoryStorage(), unit_of_work=True)
+    insert_one: Callable = database_bridge.insert_one
+
+    def insert(collection: str, row: Dict) -> Any:
+        return DatabaseFailure(DuplicateKeyError('duplicate'), False) if row.get('serial_number') == 'raced' else insert_one(collection, row)
+
+    jobs: JobRunner = JobRunner(database_bridge)
+    endpoint: EndpointItem = EndpointItem(database_bridge, [], Authorization(), jobs=jobs)
+    endpoint.ASYNC_CHUNK = 3
+
+    with mock.patch.object(database_bridge, 'insert_one', side_effect=insert):
+        with app.test_request_context('/api/v1/item?async=true', method='POST', json=[item('new_0'), item('raced'), item('new_1'), item('new_2')]) as context:
+            job: Dict = wait(jobs, endpoint._POST(request)[3][0]['job'])
+
+    assert (job['state'], job['done'], job['result']) == ('done', 4, {'succeeded': 3, 'failed': 1})
+    assert [(status['id'], status['message']) for status in jobs.get_statuses(job['_id'])][:2] == [('new_0', 'Item added to database.'), ('raced', 'Serial number already exist.')]
+    assert len(database_bridge.find('Item', {})) == 3
+
+def test_chunk_not_marked():
+    """Test job failing once chunk cannot be marked done instead of processing it again"""
+
+    database_bridge: DatabaseBridge = DatabaseBridge(MemoryStorage())
+    handled: List[List[int]] = []
+
+    def handler(units: List[int], options: Dict) -> List[Dict]:
+        handled.append(units)
+        return [{'id': str(unit), 'status': True} for unit in units]
+
+    update_one: Callable = database_bridge.update_one
+
+    def update(collection: str, condition: Dict, operation: Dict, upsert: bool = False) -> Any:
+        return DatabaseFailure(RuntimeError('failed'), False) if collection == JobRunner.CHUNK_COLLECTION else update_one(collection, condition, operation, upsert)
+
+    jobs: JobRunner = JobRunner(database_bridge)
+    jobs.register('numbers', handler)
+
+    with mock.patch.object(database_bridge, 'update_one', side_effect=update):
+        job: Dict = wait(jobs, jobs.submit_chunked('numbers', [1, 2, 3], chunk=2))
+
+    assert (job['state'], job['error']) == ('failed', 'Job chunk cannot be marked done.')
+    assert handled == [[1, 2]]
+
+def test_indexes():
+    """Test indexes of chunks and statuses created by runner"""
+
+    storage: MemoryStorage = MemoryStorage(indexes={})
+
+    JobRunner(DatabaseBridge(storage))
+
+    # Compound indexes are served by sorted index of job
+    for collection in [JobRunner.CHUNK_COLLECTION, JobRunner.STATUS_COLLECTION]:
+        assert [index['key'] for index in storage.get_stats()[collection]['indexes'].values()] == ['job']
+
+def test_resume():
+    """Test job of stopped worker resumed from unfinished chunk"""
+
+    database_bridge: DatabaseBridge = DatabaseBridge(MemoryStorage())
+    handled: List[List[int]] = []
+
+    def handler(units: List[int], options: Dict) -> List[Dict]:
+        handled.append(units)
+        return [{'id': str(unit), 'status': unit % 2 == 0} for unit in units]
+
+    # Job left behind with first chunk done
+    database_bridge.insert_many('JobChunk', [
+        {'_id': 'job:0', 'job': 'job', 'number': 0, 'done': True},
+        {'_id': 'job:1', 'job': 'job', 'number': 1, 'units': [2, 3], 'done': False}
+    ])
+    database_bridge.insert_one('Job', {'_id': 'job', 'kind': 'numbers', 'state': 'running', 'total': 4, 'done': 2, 'succeeded': 1, 'failed': 1, 'chunk': 2, 'options': {}, 'updated': time.time() - JobRunner.STALE - 1, 'result': None, 'error': None})
+
+    jobs: JobRunner = JobRunner(database_bridge)
+    jobs.register('numbers', handler)
+
+    assert jobs.resume() == 1
+    assert jobs.resume() == 0
+
+    job: Dict = wait(jobs, 'job')
+
+    assert handled == [[2, 3]]
+    assert (job['state'], job['done'], job['result']) == ('done', 4, {'succeeded': 2, 'failed': 2})
+    assert [status['index'] for status in jobs.get_statuses('job')] == [2, 3]
+
+    # Units of chunk with status are not processed again
+    database_bridge.insert_one('JobChunk', {'_id': 'partial:0', 'job': 'partial', 'number': 0, 'units': [4, 5], 'done': False})
+    database_bridge.insert_one('JobStatus', {'_id': 'partial:0', 'job': 'partial', 'chunk': 0, 'index': 0, 'id': '4', 'status': True})
+    database_bridge.insert_one('Job', {'_id': 'partial', 'kind': 'numbers', 'state': 'running', 'total': 2, 'done': 0, 'succeeded': 0, 'failed': 0, 'chunk': 2, 'options': {}, 'updated': time.time() - JobRunner.STALE - 1, 'result': None, 'error': None})
+
+    assert jobs.resume() == 1
+
+    job = wait(jobs, 'partial')
+
+    assert handled[1:] == [[5]]
+    assert (job['state'], job['done'], job['result']) == ('done', 2, {'succeeded': 1, 'failed': 1})
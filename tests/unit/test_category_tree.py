@@ -0,0 +1,315 @@
+import time
+import pytest
+from flask import Flask, request
+from unittest import mock
+from typing import List, Dict
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure, TransactionAborted
+from ExampleFlaskAPI.memory_storage import MemoryStorage
+from ExampleFlaskAPI.endpoint_category import EndpointCategory
+from ExampleFlaskAPI.endpoint_search_items import EndpointSearchItems
+from ExampleFlaskAPI.endpoint_item import EndpointItem
+from ExampleFlaskAPI.category_tree import CategoryTree
+from ExampleFlaskAPI.inventory_rollups import InventoryRollups
+from ExampleFlaskAPI.job_runner import JobRunner
+from ExampleFlaskAPI.endpoint_jobs import EndpointJobs
+from ExampleFlaskAPI.authorization import Authorization
+
+@pytest.fixture
+def setup():
+    """Fixture setup category tree a > b > c, a > d, e over in-memory storage with transactions"""
+
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+
+    database_bridge: DatabaseBridge = DatabaseBridge(MemoryStorage())
+    tree: CategoryTree = CategoryTree(database_bridge)
+    endpoint: EndpointCategory = EndpointCategory(database_bridge, [], Authorization(), tree=tree)
+
+    for name, parent_name in [('a', ''), ('b', 'a'), ('c', 'b'), ('d', 'a'), ('e', '')]:
+        with app.test_request_context('/api/v1/category', method='POST', json=[{'name': name, 'parent_name': parent_name}]) as context:
+            assert endpoint._POST(request)[3][0]['status'] == True
+
+    yield database_bridge, app, tree, endpoint
+
+def create_item(serial_number: str, category: str) -> Dict:
+    """Create example item"""
+
+    return {
+        'serial_number': serial_number,
+        'name': 'test_name',
+        'description': 'test_description',
+        'category': category,
+        'price': 1.0,
+        'location': {'room': 1, 'bookcase': 1, 'shelf': 1, 'cuvette': 1, 'column': 1, 'row': 1}
+    }
+
+def paths(database_bridge: DatabaseBridge) -> Dict[str, List[str]]:
+    """Get paths of all categories"""
+
+    return {category['name']: category['path'] for category in database_bridge.find('Category', {})}
+
+def test_paths(setup):
+    """Test paths maintained by category writes"""
+
+    database_bridge, app, tree, endpoint = setup
+
+    assert paths(database_bridge) == {'a': [], 'b': ['a'], 'c': ['a', 'b'], 'd': ['a'], 'e': []}
+
+    with app.test_request_context('/api/v1/category', method='POST', json=[{'name': 'f', 'parent_name': 'missing'}]) as context:
+        assert endpoint._POST(request)[3][0]['message'] == 'Parent category not exists.'
+
+    # Move subtree b under e
+    with app.test_request_context('/api/v1/category', method='PATCH', json=[{'name': 'b', 'change': {'parent_name': 'e'}}]) as context:
+        assert endpoint._PATCH(request)[3][0]['status'] == True
+
+    assert paths(database_bridge) == {'a': [], 'b': ['e'], 'c': ['e', 'b'], 'd': ['a'], 'e': []}
+
+    # Category cannot be moved under own descendant
+    with app.test_request_context('/api/v1/category', method='PATCH', json=[{'name': 'e', 'change': {'parent_name': 'c'}}]) as context:
+        assert endpoint._PATCH(request)[3][0]['message'] == 'Cannot set descendant category as parent.'
+
+    with app.test_request_context('/api/v1/category/e', method='DELETE') as context:
+        assert endpoint._DELETE(request, 'e')[3][0]['status'] == True
+
+    assert paths(database_bridge) == {'a': [], 'b': [], 'c': ['b'], 'd': ['a']}
+    assert database_bridge.find_one('Category', {'name': 'b'})['parent_name'] == ''
+
+    # Paths of categories written outside endpoint
+    database_bridge.update_many('Category', {}, {'$unset': {'path': ''}})
+
+    assert tree.repair() == 4
+    assert paths(database_bridge) == {'a': [], 'b': [], 'c': ['b'], 'd': ['a']}
+
+def test_tree(setup):
+    """Test cached tree dropped by category writes"""
+
+    database_bridge, app, tree, endpoint = setup
+
+    with app.test_request_context('/api/v1/category/tree', method='GET') as context:
+        assert endpoint._GET(request, tree=True)[3] == [
+            {'name': 'a', 'children': [{'name': 'b', 'children': [{'name': 'c', 'children': []}]}, {'name': 'd', 'children': []}]},
+            {'name': 'e', 'children': []}
+        ]
+
+        endpoint._GET(request, tree=True)
+
+        assert tree.get_stats() == {'cached': True, 'builds': 1, 'hits': 1}
+
+        # Counters written by items keep the tree
+        assert tree.count('a', 'item_count', 1)
+        assert tree.get_stats()['cached'] == True
+
+        database_bridge.update_one('Category', {'name': 'e'}, {'$set': {'parent_name': 'd'}})
+
+        assert endpoint._GET(request, tree=True)[3][0]['children'][1] == {'name': 'd', 'children': [{'name': 'e', 'children': []}]}
+        assert tree.get_stats()['builds'] == 2
+
+def test_search_subtree(setup):
+    """Test item search by category subtree"""
+
+    database_bridge, app, tree, endpoint = setup
+
+    database_bridge.insert_many('Item', [{'serial_number': name, 'category': name} for name in ['c', 'd', 'e']])
+
+    search: EndpointSearchItems = EndpointSearchItems(database_bridge, [], Authorization(), tree=tree)
+
+    with app.test_request_context('/api/v1/search/items?category_subtree=a', method='GET') as context:
+        assert sorted(item['serial_number'] for item in search._GET(request)[3]) == ['c', 'd']
+
+    with app.test_request_context('/api/v1/search/items?category_subtree=b,e', method='GET') as context:
+        assert sorted(item['serial_number'] for item in search._GET(request)[3]) == ['c', 'e']
+
+    with app.test_request_context('/api/v1/search/items?category_subtree=a&category=d,e', method='GET') as context:
+        assert [item['serial_number'] for item in search._GET(request)[3]] == ['d']
+
+def test_path_index():
+    """Test path index created by tree reusing hash index of memory storage"""
+
+    storage: MemoryStorage = MemoryStorage()
+    database_bridge: DatabaseBridge = DatabaseBridge(storage)
+
+    CategoryTree(database_bridge)
+    database_bridge.insert_many('Category', [{'name': 'b', 'path': ['a']}, {'name': 'c', 'path': ['a', 'b']}])
+
+    assert [category['name'] for category in database_bridge.find('Category', {'path': 'b'})] == ['c']
+
+    stats: Dict = storage.get_stats()['Category']
+
+    assert [index['type'] for index in stats['indexes'].values() if index['key'] == 'path'] == ['hash']
+    assert stats['scans'] == 0
+
+def test_counters(setup):
+    """Test child and item counters replacing parent checks"""
+
+    database_bridge, app, tree, endpoint = setup
+
+    item: EndpointItem = EndpointItem(database_bridge, [], Authorization(), tree=tree)
+
+    def counters() -> Dict[str, tuple]:
+        return {category['name']: (category['child_count'], category['item_count']) for category in database_bridge.find('Category', {})}
+
+    assert counters() == {'a': (2, 0), 'b': (1, 0), 'c': (0, 0), 'd': (0, 0), 'e': (0, 0)}
+
+    with app.test_request_context('/api/v1/item', method='POST', json=[create_item('1', 'c'), create_item('2', 'c'), create_item('3', 'b')]) as context:
+        assert [status['status'] for status in item._POST(request)[3]] == [True, True, False]
+
+    with app.test_request_context('/api/v1/item', method='PATCH', json=[{'serial_number': '2', 'change': {'category': 'd'}}]) as context:
+        assert item._PATCH(request)[3][0]['status'] == True
+
+    with app.test_request_context('/api/v1/item/1', method='DELETE') as context:
+        assert item._DELETE(request, '1')[3][0]['status'] == True
+
+    with app.test_request_context('/api/v1/category', method='POST', json=[{'name': 'f', 'parent_name': 'd'}]) as context:
+        assert endpoint._POST(request)[3][0]['message'] == 'Parent category cannot have assigned items.'
+
+    with app.test_request_context('/api/v1/category', method='PATCH', json=[{'name': 'c', 'change': {'parent_name': 'e'}}]) as context:
+        assert endpoint._PATCH(request)[3][0]['status'] == True
+
+    with app.test_request_context('/api/v1/category/d', method='DELETE') as context:
+        assert endpoint._DELETE(request, 'd')[3][0]['message'] == 'Category cannot be deleted, because have items assigned.'
+
+    assert counters() == {'a': (2, 0), 'b': (0, 0), 'c': (0, 0), 'd': (0, 1), 'e': (1, 0)}
+
+    # Counters of writes made outside endpoints
+    database_bridge.insert_one('Item', create_item('4', 'c'))
+    database_bridge.update_many('Category', {}, {'$set': {'child_count': 7}})
+
+    assert tree.repair() == 5
+    assert counters() == {'a': (2, 0), 'b': (0, 0), 'c': (0, 1), 'd': (0, 1), 'e': (1, 0)}
+
+def test_delete_rollback(setup):
+    """Test failed delete leaving children and counters untouched"""
+
+    database_bridge, app, tree, endpoint = setup
+
+    before: List[Dict] = database_bridge.find('Category', {})
+
+    with mock.patch.object(tree, 'move', return_value=False):
+        with app.test_request_context('/api/v1/category/b', method='DELETE') as context:
+            assert endpoint._DELETE(request, 'b')[3][0] == {'id': 'b', 'status': False, 'message': 'Database operation failed.'}
+
+    assert database_bridge.find('Category', {}) == before
+
+    # Joined transaction aborts whole unit of work
+    unit_of_work: DatabaseBridge = DatabaseBridge(MemoryStorage(), unit_of_work=True)
+    unit_of_work.insert_many('Category', [{k: v for k, v in category.items() if k != '_id'} for category in before])
+    tree = CategoryTree(unit_of_work)
+    endpoint = EndpointCategory(unit_of_work, [], Authorization(), tree=tree)
+
+    with mock.patch.object(tree, 'move', return_value=False):
+        with app.test_request_context('/api/v1/category?name=e,b', method='DELETE') as context:
+            with pytest.raises(TransactionAborted):
+                endpoint._DELETE(request, None)
+
+    assert [category['name'] for category in unit_of_work.find('Category', {})] == ['a', 'b', 'c', 'd', 'e']
+    assert unit_of_work.find_one('Category', {'name': 'c'})['parent_name'] == 'b'
+
+def test_rename(setup):
+    """Test rename rewriting children, paths, items and rollups"""
+
+    database_bridge, app, tree, endpoint = setup
+
+    rollups: InventoryRollups = InventoryRollups(database_bridge)
+    endpoint = EndpointCategory(database_bridge, [], Authorization(), tree=tree, rollups=rollups)
+    item: EndpointItem = EndpointItem(database_bridge, [], Authorization(), rollups=rollups, tree=tree)
+
+    with app.test_request_context('/api/v1/item', method='POST', json=[create_item('1', 'c'), create_item('2', 'c')]) as context:
+        assert all(status['status'] for status in item._POST(request)[3])
+
+    with app.test_request_context('/api/v1/category', method='PATCH', json=[{'name': 'b', 'change': {'name': 'a'}}]) as context:
+        assert endpoint._PATCH(request)[3][0]['message'] == 'Name already exist.'
+
+    # Rename and move b in one request
+    with app.test_request_context('/api/v1/category', method='PATCH', json=[{'name': 'b', 'change': {'name': 'x', 'parent_name': 'e'}}, {'name': 'c', 'change': {'name': 'y'}}]) as context:
+        assert [status['status'] for status in endpoint._PATCH(request)[3]] == [True, True]
+
+    assert paths(database_bridge) == {'a': [], 'x': ['e'], 'y': ['e', 'x'], 'd': ['a'], 'e': []}
+    assert database_bridge.find_one('Category', {'name': 'y'})['parent_name'] == 'x'
+    assert [(row['category'], row['_rev']) for row in database_bridge.find('Item', {})] == [('y', 2), ('y', 2)]
+    assert rollups.get_stats()['category'] == [{'key': 'y', 'count': 2, 'sum': 2.0, 'min': 1.0, 'max': 1.0}]
+    assert rollups.rebuild(True)['drift'] == []
+    assert tree.repair() == 0
+
+def test_rename_rollback(setup):
+    """Test failed rename leaving category, children and items untouched"""
+
+    database_bridge, app, tree, endpoint = setup
+
+    item: EndpointItem = EndpointItem(database_bridge, [], Authorization(), tree=tree)
+
+    with app.test_request_context('/api/v1/item', method='POST', json=[create_item('1', 'c')]) as context:
+        assert item._POST(request)[3][0]['status'] == True
+
+    categories: List[Dict] = database_bridge.find('Category', {})
+    items: List[Dict] = database_bridge.find('Item', {})
+    update_many = database_bridge.update_many
+
+    def fail_items(collection: str, condition: Dict, operation: Dict):
+        return DatabaseFailure(RuntimeError('failed'), False) if collection == 'Item' else update_many(collection, condition, operation)
+
+    with mock.patch.object(database_bridge, 'update_many', side_effect=fail_items):
+        with app.test_request_context('/api/v1/category', method='PATCH', json=[{'name': 'c', 'change': {'name': 'c2', 'parent_name': 'e'}}]) as context:
+            assert endpoint._PATCH(request)[3][0] == {'id': 'c', 'status': False, 'message': 'Database operation failed.'}
+
+    # Move failing after rename of children
+    with mock.patch.object(tree, 'move', return_value=False):
+        with app.test_request_context('/api/v1/category', method='PATCH', json=[{'name': 'b', 'change': {'name': 'b2'}}]) as context:
+            assert endpoint._PATCH(request)[3][0]['status'] == False
+
+    assert database_bridge.find('Category', {}) == categories
+    assert database_bridge.find('Item', {}) == items
+
+def test_rename_job(setup):
+    """Test items of large category relabeled by background job"""
+
+    database_bridge, app, tree, endpoint = setup
+
+    jobs: JobRunner = JobRunner(database_bridge)
+    endpoint = EndpointCategory(database_bridge, [], Authorization(), tree=tree, jobs=jobs)
+    endpoint.RENAME_JOB_ITEMS = 2
+    endpoint.RENAME_CHUNK = 2
+
+    item: EndpointItem = EndpointItem(database_bridge, [], Authorization(), tree=tree)
+
+    with app.test_request_context('/api/v1/item', method='POST', json=[create_item(str(i), 'd') for i in range(5)]) as context:
+        assert all(status['status'] for status in item._POST(request)[3])
+
+    with app.test_request_context('/api/v1/category', method='PATCH', json=[{'name': 'd', 'change': {'name': 'z'}}]) as context:
+        status: Dict = endpoint._PATCH(request)[3][0]
+
+    assert status['status'] == True
+
+    job: Dict = jobs.get(status['job'])
+
+    for attempt in range(100):
+        if job['state'] in ['done', 'failed']:
+            break
+
+        time.sleep(0.02)
+        job = jobs.get(status['job'])
+
+    assert (job['state'], job['total'], job['done'], job['result']) == ('done', 5, 5, {'items': 5})
+    assert database_bridge.find('Item', {'category': 'd'}) == []
+
+    with app.test_request_context('/api/v1/jobs/' + status['job'], method='GET') as context:
+        assert EndpointJobs(database_bridge, [], Authorization(), jobs)._GET(request, status['job'])[3][0]['state'] == 'done'
+        assert EndpointJobs(database_bridge, [], Authorization(), jobs)._GET(request, 'missing')[0] == 404
+
+    # Job is submitted once unit of work is committed, not at all when it aborts
+    unit_of_work: DatabaseBridge = DatabaseBridge(MemoryStorage(), unit_of_work=True)
+    unit_of_work.insert_many('Category', [{'name': 'f', 'parent_name': '', 'path': [], 'item_count': 3}, {'name': 'g', 'parent_name': '', 'path': [], 'item_count': 3}])
+    tree = CategoryTree(unit_of_work)
+    jobs = mock.Mock(spec=JobRunner)
+    jobs.submit.side_effect = lambda kind, total, function: None if unit_of_work.in_transaction() else 'job_f2'
+    endpoint = EndpointCategory(unit_of_work, [], Authorization(), tree=tree, jobs=jobs)
+    endpoint.RENAME_JOB_ITEMS = 2
+
+    with app.test_request_context('/api/v1/category', method='PATCH', json=[{'name': 'f', 'change': {'name': 'f2'}}]) as context:
+        assert endpoint._PATCH(request)[3][0]['job'] == 'job_f2'
+
+    with mock.patch.object(tree, 'move', return_value=False):
+        with app.test_request_context('/api/v1/category', method='PATCH', json=[{'name': 'g', 'change': {'name': 'g2'}}]) as context:
+            assert endpoint._PATCH(request)[0] == 500
+
+    assert jobs.submit.call_count == 1
+    assert unit_of_work.find_one('Category', {'name': 'g'})
@@ -0,0 +1,43 @@
+import pytest
+import time
+from ExampleFlaskAPI.circuit_breaker import CircuitBreaker
+
+def test_open_after_failures():
+    """Test opening breaker after consecutive failures"""
+
+    breaker: CircuitBreaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+
+    assert breaker.allow() == True
+    assert breaker.record_failure() == False
+    assert breaker.record_failure() == True
+    assert breaker.allow() == False
+    assert breaker.get_stats()['state'] == 'open'
+    assert breaker.get_stats()['transitions'] == {'closed->open': 1}
+
+def test_half_open_probe():
+    """Test probing open breaker after recovery timeout"""
+
+    breaker: CircuitBreaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.01)
+
+    breaker.record_failure()
+    time.sleep(0.02)
+
+    assert breaker.allow() == True # Single probe
+    assert breaker.allow() == False
+    
+    breaker.record_success()
+
+    assert breaker.allow() == True
+    assert breaker.get_stats()['transitions'] == {'closed->open': 1, 'open->half_open': 1, 'half_open->closed': 1}
+
+def test_failed_probe():
+    """Test reopening breaker when probe fails"""
+
+    breaker: CircuitBreaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.01)
+
+    breaker.record_failure()
+    time.sleep(0.02)
+    breaker.allow()
+
+    assert breaker.record_failure() == True
+    assert breaker.get_stats()['state'] == 'open'
@@ -1,11 +1,15 @@
 import pytest
+import datetime
+import contextlib
 import mongomock
 import pymongo
 from flask_pymongo import PyMongo
 from flask import Flask, jsonify, request
 from unittest import mock
 from typing import List, Dict
-from ExampleFlaskAPI.database_bridge import DatabaseBridge
+from pymongo.errors import AutoReconnect, DuplicateKeyError, OperationFailure
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure
+from ExampleFlaskAPI.routing_policy import RoutingPolicy
 from ExampleFlaskAPI.endpoint_category import EndpointCategory
 from ExampleFlaskAPI.authorization import Authorization
 
@@ -111,3 +115,199 @@ def test_get_collection_names(setup):
     mongo.db['Category'].insert_one({'name': 'test', 'parent_name': ''})
 
     assert database_bridge.get_collection_names() == ['Category'] 
+
+
+def test_failure_result(setup):
+    """Test typed failure results"""
+
+    database_bridge, mongo = setup
+
+    with mock.patch.object(mongomock.Collection, 'delete_many', side_effect=DuplicateKeyError('test')):
+        result = database_bridge.delete_many('Category', {'name': 'test'})
+
+    assert isinstance(result, DatabaseFailure)
+    assert result.transient == False
+    assert result.deleted_count == 0
+    assert result == []
+
+def test_read_retry(setup):
+    """Test retrying idempotent reads on transient errors"""
+
+    _, mongo = setup
+
+    database_bridge = DatabaseBridge(mongo, retries=2, base_backoff=0)
+
+    with mock.patch.object(mongomock.Collection, 'find_one', side_effect=[AutoReconnect('test'), AutoReconnect('test'), {'name': 'test'}]) as patched:
+        assert database_bridge.find_one('Category', {'name': 'test'})['name'] == 'test'
+        assert patched.call_count == 3
+
+    with mock.patch.object(mongomock.Collection, 'insert_one', side_effect=AutoReconnect('test')) as patched:
+        assert database_bridge.insert_one('Category', {'name': 'test1'}).transient == True
+        assert patched.call_count == 1 # Writes are not retried
+
+def test_circuit_breaker(setup):
+    """Test failing fast while database is down"""
+
+    _, mongo = setup
+
+    database_bridge = DatabaseBridge(mongo, retries=0, failure_threshold=2, recovery_timeout=60)
+
+    with mock.patch.object(mongomock.Collection, 'find_one', side_effect=AutoReconnect('test')) as patched:
+        database_bridge.find_one('Category', {})
+        database_bridge.find_one('Category', {})
+        result = database_bridge.find_one('Category', {})
+
+        assert patched.call_count == 2
+        assert isinstance(result, DatabaseFailure)
+
+    assert database_bridge.get_stats()['breakers']['Category.find_one']['state'] == 'open'
+    assert database_bridge.find('Category', {}) == [] # Other operations have own breakers
+
+def test_routing_policy(setup):
+    """Test routing reads to secondary with read-your-writes and bounded staleness"""
+
+    _, mongo = setup
+
+    app = Flask(__name__)
+    secondaries: List[PyMongo] = []
+
+    for name in ['replicated', 'lagging']:
+        secondary = PyMongo(app, uri="mongodb://testdb")
+        secondary.cx = mongomock.MongoClient()
+        secondary.db = secondary.cx["testdb"]
+        secondary.db['Category'].insert_one({'name': name, 'parent_name': ''})
+        secondaries.append(secondary)
+
+    now: datetime.datetime = datetime.datetime.now()
+    written: Dict = {id(mongo.cx): now, id(secondaries[0].cx): now - datetime.timedelta(seconds=5), id(secondaries[1].cx): now - datetime.timedelta(seconds=200)}
+
+    def hello(database: mongomock.Database, name: str) -> Dict:
+        return {'lastWrite': {'lastWriteDate': written[id(database.client)]}}
+
+    database_bridge = DatabaseBridge(mongo, policies={'GET /api/v1/category': RoutingPolicy('nearest', 90)}, secondaries=secondaries)
+
+    # Without request policy reads go to primary
+    assert database_bridge.find('Category', {}) == []
+
+    token = database_bridge.begin_request('GET', '/api/v1/category')
+
+    # Lagging secondary is skipped even while it is nearer
+    with mock.patch.object(mongomock.Database, 'command', autospec=True, side_effect=hello):
+        assert database_bridge.find_one('Category', {})['name'] == 'replicated'
+
+    database_bridge.insert_one('Category', {'name': 'test', 'parent_name': ''})
+
+    assert database_bridge.find_one('Category', {})['name'] == 'test'
+
+    database_bridge.end_request(token)
+
+    stats: Dict = database_bridge.get_stats()['secondaries']
+
+    assert stats['reads'] == [1, 0]
+    assert stats['lag'] == [5.0, 200.0]
+
+    # Unknown lag leaves staleness to driver
+    database_bridge = DatabaseBridge(mongo, policies={'GET /api/v1/category': RoutingPolicy('nearest', 90)}, secondaries=secondaries)
+    token = database_bridge.begin_request('GET', '/api/v1/category')
+
+    assert database_bridge.find_one('Category', {})['name'] == 'test'
+
+    database_bridge.end_request(token)
+
+def test_write_concern(setup):
+    """Test applying per route write concern"""
+
+    _, mongo = setup
+
+    database_bridge = DatabaseBridge(mongo)
+    database_bridge.set_policy('POST /api/v1/item', RoutingPolicy(write_concern={'w': 1}))
+
+    token = database_bridge.begin_request('POST', '/api/v1/item')
+
+    with mock.patch.object(mongomock.Collection, 'with_options', autospec=True, side_effect=lambda collection, **kwargs: collection) as patched:
+        database_bridge.insert_one('Item', {'serial_number': 'test'})
+
+    database_bridge.end_request(token)
+
+    assert patched.call_args.kwargs['write_concern'].document == {'w': 1}
+    assert mongo.db['Item'].find_one({'serial_number': 'test'})
+
+    with pytest.raises(ValueError):
+        RoutingPolicy('nearest', 10)
+
+class ClientSessionTest():
+    def __init__(self):
+        self.in_transaction = False
+        self.commits = 0
+        self.aborts = 0
+
+    def start_transaction(self):
+        self.in_transaction = True
+        return contextlib.nullcontext()
+
+    def commit_transaction(self):
+        self.in_transaction = False
+        self.commits += 1
+
+    def abort_transaction(self):
+        self.in_transaction = False
+        self.aborts += 1
+
+    def end_session(self):
+        pass
+
+def test_session_binding(setup):
+    """Test joining ambient session by operations"""
+
+    database_bridge, mongo = setup
+
+    client_session = ClientSessionTest()
+    mongo.cx = mock.Mock(start_session=lambda: client_session)
+
+    with mock.patch.object(mongomock.Collection, 'find_one', return_value=None) as patched:
+        database_bridge.find_one('Category', {})
+
+        assert patched.call_args.kwargs['session'] is None
+
+        with database_bridge.start_session() as session:
+            with session.start_transaction():
+                database_bridge.find_one('Category', {})
+
+                assert patched.call_args.kwargs['session'] is client_session
+
+                # Nested sessions join transaction in progress
+                with database_bridge.start_session() as nested:
+                    with nested.start_transaction():
+                        database_bridge.find_one('Category', {})
+
+                        assert patched.call_args.kwargs['session'] is client_session
+
+        database_bridge.find_one('Category', {})
+
+        assert patched.call_args.kwargs['session'] is None
+
+def test_unit_of_work(setup):
+    """Test running function in one transaction with retries"""
+
+    _, mongo = setup
+
+    client_session = ClientSessionTest()
+    mongo.cx = mock.Mock(start_session=lambda: client_session)
+
+    database_bridge = DatabaseBridge(mongo, base_backoff=0, unit_of_work=True)
+
+    attempts: List[int] = []
+
+    def process() -> str:
+        attempts.append(1)
+
+        if len(attempts) == 1:
+            raise OperationFailure('Write conflict', 112, {'errorLabels': ['TransientTransactionError']})
+
+        database_bridge.insert_one('Category', {'name': 'test', 'parent_name': ''})
+        return 'done'
+
+    assert database_bridge.run_transaction(process) == 'done'
+    assert len(attempts) == 2
+    assert client_session.aborts == 1
+    assert client_session.commits == 1
@@ -18,6 +18,9 @@ class DatabaseBridgeTest(DatabaseBridge):
             def __exit__(self, exc_type, exc_value, traceback):
                 pass                       
 
+        def abort_transaction(self):
+            pass
+
         def __enter__(self):
             return self
 
@@ -75,6 +78,10 @@ def test_post(setup):
         assert result[0]['status'] == True
         
         del request.json[0]['_id']
+        del request.json[0]['_rev']
+        del request.json[0]['path']
+        del request.json[0]['child_count']
+        del request.json[0]['item_count']
         result = endpoint._POST(request)[3]
 
         assert result[0]['id'] == 'test'
@@ -149,4 +156,38 @@ def test_delete(setup):
         result = endpoint._DELETE(request, 'test')[3]
         
         assert result[0]['id'] == 'test'
-        assert result[0]['status'] == True                              
\ No newline at end of file
+        assert result[0]['status'] == True                              
+
+def test_if_match(setup):
+    """Test conditional category update"""
+
+    database_bridge, mongo, app = setup
+
+    endpoint: EndpointCategory = EndpointCategory(database_bridge, [], Authorization())
+
+    database_bridge.insert_one('Category', {'name': 'test', 'parent_name': '', '_rev': 3})
+
+    with app.test_request_context(
+    '/api/v1/category', # URL path
+    method='PATCH', # HTTP method
+    json=[{'name': 'test', '_rev': 2, 'change': {'parent_name': ''}}] # JSON payload
+    ) as context:
+        response: tuple = endpoint._PATCH(request)
+
+        # Revision in body reports conflict in status only
+        assert response[0] == 200
+        assert response[3][0]['message'] == 'Revision mismatch.'
+
+    with app.test_request_context(
+    '/api/v1/category', # URL path
+    method='PATCH', # HTTP method
+    headers={'If-Match': '"3"'},
+    json=[{'name': 'test', 'change': {'parent_name': ''}}, {'name': 'test1', 'change': {}}] # JSON payload
+    ) as context:
+        assert endpoint._PATCH(request)[:3] == (400, False, 1407)
+
+    with app.test_request_context(
+    '/api/v1/category/test', # URL path
+    method='GET', # HTTP method
+    ) as context:
+        assert endpoint._GET(request, 'test')[4] == {'ETag': '"3"'}
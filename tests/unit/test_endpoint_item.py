@@ -18,6 +18,9 @@ class DatabaseBridgeTest(DatabaseBridge):
             def __exit__(self, exc_type, exc_value, traceback):
                 pass                       
 
+        def abort_transaction(self):
+            pass
+
         def __enter__(self):
             return self
 
@@ -104,6 +107,7 @@ def test_post(setup):
         assert result[0]['status'] == True
         
         del request.json[0]['_id']
+        del request.json[0]['_rev']
         result = endpoint._POST(request)[3]
 
         assert result[0]['id'] == 'test'
@@ -243,3 +247,61 @@ def test_delete(setup):
         result = endpoint._DELETE(request, 'test')[3]
 
         assert result[0]['status']== True
+
+def test_if_match(setup):
+    """Test conditional item update and delete"""
+
+    database_bridge, mongo, app = setup
+
+    endpoint: EndpointItem = EndpointItem(database_bridge, [], Authorization())
+
+    database_bridge.insert_one('Item', {'serial_number': 'test',
+        'name': 'test_name',
+        'description': 'test_description',
+        'category': '',
+        'price': 1.0,
+        'location': {
+            'room': 1,
+            'bookcase': 1,
+            'shelf': 1,
+            'cuvette': 1,
+            'column': 1,
+            'row': 1
+        },
+        '_rev': 1
+    })
+
+    with app.test_request_context(
+    '/api/v1/item', # URL path
+    method='PATCH', # HTTP method
+    headers={'If-Match': '"1"'},
+    json=[{'serial_number': 'test', 'change': {'price': 2.0}}] # JSON payload
+    ) as context:
+        response: tuple = endpoint._PATCH(request)
+
+        assert response[0] == 200
+        assert response[3][0]['rev'] == 2
+        assert response[4] == {'ETag': '"2"'}
+
+        # Same revision is stale now
+        response = endpoint._PATCH(request)
+
+        assert response[0] == 412
+        assert response[3][0]['message'] == 'Revision mismatch.'
+        assert response[3][0]['rev'] == 2
+
+    with app.test_request_context(
+    '/api/v1/item/test', # URL path
+    method='DELETE', # HTTP method
+    headers={'If-Match': '"1"'}
+    ) as context:
+        assert endpoint._DELETE(request, 'test')[0] == 412
+        assert database_bridge.find_one('Item', {'serial_number': 'test'})
+
+    with app.test_request_context(
+    '/api/v1/item/test', # URL path
+    method='DELETE', # HTTP method
+    headers={'If-Match': '"2"'}
+    ) as context:
+        assert endpoint._DELETE(request, 'test')[3][0]['status'] == True
+        assert not database_bridge.find_one('Item', {'serial_number': 'test'})
@@ -1,3 +1,4 @@
+import bson
 import pytest
 import werkzeug
 import mongomock
@@ -10,6 +11,8 @@ from typing import List, Dict, Tuple
 from ExampleFlaskAPI.endpoint import Endpoint
 from ExampleFlaskAPI.endpoint_search_items import EndpointSearchItems
 from ExampleFlaskAPI.database_bridge import DatabaseBridge
+from ExampleFlaskAPI.memory_storage import MemoryStorage
+from ExampleFlaskAPI.search_query import SearchQuery
 from ExampleFlaskAPI.authorization import Authorization
 
 class DatabaseBridgeTest(DatabaseBridge):
@@ -106,4 +109,110 @@ def test_get(setup):
     method='GET', # HTTP method
     ) as context:
         assert endpoint._GET(request)[3][0]['serial_number'] == 'test3'
-        
\ No newline at end of file
+
+def test_text_search():
+    """Test full-text search combined with filters"""
+
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+
+    # Text index is created by endpoint
+    database_bridge: DatabaseBridge = DatabaseBridge(MemoryStorage(indexes={}))
+    database_bridge.insert_many('Item', [
+        {'serial_number': '1', 'name': 'Oak shelf', 'description': 'Shelf of red oak', 'category': '', 'price': 10.0},
+        {'serial_number': '2', 'name': 'Red lamp', 'description': 'Desk lamp', 'category': '', 'price': 20.0},
+        {'serial_number': '3', 'name': 'Pine shelf', 'description': 'Broken shelf', 'category': '', 'price': 30.0},
+        {'serial_number': '4', 'name': 'Chair', 'description': 'Oak chair', 'category': '', 'price': 40.0}
+    ])
+
+    endpoint: EndpointSearchItems = EndpointSearchItems(database_bridge, [], Authorization())
+
+    def search(arguments: str) -> List[Dict]:
+        with app.test_request_context('/api/v1/search/items?' + arguments, method='GET') as context:
+            return endpoint._GET(request)[3]
+
+    items: List[Dict] = search('q=shelf')
+
+    # Matches in shorter fields score higher
+    assert [item['serial_number'] for item in items] == ['3', '1']
+    assert items[0]['score'] > items[1]['score'] > 0
+
+    assert [item['serial_number'] for item in search('q=OAK&max_price=20')] == ['1']
+    assert [item['serial_number'] for item in search('q=shelf -broken')] == ['1']
+    assert [item['serial_number'] for item in search('q="red oak"')] == ['1']
+    assert search('q=table') == []
+
+def test_sort(setup):
+    """Test sorting with tiebreaker, pagination and rejected fields"""
+
+    database_bridge, mongo, app = setup
+
+    database_bridge.insert_many('Item', [
+        {'serial_number': str(i), 'name': 'test_name', 'category': '', 'price': float(i % 3), 'location': {'room': i % 2}} for i in range(6)
+    ])
+
+    endpoint: EndpointSearchItems = EndpointSearchItems(database_bridge, [], Authorization())
+
+    def search(arguments: str) -> Tuple:
+        with app.test_request_context('/api/v1/search/items?' + arguments, method='GET') as context:
+            return endpoint._GET(request)
+
+    assert [item['serial_number'] for item in search('sort=-price,location_room')[3]] == ['2', '5', '4', '1', '0', '3']
+
+    # Equal prices keep insertion order over pages
+    pages: List[str] = [item['serial_number'] for skip in range(0, 6, 2) for item in search('sort=price&limit=2&skip=' + str(skip))[3]]
+
+    assert pages == ['0', '3', '1', '4', '2', '5']
+    assert [item['serial_number'] for item in search('serial_number=1,2,3&sort=-price')[3]] == ['2', '1', '3']
+    assert search('sort=name')[:3] == (400, False, 1410)
+
+    # Sortable fields are backed by indexes ending with tiebreaker
+    assert {'price_1__id_1', 'location.room_1__id_1', 'name_text_description_text'} <= set(mongo.db['Item'].index_information())
+
+def test_post(setup):
+    """Test search with JSON query"""
+
+    database_bridge, mongo, app = setup
+
+    database_bridge.insert_many('Item', [
+        {'serial_number': str(i), 'name': ['Oak shelf', 'Pine shelf'][i % 2], 'category': ['a', 'b', 'c'][i % 3], 'price': float(i), 'location': {'room': i % 4}} for i in range(12)
+    ])
+
+    queries: SearchQuery = SearchQuery()
+    endpoint: EndpointSearchItems = EndpointSearchItems(database_bridge, [], Authorization(), queries=queries)
+
+    def search(body: Dict) -> Tuple:
+        with app.test_request_context('/api/v1/search/items', method='POST', json=body) as context:
+            return endpoint._POST(request)
+
+    body: Dict = {'filter': {'or': [{'field': 'location_room', 'in': [3]}, {'field': 'price', 'lt': 2}, {'and': [{'field': 'name', 'prefix': 'Oak'}, {'not': {'field': 'category', 'in': ['a', 'b']}}]}]}, 'sort': '-price'}
+
+    assert [item['serial_number'] for item in search(body)[3]] == ['11', '8', '7', '3', '2', '1', '0']
+
+    # Same query with other order of conditions shares compiled filter
+    reordered: Dict = {'sort': '-price', 'filter': {'or': list(reversed(body['filter']['or']))}}
+
+    assert queries.compile(body['filter']) == queries.compile(reordered['filter'])
+    assert search(reordered)[3] == search(body)[3]
+    assert queries.get_stats()['hits'] >= 2
+
+    # Nested and repeated conditions share cache entry too
+    fresh: SearchQuery = SearchQuery()
+
+    for query in [body['filter'], reordered['filter'], {'or': [body['filter'], {'field': 'price', 'lt': 2}]}]:
+        fresh.compile(query)
+
+    assert fresh.get_stats() == {'cached': 1, 'hits': 2, 'misses': 1}
+
+    assert search({'filter': {'field': 'price', 'gte': 10}, 'skip': 1})[3][0]['serial_number'] == '11'
+    assert search({'filter': {'field': 'description', 'eq': 'x'}})[:3] == (400, False, 1411)
+    assert search({'filter': {'field': 'price', 'prefix': '1'}})[:3] == (400, False, 1411)
+    assert search({'filter': {'field': 'location_room', 'eq': 'one'}})[:3] == (400, False, 1411)
+    assert search({'filter': {'or': []}})[:3] == (400, False, 1411)
+
+    # Body decoded by its Content-Type
+    with app.test_request_context('/api/v1/search/items', method='POST', data=bson.encode({'data': {'filter': {'field': 'price', 'gte': 11}}}), content_type='application/bson') as context:
+        assert [item['serial_number'] for item in endpoint._POST(request)[3]] == ['11']
+
+    with app.test_request_context('/api/v1/search/items', method='POST', data='{', content_type='application/json') as context:
+        assert endpoint._POST(request)[:3] == (400, False, 1411)
@@ -0,0 +1,97 @@
+import random
+from flask import Flask
+from typing import List, Dict
+from ExampleFlaskAPI.memory_storage import MemoryStorage
+from ExampleFlaskAPI.database_bridge import DatabaseBridge
+from ExampleFlaskAPI.authorization import Authorization
+from ExampleFlaskAPI.hot_keys import HotKeys
+from ExampleFlaskAPI.api import API
+
+def test_sketch():
+    """Test estimates and top keys of skewed stream"""
+
+    hot_keys: HotKeys = HotKeys(width=256, depth=4, size=10)
+    generator: random.Random = random.Random(7)
+    counts: Dict[str, int] = {}
+
+    # Key i is requested about 1 / (i + 1) as often as key 0
+    for _ in range(20000):
+        key: str = 'key_' + str(int(1000 ** generator.random()) - 1)
+        counts[key] = counts.get(key, 0) + 1
+        hot_keys.add(key)
+
+    stats: Dict = hot_keys.get_stats()
+
+    assert stats['requests'] == 20000
+    assert stats['memory'] == 256 * 4 * 8
+
+    # Bound may be missed with probability e ^ -depth
+    assert all(hot_keys.estimate(key) >= count for key, count in counts.items())
+    assert sum(hot_keys.estimate(key) > count + stats['error'] for key, count in counts.items()) <= len(counts) * 0.02
+
+    expected: List[str] = sorted(counts, key=counts.get, reverse=True)[:5]
+
+    assert [key for key, _ in hot_keys.top(5)] == expected
+    assert len(stats['top']) == 10
+
+def test_snapshot(tmp_path):
+    """Test restored snapshot with halved counts"""
+
+    path: str = str(tmp_path / 'hot_keys.json')
+
+    assert not HotKeys().save()
+
+    hot_keys: HotKeys = HotKeys(path)
+    hot_keys.add('a', 10)
+    hot_keys.add('b', 4)
+    hot_keys.add('c', 1)
+
+    assert hot_keys.save()
+
+    restored: HotKeys = HotKeys(path)
+
+    assert restored.restored() == ['a', 'b', 'c']
+    assert restored.top() == [('a', 5), ('b', 2)]
+
+def test_warm(tmp_path):
+    """Test caches filled with reads of last run"""
+
+    path: str = str(tmp_path / 'hot_keys.json')
+    database_bridge: DatabaseBridge = DatabaseBridge(MemoryStorage())
+    database_bridge.insert_many('Item', [{'serial_number': str(i), 'name': 'test_name', 'price': float(i), 'location': {'room': 1}} for i in range(3)])
+
+    authorization: Authorization = Authorization()
+    authorization.create_session('reader', ['READ'])
+
+    app = Flask(__name__)
+    hot_keys: HotKeys = HotKeys(path)
+    API(app, database_bridge, authorization, hot_keys=hot_keys)
+
+    client = app.test_client()
+
+    for _ in range(3):
+        assert client.get('/api/v1/item/1?api_key=reader').status_code == 200
+
+    assert client.get('/api/v1/search/items?max_price=1&api_key=reader').status_code == 200
+    assert client.post('/api/v1/search/items?api_key=reader', json={'filter': {'field': 'price', 'lt': 2}}).status_code == 200
+
+    # Unauthorized reads are not counted
+    assert client.get('/api/v1/item/2?api_key=unknown').status_code == 401
+
+    top: List[Dict] = client.get('/api/v1/stats/hot_keys?api_key=reader').json['result'][0]['top']
+
+    assert top[0] == {'key': 'GET /api/v1/item/1', 'count': 3}
+    assert {entry['key'] for entry in top} == {'GET /api/v1/item/1', 'GET /api/v1/search/items?max_price=1', 'POST /api/v1/search/items {"filter": {"field": "price", "lt": 2}}', 'GET /api/v1/stats/hot_keys'}
+
+    hot_keys.save()
+
+    # New worker reads the keys before serving
+    app = Flask(__name__)
+    API(app, database_bridge, authorization, hot_keys=HotKeys(path))
+
+    client = app.test_client()
+    stats: Dict = client.get('/api/v1/stats/hot_keys?api_key=reader').json['result'][0]
+
+    assert stats['warmed'] == 4
+    assert client.get('/api/v1/stats/item_cache?api_key=reader').json['result'][0]['entries'] == 1
+    assert client.get('/api/v1/stats/search_cache?api_key=reader').json['result'][0]['entries'] == 2
@@ -0,0 +1,140 @@
+import pytest
+import mongomock
+from flask_pymongo import PyMongo
+from flask import Flask, request
+from unittest import mock
+from typing import List, Dict
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure
+from ExampleFlaskAPI.memory_storage import MemoryStorage
+from ExampleFlaskAPI.endpoint_item import EndpointItem
+from ExampleFlaskAPI.inventory_rollups import InventoryRollups
+from ExampleFlaskAPI.authorization import Authorization
+
+class DatabaseBridgeTest(DatabaseBridge):
+    class start_session():
+        class start_transaction():
+            def __enter__(self):
+                return self
+
+            def __exit__(self, exc_type, exc_value, traceback):
+                pass
+
+        def abort_transaction(self):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc_value, traceback):
+            pass
+
+def create_item(serial_number: str, category: str, price: float, room: int) -> Dict:
+    """Create example item"""
+
+    return {
+        'serial_number': serial_number,
+        'name': 'test_name',
+        'description': 'test_description',
+        'category': category,
+        'price': price,
+        'location': {'room': room, 'bookcase': 1, 'shelf': 1, 'cuvette': 1, 'column': 1, 'row': 1}
+    }
+
+@pytest.fixture
+def setup():
+    """Fixture setup item endpoint maintaining rollups"""
+
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+
+    mongo = PyMongo(app, uri="mongodb://testdb")
+    mongo.cx = mongomock.MongoClient()
+    mongo.db = mongo.cx["testdb"]
+
+    database_bridge: DatabaseBridgeTest = DatabaseBridgeTest(mongo)
+    database_bridge.insert_many('Category', [{'name': 'a', 'parent_name': ''}, {'name': 'b', 'parent_name': ''}])
+
+    rollups: InventoryRollups = InventoryRollups(database_bridge)
+    endpoint: EndpointItem = EndpointItem(database_bridge, [], Authorization(), rollups=rollups)
+
+    with app.test_request_context('/api/v1/item', method='POST', json=[create_item(str(i), 'a' if i % 2 else 'b', float(i), i % 3) for i in range(1, 7)]) as context:
+        assert all(status['status'] for status in endpoint._POST(request)[3])
+
+    yield database_bridge, mongo, app, rollups, endpoint
+
+def test_writes(setup):
+    """Test rollups following item writes"""
+
+    database_bridge, mongo, app, rollups, endpoint = setup
+
+    assert rollups.get_stats()['category'] == [
+        {'key': 'a', 'count': 3, 'sum': 9.0, 'min': 1.0, 'max': 5.0},
+        {'key': 'b', 'count': 3, 'sum': 12.0, 'min': 2.0, 'max': 6.0}
+    ]
+
+    # Move item 5 to other category and room, change price of item 2
+    with app.test_request_context('/api/v1/item', method='PATCH', json=[{'serial_number': '5', 'change': {'category': 'b', 'location': {'room': 0}}}, {'serial_number': '2', 'change': {'price': 20.0}}]) as context:
+        assert all(status['status'] for status in endpoint._PATCH(request)[3])
+
+    with app.test_request_context('/api/v1/item/6', method='DELETE') as context:
+        assert endpoint._DELETE(request, '6')[3][0]['status'] == True
+
+    stats: Dict = rollups.get_stats()
+
+    assert stats['category'] == [
+        {'key': 'a', 'count': 2, 'sum': 4.0, 'min': 1.0, 'max': 3.0},
+        {'key': 'b', 'count': 3, 'sum': 29.0, 'min': 4.0, 'max': 20.0}
+    ]
+    assert stats['room'] == [
+        {'key': 0, 'count': 2, 'sum': 8.0, 'min': 3.0, 'max': 5.0},
+        {'key': 1, 'count': 2, 'sum': 5.0, 'min': 1.0, 'max': 4.0},
+        {'key': 2, 'count': 1, 'sum': 20.0, 'min': 20.0, 'max': 20.0}
+    ]
+    assert rollups.rebuild(True)['drift'] == []
+
+def test_rebuild(setup):
+    """Test drift report and rebuild"""
+
+    database_bridge, mongo, app, rollups, endpoint = setup
+
+    # Write bypassing endpoint
+    database_bridge.insert_one('Item', create_item('7', 'a', 7.0, 1))
+
+    report: Dict = rollups.rebuild(True)
+
+    assert report['rebuilt'] == False
+    assert {(drift['dimension'], drift['key'], drift['field']) for drift in report['drift']} == {('category', 'a', 'count'), ('category', 'a', 'sum'), ('category', 'a', 'max'), ('room', 1, 'count'), ('room', 1, 'sum'), ('room', 1, 'max')}
+    assert rollups.get_stats()['category'][0]['count'] == 3
+
+    assert rollups.rebuild()['groups'] == 5
+    assert rollups.get_stats()['category'][0] == {'key': 'a', 'count': 4, 'sum': 16.0, 'min': 1.0, 'max': 7.0}
+    assert rollups.rebuild(True)['drift'] == []
+
+def test_rollback():
+    """Test failed rollup write rolling back item update and delete with counters"""
+
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+
+    database_bridge: DatabaseBridge = DatabaseBridge(MemoryStorage())
+    database_bridge.insert_many('Category', [{'name': 'a', 'parent_name': '', 'item_count': 0}, {'name': 'b', 'parent_name': '', 'item_count': 0}])
+
+    endpoint: EndpointItem = EndpointItem(database_bridge, [], Authorization(), rollups=InventoryRollups(database_bridge))
+
+    with app.test_request_context('/api/v1/item', method='POST', json=[create_item('1', 'a', 1.0, 1), create_item('2', 'b', 2.0, 1)]) as context:
+        assert all(status['status'] for status in endpoint._POST(request)[3])
+
+    before: List[List[Dict]] = [database_bridge.find(collection, {}) for collection in ['Item', 'Category', 'Rollup']]
+    update_one = database_bridge.update_one
+
+    def fail_rollups(collection: str, *args, **kwargs):
+        return DatabaseFailure(RuntimeError('failed'), False) if collection == 'Rollup' else update_one(collection, *args, **kwargs)
+
+    with mock.patch.object(database_bridge, 'update_one', side_effect=fail_rollups):
+        with app.test_request_context('/api/v1/item', method='PATCH', json=[{'serial_number': '1', 'change': {'category': 'b'}}]) as context:
+            assert endpoint._PATCH(request)[3][0]['message'] == 'Database operation failed.'
+
+        with app.test_request_context('/api/v1/item/2', method='DELETE') as context:
+            assert endpoint._DELETE(request, '2')[3][0]['message'] == 'Database operation failed.'
+
+    assert [database_bridge.find(collection, {}) for collection in ['Item', 'Category', 'Rollup']] == before
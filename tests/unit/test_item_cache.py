@@ -0,0 +1,107 @@
+import json
+import time
+import pytest
+from flask import Flask, request
+from unittest import mock
+from typing import List, Dict
+from ExampleFlaskAPI.memory_storage import MemoryStorage
+from ExampleFlaskAPI.database_bridge import DatabaseBridge
+from ExampleFlaskAPI.endpoint_item import EndpointItem
+from ExampleFlaskAPI.item_cache import ItemCache
+from ExampleFlaskAPI.media_types import MediaTypes
+from ExampleFlaskAPI.authorization import Authorization
+
+def item(serial: str, price: float = 1.0) -> Dict:
+    return {
+        'serial_number': serial,
+        'name': 'test_name',
+        'description': 'test_description',
+        'category': '',
+        'price': price,
+        'location': {'room': 1, 'bookcase': 1, 'shelf': 1, 'cuvette': 1, 'column': 1, 'row': 1}
+    }
+
+@pytest.fixture
+def setup():
+    """Fixture setup endpoint reading items through cache"""
+
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+
+    database_bridge: DatabaseBridge = DatabaseBridge(MemoryStorage())
+    database_bridge.insert_many('Item', [item(str(i), float(i)) for i in range(5)])
+
+    cache: ItemCache = ItemCache(database_bridge)
+    endpoint: EndpointItem = EndpointItem(database_bridge, [], Authorization(), cache=cache)
+
+    def get(serials: str) -> List[Dict]:
+        with app.test_request_context('/api/v1/item?serial_number=' + serials, method='GET') as context:
+            return endpoint._GET(request)
+
+    yield app, database_bridge, cache, endpoint, get
+
+def test_reads(setup):
+    """Test partial hits read with one query for the rest"""
+
+    app, database_bridge, cache, endpoint, get = setup
+
+    with mock.patch.object(database_bridge, 'find', wraps=database_bridge.find) as find:
+        assert [row['serial_number'] for row in get('1,2')[3]] == ['1', '2']
+        assert [row['serial_number'] for row in get('3,2,missing,1')[3]] == ['3', '2', '1']
+
+        assert find.call_count == 2
+        assert find.call_args[0][1] == {'serial_number': {'$in': ['3', 'missing']}}
+
+        # Hits and cached miss need no query
+        assert get('missing,3')[3][0]['serial_number'] == '3'
+        assert find.call_count == 2
+
+    stats: Dict = cache.get_stats()
+
+    assert (stats['entries'], stats['missing'], stats['hits'], stats['miss_hits'], stats['misses']) == (4, 1, 3, 1, 4)
+
+    # Cached rows encode to same JSON as database rows
+    assert json.loads(MediaTypes.encode({'result': get('2')[3]}, MediaTypes.JSON)) == json.loads(MediaTypes.encode({'result': database_bridge.find('Item', {'serial_number': '2'})}, MediaTypes.JSON))
+
+def test_writes(setup):
+    """Test item writes dropping cached entries"""
+
+    app, database_bridge, cache, endpoint, get = setup
+
+    assert get('1,new')[3][0]['price'] == 1.0
+
+    with app.test_request_context('/api/v1/item', method='POST', json=[item('new', 7.0)]) as context:
+        assert endpoint._POST(request)[3][0]['status'] == True
+
+    with app.test_request_context('/api/v1/item', method='PATCH', json=[{'serial_number': '1', 'change': {'price': 1.5}}]) as context:
+        assert endpoint._PATCH(request)[3][0]['status'] == True
+
+    assert [row['price'] for row in get('1,new')[3]] == [1.5, 7.0]
+
+    # Cached row keeps revision for If-Match
+    assert get('new')[4] == {'ETag': '"1"'}
+
+    with app.test_request_context('/api/v1/item/new', method='DELETE') as context:
+        assert endpoint._DELETE(request, 'new')[3][0]['status'] == True
+
+    assert [row['serial_number'] for row in get('1,new')[3]] == ['1']
+
+def test_bounds(setup):
+    """Test eviction by size and expiry by TTL"""
+
+    app, database_bridge, cache, endpoint, get = setup
+
+    small: ItemCache = ItemCache(database_bridge, 3 * 400, ttl=0.05, miss_ttl=0.0)
+
+    assert len(small.get_many(['0', '1', '2', '3', 'missing'])) == 4
+
+    stats: Dict = small.get_stats()
+
+    assert stats['memory'] <= stats['capacity'] and stats['evictions'] > 0
+    assert stats['entries'] < 5
+
+    time.sleep(0.06)
+
+    small.get_many(['3'])
+
+    assert small.get_stats()['hits'] == 0
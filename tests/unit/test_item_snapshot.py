@@ -0,0 +1,114 @@
+import pytest
+import mongomock
+from flask_pymongo import PyMongo
+from flask import Flask, request
+from typing import List, Dict
+from ExampleFlaskAPI.database_bridge import DatabaseBridge
+from ExampleFlaskAPI.authorization import Authorization
+
+numpy = pytest.importorskip('numpy')
+
+from ExampleFlaskAPI.item_snapshot import ItemSnapshot
+from ExampleFlaskAPI.endpoint_item_stats import EndpointItemStats
+
+def create_item(serial_number: str, category: str, price: float, room: int) -> Dict:
+    """Create example item"""
+
+    return {
+        'serial_number': serial_number,
+        'name': 'test_name',
+        'description': 'test_description',
+        'category': category,
+        'price': price,
+        'location': {'room': room, 'bookcase': 1, 'shelf': 1, 'cuvette': 1, 'column': 1, 'row': 1}
+    }
+
+@pytest.fixture
+def setup():
+    """Fixture setup snapshot over mongomock database"""
+
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+
+    mongo = PyMongo(app, uri="mongodb://testdb")
+    mongo.cx = mongomock.MongoClient()
+    mongo.db = mongo.cx["testdb"]
+
+    database_bridge: DatabaseBridge = DatabaseBridge(mongo)
+    database_bridge.insert_many('Item', [create_item(str(i), 'category_' + str(i % 3), float(i), i % 4) for i in range(40)])
+
+    snapshot: ItemSnapshot = ItemSnapshot(database_bridge)
+
+    yield database_bridge, snapshot, app
+
+def test_aggregate(setup):
+    """Test vectorized statistics against NumPy reference"""
+
+    database_bridge, snapshot, app = setup
+
+    prices: numpy.ndarray = numpy.arange(40, dtype=float)
+    stats: Dict = snapshot.aggregate({}, None, [50, 90], 4)
+
+    assert stats['count'] == 40
+    assert stats['groups'][0]['sum'] == prices.sum()
+    assert stats['groups'][0]['percentiles'] == {'p50': numpy.percentile(prices, 50), 'p90': numpy.percentile(prices, 90)}
+    assert stats['groups'][0]['histogram'] == numpy.histogram(prices, 4)[0].tolist()
+    assert stats['edges'] == numpy.histogram(prices, 4)[1].tolist()
+
+    stats = snapshot.aggregate({'location.room': {'$gte': 1, '$lte': 2}, 'price': {'$lte': 30.0}}, 'category', [25])
+
+    for group in stats['groups']:
+        expected: numpy.ndarray = numpy.array([i for i in range(31) if i % 4 in [1, 2] and 'category_' + str(i % 3) == group['group']], dtype=float)
+
+        assert group['count'] == len(expected)
+        assert group['min'] == expected.min() and group['max'] == expected.max()
+        assert group['percentiles']['p25'] == numpy.percentile(expected, 25)
+
+    assert [group['group'] for group in snapshot.aggregate({'serial_number': {'$in': ['1', '2', 'x']}}, 'location.room')['groups']] == [1, 2]
+    assert snapshot.aggregate({'category': {'$in': ['missing']}}) == {'count': 0, 'edges': [], 'groups': []}
+
+def test_incremental_refresh(setup):
+    """Test applying writes without reloading snapshot"""
+
+    database_bridge, snapshot, app = setup
+
+    snapshot.aggregate({})
+
+    database_bridge.insert_one('Item', create_item('new', 'category_0', 100.0, 1))
+    database_bridge.update_one('Item', {'serial_number': '5'}, {'$set': {'price': 50.0}})
+    database_bridge.delete_many('Item', {'serial_number': {'$in': ['0', '1']}})
+
+    assert snapshot.get_stats()['pending'] == 4
+
+    stats: Dict = snapshot.aggregate({})
+
+    assert stats['count'] == 39
+    assert stats['groups'][0]['sum'] == sum(range(2, 40)) - 5.0 + 50.0 + 100.0
+    assert snapshot.get_stats()['reloads'] == 1
+    assert snapshot.get_stats()['refreshes'] == 1
+
+    # Writes with other conditions reload whole snapshot
+    database_bridge.update_many('Item', {'category': 'category_1'}, {'$set': {'price': 0.0}})
+
+    assert snapshot.aggregate({'category': {'$in': ['category_1']}})['groups'][0]['sum'] == 0.0
+    assert snapshot.get_stats()['reloads'] == 2
+
+def test_endpoint(setup):
+    """Test item statistics endpoint parameters"""
+
+    database_bridge, snapshot, app = setup
+
+    endpoint: EndpointItemStats = EndpointItemStats(database_bridge, [], Authorization(), snapshot)
+
+    with app.test_request_context('/api/v1/stats/items?category=category_0,category_1&group_by=location_room&percentiles=50&bins=2', method='GET') as context:
+        response: List = endpoint._GET(request)
+
+        assert response[0] == 200
+        assert sum(group['count'] for group in response[3][0]['groups']) == 27
+        assert len(response[3][0]['groups'][0]['histogram']) == 2
+
+    with app.test_request_context('/api/v1/stats/items?group_by=description', method='GET') as context:
+        assert endpoint._GET(request)[:3] == (400, False, 1408)
+
+    with app.test_request_context('/api/v1/stats/items?percentiles=101', method='GET') as context:
+        assert endpoint._GET(request)[:3] == (400, False, 1408)
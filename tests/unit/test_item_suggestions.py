@@ -0,0 +1,87 @@
+import pytest
+from flask import Flask, request
+from typing import List, Dict
+from ExampleFlaskAPI.memory_storage import MemoryStorage
+from ExampleFlaskAPI.database_bridge import DatabaseBridge
+from ExampleFlaskAPI.endpoint_item import EndpointItem
+from ExampleFlaskAPI.endpoint_search_suggest import EndpointSearchSuggest
+from ExampleFlaskAPI.item_suggestions import ItemSuggestions
+from ExampleFlaskAPI.authorization import Authorization
+
+def create_item(serial_number: str, name: str) -> Dict:
+    """Create example item"""
+
+    return {
+        'serial_number': serial_number,
+        'name': name,
+        'description': 'test_description',
+        'category': '',
+        'price': 1.0,
+        'location': {'room': 1, 'bookcase': 1, 'shelf': 1, 'cuvette': 1, 'column': 1, 'row': 1}
+    }
+
+@pytest.fixture
+def setup():
+    """Fixture setup suggestions loaded from in-memory storage"""
+
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+
+    database_bridge: DatabaseBridge = DatabaseBridge(MemoryStorage())
+    database_bridge.insert_many('Item', [create_item('SN-' + str(i), ['Oak shelf', 'Oak chair', 'Orange lamp'][i % 3 if i < 6 else 0]) for i in range(8)])
+
+    suggestions: ItemSuggestions = ItemSuggestions(database_bridge)
+    assert suggestions.load()
+
+    yield database_bridge, app, suggestions
+
+def test_suggest(setup):
+    """Test ranking of prefix range by frequency"""
+
+    database_bridge, app, suggestions = setup
+
+    assert suggestions.suggest('o', 2) == [{'value': 'Oak shelf', 'field': 'name', 'count': 4}, {'value': 'Oak chair', 'field': 'name', 'count': 2}]
+    assert [suggestion['value'] for suggestion in suggestions.suggest('OAK C')] == ['Oak chair']
+    assert [suggestion['value'] for suggestion in suggestions.suggest('sn-')][:3] == ['SN-0', 'SN-1', 'SN-2']
+    assert suggestions.suggest('table') == []
+
+    stats: Dict = suggestions.get_stats()
+
+    assert stats['entries'] == 11
+    assert stats['items'] == 8
+    assert stats['memory_per_million'] > 0
+
+def test_writes(setup):
+    """Test item writes applied without reload"""
+
+    database_bridge, app, suggestions = setup
+
+    endpoint: EndpointItem = EndpointItem(database_bridge, [], Authorization())
+
+    with app.test_request_context('/api/v1/item', method='POST', json=[create_item('X-1', 'Orange lamp'), create_item('X-2', 'Orange lamp')]) as context:
+        assert all(status['status'] for status in endpoint._POST(request)[3])
+
+    with app.test_request_context('/api/v1/item', method='PATCH', json=[{'serial_number': 'SN-0', 'change': {'name': 'Table'}}]) as context:
+        assert endpoint._PATCH(request)[3][0]['status'] == True
+
+    with app.test_request_context('/api/v1/item/SN-1', method='DELETE') as context:
+        assert endpoint._DELETE(request, 'SN-1')[3][0]['status'] == True
+
+    assert suggestions.suggest('o', 3) == [{'value': 'Orange lamp', 'field': 'name', 'count': 4}, {'value': 'Oak shelf', 'field': 'name', 'count': 3}, {'value': 'Oak chair', 'field': 'name', 'count': 1}]
+    assert suggestions.suggest('t') == [{'value': 'Table', 'field': 'name', 'count': 1}]
+    assert [suggestion['value'] for suggestion in suggestions.suggest('x')] == ['X-1', 'X-2']
+    assert suggestions.suggest('sn-1') == []
+    assert suggestions.get_stats()['reloads'] == 1
+
+def test_endpoint(setup):
+    """Test suggestion endpoint"""
+
+    database_bridge, app, suggestions = setup
+
+    endpoint: EndpointSearchSuggest = EndpointSearchSuggest(database_bridge, [], Authorization(), suggestions)
+
+    with app.test_request_context('/api/v1/search/suggest?prefix=oak&limit=1', method='GET') as context:
+        assert endpoint._GET(request)[3] == [{'value': 'Oak shelf', 'field': 'name', 'count': 4}]
+
+    with app.test_request_context('/api/v1/search/suggest', method='GET') as context:
+        assert endpoint._GET(request)[:3] == (400, False, 1409)
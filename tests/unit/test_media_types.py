@@ -0,0 +1,91 @@
+import pytest
+import bson
+import mongomock
+from flask_pymongo import PyMongo
+from flask import Flask, request
+from typing import List, Dict
+from ExampleFlaskAPI.media_types import MediaTypes
+from ExampleFlaskAPI.database_bridge import DatabaseBridge
+from ExampleFlaskAPI.endpoint_category import EndpointCategory
+from ExampleFlaskAPI.authorization import Authorization
+
+class DatabaseBridgeTest(DatabaseBridge):
+    class start_session():
+        class start_transaction():
+            def __enter__(self):
+                return self
+
+            def __exit__(self, exc_type, exc_value, traceback):
+                pass                       
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc_value, traceback):
+            pass  
+
+@pytest.fixture
+def setup():
+    """Fixture setup app with category endpoint"""
+
+    app = Flask(__name__)
+
+    app.config["MONGO_URI"] = "mongodb://testdb"  
+    app.config["TESTING"] = True 
+    mongo = PyMongo(app)
+
+    mongo.cx = mongomock.MongoClient()
+    mongo.db = mongo.cx["testdb"]
+
+    authorization: Authorization = Authorization()
+    authorization.create_session('test', ['READ', 'CREATE'])
+
+    endpoint: EndpointCategory = EndpointCategory(DatabaseBridgeTest(mongo), {}, authorization)
+    app.route('/api/v1/category/<name>', methods=['GET'])(endpoint.route_category)
+    app.route('/api/v1/category', methods=['POST'])(endpoint.route_category)
+
+    yield app.test_client(), mongo
+
+def test_negotiate(setup):
+    """Test choosing response format by Accept header"""
+
+    client, mongo = setup
+
+    mongo.db['Category'].insert_one({'name': 'test', 'parent_name': ''})
+
+    response = client.get('/api/v1/category/test', headers={'Authorization': 'test'})
+
+    assert response.headers['Content-Type'] == 'application/json; charset=utf-8'
+
+    response = client.get('/api/v1/category/test', headers={'Authorization': 'test', 'Accept': 'application/bson'})
+
+    assert response.headers['Content-Type'] == 'application/bson'
+    assert isinstance(bson.decode(response.data)['result'][0]['_id'], bson.ObjectId) # Types stay native
+
+def test_msgpack(setup):
+    """Test MessagePack response and request body"""
+
+    msgpack = pytest.importorskip('msgpack')
+
+    client, mongo = setup
+
+    response = client.post('/api/v1/category', headers={'Authorization': 'test', 'Accept': 'application/msgpack', 'Content-Type': 'application/msgpack'}, data=msgpack.packb([{'name': 'test', 'parent_name': ''}]))
+
+    assert response.headers['Content-Type'] == 'application/msgpack'
+    assert msgpack.unpackb(response.data)['result'][0]['status'] == True
+
+    response = client.get('/api/v1/category/test', headers={'Authorization': 'test', 'Accept': 'application/msgpack'})
+
+    row: Dict = msgpack.unpackb(response.data, ext_hook=lambda code, data: bson.ObjectId(data))['result'][0]
+
+    assert row['_id'] == mongo.db['Category'].find_one({'name': 'test'})['_id']
+
+def test_bson_body(setup):
+    """Test BSON request body"""
+
+    client, mongo = setup
+
+    response = client.post('/api/v1/category', headers={'Authorization': 'test', 'Content-Type': 'application/bson'}, data=bson.encode({'data': [{'name': 'test', 'parent_name': ''}]}))
+
+    assert response.status_code == 200
+    assert mongo.db['Category'].find_one({'name': 'test'})
@@ -0,0 +1,127 @@
+import pytest
+from flask import Flask, request
+from typing import List, Dict
+from ExampleFlaskAPI.memory_storage import MemoryStorage
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure
+from ExampleFlaskAPI.endpoint_item import EndpointItem
+from ExampleFlaskAPI.authorization import Authorization
+
+def create_item(serial_number: str, category: str, price: float, room: int) -> Dict:
+    """Create example item"""
+
+    return {
+        'serial_number': serial_number,
+        'name': 'test_name',
+        'description': 'test_description',
+        'category': category,
+        'price': price,
+        'location': {'room': room, 'bookcase': 1, 'shelf': 1, 'cuvette': 1, 'column': 1, 'row': 1}
+    }
+
+@pytest.fixture
+def setup():
+    """Fixture setup bridge over in-memory storage"""
+
+    storage: MemoryStorage = MemoryStorage()
+    database_bridge: DatabaseBridge = DatabaseBridge(storage)
+
+    database_bridge.insert_many('Item', [create_item(str(i), 'category_' + str(i % 3), float(i), i % 5) for i in range(30)])
+
+    yield database_bridge, storage
+
+def test_query(setup):
+    """Test query subset and index usage"""
+
+    database_bridge, storage = setup
+
+    assert [item['serial_number'] for item in database_bridge.find('Item', {'serial_number': {'$in': ['3', '7', 'x']}})] == ['3', '7']
+    assert len(database_bridge.find('Item', {'location.room': {'$gte': 1, '$lte': 2}})) == 12
+    assert len(database_bridge.find('Item', {'category': 'category_1', 'price': {'$gte': 10.0}})) == 7
+    assert len(database_bridge.find('Item', {'location.room': 4}, 2, 3)) == 3
+    assert len(database_bridge.find('Item', {'$or': [{'price': {'$lt': 2.0}}, {'serial_number': '29'}]})) == 3
+    assert database_bridge.find('Item', {'missing': None, 'serial_number': '1'})[0]['serial_number'] == '1'
+
+    # Every query above was answered by index except $or
+    assert storage.get_stats()['Item']['scans'] == 1
+
+def test_update(setup):
+    """Test update operators, upsert and unique index"""
+
+    database_bridge, storage = setup
+
+    document: Dict = database_bridge.find_one_and_update('Item', {'serial_number': '1'}, {'$set': {'location.room': 9}, '$inc': {'_rev': 1}}, {'_rev': True, 'location': True})
+
+    assert document['_rev'] == 1
+    assert document['location']['room'] == 9
+    assert database_bridge.find('Item', {'location.room': 9})[0]['serial_number'] == '1'
+
+    assert database_bridge.update_many('Item', {'category': 'category_0'}, {'$max': {'price': 20.0}}).modified_count == 7
+    assert storage.db['Rollup'].update_one({'name': 'a'}, {'$inc': {'count': 2}}, upsert=True).upserted_id
+    assert storage.db['Rollup'].find_one({'name': 'a'})['count'] == 2
+
+    storage.db['Item'].create_index('serial_number', unique=True, name='serial_number_unique')
+
+    # Compound index is served by index of its first field
+    assert storage.db['Item'].create_index([('price', 1), ('_id', 1)]) == 'price_1'
+
+    assert isinstance(database_bridge.insert_one('Item', create_item('1', '', 1.0, 1)), DatabaseFailure)
+
+    # Bulk update with own condition per row
+    result = database_bridge.bulk_update('Item', [({'serial_number': '2'}, {'$set': {'price': 0.5}}), ({'serial_number': '4'}, {'$inc': {'price': 1.0}}), ({'serial_number': 'x'}, {'$set': {'price': 0.0}})])
+
+    assert (result.matched_count, result.modified_count) == (2, 2)
+    assert [item['price'] for item in database_bridge.find('Item', {'serial_number': {'$in': ['2', '4']}})] == [0.5, 5.0]
+
+def test_transaction(setup):
+    """Test rollback of aborted transaction"""
+
+    database_bridge, storage = setup
+
+    with pytest.raises(RuntimeError):
+        with database_bridge.start_session() as session:
+            with session.start_transaction():
+                database_bridge.insert_one('Item', create_item('new', '', 1.0, 1))
+                database_bridge.update_one('Item', {'serial_number': '2'}, {'$set': {'category': 'changed'}})
+                database_bridge.delete_many('Item', {'location.room': 0})
+                raise RuntimeError()
+
+    assert not database_bridge.find_one('Item', {'serial_number': 'new'})
+    assert not database_bridge.find('Item', {'category': 'changed'})
+    assert len(database_bridge.find('Item', {'location.room': 0})) == 6
+
+    with database_bridge.start_session() as session:
+        with session.start_transaction():
+            database_bridge.delete_many('Item', {'location.room': 0})
+
+    assert len(database_bridge.find('Item', {})) == 24
+
+def test_snapshot(setup, tmp_path):
+    """Test snapshot to disk and restore"""
+
+    database_bridge, storage = setup
+
+    path: str = str(tmp_path / 'storage.bson')
+
+    assert storage.snapshot(path) == 30
+
+    restored: DatabaseBridge = DatabaseBridge(MemoryStorage(path))
+
+    assert restored.find_one('Item', {'serial_number': '5'})['price'] == 5.0
+    assert len(restored.find('Item', {'location.room': {'$gt': 3}})) == 6
+
+def test_endpoint(setup):
+    """Test item endpoint on in-memory storage"""
+
+    database_bridge, storage = setup
+
+    app = Flask(__name__)
+    endpoint: EndpointItem = EndpointItem(database_bridge, [], Authorization())
+
+    with app.test_request_context('/api/v1/item', method='POST', json=[create_item('new', '', 1.0, 1)]) as context:
+        assert endpoint._POST(request)[3][0]['status'] == True
+
+    with app.test_request_context('/api/v1/item', method='PATCH', headers={'If-Match': '"1"'}, json=[{'serial_number': 'new', 'change': {'price': 2.0}}]) as context:
+        assert endpoint._PATCH(request)[4] == {'ETag': '"2"'}
+
+    with app.test_request_context('/api/v1/item/new', method='GET') as context:
+        assert endpoint._GET(request, 'new')[3][0]['price'] == 2.0
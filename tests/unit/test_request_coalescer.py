@@ -0,0 +1,112 @@
+import time
+import pytest
+import threading
+import werkzeug
+from flask import Flask
+from typing import List, Dict, Tuple
+from ExampleFlaskAPI.memory_storage import MemoryStorage
+from ExampleFlaskAPI.database_bridge import DatabaseBridge
+from ExampleFlaskAPI.endpoint import Endpoint
+from ExampleFlaskAPI.request_coalescer import RequestCoalescer
+from ExampleFlaskAPI.authorization import Authorization
+
+class EndpointBlocking(Endpoint):
+    """Endpoint answering reads once released"""
+
+    def route(self, **kwargs) -> str:
+        return self._route(**kwargs)
+
+    def _GET(self, request: werkzeug.local.LocalProxy) -> Tuple[int, bool, int, List]:
+        self.calls += 1
+        self.release.wait(5)
+
+        if request.args.get('fail'):
+            raise RuntimeError('Query failed.')
+
+        return 200, True, 1200, [{'value': request.args.get('value'), 'call': self.calls}]
+
+    def __init__(self, *args):
+        super().__init__(*args)
+
+        self.calls: int = 0
+        self.release: threading.Event = threading.Event()
+
+@pytest.fixture
+def setup():
+    """Fixture setup app with coalescing endpoint"""
+
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+
+    authorization: Authorization = Authorization()
+    authorization.create_session('reader_1', ['READ'])
+    authorization.create_session('reader_2', ['READ'])
+    authorization.create_session('admin', ['READ', 'CREATE'])
+
+    coalescer: RequestCoalescer = RequestCoalescer()
+    endpoint: EndpointBlocking = EndpointBlocking(DatabaseBridge(MemoryStorage()), {}, authorization)
+    endpoint.coalesce_reads(coalescer)
+
+    app.route('/read', methods=['GET'])(endpoint.route)
+
+    def read(urls: List[str], expected: int) -> List:
+        responses: List = [None] * len(urls)
+
+        def worker(index: int) -> None:
+            responses[index] = app.test_client().get(urls[index])
+
+        threads: List[threading.Thread] = [threading.Thread(target=worker, args=(index,)) for index in range(len(urls))]
+
+        for thread in threads:
+            thread.start()
+
+        # Release once all requests joined their calls
+        deadline: float = time.monotonic() + 5
+
+        while coalescer.get_stats()['coalesced'] + coalescer.get_stats()['running'] < expected and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        endpoint.release.set()
+
+        for thread in threads:
+            thread.join()
+
+        endpoint.release.clear()
+
+        return responses
+
+    yield coalescer, endpoint, read
+
+def test_coalescing(setup):
+    """Test identical reads sharing one call"""
+
+    coalescer, endpoint, read = setup
+
+    responses: List = read(['/read?value=a&api_key=reader_1', '/read?api_key=reader_2&value=a', '/read?value=a&api_key=reader_1', '/read?value=b&api_key=reader_1', '/read?value=a&api_key=admin'], 5)
+
+    assert endpoint.calls == 3
+    assert responses[0].data == responses[1].data == responses[2].data
+    assert responses[3].json['result'][0]['value'] == 'b'
+    assert responses[4].json['result'][0]['value'] == 'a'
+    assert coalescer.get_stats() == {'calls': 3, 'coalesced': 2, 'running': 0}
+
+    # Unknown key is rejected before joining
+    assert read(['/read?value=a&api_key=unknown'], 0)[0].status_code == 401
+
+def test_errors(setup):
+    """Test failure reaching all coalesced requests"""
+
+    coalescer, endpoint, read = setup
+
+    responses: List = read(['/read?fail=1&api_key=reader_1'] * 3, 3)
+
+    assert endpoint.calls == 1
+    assert [response.status_code for response in responses] == [500, 500, 500]
+
+    def fail() -> None:
+        raise ValueError('failed')
+
+    with pytest.raises(ValueError):
+        coalescer.run('key', fail)
+
+    assert coalescer.run('key', lambda: 1) == 1
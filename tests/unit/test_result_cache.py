@@ -0,0 +1,115 @@
+import pytest
+import mongomock
+from flask_pymongo import PyMongo
+from flask import Flask, request
+from typing import List, Dict
+from ExampleFlaskAPI.database_bridge import DatabaseBridge
+from ExampleFlaskAPI.memory_storage import MemoryStorage
+from ExampleFlaskAPI.endpoint_search_items import EndpointSearchItems
+from ExampleFlaskAPI.result_cache import ResultCache
+from ExampleFlaskAPI.authorization import Authorization
+
+@pytest.fixture
+def setup():
+    """Fixture setup two workers sharing one mongomock database"""
+
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+
+    mongo = PyMongo(app, uri="mongodb://testdb")
+    mongo.cx = mongomock.MongoClient()
+    mongo.db = mongo.cx["testdb"]
+
+    database_bridge: DatabaseBridge = DatabaseBridge(mongo)
+    other_bridge: DatabaseBridge = DatabaseBridge(mongo)
+
+    database_bridge.insert_many('Item', [{'serial_number': str(i), 'name': 'test_name', 'price': float(i), 'location': {'room': i % 2}} for i in range(10)])
+
+    cache: ResultCache = ResultCache(database_bridge)
+    ResultCache(other_bridge)
+
+    endpoint: EndpointSearchItems = EndpointSearchItems(database_bridge, [], Authorization(), cache=cache)
+
+    def search(arguments: str) -> List[str]:
+        with app.test_request_context('/api/v1/search/items?' + arguments, method='GET') as context:
+            return [item['serial_number'] for item in endpoint._GET(request)[3]]
+
+    yield database_bridge, other_bridge, cache, search
+
+def test_hits(setup):
+    """Test repeated searches served from cache until a write"""
+
+    database_bridge, other_bridge, cache, search = setup
+
+    assert search('location_room=1&sort=-price&limit=2') == ['9', '7']
+    assert search('location_room=1&sort=-price&limit=2') == ['9', '7']
+    assert search('location_room=1&sort=-price&limit=2&skip=1') == ['7', '5']
+
+    stats: Dict = cache.get_stats()
+
+    assert (stats['entries'], stats['hits'], stats['misses']) == (2, 1, 2)
+    assert stats['memory'] > 0
+
+    database_bridge.update_one('Item', {'serial_number': '9'}, {'$set': {'price': 0.5}})
+
+    assert search('location_room=1&sort=-price&limit=2') == ['7', '5']
+    assert cache.get_stats()['hits'] == 1
+
+def test_other_worker(setup):
+    """Test write of other worker seen through version document"""
+
+    database_bridge, other_bridge, cache, search = setup
+
+    assert search('max_price=1') == ['0', '1']
+
+    other_bridge.insert_one('Item', {'serial_number': '10', 'name': 'test_name', 'price': 0.0, 'location': {'room': 0}})
+
+    assert search('max_price=1') == ['0', '1', '10']
+    assert cache.get_stats()['hits'] == 0
+
+def test_session_bump():
+    """Test writes of one session bumping version once"""
+
+    database_bridge: DatabaseBridge = DatabaseBridge(MemoryStorage())
+    cache: ResultCache = ResultCache(database_bridge)
+
+    with database_bridge.start_session() as session:
+        with session.start_transaction():
+            database_bridge.insert_one('Item', {'serial_number': '1', 'price': 1.0})
+            database_bridge.update_one('Item', {'serial_number': '1'}, {'$set': {'price': 0.5}})
+            database_bridge.delete_many('Item', {'serial_number': '1'})
+
+    assert database_bridge.find_one('Version', {'_id': 'Item'})['version'] == 1
+    assert cache.get_stats()['versions'] == {'Item': 1}
+
+    database_bridge.insert_one('Item', {'serial_number': '2', 'price': 1.0})
+
+    assert database_bridge.find_one('Version', {'_id': 'Item'})['version'] == 2
+
+def test_eviction(setup):
+    """Test least recently used results evicted by size"""
+
+    database_bridge, other_bridge, cache, search = setup
+
+    # Four single items of 103 encoded bytes fit
+    small: ResultCache = ResultCache(database_bridge, 450)
+
+    def fetch(serials: List[str]) -> List[Dict]:
+        return small.fetch('Item', ','.join(serials), lambda: database_bridge.find('Item', {'serial_number': {'$in': serials}}))
+
+    for serial in ['1', '2', '3', '4', '1', '5']:
+        assert fetch([serial])[0]['serial_number'] == serial
+
+    stats: Dict = small.get_stats()
+
+    assert (stats['entries'], stats['memory'], stats['hits'], stats['evictions']) == (4, 412, 1, 1)
+
+    # Item 2 was least recently used
+    fetch(['2'])
+    fetch(['1'])
+
+    assert small.get_stats()['hits'] == 2
+
+    # Result above quarter of capacity is not kept
+    assert len(fetch(['6', '7'])) == 2
+    assert small.get_stats()['memory'] == 412
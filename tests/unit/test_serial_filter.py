@@ -0,0 +1,134 @@
+from flask import Flask, request
+from unittest import mock
+from typing import List, Dict
+from ExampleFlaskAPI.memory_storage import MemoryStorage, MemorySession
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure
+from ExampleFlaskAPI.endpoint_item import EndpointItem
+from ExampleFlaskAPI.serial_filter import SerialFilter
+from ExampleFlaskAPI.authorization import Authorization
+from ExampleFlaskAPI.api import API
+
+def item(serial: str) -> Dict:
+    return {
+        'serial_number': serial,
+        'name': 'test_name',
+        'description': 'test_description',
+        'category': '',
+        'price': 1.0,
+        'location': {'room': 1, 'bookcase': 1, 'shelf': 1, 'cuvette': 1, 'column': 1, 'row': 1}
+    }
+
+def test_filter():
+    """Test false positive rate and deletes of filter"""
+
+    database_bridge: DatabaseBridge = DatabaseBridge(MemoryStorage())
+    database_bridge.insert_many('Item', [item('serial_' + str(i)) for i in range(2000)])
+
+    serials: SerialFilter = SerialFilter(database_bridge, 1000, 0.01)
+
+    assert serials.might_contain('unknown')
+    assert serials.load()
+
+    assert all(serials.might_contain('serial_' + str(i)) for i in range(2000))
+
+    # Sized for twice the existing serials
+    stats: Dict = serials.get_stats()
+
+    assert (stats['serials'], stats['hashes']) == (2000, 7)
+    assert stats['memory'] == stats['counters'] > 4000 * 9
+    assert stats['expected_error_rate'] < 0.01
+
+    false_positives: int = sum(serials.might_contain('other_' + str(i)) for i in range(10000))
+
+    assert false_positives < 10000 * 0.01
+
+    serials.remove('serial_1')
+    serials.remove('never_added')
+
+    assert not serials.might_contain('serial_1')
+    assert serials.get_stats()['serials'] == 1999
+
+def test_index():
+    """Test unique index created by load, filter not loaded without it"""
+
+    database_bridge: DatabaseBridge = DatabaseBridge(MemoryStorage(indexes={}))
+    database_bridge.insert_one('Item', item('existing'))
+
+    assert SerialFilter(database_bridge).load()
+    assert isinstance(database_bridge.insert_one('Item', item('existing')), DatabaseFailure)
+
+    duplicates: DatabaseBridge = DatabaseBridge(MemoryStorage(indexes={}))
+    duplicates.insert_many('Item', [item('existing'), item('existing')])
+    serials: SerialFilter = SerialFilter(duplicates)
+
+    assert not serials.load()
+    assert serials.might_contain('unknown')
+
+def test_inserts():
+    """Test inserts skipping lookup of new serials and relying on unique index"""
+
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+
+    database_bridge: DatabaseBridge = DatabaseBridge(MemoryStorage())
+    database_bridge.insert_one('Item', item('existing'))
+
+    serials: SerialFilter = SerialFilter(database_bridge, 1000)
+    serials.load()
+
+    endpoint: EndpointItem = EndpointItem(database_bridge, [], Authorization(), serials=serials)
+
+    def post(serial: str) -> Dict:
+        with app.test_request_context('/api/v1/item', method='POST', json=[item(serial)]) as context:
+            return endpoint._POST(request)[3][0]
+
+    with mock.patch.object(database_bridge, 'find_one', wraps=database_bridge.find_one) as find_one:
+        assert post('new')['status'] == True
+        assert not any(call[0][0] == 'Item' for call in find_one.call_args_list)
+
+        assert post('existing')['message'] == 'Serial number already exist.'
+        assert post('new')['message'] == 'Serial number already exist.'
+        assert find_one.call_count == 2
+
+    # Serial added by another worker is not in filter, unique index rejects it and transaction is aborted
+    database_bridge.insert_one('Item', item('other_worker'))
+
+    with mock.patch.object(MemorySession, 'abort_transaction', autospec=True, side_effect=MemorySession.abort_transaction) as abort:
+        assert post('other_worker') == {'id': 'other_worker', 'status': False, 'message': 'Serial number already exist.'}
+        assert abort.call_count == 1
+
+    with app.test_request_context('/api/v1/item/new', method='DELETE') as context:
+        assert endpoint._DELETE(request, 'new')[3][0]['status'] == True
+
+    assert post('new')['status'] == True
+
+    stats: Dict = serials.get_stats()
+
+    assert (stats['lookups'], stats['skipped'], stats['false_positives']) == (5, 3, 0)
+
+    # Inside unit of work serial is looked up, duplicate would abort whole request
+    unit_of_work: DatabaseBridge = DatabaseBridge(MemoryStorage(), unit_of_work=True)
+    serials = SerialFilter(unit_of_work)
+    serials.load()
+
+    unit_of_work.insert_one('Item', item('late'))
+    endpoint = EndpointItem(unit_of_work, [], Authorization(), serials=serials)
+
+    with app.test_request_context('/api/v1/item', method='POST', json=[item('late'), item('new')]) as context:
+        assert [status['status'] for status in endpoint._POST(request)[3]] == [False, True]
+
+def test_api():
+    """Test filter passed to API loaded and reported"""
+
+    database_bridge: DatabaseBridge = DatabaseBridge(MemoryStorage())
+    database_bridge.insert_many('Item', [item(str(i)) for i in range(3)])
+
+    authorization: Authorization = Authorization()
+    authorization.create_session('reader', ['READ'])
+
+    app = Flask(__name__)
+    API(app, database_bridge, authorization, serials=SerialFilter(database_bridge, capacity=1000, error_rate=0.05))
+
+    stats: Dict = app.test_client().get('/api/v1/stats/serial_filter?api_key=reader').json['result'][0]
+
+    assert (stats['loaded'], stats['serials'], stats['capacity'], stats['error_rate']) == (True, 3, 1000, 0.05)
@@ -0,0 +1,123 @@
+import pytest
+import mongomock
+from flask_pymongo import PyMongo
+from flask import Flask, request
+from typing import List, Dict
+from ExampleFlaskAPI.database_bridge import DatabaseBridge
+from ExampleFlaskAPI.shard_router import ShardRouter
+from ExampleFlaskAPI.endpoint_search_items import EndpointSearchItems
+from ExampleFlaskAPI.authorization import Authorization
+
+def create_client(app: Flask) -> PyMongo:
+    """Create client over a fresh mongomock database"""
+
+    mongo = PyMongo(app, uri="mongodb://testdb")
+    mongo.cx = mongomock.MongoClient()
+    mongo.db = mongo.cx["testdb"]
+
+    return mongo
+
+def create_item(serial_number: str, price: float, room: int) -> Dict:
+    """Create example item"""
+
+    return {
+        'serial_number': serial_number,
+        'name': 'test_name',
+        'description': 'test_description',
+        'category': 'test',
+        'price': price,
+        'location': {'room': room, 'bookcase': 1, 'shelf': 1, 'cuvette': 1, 'column': 1, 'row': 1}
+    }
+
+@pytest.fixture
+def setup():
+    """Fixture setup bridge over main database and three shards"""
+
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+
+    mongo: PyMongo = create_client(app)
+    shards: List[PyMongo] = [create_client(app) for i in range(3)]
+    router: ShardRouter = ShardRouter(shards)
+
+    database_bridge: DatabaseBridge = DatabaseBridge(mongo, sharding=router)
+    database_bridge.insert_many('Item', [create_item(str(i), float(i % 7), i % 4) for i in range(30)])
+
+    yield database_bridge, mongo, shards, router
+
+def test_routing(setup):
+    """Test placement of rows and targeted point lookups"""
+
+    database_bridge, mongo, shards, router = setup
+
+    # Every shard got a part of rows, main database none
+    assert sorted(len(list(shard.db['Item'].find({}))) for shard in shards) != [0, 0, 30]
+    assert sum(len(list(shard.db['Item'].find({}))) for shard in shards) == 30
+    assert 'Item' not in mongo.db.list_collection_names()
+
+    for i in range(30):
+        assert shards[router.shard_of(str(i))].db['Item'].find_one({'serial_number': str(i)})
+
+    stats: Dict = router.get_stats()
+
+    assert database_bridge.find_one('Item', {'serial_number': '17'})['price'] == 3.0
+
+    # Serials owned by two different shards
+    second: str = next(str(i) for i in range(30) if router.shard_of(str(i)) != router.shard_of('1'))
+
+    assert [item['serial_number'] for item in database_bridge.find('Item', {'serial_number': {'$in': [second, '1']}}, sort=[('serial_number', 1)])] == sorted([second, '1'])
+    assert database_bridge.get_stats()['shards']['targeted'] == stats['targeted'] + 1
+    assert database_bridge.get_stats()['shards']['scattered'] == stats['scattered'] + 1
+
+    # Unsharded collections stay on main database
+    database_bridge.insert_one('Category', {'name': 'test', 'parent_name': ''})
+
+    assert mongo.db['Category'].find_one({'name': 'test'})
+    assert database_bridge.find_one('Category', {'name': 'test'})
+    assert set(database_bridge.get_collection_names()) == {'Item', 'Category'}
+
+def test_scatter_gather(setup):
+    """Test merging of sorted pages from all shards"""
+
+    database_bridge, mongo, shards, router = setup
+
+    expected: List[Dict] = sorted([create_item(str(i), float(i % 7), i % 4) for i in range(30)], key=lambda item: (-item['price'], item['serial_number']))
+    sort: List = [('price', -1), ('serial_number', 1)]
+
+    assert [item['serial_number'] for item in database_bridge.find('Item', {}, sort=sort)] == [item['serial_number'] for item in expected]
+    assert [item['serial_number'] for item in database_bridge.find('Item', {}, 5, 10, sort=sort)] == [item['serial_number'] for item in expected[5:15]]
+    assert [item['serial_number'] for item in database_bridge.find('Item', {'location.room': 1}, 2, 3, sort=sort)] == [item['serial_number'] for item in expected if item['location']['room'] == 1][2:5]
+
+    assert database_bridge.update_many('Item', {'price': 0.0}, {'$set': {'price': 10.0}}).modified_count == 5
+    assert database_bridge.delete_many('Item', {'price': 10.0}).deleted_count == 5
+    assert len(database_bridge.find('Item', {})) == 25
+
+    app = Flask(__name__)
+    endpoint: EndpointSearchItems = EndpointSearchItems(database_bridge, [], Authorization())
+
+    with app.test_request_context('/api/v1/search/items?location_room=2&limit=4', method='GET') as context:
+        assert len(endpoint._GET(request)[3]) == 4
+
+def test_migration():
+    """Test moving rows between shards when shard key changes"""
+
+    app = Flask(__name__)
+    shards: List[PyMongo] = [create_client(app) for i in range(2)]
+    router: ShardRouter = ShardRouter(shards, key='location.room', mapping={1: 0, 2: 1})
+    database_bridge: DatabaseBridge = DatabaseBridge(create_client(app), sharding=router)
+
+    database_bridge.insert_many('Item', [create_item(str(i), 1.0, 1) for i in range(3)])
+
+    document: Dict = database_bridge.find_one_and_update('Item', {'serial_number': '1'}, {'$set': {'location.room': 2}, '$inc': {'_rev': 1}}, {'_rev': True, 'location': True})
+
+    assert document == {'_id': document['_id'], '_rev': 1, 'location': {'room': 2, 'bookcase': 1, 'shelf': 1, 'cuvette': 1, 'column': 1, 'row': 1}}
+    assert shards[1].db['Item'].find_one({'serial_number': '1'})
+    assert not shards[0].db['Item'].find_one({'serial_number': '1'})
+
+    # Rooms pin shards, so room lookup is targeted
+    assert database_bridge.update_many('Item', {'location.room': 1}, {'$set': {'location': {'room': 2}}}).modified_count == 2
+    assert len(database_bridge.find('Item', {'location.room': 2})) == 3
+    assert router.get_stats()['scattered'] == 1
+
+    with pytest.raises(ValueError):
+        ShardRouter(shards, mapping={1: 2})
@@ -0,0 +1,149 @@
+import time
+import pytest
+import threading
+from flask import Flask, request
+from unittest import mock
+from typing import Any, Callable, List, Dict
+from pymongo.errors import DuplicateKeyError
+from ExampleFlaskAPI.memory_storage import MemoryStorage, MemorySession
+from ExampleFlaskAPI.database_bridge import DatabaseBridge, DatabaseFailure
+from ExampleFlaskAPI.endpoint_item import EndpointItem
+from ExampleFlaskAPI.write_batcher import WriteBatcher
+from ExampleFlaskAPI.authorization import Authorization
+
+def item(serial: str, category: str = '', price: float = 1.0) -> Dict:
+    return {
+        'serial_number': serial,
+        'name': 'test_name',
+        'description': 'test_description',
+        'category': category,
+        'price': price,
+        'location': {'room': 1, 'bookcase': 1, 'shelf': 1, 'cuvette': 1, 'column': 1, 'row': 1}
+    }
+
+def concurrently(function: Callable[[Any], Any], values: List[Any]) -> List[Any]:
+    results: List[Any] = [None] * len(values)
+
+    def worker(index: int) -> None:
+        try:
+            results[index] = function(values[index])
+        except Exception as error:
+            results[index] = error
+
+    threads: List[threading.Thread] = [threading.Thread(target=worker, args=(index,)) for index in range(len(values))]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    return results
+
+def test_batching():
+    """Test concurrent values flushed together"""
+
+    batcher: WriteBatcher = WriteBatcher(max_items=4, max_delay=1.0)
+    batches: List[List[int]] = []
+
+    def flush(values: List[int]) -> List[int]:
+        batches.append(values)
+        return [value * 10 for value in values]
+
+    start: float = time.monotonic()
+
+    assert sorted(concurrently(lambda value: batcher.submit(value, flush), [1, 2, 3, 4])) == [10, 20, 30, 40]
+
+    # Full batch does not wait for delay
+    assert time.monotonic() - start < 1.0
+    assert [sorted(batch) for batch in batches] == [[1, 2, 3, 4]]
+
+    stats: Dict = batcher.get_stats()
+
+    assert (stats['batches'], stats['items'], stats['max_size'], stats['sizes']) == (1, 4, 4, {'4': 1})
+    assert stats['max_wait_ms'] < 1000
+
+    def fail(values: List[int]) -> List[int]:
+        raise ValueError('failed')
+
+    with pytest.raises(ValueError):
+        WriteBatcher(max_delay=0.0).submit(1, fail)
+
+@pytest.fixture
+def setup():
+    """Fixture setup item endpoint writing single POSTs in batches"""
+
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+
+    database_bridge: DatabaseBridge = DatabaseBridge(MemoryStorage())
+    database_bridge.insert_one('Item', item('existing'))
+    database_bridge.insert_one('Category', {'name': 'test_category', 'parent_name': ''})
+
+    batcher: WriteBatcher = WriteBatcher(max_items=5, max_delay=1.0)
+    endpoint: EndpointItem = EndpointItem(database_bridge, [], Authorization(), batcher=batcher)
+
+    def post(row: Dict) -> Dict:
+        with app.test_request_context('/api/v1/item', method='POST', json=[row]) as context:
+            return endpoint._POST(request)[3][0]
+
+    yield database_bridge, batcher, post
+
+def test_endpoint(setup):
+    """Test items of concurrent POSTs validated together and inserted at once"""
+
+    database_bridge, batcher, post = setup
+
+    rows: List[Dict] = [item('new_1', 'test_category'), item('existing'), item('new_2', 'unknown'), item('new_3', price=-1.0), item('new_4')]
+
+    with mock.patch.object(database_bridge, 'insert_many', wraps=database_bridge.insert_many) as insert_many:
+        statuses: List[Dict] = concurrently(post, rows)
+
+    assert insert_many.call_count == 1
+    assert [status['status'] for status in statuses] == [True, False, False, False, True]
+    assert [status['message'] for status in statuses[1:4]] == ['Serial number already exist.', 'Category does not exist.', 'Price must be greater than 0.']
+    assert statuses[0] == {'id': 'new_1', 'status': True, 'message': 'Item added to database.', 'rev': 1}
+
+    assert database_bridge.find_one('Category', {'name': 'test_category'})['item_count'] == 1
+    assert batcher.get_stats()['sizes'] == {'5': 1}
+
+    # Repeated serial in one batch is inserted once
+    statuses = concurrently(post, [item('twin'), item('twin'), item('new_5'), item('new_6'), item('new_7')])
+
+    assert sorted(status['status'] for status in statuses if status['id'] == 'twin') == [False, True]
+    assert len(database_bridge.find('Item', {'serial_number': 'twin'})) == 1
+
+def test_fallback(setup):
+    """Test failed insert_many rolled back and written item by item"""
+
+    database_bridge, batcher, post = setup
+
+    insert_many: Callable = database_bridge.insert_many
+
+    # Insert fails after writing first rows
+    def fail(collection: str, rows: List[Dict]) -> DatabaseFailure:
+        insert_many(collection, rows[:2])
+        return DatabaseFailure(DuplicateKeyError('duplicate'), False)
+
+    with mock.patch.object(database_bridge, 'insert_many', side_effect=fail):
+        with mock.patch.object(MemorySession, 'abort_transaction', autospec=True, side_effect=MemorySession.abort_transaction) as abort:
+            statuses: List[Dict] = concurrently(post, [item('new_' + str(i), 'test_category') for i in range(5)])
+
+    assert abort.call_count == 1
+    assert all(status['status'] for status in statuses)
+    assert len(database_bridge.find('Item', {'serial_number': {'$regex': '^new_'}})) == 5
+    assert database_bridge.find_one('Category', {'name': 'test_category'})['item_count'] == 5
+
+    # Written rows cannot be read back after lookup of serials
+    find: Callable = database_bridge.find
+    finds: List[int] = []
+
+    def fail_reread(*args, **kwargs) -> List[Dict]:
+        finds.append(1)
+        return find(*args, **kwargs) if len(finds) == 1 else DatabaseFailure(RuntimeError('failed'), False)
+
+    with mock.patch.object(database_bridge, 'insert_many', return_value=DatabaseFailure(DuplicateKeyError('duplicate'), False)):
+        with mock.patch.object(database_bridge, 'find', side_effect=fail_reread):
+            statuses = concurrently(post, [item('other_' + str(i)) for i in range(5)])
+
+    assert [status['message'] for status in statuses] == ['Database operation failed.'] * 5